@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+過去の説明会の文字起こし・資料・要約を横断して検索するコマンドラインツール
+
+使用例:
+    python archive.py import ~/Documents/要約ツール        # 既存の出力フォルダーを取り込む
+    python archive.py search "月産 1000台"                 # 文字起こしを検索
+    python archive.py search 増産 --kind summaries --page 2
+    python archive.py list
+    python archive.py show 12 --page 3
+"""
+
+import sys
+import argparse
+
+from config.api_config import LOG_LEVEL, LOG_MODULE_LEVELS
+from utils.session_archive import SessionArchive, SEARCH_KINDS, KIND_SEGMENTS, DEFAULT_PAGE_SIZE
+from utils.log_utils import configure_logging
+
+
+def format_time(seconds):
+    """秒数を「分:秒」形式にフォーマット（時刻のないセグメントは --:--）"""
+    if seconds is None:
+        return "--:--"
+    m, s = divmod(int(seconds), 60)
+    return f"{m:02d}:{s:02d}"
+
+
+def print_page_footer(page):
+    if page.has_more:
+        print(f"（続きがあります: --page {page.page + 2}）")
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="過去の説明会の文字起こし・資料・要約を横断して検索します")
+    parser.add_argument("--archive", default="", help="アーカイブのパス（既定: ~/Documents/要約ツール/archive.sqlite3）")
+    parser.add_argument("--log-level", default=LOG_LEVEL, help="ログの出力レベル (DEBUG/INFO/WARNING/ERROR/OFF)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="既存の出力フォルダーを取り込む")
+    import_parser.add_argument("folders", nargs="+", help="出力フォルダー")
+    import_parser.add_argument("--no-recursive", action="store_true", help="サブフォルダーを探さない")
+
+    for name, help_text in (("search", "全文検索する"), ("list", "セッションの一覧を表示する"), ("show", "セッションの文字起こしを表示する")):
+        sub = commands.add_parser(name, help=help_text)
+        if name == "search":
+            sub.add_argument("query", help="検索語（空白区切りで複数指定すると全てを含むものを探す）")
+            sub.add_argument("--kind", choices=SEARCH_KINDS, default=KIND_SEGMENTS, help="検索対象")
+        elif name == "show":
+            sub.add_argument("session_id", type=int, help="セッションID")
+        sub.add_argument("--page", type=int, default=1, help="ページ番号（1始まり）")
+        sub.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="1ページの件数")
+    return parser
+
+
+def main(argv=None):
+    """メイン関数"""
+    args = build_arg_parser().parse_args(argv)
+    configure_logging(args.log_level, LOG_MODULE_LEVELS)
+    archive = SessionArchive(args.archive or None)
+    try:
+        if args.command == "import":
+            for folder in args.folders:
+                counts = archive.import_output_folder(folder, recursive=not args.no_recursive)
+                print(f"{folder}: 取り込み {counts['imported']}件, スキップ {counts['skipped']}件, 失敗 {counts['failed']}件")
+            print(f"セッション数: {archive.count_sessions()}")
+
+        elif args.command == "search":
+            page = archive.search(args.query, kind=args.kind, page=args.page - 1, page_size=args.page_size)
+            if not page.items:
+                print("該当なし")
+            for item in page.items:
+                location = format_time(item["start"]) if args.kind == KIND_SEGMENTS else item.get("name") or item.get("model") or ""
+                snippet = item["snippet"].replace("\n", " ")
+                print(f"[{item['session_id']}] {item['created_at'][:10]} {item['title']}  {location}  {snippet}")
+            print_page_footer(page)
+
+        elif args.command == "list":
+            page = archive.list_sessions(page=args.page - 1, page_size=args.page_size)
+            for item in page.items:
+                duration = format_time(item["duration"])
+                print(f"[{item['id']}] {item['created_at']} {item['title']}  ({item['segment_count']}セグメント, {duration})")
+            print_page_footer(page)
+
+        elif args.command == "show":
+            session = archive.get_session(args.session_id)
+            if session is None:
+                print(f"セッションが見つかりません: {args.session_id}", file=sys.stderr)
+                return 1
+            print(f"{session['title']} ({session['created_at']}) モデル: {session['model'] or '-'}")
+            page = archive.get_segments(args.session_id, page=args.page - 1, page_size=args.page_size)
+            for item in page.items:
+                print(f"{format_time(item['start'])}  {item['text']}")
+            print_page_footer(page)
+    finally:
+        archive.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
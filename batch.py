@@ -0,0 +1,463 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+取引先説明会の録画・録音をまとめて文字起こし・要約するコマンドラインツール (GUI不要)
+
+使用例:
+    python batch.py "D:/録音/*.mp4" D:/録音/2024-05 --documents "D:/資料/*.pdf" --workers 4
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import threading
+import sqlite3
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from config.api_config import (
+    get_api_key, AVAILABLE_MODELS, DEFAULT_MODEL, LOG_LEVEL, LOG_MODULE_LEVELS,
+    WHISPER_BATCH_MAX_FILES, WHISPER_BATCH_MAX_SECONDS
+)
+from config.prompts import (
+    DEFAULT_SUMMARY_PROMPT, SHORT_SUMMARY_PROMPT,
+    DETAILED_ANALYSIS_PROMPT, load_prompt_from_file
+)
+from utils.whisper_utils import transcribe_with_subprocess
+from utils.job_scheduler import JobScheduler, RESOURCE_TRANSCRIPTION, RESOURCE_DOCUMENTS, RESOURCE_API
+from utils.whisper_batch import transcribe_batch_with_subprocess
+from utils.transcription_cache import TranscriptionCache
+from utils.resident_whisper import ResidentWhisperWorker, is_faster_whisper_available
+from utils.openai_utils import OpenAIAPI
+from utils.document_utils import DocumentParser
+from utils.output_utils import get_default_output_dir, save_result_files
+from utils.session_archive import SessionArchive
+from utils.log_utils import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+# GUIのファイル選択ダイアログと同じ拡張子
+MEDIA_EXTENSIONS = {'.mp3', '.wav', '.ogg', '.mp4', '.avi', '.mov', '.m4a', '.flac', '.aac'}
+DOCUMENT_EXTENSIONS = {'.pdf', '.docx', '.pptx', '.txt'}
+
+PROMPTS = {
+    "default": DEFAULT_SUMMARY_PROMPT,
+    "short": SHORT_SUMMARY_PROMPT,
+    "detailed": DETAILED_ANALYSIS_PROMPT,
+}
+
+
+def expand_inputs(patterns, extensions, recursive=False):
+    """
+    ファイル・ディレクトリ・グロブパターンを対象ファイルのリストに展開する
+
+    Args:
+        patterns (list): パスまたはグロブパターンのリスト
+        extensions (set): 対象とする拡張子
+        recursive (bool): ディレクトリをサブフォルダまで探索するかどうか
+
+    Returns:
+        list: 重複を除いた絶対パスのリスト（指定順）
+    """
+    found = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            if recursive:
+                candidates = glob.glob(os.path.join(pattern, "**", "*"), recursive=True)
+            else:
+                candidates = glob.glob(os.path.join(pattern, "*"))
+            candidates.sort()
+        elif os.path.isfile(pattern):
+            candidates = [pattern]
+        else:
+            candidates = sorted(glob.glob(pattern, recursive=recursive))
+        for path in candidates:
+            if os.path.isfile(path) and os.path.splitext(path)[1].lower() in extensions:
+                found.append(os.path.abspath(path))
+
+    unique = []
+    seen = set()
+    for path in found:
+        if path not in seen:
+            seen.add(path)
+            unique.append(path)
+    return unique
+
+
+def find_paired_documents(audio_file):
+    """録音と同じフォルダにある、ファイル名が録音名で始まる資料を探す"""
+    directory = os.path.dirname(audio_file)
+    stem = os.path.splitext(os.path.basename(audio_file))[0]
+    paired = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if (name.startswith(stem) and os.path.isfile(path)
+                and os.path.splitext(name)[1].lower() in DOCUMENT_EXTENSIONS):
+            paired.append(path)
+    return paired
+
+
+class BatchProcessor:
+    """録音ごとに文字起こし→資料抽出→要約→保存を行い、工程ごとに同時実行数を制限するクラス"""
+
+    def __init__(self, output_dir, prompt=None, model=DEFAULT_MODEL, api_key="",
+                 transcribe_jobs=1, document_jobs=2, summary_jobs=2, cache=None, whisper_path=None,
+                 resident_worker=None, archive=None):
+        """
+        Args:
+            output_dir (str): 結果の出力ディレクトリ
+            prompt (str, optional): 要約プロンプト（Noneの場合は要約しない）
+            model (str): OpenAIのモデル名
+            api_key (str): OpenAI APIキー
+            transcribe_jobs (int): 文字起こしの同時実行数
+            document_jobs (int): 資料抽出の同時実行数
+            summary_jobs (int): 要約APIの同時実行数
+            cache (TranscriptionCache, optional): 文字起こしキャッシュ
+            whisper_path (str, optional): faster-whisper-xxlのディレクトリ
+            resident_worker (ResidentWhisperWorker, optional): 常駐モデルのワーカー（指定時は全録音で共有）
+            archive (SessionArchive, optional): 結果を追加するセッションアーカイブ
+        """
+        self.output_dir = output_dir
+        self.whisper_output_dir = os.path.join(output_dir, "whisper_output")
+        self.prompt = prompt
+        self.model = model
+        self.api_key = api_key
+        self.cache = cache
+        self.whisper_path = whisper_path
+        self.resident_worker = resident_worker
+        self.archive = archive
+
+        # 資源ごとの同時実行数はスケジューラで管理する（待ち時間・キュー長はレポートに残す）
+        self.scheduler = JobScheduler({
+            RESOURCE_TRANSCRIPTION: max(1, transcribe_jobs),
+            RESOURCE_DOCUMENTS: max(1, document_jobs),
+            RESOURCE_API: max(1, summary_jobs),
+        })
+
+        # 複数の録音で共有される資料は1回だけ抽出する
+        self._document_lock = threading.Lock()
+        self._document_events = {}
+        self._document_texts = {}
+
+        # まとめて文字起こしした結果（録音ごとに完了を待てるようにする）
+        self._transcript_events = {}
+        self._transcripts = {}
+
+    def transcribe_in_batches(self, audio_files, max_files=WHISPER_BATCH_MAX_FILES,
+                              max_seconds=WHISPER_BATCH_MAX_SECONDS):
+        """
+        録音を少数のfaster-whisper実行にまとめて文字起こしする（バックグラウンドで実行）
+
+        まとめた実行が終わるたびに、その録音の資料抽出・要約を始められるようにする。
+
+        Returns:
+            threading.Thread: 文字起こしを行うスレッド
+        """
+        for audio_file in audio_files:
+            self._transcript_events[audio_file] = threading.Event()
+
+        def on_file_finished(path, text, segments, ok):
+            self._transcripts[path] = (text, segments, ok)
+            self._transcript_events[path].set()
+
+        def run():
+            try:
+                transcribe_batch_with_subprocess(
+                    audio_files, self.whisper_output_dir, self.whisper_path, self.cache,
+                    max_files=max_files, max_seconds=max_seconds, on_file_finished=on_file_finished
+                )
+            except Exception:
+                logger.exception("まとめた文字起こしでエラーが発生しました", extra={"stage": "transcribe_batch"})
+            finally:
+                # 失敗した場合も待っている録音を先に進める
+                for event in self._transcript_events.values():
+                    event.set()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def _transcribe(self, audio_file):
+        """まとめた文字起こしの結果を待つか、1件ずつ文字起こしする"""
+        event = self._transcript_events.get(audio_file)
+        if event is not None:
+            event.wait()
+            return self._transcripts.get(audio_file, ("", [], False))
+        stem = os.path.splitext(os.path.basename(audio_file))[0]
+        return transcribe_with_subprocess(
+            audio_file, os.path.join(self.whisper_output_dir, stem), self.whisper_path, self.cache,
+            resident_worker=self.resident_worker
+        )
+
+    def _extract_document(self, doc_file):
+        with self._document_lock:
+            event = self._document_events.get(doc_file)
+            owner = event is None
+            if owner:
+                event = threading.Event()
+                self._document_events[doc_file] = event
+
+        if not owner:
+            event.wait()
+            return self._document_texts.get(doc_file, "")
+
+        try:
+            with self.scheduler.slot(RESOURCE_DOCUMENTS, name=os.path.basename(doc_file)):
+                text = DocumentParser().extract_text_from_file(doc_file)
+            self._document_texts[doc_file] = text
+            return text
+        finally:
+            event.set()
+
+    def _archive(self, audio_file, documents, transcription, segments, summary, report):
+        """
+        保存した結果をアーカイブに追加する（失敗しても録音の処理は失敗にしない）
+
+        Returns:
+            str: 失敗した場合のエラーメッセージ（成功時は None）
+        """
+        try:
+            audio_digest = self.cache.audio_digest(audio_file) if self.cache is not None else None
+            source_path = report["outputs"].get("transcription") or report["outputs"].get("summary")
+            report["outputs"]["archive_session"] = self.archive.add_session(
+                segments=segments or None,
+                transcript=transcription,
+                summary=summary,
+                documents=[(os.path.basename(doc), self._document_texts.get(doc, "")) for doc in documents],
+                audio_path=os.path.abspath(audio_file),
+                audio_digest=audio_digest,
+                model=self.model if summary else None,
+                prompt=self.prompt if summary else None,
+                source_path=os.path.abspath(source_path) if source_path else None,
+            )
+        except (OSError, sqlite3.Error) as e:
+            return str(e)
+        return None
+
+    def process(self, audio_file, documents):
+        """
+        1件の録音を処理する
+
+        Args:
+            audio_file (str): 音声/動画ファイルのパス
+            documents (list): 追加資料のパスのリスト
+
+        Returns:
+            dict: ジョブレポート
+        """
+        report = {
+            "audio_file": audio_file,
+            "documents": documents,
+            "status": "running",
+            "stages": {},
+            "outputs": {},
+            "error": None,
+        }
+        started = time.perf_counter()
+
+        def run_stage(name, resource, func):
+            if resource is None:
+                stage_start = time.perf_counter()
+                try:
+                    return func()
+                finally:
+                    report["stages"][name] = {
+                        "wait_seconds": 0.0,
+                        "seconds": round(time.perf_counter() - stage_start, 3),
+                    }
+            job = None
+            try:
+                with self.scheduler.slot(resource, name=f"{name}:{os.path.basename(audio_file)}") as job:
+                    return func()
+            finally:
+                if job is not None:
+                    report["stages"][name] = {
+                        "wait_seconds": round(job.wait_seconds, 3),
+                        "seconds": round(job.run_seconds, 3),
+                    }
+
+        try:
+            # まとめて文字起こしする録音は実行側で同時実行数を決めるため、ここでは枠を取らない
+            batched = audio_file in self._transcript_events
+            transcription, segments, ok = run_stage(
+                "transcription", None if batched else RESOURCE_TRANSCRIPTION,
+                lambda: self._transcribe(audio_file)
+            )
+            report["stages"]["transcription"]["segments"] = len(segments)
+            if not ok:
+                raise RuntimeError("文字起こしに失敗しました")
+
+            document_text = ""
+            if documents:
+                def extract_all():
+                    parts = []
+                    for doc_file in documents:
+                        text = self._extract_document(doc_file)
+                        parts.append(f"\n--- {os.path.basename(doc_file)} ---\n{text}\n\n")
+                    return "".join(parts)
+                document_text = run_stage("documents", None, extract_all)
+
+            summary = ""
+            if self.prompt:
+                def summarize():
+                    api = OpenAIAPI(self.api_key)
+                    api.set_model(self.model)
+                    return api.generate_summary(self.prompt, transcription, document_text)
+                summary = run_stage("summary", RESOURCE_API, summarize)
+                if summary.startswith("要約生成中にエラーが発生しました") or summary == "APIキーが設定されていません。":
+                    report["stages"]["summary"]["error"] = summary
+                    summary = ""
+
+            report["outputs"] = run_stage(
+                "save", None,
+                lambda: save_result_files(self.output_dir, audio_file, transcription, summary)
+            )
+            if self.archive is not None:
+                archive_error = run_stage("archive", None, lambda: self._archive(
+                    audio_file, documents, transcription, segments, summary, report
+                ))
+                if archive_error:
+                    report["stages"]["archive"]["error"] = archive_error
+            report["status"] = "ok" if (summary or not self.prompt) else "partial"
+        except Exception as e:
+            logger.exception("録音の処理に失敗しました", extra={"stage": "batch", "file": audio_file})
+            report["status"] = "failed"
+            report["error"] = str(e)
+
+        report["total_seconds"] = round(time.perf_counter() - started, 3)
+        print(f"[{report['status']}] {os.path.basename(audio_file)} ({report['total_seconds']:.1f}秒)")
+        return report
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="録音ファイルをまとめて文字起こし・要約します (GUI不要)")
+    parser.add_argument("inputs", nargs="+", help="音声/動画ファイル、ディレクトリ、またはグロブパターン")
+    parser.add_argument("--documents", nargs="*", default=[], help="全ての録音に添付する資料（ファイル/ディレクトリ/グロブ）")
+    parser.add_argument("--output-dir", default="", help="出力ディレクトリ（既定: ~/Documents/要約ツール）")
+    parser.add_argument("--recursive", action="store_true", help="ディレクトリをサブフォルダまで探索する")
+    parser.add_argument("--workers", type=int, default=4, help="同時に処理する録音数")
+    parser.add_argument("--transcribe-jobs", type=int, default=1, help="文字起こしの同時実行数")
+    parser.add_argument("--document-jobs", type=int, default=2, help="資料抽出の同時実行数")
+    parser.add_argument("--summary-jobs", type=int, default=2, help="要約APIの同時実行数")
+    parser.add_argument("--prompt", choices=sorted(PROMPTS), default="default", help="要約タイプ")
+    parser.add_argument("--prompt-file", default="", help="プロンプトファイル（--promptより優先）")
+    parser.add_argument("--model", choices=AVAILABLE_MODELS, default=DEFAULT_MODEL, help="生成AIモデル")
+    parser.add_argument("--no-summary", action="store_true", help="要約を行わない")
+    parser.add_argument("--no-cache", action="store_true", help="文字起こしキャッシュを使わない")
+    parser.add_argument("--backend", choices=["subprocess", "resident"], default="subprocess",
+                        help="文字起こし方式 (resident: モデルを1回だけ読み込み全録音で共有)")
+    parser.add_argument("--whisper-batch", type=int, default=0,
+                        help=f"1回のfaster-whisper実行にまとめる録音数（0: まとめない、既定の上限: {WHISPER_BATCH_MAX_FILES}）")
+    parser.add_argument("--whisper-batch-seconds", type=float, default=WHISPER_BATCH_MAX_SECONDS,
+                        help="1回の実行にまとめる合計音声長の上限（秒）")
+    parser.add_argument("--report", default="", help="ジョブレポート(JSON)の出力先")
+    parser.add_argument("--archive", default="", help="結果を追加するセッションアーカイブ（既定: ~/Documents/要約ツール/archive.sqlite3）")
+    parser.add_argument("--no-archive", action="store_true", help="セッションアーカイブに追加しない")
+    parser.add_argument("--log-level", default=LOG_LEVEL, help="ログの出力レベル (DEBUG/INFO/WARNING/ERROR/OFF)")
+    parser.add_argument("--log-json", default="", help="構造化ログ(JSON Lines)の出力先")
+    return parser
+
+
+def main(argv=None):
+    """メイン関数"""
+    args = build_arg_parser().parse_args(argv)
+    configure_logging(args.log_level, LOG_MODULE_LEVELS, json_path=args.log_json or None)
+
+    audio_files = expand_inputs(args.inputs, MEDIA_EXTENSIONS, args.recursive)
+    if not audio_files:
+        print("処理対象の音声/動画ファイルが見つかりません", file=sys.stderr)
+        return 1
+    shared_documents = expand_inputs(args.documents, DOCUMENT_EXTENSIONS, args.recursive)
+
+    prompt = None
+    api_key = ""
+    if not args.no_summary:
+        prompt = load_prompt_from_file(args.prompt_file) if args.prompt_file else PROMPTS[args.prompt]
+        try:
+            api_key = get_api_key()
+        except ValueError as e:
+            print(f"エラー: {e}", file=sys.stderr)
+            return 1
+
+    output_dir = os.path.abspath(args.output_dir or get_default_output_dir())
+    os.makedirs(output_dir, exist_ok=True)
+
+    resident_worker = None
+    if args.backend == "resident":
+        if is_faster_whisper_available():
+            resident_worker = ResidentWhisperWorker()
+            resident_worker.start()
+        else:
+            print("faster_whisperが見つからないため、サブプロセス方式で実行します", file=sys.stderr)
+
+    processor = BatchProcessor(
+        output_dir,
+        prompt=prompt,
+        model=args.model,
+        api_key=api_key,
+        transcribe_jobs=args.transcribe_jobs,
+        document_jobs=args.document_jobs,
+        summary_jobs=args.summary_jobs,
+        cache=None if args.no_cache else TranscriptionCache(),
+        resident_worker=resident_worker,
+        archive=None if args.no_archive else SessionArchive(args.archive or None),
+    )
+
+    use_whisper_batch = args.whisper_batch > 1 and resident_worker is None
+    if use_whisper_batch:
+        # 短い録音が多い場合にプロセス起動・モデル読み込みの回数を減らす（常駐モデルでは不要）
+        processor.transcribe_in_batches(audio_files, args.whisper_batch, args.whisper_batch_seconds)
+
+    print(f"{len(audio_files)}件の録音を処理します (ワーカー数: {args.workers})")
+    started_at = datetime.now()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [
+            executor.submit(processor.process, audio_file, shared_documents + [
+                doc for doc in find_paired_documents(audio_file) if doc not in shared_documents
+            ])
+            for audio_file in audio_files
+        ]
+        jobs = [future.result() for future in futures]
+    if resident_worker is not None:
+        resident_worker.shutdown()
+    if processor.archive is not None:
+        processor.archive.close()
+    if processor.cache is not None:
+        processor.cache.close()
+
+    report = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "settings": {
+            "workers": args.workers,
+            "transcribe_jobs": args.transcribe_jobs,
+            "document_jobs": args.document_jobs,
+            "summary_jobs": args.summary_jobs,
+            "model": args.model if prompt else None,
+            "backend": "resident" if resident_worker is not None else "subprocess",
+            "whisper_batch": args.whisper_batch if use_whisper_batch else None,
+        },
+        "scheduler": processor.scheduler.metrics(),
+        "counts": {
+            status: sum(1 for job in jobs if job["status"] == status)
+            for status in ("ok", "partial", "failed")
+        },
+        "jobs": jobs,
+    }
+    report_path = args.report or os.path.join(
+        output_dir, f"batch_report_{started_at.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"ジョブレポート: {report_path}")
+
+    return 0 if report["counts"]["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Whisper出力パーサーのマイクロベンチマーク
+
+従来方式（チャンクごとに4つの正規表現を毎回コンパイル・照合）と
+WhisperOutputParser（一度だけコンパイルした文法で行単位に解析）を比較する。
+
+使用例:
+    python benchmarks/bench_progress_parser.py                 # 約8MBの合成ログで計測
+    python benchmarks/bench_progress_parser.py whisper_log.txt # 取得済みのログで計測
+"""
+
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.whisper_progress import WhisperOutputParser  # noqa: E402
+
+
+def make_synthetic_log(target_bytes=8 * 1024 * 1024):
+    """faster-whisperの出力を模した合成ログを生成する"""
+    rng = random.Random(0)
+    lines = ["Transcribing audio with model large-v2", "Processing audio with duration 03:00:00.000"]
+    t = 0.0
+    size = 0
+    while size < target_bytes:
+        start = t
+        t += rng.uniform(1.0, 8.0)
+        minutes, seconds = divmod(start, 60)
+        end_minutes, end_seconds = divmod(t, 60)
+        text = "本日は弊社の生産計画についてご説明いたします。" * rng.randint(1, 3)
+        line = f"[{int(minutes):02d}:{seconds:06.3f} --> {int(end_minutes):02d}:{end_seconds:06.3f}] {text}"
+        lines.append(line)
+        if rng.random() < 0.05:
+            lines.append(f"Processing segment {len(lines)} / 100000")
+        size += len(line.encode("utf-8")) + 1
+    lines.append("Saving results")
+    return "\n".join(lines) + "\n"
+
+
+def split_into_reads(log, rng):
+    """QProcessの読み込み単位を模して、行の途中も含むランダムな位置で分割する"""
+    chunks = []
+    pos = 0
+    while pos < len(log):
+        size = rng.randint(64, 4096)
+        chunks.append(log[pos:pos + size])
+        pos += size
+    return chunks
+
+
+def legacy_parse(chunk):
+    """従来のextract_timestamp_progress/extract_segment_info相当の処理"""
+    patterns = [
+        r"\[(\d+):(\d+)\.(\d+)\s+-->\s+(\d+):(\d+)\.(\d+)\]",
+        r"(\d+):(\d+):(\d+),(\d+)\s+-->\s+(\d+):(\d+):(\d+),(\d+)",
+        r"(\d+):(\d+):(\d+)\.(\d+)\s+-->\s+(\d+):(\d+):(\d+)\.(\d+)",
+        r"(\d+):(\d+):(\d+)\s+-->\s+(\d+):(\d+):(\d+)",
+    ]
+    found = 0
+    latest = -1
+    if "-->" in chunk or ":" in chunk:
+        for line in chunk.strip().splitlines():
+            for idx, pattern in enumerate(patterns):
+                match = re.search(pattern, line)
+                if match:
+                    groups = match.groups()
+                    if idx == 0:
+                        end_sec = int(groups[3]) * 60 + int(groups[4]) + int(groups[5]) / 1000.0
+                    elif idx in (1, 2):
+                        end_sec = int(groups[4]) * 3600 + int(groups[5]) * 60 + int(groups[6]) + int(groups[7]) / 1000.0
+                    else:
+                        end_sec = int(groups[3]) * 3600 + int(groups[4]) * 60 + int(groups[5])
+                    latest = max(latest, end_sec)
+                    found += 1
+                    break
+    if latest < 0 and "segment" in chunk.lower():
+        try:
+            parts = chunk.split("segment")[1].strip().split("/")
+            if len(parts) == 2:
+                int(parts[0].strip())
+                int(parts[1].strip().split()[0])
+                found += 1
+        except ValueError:
+            pass
+    # 逐次セグメント用に同じ行をもう一度解析していた
+    for line in chunk.split("\n"):
+        re.match(
+            r"^\[(?:(\d+):)?(\d+):(\d+(?:\.\d+)?)\s+-->\s+(?:(\d+):)?(\d+):(\d+(?:\.\d+)?)\]\s*(.*)$",
+            line.strip()
+        )
+    # main.py側でも同じテキストを再解析していた
+    re.search(r'\[(\d{2}):(\d{2}):([\d\.]+)\s+-->\s+(\d{2}):(\d{2}):([\d\.]+)\]', chunk)
+    return found
+
+
+def bench(name, func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<28} {best * 1000:9.1f} ms  ({result})")
+    return best
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "r", encoding="utf-8", errors="ignore") as f:
+            log = f.read()
+    else:
+        log = make_synthetic_log()
+    chunks = split_into_reads(log, random.Random(1))
+    print(f"ログサイズ: {len(log.encode('utf-8')) / 1024 / 1024:.1f} MB, 読み込み回数: {len(chunks)}")
+
+    def run_legacy():
+        return f"{sum(legacy_parse(chunk) for chunk in chunks)} matches"
+
+    def run_parser():
+        parser = WhisperOutputParser()
+        count = 0
+        for chunk in chunks:
+            count += len(parser.feed(chunk))
+        count += len(parser.flush())
+        return f"{count} events"
+
+    legacy = bench("legacy (per-chunk regex)", run_legacy)
+    current = bench("WhisperOutputParser", run_parser)
+    print(f"速度比: {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+再生位置 -> セグメント検索のベンチマーク
+
+従来方式（再生位置の通知ごとに全セグメントを先頭から走査）と
+SegmentIndex（二分探索 + 直前のセグメントの再確認）の1回あたりの所要時間を比較する。
+
+使用例:
+    python benchmarks/bench_segment_index.py                  # 2万セグメントで計測
+    python benchmarks/bench_segment_index.py --segments 100000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.segment_store import SegmentStore  # noqa: E402
+from utils.segment_index import SegmentIndex  # noqa: E402
+
+
+def make_store(count):
+    """少し重なりのあるセグメントを生成する"""
+    rng = random.Random(0)
+    store = SegmentStore()
+    t = 0.0
+    for _ in range(count):
+        start = t
+        t += rng.uniform(1.0, 6.0)
+        store.append(start, t + rng.uniform(-0.5, 0.3), "本日は弊社の生産計画についてご説明いたします。")
+    return store
+
+
+def legacy_find(store, seconds):
+    for i, (start, end) in enumerate(zip(store.starts, store.ends)):
+        if start <= seconds <= end:
+            return i
+    return None
+
+
+def bench(name, func, positions):
+    started = time.perf_counter()
+    for position in positions:
+        func(position)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<32} {elapsed / len(positions) * 1e6:10.2f} us/回")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="再生位置 -> セグメント検索のベンチマーク")
+    parser.add_argument("--segments", type=int, default=20000, help="セグメント数")
+    args = parser.parse_args()
+
+    store = make_store(args.segments)
+    duration = store.ends[-1]
+    rng = random.Random(1)
+    # 再生中の位置通知（QMediaPlayerの既定は1秒ごと、ここでは100ミリ秒ごと）と任意位置へのシーク
+    playback = [i * 0.1 for i in range(int(duration * 10))][:200000]
+    seeks = [rng.uniform(0, duration) for _ in range(100000)]
+    print(f"セグメント数: {len(store)}, 音声長: {duration / 3600:.1f}時間")
+
+    index = SegmentIndex(store)
+    bench("SegmentIndex (再生中)", index.find, playback)
+    bench("SegmentIndex (シーク)", index.find, seeks)
+    bench("legacy (シーク, 200回)", lambda s: legacy_find(store, s), seeks[:200])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+字幕パーサーのベンチマーク
+
+従来方式（ファイル全体を読み込んで '\\n\\n' で分割し、str.split の連鎖で時刻を解析）と
+subtitle_parser（一定サイズずつ読みながら、faster-whisperが書く固定の形のブロックは専用の正規表現と
+表引きで、それ以外は汎用の正規表現で解析）を比較する。
+ピークメモリはtracemallocで計測する。
+10万セグメントのSRT(LF/CRLF)・WebVTT・JSONを生成して計測する。
+
+使用例:
+    python benchmarks/bench_subtitle_parser.py                # 10万セグメントで計測
+    python benchmarks/bench_subtitle_parser.py --segments 20000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.subtitle_parser import parse_subtitle_file  # noqa: E402
+
+
+def make_segments(count):
+    """会議の文字起こしを模したセグメントを生成する"""
+    rng = random.Random(0)
+    segments = []
+    t = 0.0
+    for _ in range(count):
+        start = t
+        t += rng.uniform(0.5, 3.0)
+        text = "本日は弊社の生産計画についてご説明いたします。" * rng.randint(1, 3)
+        segments.append({'start': start, 'end': t, 'text': text})
+    return segments
+
+
+def format_time(seconds, separator):
+    total_ms = int(round(seconds * 1000))
+    hours, rem = divmod(total_ms, 3600000)
+    minutes, rem = divmod(rem, 60000)
+    secs, ms = divmod(rem, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{ms:03d}"
+
+
+def write_files(segments, work_dir):
+    """同じセグメントを各形式で書き出し、(名前, パス) のリストを返す"""
+    srt_lines = []
+    for i, seg in enumerate(segments, start=1):
+        srt_lines.append(f"{i}\n{format_time(seg['start'], ',')} --> {format_time(seg['end'], ',')}\n{seg['text']}\n\n")
+    srt = "".join(srt_lines)
+    files = []
+    for name, newline in (("srt (LF)", "\n"), ("srt (CRLF)", "\r\n")):
+        path = os.path.join(work_dir, f"{name.split()[0]}_{len(files)}.srt")
+        with open(path, "w", encoding="utf-8", newline=newline) as f:
+            f.write(srt)
+        files.append((name, path))
+
+    vtt_path = os.path.join(work_dir, "subtitles.vtt")
+    with open(vtt_path, "w", encoding="utf-8") as f:
+        f.write("WEBVTT\n\n")
+        for seg in segments:
+            f.write(f"{format_time(seg['start'], '.')} --> {format_time(seg['end'], '.')}\n{seg['text']}\n\n")
+    files.append(("vtt", vtt_path))
+
+    json_path = os.path.join(work_dir, "subtitles.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"segments": [dict(seg, id=i) for i, seg in enumerate(segments)]}, f, ensure_ascii=False)
+    files.append(("json", json_path))
+    return files
+
+
+def legacy_parse(srt_file_path):
+    """従来のWhisperTranscriber.parse_srt_file相当の処理"""
+    def parse_time(time_str):
+        hours, minutes, seconds = time_str.replace(',', '.').split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    segments = []
+    with open(srt_file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    for entry in content.strip().split('\n\n'):
+        lines = entry.split('\n')
+        if len(lines) >= 3:
+            start_str, end_str = lines[1].split(' --> ')
+            segments.append({'start': parse_time(start_str), 'end': parse_time(end_str), 'text': ' '.join(lines[2:])})
+    return segments
+
+
+def bench(name, func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<28} {best * 1000:9.1f} ms  peak {peak / 1024 / 1024:6.1f} MB  ({len(result)} segments)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字幕パーサーのベンチマーク")
+    parser.add_argument("--segments", type=int, default=100000, help="生成するセグメント数")
+    args = parser.parse_args()
+
+    segments = make_segments(args.segments)
+    with tempfile.TemporaryDirectory() as work_dir:
+        files = write_files(segments, work_dir)
+        for name, path in files:
+            print(f"\n{name}: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+            if name.startswith("srt"):
+                bench("legacy (split)", lambda: legacy_parse(path))
+            bench("subtitle_parser", lambda: parse_subtitle_file(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+過去の文字起こしを開く処理のベンチマーク
+
+SRTを解析して SegmentStore を作る場合と、サイドカー（.lsseg）をメモリマップで開く場合の
+読み込み時間と、開いた直後に表示する先頭50行のテキスト取得を含めた時間を比較する。
+
+使用例:
+    python benchmarks/bench_transcript_sidecar.py                  # 5時間相当（約1.2万セグメント）で計測
+    python benchmarks/bench_transcript_sidecar.py --segments 100000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.subtitle_utils import write_srt_file  # noqa: E402
+from utils.transcript_sidecar import write_sidecar, sidecar_path, load_segments, load_sidecar  # noqa: E402
+from utils.segment_store import SegmentStore  # noqa: E402
+from utils.subtitle_parser import iter_subtitle_file  # noqa: E402
+
+
+def make_segments(count):
+    """会議の文字起こしを模したセグメントを生成する"""
+    rng = random.Random(0)
+    segments = []
+    t = 0.0
+    for _ in range(count):
+        start = t
+        t += rng.uniform(0.5, 3.0)
+        segments.append({'start': start, 'end': t, 'text': "本日は弊社の生産計画についてご説明いたします。" * rng.randint(1, 3)})
+    return segments
+
+
+def bench(name, func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        store = func()
+        for row in range(min(50, len(store))):
+            store.text(row)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<28} {best * 1000:9.2f} ms  ({len(store)} segments)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="過去の文字起こしを開く処理のベンチマーク")
+    parser.add_argument("--segments", type=int, default=12000, help="セグメント数")
+    args = parser.parse_args()
+
+    segments = make_segments(args.segments)
+    with tempfile.TemporaryDirectory() as work_dir:
+        srt_path = os.path.join(work_dir, "meeting.srt")
+        write_srt_file(srt_path, segments)
+        write_sidecar(sidecar_path(srt_path), segments, srt_path)
+        print(f"SRT: {os.path.getsize(srt_path) / 1024 / 1024:.1f} MB, "
+              f"サイドカー: {os.path.getsize(sidecar_path(srt_path)) / 1024 / 1024:.1f} MB")
+        bench("SRTを解析", lambda: SegmentStore(iter_subtitle_file(srt_path)))
+        bench("サイドカー (load_segments)", lambda: load_segments(srt_path))
+        bench("サイドカー (直接)", lambda: load_sidecar(sidecar_path(srt_path)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+無音除去(VAD)前処理のベンチマーク
+
+録音ごとに発話区間の検出・切り出しにかかる時間と、取り除ける無音の割合を計測する。
+--whisper を指定すると、元の音声と発話のみの音声それぞれでfaster-whisperを実行し、所要時間を比較する。
+
+使用例:
+    python benchmarks/bench_vad.py 会議.mp3 講義.m4a
+    python benchmarks/bench_vad.py 会議.mp3 --whisper
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.media_probe import get_duration  # noqa: E402
+from utils.vad import detect_speech_regions, extract_speech, is_worth_applying  # noqa: E402
+
+
+def time_whisper(audio_file_path, output_dir):
+    """faster-whisperを同期実行し、所要時間（秒）を返す"""
+    from utils.whisper_utils import transcribe_with_subprocess
+    started = time.perf_counter()
+    _, segments, success = transcribe_with_subprocess(audio_file_path, output_dir)
+    return time.perf_counter() - started, len(segments), success
+
+
+def bench_file(audio_file_path, run_whisper):
+    duration = get_duration(audio_file_path)
+    print(f"\n{audio_file_path}")
+    if duration <= 0:
+        print("  音声長を取得できませんでした")
+        return
+
+    started = time.perf_counter()
+    regions = detect_speech_regions(audio_file_path, duration)
+    detect_time = time.perf_counter() - started
+    if regions is None:
+        print("  無音検出に失敗しました")
+        return
+
+    speech = sum(end - start for start, end in regions)
+    print(f"  音声長: {duration:.1f}秒, 発話: {speech:.1f}秒 ({len(regions)}区間), "
+          f"削減: {(1 - speech / duration) * 100:.1f}%, 検出: {detect_time:.2f}秒")
+    if not is_worth_applying(regions, duration):
+        print("  取り除ける無音が少ないため、実際の処理では無音除去を行いません")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        speech_wav = os.path.join(work_dir, "speech.wav")
+        started = time.perf_counter()
+        offset_map = extract_speech(audio_file_path, regions, speech_wav)
+        extract_time = time.perf_counter() - started
+        if offset_map is None:
+            print("  発話区間の切り出しに失敗しました")
+            return
+        print(f"  切り出し: {extract_time:.2f}秒")
+
+        if run_whisper:
+            original_time, original_count, ok1 = time_whisper(audio_file_path, os.path.join(work_dir, "original"))
+            speech_time, speech_count, ok2 = time_whisper(speech_wav, os.path.join(work_dir, "speech"))
+            total = detect_time + extract_time + speech_time
+            print(f"  Whisper 元音声: {original_time:.1f}秒 ({original_count}セグメント, 成功={ok1})")
+            print(f"  Whisper 発話のみ: {speech_time:.1f}秒 ({speech_count}セグメント, 成功={ok2}), "
+                  f"前処理込み: {total:.1f}秒 ({original_time / total if total else 0:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="無音除去(VAD)前処理のベンチマーク")
+    parser.add_argument("inputs", nargs="+", help="計測する録音ファイル")
+    parser.add_argument("--whisper", action="store_true", help="faster-whisperの実行時間も比較する")
+    args = parser.parse_args()
+    for path in args.inputs:
+        bench_file(path, args.whisper)
+
+
+if __name__ == "__main__":
+    main()
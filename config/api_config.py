@@ -42,4 +42,33 @@ MODEL_INFO = {
 }
 
 # Whisper設定
-WHISPER_PATH = "Faster-Whisper-XXL" 
\ No newline at end of file
+WHISPER_PATH = "Faster-Whisper-XXL" 
+
+# 文字起こしプロセスの監視（Noneで無効）
+WHISPER_STALL_SECONDS = 10 * 60         # 出力がないままこの秒数が経過したら停止とみなして終了させる
+WHISPER_TIMEOUT_SECONDS = 6 * 60 * 60   # 1回の実行の制限時間（秒）
+
+# 複数ファイルを1回のfaster-whisper実行にまとめる場合の上限
+WHISPER_BATCH_MAX_FILES = 16            # 1回の実行に含める最大ファイル数
+WHISPER_BATCH_MAX_SECONDS = 2 * 60 * 60  # 1回の実行に含める合計音声長（秒）
+
+# ジョブスケジューラの資源ごとの同時実行数
+SCHEDULER_LIMITS = {
+    "transcription": 1,  # CPU/GPUを占有する文字起こし
+    "api": 2,            # 生成AIのAPI呼び出し
+    "documents": 2,      # 資料からのテキスト抽出
+}
+
+# 常駐モデル(faster-whisper)の設定
+RESIDENT_WHISPER_MODEL = "large-v2"        # モデル名またはモデルディレクトリのパス
+RESIDENT_WHISPER_DEVICE = "auto"           # "auto" / "cpu" / "cuda"
+RESIDENT_WHISPER_COMPUTE_TYPE = "default"  # "int8" / "float16" など
+RESIDENT_WHISPER_MODEL_DIR = None          # モデルのダウンロード先 (Noneの場合は既定の場所)
+
+# デコード済み音声（16kHzモノラルPCM）のキャッシュ。再生・文字起こしで共有する
+PCM_CACHE_DIR = None       # 保存先 (Noneの場合はプロジェクト直下の cache/pcm)
+PCM_CACHE_MAX_MB = 4096    # 上限サイズ（MB）。超えた分は最後に使った時刻の古い順に削除する（1時間あたり約115MB）
+
+# ログ設定（環境変数 LISTEN_SUMMARIZE_LOG_LEVEL / LISTEN_SUMMARIZE_LOG_MODULES で上書き可能）
+LOG_LEVEL = "WARNING"   # コンソールに出力するレベル ("DEBUG" / "INFO" / "WARNING" / "ERROR" / "OFF")
+LOG_MODULE_LEVELS = {}  # モジュールごとのレベル 例: {"whisper_utils": "DEBUG", "audio_player": "INFO"}
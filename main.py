@@ -10,41 +10,57 @@ import sys
 import time
 import tempfile
 import re
-import traceback
 import subprocess
+import sqlite3
 from pathlib import Path
-from datetime import datetime
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QPushButton, QLabel, QTextEdit, QFileDialog, QProgressBar, 
     QComboBox, QTabWidget, QSlider, QMessageBox, QGroupBox,
-    QTableWidget, QTableWidgetItem, QHeaderView, QSplitter,
-    QRadioButton, QButtonGroup, QLineEdit
+    QTableView, QAbstractItemView, QHeaderView, QSplitter,
+    QRadioButton, QButtonGroup, QLineEdit, QCheckBox, QListWidget, QListWidgetItem
 )
 from PyQt5.QtCore import Qt, QTimer, pyqtSlot, QUrl, QMetaObject, Q_ARG
 from PyQt5.QtGui import QIcon, QFont, QDesktopServices
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 
 # 自作モジュールのインポート
-from config.api_config import get_api_key, AVAILABLE_MODELS, DEFAULT_MODEL, MODEL_INFO
+from config.api_config import (
+    get_api_key, AVAILABLE_MODELS, DEFAULT_MODEL, MODEL_INFO, LOG_LEVEL, LOG_MODULE_LEVELS, SCHEDULER_LIMITS
+)
 from config.prompts import (
     DEFAULT_SUMMARY_PROMPT, SHORT_SUMMARY_PROMPT, 
     DETAILED_ANALYSIS_PROMPT, load_prompt_from_file
 )
 from utils.whisper_utils import WhisperTranscriber
+from utils.whisper_backends import ResidentModelBackend
+from utils.whisper_progress import TimestampEvent, SegmentCounterEvent
 from utils.openai_utils import OpenAIAPI
 from utils.document_utils import DocumentParser
 from utils.audio_player import AudioPlayer
+from utils.segment_playback import SEGMENT_PREFETCH_COUNT
+from utils.output_utils import get_default_output_dir, save_result_files
+from utils.log_utils import get_logger, configure_logging, install_crash_handler
+from utils.job_scheduler import JobScheduler, PRIORITY_HIGH, STATE_DONE, qt_main_thread_dispatcher
+from utils.process_supervisor import STOP_CANCELLED
+from utils.transcript_sidecar import load_segments
+from utils.segment_store import SegmentStore
+from utils.segment_index import SegmentIndex
+from utils.segment_table import SegmentTableModel, PlayButtonDelegate, COLUMN_TEXT, COLUMN_PLAY, format_segment_time
+from utils.segment_search import SegmentSearchIndex
+from utils.session_archive import SessionArchive
+
+logger = get_logger(__name__)
 
 # markdown ライブラリが利用可能かどうかのフラグ
 markdown_lib_available = False
 try:
     import markdown
     markdown_lib_available = True
-    print("Markdownライブラリは利用可能です。")
+    logger.debug("Markdownライブラリは利用可能です。")
 except ImportError:
-    print("Markdownライブラリが見つかりません。必要に応じてインストールを試みます。")
+    logger.info("Markdownライブラリが見つかりません。必要に応じてインストールを試みます。")
 
 class MainWindow(QMainWindow):
     """メインウィンドウクラス"""
@@ -60,17 +76,31 @@ class MainWindow(QMainWindow):
         self.audio_file = ""
         self.output_dir = ""
         self.document_files = []
-        self.transcription = ""
-        self.segments = []
+        self.segments = SegmentStore()  # 文字起こし結果（全文もここから取り出す）
+        self.segment_index = SegmentIndex(self.segments)  # 再生位置 -> セグメントの検索用
+        self.highlighted_row = None  # 再生位置に合わせて最後に選択した行
+        self.search_index = SegmentSearchIndex(self.segments)  # セグメントの全文検索用
+        self.plain_transcription = ""  # セグメントがなくテキストだけ得られた場合の文字起こし
         self.document_text = ""
+        self.document_texts = []  # 資料ごとの (ファイル名, 抽出テキスト)
         self.summary = ""
+        self.summary_model = None  # 要約に使ったモデルとプロンプト（アーカイブに記録する）
+        self.summary_prompt = None
+        self.archive = None  # セッションアーカイブ (最初の保存時に開く)
         self.selected_prompt_file = None # 選択されたプロンプトファイルのフルパス
         
+        # 文字起こし・資料抽出・要約APIの実行枠を管理するスケジューラ（完了通知はメインスレッドで受け取る）
+        self.scheduler = JobScheduler(SCHEDULER_LIMITS, dispatch=qt_main_thread_dispatcher())
+        self.transcription_job = None
+        self.document_jobs = []
+        self.summary_job = None
+        
         # ユーティリティクラスのインスタンス化
         self.transcriber = WhisperTranscriber()
         self.openai_api = OpenAIAPI()
         self.document_parser = DocumentParser()
         self.audio_player = AudioPlayer()
+        self.resident_backend = None  # モデル常駐バックエンド (必要になった時点で生成)
         
         # プログレスバーの表示用タイマー
         self.progress_timer = QTimer()
@@ -80,9 +110,9 @@ class MainWindow(QMainWindow):
         try:
             api_key = get_api_key()
             self.openai_api.set_api_key(api_key)
-            print("OpenAI APIキーを環境変数から正常に読み込みました。")
+            logger.info("OpenAI APIキーを環境変数から正常に読み込みました。")
         except ValueError as e:
-            print(f"エラー: {e}", file=sys.stderr)
+            logger.error("APIキーの読み込みに失敗しました: %s", e)
             QMessageBox.critical(self, "APIキーエラー", str(e) + "\n環境変数 'OPENAI_API_KEY' を設定してください。")
             # 必要に応じてアプリケーションを終了
             sys.exit(1) # 例: アプリケーション終了
@@ -119,8 +149,15 @@ class MainWindow(QMainWindow):
         browse_srt_btn = QPushButton("SRT読込...")
         browse_srt_btn.clicked.connect(self.browse_srt_file)
 
+        # 再生用の音声の準備（バックグラウンドのデコード）を取り消すボタン（準備中のみ表示）
+        self.cancel_audio_load_btn = QPushButton("準備中止")
+        self.cancel_audio_load_btn.setToolTip("再生用の音声の準備を中止します（文字起こしには影響しません）")
+        self.cancel_audio_load_btn.clicked.connect(self.audio_player.cancel_load)
+        self.cancel_audio_load_btn.setVisible(False)
+
         audio_layout.addWidget(audio_label)
         audio_layout.addWidget(self.audio_path_label, 1)
+        audio_layout.addWidget(self.cancel_audio_load_btn)
         audio_layout.addWidget(browse_audio_btn)
         audio_layout.addWidget(browse_srt_btn) # ボタンをレイアウトに追加
         
@@ -167,6 +204,19 @@ class MainWindow(QMainWindow):
         self.transcribe_btn = QPushButton("文字起こし実行")
         self.transcribe_btn.clicked.connect(self.run_transcription)
         
+        # 並列文字起こしの切り替え
+        self.parallel_checkbox = QCheckBox("並列処理")
+        self.parallel_checkbox.setToolTip("無音区間で音声を分割し、CPUコア数に応じて複数プロセスで同時に文字起こしします")
+        
+        # モデル常駐の切り替え
+        self.resident_checkbox = QCheckBox("モデル常駐")
+        self.resident_checkbox.setToolTip("Whisperモデルを読み込んだままにし、2回目以降の文字起こしを高速化します")
+        self.resident_checkbox.toggled.connect(self.toggle_resident_backend)
+        
+        # 無音除去(VAD)の切り替え
+        self.vad_checkbox = QCheckBox("無音除去")
+        self.vad_checkbox.setToolTip("休憩や待ち時間などの無音区間を取り除いてから文字起こしします（並列処理では使用しません）")
+        
         self.summarize_btn = QPushButton("要約作成実行")
         self.summarize_btn.clicked.connect(self.run_summarization)
         self.summarize_btn.setEnabled(False)
@@ -176,6 +226,9 @@ class MainWindow(QMainWindow):
         self.save_btn.setEnabled(False)
         
         run_layout.addWidget(self.transcribe_btn)
+        run_layout.addWidget(self.parallel_checkbox)
+        run_layout.addWidget(self.resident_checkbox)
+        run_layout.addWidget(self.vad_checkbox)
         run_layout.addWidget(self.summarize_btn)
         run_layout.addWidget(self.save_btn)
         
@@ -206,15 +259,47 @@ class MainWindow(QMainWindow):
         segments_group = QGroupBox("文字起こし結果とセクション別音声再生")
         segments_layout = QVBoxLayout()
         
-        # セグメントテーブル
-        self.segments_table = QTableWidget(0, 4)  # 列数を5から4に変更
-        self.segments_table.setHorizontalHeaderLabels(["開始時間", "終了時間", "テキスト", "再生"]) # 話者列を削除
-        self.segments_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)  # テキスト列のインデックスを2に変更
+        # 全文検索（入力が止まってから検索し、関連度順の結果をクリックするとその位置へ移動する）
+        search_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("文字起こしを検索（型番・数量・日付など、空白区切りで複数語）")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_result_label = QLabel("")
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_edit.textChanged.connect(lambda _: self.search_timer.start())
+        self.search_edit.returnPressed.connect(self.run_search)
+        search_layout.addWidget(self.search_edit, 1)
+        search_layout.addWidget(self.search_result_label)
+        
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(150)
+        self.search_results.setVisible(False)
+        self.search_results.itemActivated.connect(self.jump_to_search_hit)
+        self.search_results.itemClicked.connect(self.jump_to_search_hit)
+        
+        # セグメントテーブル（SegmentStoreを直接表示し、表示中の行だけを描画する）
+        self.segment_model = SegmentTableModel(self)
+        self.segments_table = QTableView()
+        self.segments_table.setModel(self.segment_model)
+        self.segments_table.horizontalHeader().setSectionResizeMode(COLUMN_TEXT, QHeaderView.Stretch)
         self.segments_table.verticalHeader().setVisible(False)
-        self.segments_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.segments_table.setSelectionMode(QTableWidget.SingleSelection)
+        # 行の高さを固定し、行数が多くても高さの計算で全行を調べないようにする
+        self.segments_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.segments_table.setWordWrap(False)
+        self.segments_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.segments_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.segments_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # 再生ボタンは行ごとのウィジェットではなくデリゲートで描画する
+        self.play_delegate = PlayButtonDelegate(self.segments_table)
+        self.play_delegate.play_requested.connect(lambda row: self.play_segment(self.segments[row], row))
+        self.segments_table.setItemDelegateForColumn(COLUMN_PLAY, self.play_delegate)
         
         # セグメントグループにウィジェットを追加
+        segments_layout.addLayout(search_layout)
+        segments_layout.addWidget(self.search_results)
         segments_layout.addWidget(self.segments_table)
         segments_group.setLayout(segments_layout)
         
@@ -303,8 +388,11 @@ class MainWindow(QMainWindow):
         # Whisper文字起こし進捗
         self.transcriber.progress_updated.connect(self.update_transcribe_progress)
         
-        # Whisperのセグメント更新シグナル
-        self.transcriber.segment_updated.connect(self.on_segment_updated)
+        # Whisperの出力から解析された進捗イベント
+        self.transcriber.output_events.connect(self.on_output_events)
+        
+        # 文字起こし中に確定したセグメントの逐次追加
+        self.transcriber.segments_appended.connect(self.on_segments_appended)
         
         # OpenAI API進捗
         self.openai_api.progress_updated.connect(self.update_summarize_progress)
@@ -317,6 +405,8 @@ class MainWindow(QMainWindow):
         self.audio_player.duration_changed.connect(self.update_duration)
         self.audio_player.state_changed.connect(self.update_state)
         self.audio_player.error_occurred.connect(self.on_audio_error)
+        self.audio_player.load_progress.connect(self.on_audio_load_progress)
+        self.audio_player.load_finished.connect(self.on_audio_load_finished)
         
         # モデル選択変更時
         self.model_combo.currentTextChanged.connect(self.on_model_changed)
@@ -333,25 +423,15 @@ class MainWindow(QMainWindow):
         )
         
         if file_path:
-            # 読み込み中表示
-            self.progress_label.setText("音声ファイル読み込み中...")
-            self.progress_bar.setValue(10)
-            self.audio_path_label.setText("読み込み中...")
-            
             # 絶対パスに変換
             file_path = os.path.abspath(file_path)
-            self.audio_file = file_path
-            
-            # アプリケーションイベントを処理
-            QApplication.processEvents()
             
-            # 音声ファイルをプレーヤーに読み込み
+            # 再生用の音声はバックグラウンドで準備する（準備中も他の操作や文字起こしができる）
             if self.audio_player.load_file(file_path):
-                self.audio_path_label.setText(os.path.basename(file_path))
-                # プログレスバーとラベルを初期化
-                self.progress_bar.setValue(0)
-                self.progress_label.setText("待機中...") 
-                # スタイルも初期状態に戻す（必要であれば）
+                self.audio_file = file_path
+                self.audio_path_label.setText(f"{os.path.basename(file_path)} (再生準備中)")
+                self.audio_path_label.setToolTip(file_path)
+                self.cancel_audio_load_btn.setVisible(True)
                 self.progress_bar.setStyleSheet("") # デフォルトスタイルに戻す
             else:
                 self.audio_path_label.setText("読み込みに失敗しました")
@@ -359,6 +439,24 @@ class MainWindow(QMainWindow):
                 self.progress_label.setText("音声ファイル読み込み失敗")
                 self.progress_bar.setValue(0)
     
+    def on_audio_load_progress(self, value, message):
+        """再生用の音声の準備の進捗（文字起こし・要約の実行中はそちらの表示を優先する）"""
+        if self.transcription_job is not None or self.summary_job is not None:
+            return
+        self.progress_bar.setValue(value)
+        self.progress_label.setText(message)
+    
+    def on_audio_load_finished(self, success):
+        """再生用の音声の準備の終了"""
+        self.cancel_audio_load_btn.setVisible(False)
+        if not self.audio_file:
+            return
+        name = os.path.basename(self.audio_file)
+        self.audio_path_label.setText(name if success else f"{name} (再生不可)")
+        if self.transcription_job is None and self.summary_job is None:
+            self.progress_bar.setValue(0)
+            self.progress_label.setText("待機中..." if success else "再生用の音声を準備できませんでした")
+    
     def browse_document_files(self):
         """追加資料ファイルを選択するダイアログを表示"""
         file_dialog = QFileDialog()
@@ -394,7 +492,7 @@ class MainWindow(QMainWindow):
             self.prompt_file_path.setToolTip(self.selected_prompt_file) # ツールチップにフルパス表示
             self.custom_prompt_btn.setChecked(True) # ファイル選択したらカスタムラジオを選択状態にする
             self.custom_prompt_area.clear() # テキストエリアはクリアする
-            print(f"カスタムプロンプトファイル選択: {self.selected_prompt_file}")
+            logger.info("カスタムプロンプトファイル選択: %s", self.selected_prompt_file)
         else:
             # キャンセルされた場合、以前選択していたファイルパスをクリア
             # self.selected_prompt_file = None
@@ -421,6 +519,21 @@ class MainWindow(QMainWindow):
         self.openai_api.set_model(model_name)
         self.update_model_info(model_name)
     
+    def toggle_resident_backend(self, checked):
+        """文字起こしバックエンドをモデル常駐方式/サブプロセス方式で切り替え"""
+        if checked:
+            if self.resident_backend is None:
+                self.resident_backend = ResidentModelBackend()
+            if not self.resident_backend.is_available():
+                QMessageBox.warning(self, "警告", "faster_whisperが利用できないため、モデル常駐は使用できません。")
+                self.resident_checkbox.setChecked(False)
+                return
+            self.transcriber.set_backend(self.resident_backend)
+            # 先にモデルを読み込んでおく
+            self.resident_backend.warm_up()
+        else:
+            self.transcriber.set_backend(self.transcriber.subprocess_backend)
+    
     def run_transcription(self):
         """
         音声ファイルの文字起こしを実行する
@@ -434,8 +547,9 @@ class MainWindow(QMainWindow):
         self.progress_label.setText("文字起こしの準備中...")
         
         # 変数クリア
-        self.transcription = ""
-        self.segments = []
+        self.plain_transcription = ""
+        self.set_segments(SegmentStore())
+        self.populate_segments(self.segments)
         
         try:
             # 音声ファイルの絶対パスを取得
@@ -444,92 +558,169 @@ class MainWindow(QMainWindow):
             # ボタンを無効化
             self.transcribe_btn.setEnabled(False)
             
-            # トランスクライバーのシグナル接続を確認
-            # プログラム開始時に既に接続されているはずだが念のため
-            try:
-                self.transcriber.progress_updated.disconnect()
-                self.transcriber.transcription_finished.disconnect()
-            except:
-                pass
-                
-            self.transcriber.progress_updated.connect(self.update_transcribe_progress)
-            self.transcriber.transcription_finished.connect(self.on_transcription_finished)
-            
-            # 文字起こし開始
-            self.transcriber.transcribe(audio_file_path, output_dir=self.output_dir)
+            # 文字起こし開始（スケジューラの文字起こし枠が空き次第開始する）
+            self.transcription_job = self.transcriber.submit_transcription(
+                self.scheduler,
+                audio_file_path,
+                priority=PRIORITY_HIGH,
+                output_dir=self.output_dir,
+                on_done=self.on_transcription_job_done,
+                parallel=self.parallel_checkbox.isChecked(),
+                vad=self.vad_checkbox.isChecked()
+            )
             
             # プログレスバーのアニメーションを開始
             self.progress_timer.start(200)
             
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("文字起こし実行中にエラーが発生しました")
             self.progress_label.setText(f"文字起こし失敗: {str(e)}")
             self.transcribe_btn.setEnabled(True)
             QMessageBox.critical(self, "エラー", f"文字起こし実行中にエラーが発生しました: {str(e)}")
     
     def process_documents(self):
-        """追加資料の処理"""
+        """追加資料の処理（資料抽出の枠で並行して実行し、全て終わったら表示する）"""
         self.progress_bar.setValue(0)
         self.progress_label.setText("追加資料の処理を開始します...")
+        self.summarize_btn.setEnabled(False)
         
-        all_text = ""
-        for doc_file in self.document_files:
-            self.progress_label.setText(f"処理中: {os.path.basename(doc_file)}")
-            text = self.document_parser.extract_text_from_file(doc_file)
-            all_text += f"\n--- {os.path.basename(doc_file)} ---\n{text}\n\n"
-        
-        self.document_text = all_text
-        self.document_text_edit.setText(all_text)
+        for job in self.document_jobs:
+            job.cancel()
+        doc_files = list(self.document_files)
+        texts = [""] * len(doc_files)
+        jobs = []
+        
+        def on_done(index, job):
+            if job not in self.document_jobs:
+                return  # 取り消された以前の処理
+            texts[index] = job.result() if job.state == STATE_DONE else ""
+            finished = sum(1 for j in jobs if j.done())
+            self.progress_bar.setValue(int(finished / len(jobs) * 100))
+            self.progress_label.setText(f"追加資料を処理中... {finished}/{len(jobs)}")
+            if finished < len(jobs):
+                return
+            all_text = "".join(
+                f"\n--- {os.path.basename(doc_file)} ---\n{text}\n\n" for doc_file, text in zip(doc_files, texts)
+            )
+            self.document_text = all_text
+            self.document_texts = [(os.path.basename(doc_file), text) for doc_file, text in zip(doc_files, texts)]
+            self.document_text_edit.setText(all_text)
+            self.document_jobs = []
+            self.progress_label.setText("追加資料の処理完了")
+            self.summarize_btn.setEnabled(self.has_transcription())
+        
+        for index, doc_file in enumerate(doc_files):
+            jobs.append(self.document_parser.submit_extraction(
+                self.scheduler, doc_file, priority=PRIORITY_HIGH,
+                on_done=lambda job, i=index: on_done(i, job)
+            ))
+        self.document_jobs = jobs
+    
+    @property
+    def transcription(self):
+        """要約などに渡す文字起こし全文（セグメントがある場合はストアのバッファから取り出す）"""
+        if self.segments:
+            return self.segments.transcript()
+        return self.plain_transcription
+    
+    def has_transcription(self):
+        """文字起こし結果があるかどうか（全文を組み立てずに判定する）"""
+        return bool(self.segments) or bool(self.plain_transcription)
+    
+    def set_segments(self, segments):
+        """
+        表示中の文字起こし結果を差し替え、再生位置の検索インデックスを作り直す
         
-        self.progress_bar.setValue(100)
-        self.progress_label.setText("追加資料の処理完了")
+        Args:
+            segments (SegmentStore): 文字起こし結果
+        """
+        self.segments = segments
+        self.segment_index = SegmentIndex(segments)
+        self.highlighted_row = None
+        # 検索インデックスは最初の検索時に作る（大きな文字起こしでも読み込み直後の操作を妨げない）
+        self.search_index = SegmentSearchIndex(segments)
+        if self.search_edit.text().strip():
+            self.search_timer.start()
+        else:
+            self.show_search_hits([])
     
     def populate_segments(self, segments, has_audio=True):
         """セグメントテーブルにデータを設定 (音声有無フラグ付き)"""
-        self.segments_table.setRowCount(len(segments))
+        self.highlighted_row = None
+        self.segment_model.set_segments(segments, has_audio)
+    
+    def reconcile_segments(self, segments, has_audio=True):
+        """
+        逐次表示済みのテーブルを最終結果に合わせる (変更のあった行だけ更新)
         
-        for i, segment in enumerate(segments):
-            # 開始時間
-            start_item = QTableWidgetItem(self.format_time(segment.get('start', 0)))
-            self.segments_table.setItem(i, 0, start_item)
-            
-            # 終了時間
-            end_item = QTableWidgetItem(self.format_time(segment.get('end', 0)))
-            self.segments_table.setItem(i, 1, end_item)
-            
-            # テキスト (列インデックスを2に変更)
-            text_item = QTableWidgetItem(segment.get('text', ''))
-            self.segments_table.setItem(i, 2, text_item)
-            
-            # 再生ボタン (列インデックスを3に変更)
-            play_button = QPushButton("再生")
-            if has_audio:
-                play_button.clicked.connect(lambda checked, s=segment: self.play_segment(s))
-                play_button.setEnabled(True)
-            else:
-                play_button.setEnabled(False) # 音声がない場合は無効化
-            self.segments_table.setCellWidget(i, 3, play_button)
+        Args:
+            segments (SegmentStore): 最終的なセグメント
+            has_audio (bool): 音声があるかどうか
+        """
+        self.segment_model.replace_segments(segments, has_audio)
     
-    def format_time(self, seconds):
-        """秒数を「分:秒」形式にフォーマット"""
-        m, s = divmod(int(seconds), 60)
-        return f"{m:02d}:{s:02d}"
+    def on_segments_appended(self, segments):
+        """文字起こし中に確定したセグメントをテーブルへ追加"""
+        if not segments:
+            return
+        # モデルのストアは self.segments と同じものなので、追加した行だけがテーブルに通知される
+        self.segment_model.append(segments)
+        self.segment_index.refresh()  # 追加分だけをインデックスに取り込む
+        self.search_index.refresh()
+        if self.search_edit.text().strip():
+            self.search_timer.start()  # 追加分も検索結果に反映する
+        # 途中までの内容でも要約できるようにする
+        self.summarize_btn.setEnabled(True)
+    
+    def run_search(self):
+        """検索欄の語で文字起こしを検索し、結果を一覧に表示する"""
+        self.search_timer.stop()
+        query = self.search_edit.text()
+        if not query.strip():
+            self.show_search_hits([])
+            return
+        self.show_search_hits(self.search_index.search(query))
+    
+    def show_search_hits(self, hits):
+        """検索結果を関連度順に一覧へ表示する（空の場合は一覧を隠す）"""
+        self.search_results.clear()
+        for hit in hits:
+            item = QListWidgetItem(f"{format_segment_time(hit.start)}  {hit.text}")
+            item.setData(Qt.UserRole, hit.index)
+            item.setToolTip(hit.text)
+            self.search_results.addItem(item)
+        self.search_results.setVisible(bool(hits))
+        if self.search_edit.text().strip():
+            self.search_result_label.setText(f"{len(hits)}件" if hits else "該当なし")
+        else:
+            self.search_result_label.setText("")
+    
+    def jump_to_search_hit(self, item):
+        """検索結果のセグメントを選択し、音声がある場合は再生位置をその開始時刻に移動する"""
+        row = item.data(Qt.UserRole)
+        if row is None or row >= len(self.segments):
+            return
+        self.highlighted_row = row
+        self.segments_table.selectRow(row)
+        self.segments_table.scrollTo(self.segment_model.index(row, COLUMN_TEXT), QAbstractItemView.PositionAtCenter)
+        if self.audio_file:
+            self.audio_player.set_position(int(self.segments.starts[row] * 1000))
     
     def on_segment_selected(self):
         """セグメント選択時の処理"""
-        selected_items = self.segments_table.selectedItems()
-        if not selected_items:
+        selected_rows = self.segments_table.selectionModel().selectedRows()
+        if not selected_rows:
             return
         
-        row = selected_items[0].row()
+        row = selected_rows[0].row()
         segment = self.segments[row]
         start_time = segment.get('start', 0)
         
         # 音声プレーヤーに再生位置をセット
         self.audio_player.set_position(int(start_time * 1000))
     
-    def play_segment(self, segment):
-        """セグメントを再生"""
+    def play_segment(self, segment, row=None):
+        """セグメントを再生（続けて聞くことが多い後続のセグメントは先に読み込んでおく）"""
         if not self.audio_file or not self.segments:
             return
         
@@ -547,6 +738,12 @@ class MainWindow(QMainWindow):
         
         # 再生開始 (開始位置を引数で渡す)
         self.audio_player.play(start_time_ms)
+        
+        if row is not None:
+            following = range(row + 1, min(len(self.segments), row + 1 + SEGMENT_PREFETCH_COUNT))
+            self.audio_player.prefetch_segments(
+                [(self.segments.starts[i], self.segments.ends[i]) for i in following]
+            )
     
     def play_audio(self):
         """音声を再生"""
@@ -562,12 +759,7 @@ class MainWindow(QMainWindow):
     
     def set_position(self, position):
         """再生位置の更新"""
-        # 現在の位置に該当するセグメントを検索してハイライト
-        position_seconds = position / 1000
-        for i, segment in enumerate(self.segments):
-            if segment.get('start', 0) <= position_seconds <= segment.get('end', 0):
-                self.segments_table.selectRow(i)
-                break
+        self.highlight_segment_at(position)
     
     def update_duration(self, duration):
         """音声の長さの更新"""
@@ -575,12 +767,15 @@ class MainWindow(QMainWindow):
 
     def update_position(self, position):
         """再生位置の更新"""
-        # 現在の位置に該当するセグメントを検索してハイライト
-        position_seconds = position / 1000
-        for i, segment in enumerate(self.segments):
-            if segment.get('start', 0) <= position_seconds <= segment.get('end', 0):
-                self.segments_table.selectRow(i)
-                break
+        self.highlight_segment_at(position)
+
+    def highlight_segment_at(self, position):
+        """再生位置（ミリ秒）を含むセグメントの行を選択する（行が変わらない場合は何もしない）"""
+        row = self.segment_index.find(position / 1000)
+        if row is None or row == self.highlighted_row:
+            return
+        self.highlighted_row = row
+        self.segments_table.selectRow(row)
 
     def update_state(self, state):
         """プレーヤーの状態更新"""
@@ -588,7 +783,7 @@ class MainWindow(QMainWindow):
     
     def run_summarization(self):
         """要約処理を実行 (Markdown -> HTML変換修正)"""
-        if not self.transcription: return
+        if not self.has_transcription(): return
         if not self.openai_api.api_key: return
 
         # プロンプトの選択
@@ -618,27 +813,35 @@ class MainWindow(QMainWindow):
         
         self.progress_bar.setValue(10)
         self.progress_label.setText("OpenAI API に要約リクエストを送信中...")
-        QApplication.processEvents() # UI更新
         
-        # 要約実行
-        try:
-            self.summary = self.openai_api.generate_summary(
-                prompt, 
-                self.transcription, 
-                self.document_text
-            )
-        except Exception as api_e:
-             QMessageBox.critical(self, "APIエラー", f"OpenAI APIとの通信中にエラーが発生しました。\n{api_e}")
-             self.progress_label.setText("APIエラー")
-             self.progress_bar.setValue(0)
-             self.progress_timer.stop()
-             self.summarize_btn.setEnabled(True)
-             return
+        # 要約実行（APIの枠で実行し、完了後に on_summary_finished で表示する）
+        self.summary_job = self.openai_api.submit_summary(
+            self.scheduler,
+            prompt, 
+            self.transcription, 
+            self.document_text,
+            priority=PRIORITY_HIGH,
+            on_done=lambda job, m=model, p=prompt: self.on_summary_finished(job, m, p)
+        )
+    
+    def on_summary_finished(self, job, model=None, prompt=None):
+        """要約ジョブの終了時の処理 (model / prompt は要約に使ったもの)"""
+        self.summary_job = None
+        if job.state != STATE_DONE:
+            if job.error is not None:
+                QMessageBox.critical(self, "APIエラー", f"OpenAI APIとの通信中にエラーが発生しました。\n{job.error}")
+            self.progress_label.setText("APIエラー" if job.error is not None else "要約を中止しました")
+            self.progress_bar.setValue(0)
+            self.progress_timer.stop()
+            self.summarize_btn.setEnabled(True)
+            return
+        self.summary = job.result()
+        self.summary_model = model
+        self.summary_prompt = prompt
 
         # 要約結果を表示
         self.progress_bar.setValue(90)
         self.progress_label.setText("要約結果を処理中...")
-        QApplication.processEvents() # UI更新
 
         if self.summary:
             html_content = None
@@ -646,12 +849,12 @@ class MainWindow(QMainWindow):
                 # --- HTML変換試行 --- 
                 import markdown # ここでインポートを試みる
                 html_content = markdown.markdown(self.summary, extensions=['extra', 'nl2br'])
-                print("要約をHTMLとして表示します")
+                logger.debug("要約をHTMLとして表示します")
                 self.summary_text.setHtml(html_content)
                 # ---------------------
             except ImportError:
                 # --- インポート失敗時のインストール試行 --- 
-                print("Markdownライブラリが見つかりません。インストールを試みます。")
+                logger.info("Markdownライブラリが見つかりません。インストールを試みます。")
                 reply = QMessageBox.question(self, '確認', 
                                              '要約表示に必要なMarkdownライブラリが見つかりません。\n'
                                              'インストールを試みますか？ (pip install markdown)', 
@@ -662,33 +865,33 @@ class MainWindow(QMainWindow):
                     QApplication.processEvents()
                     try:
                         subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'markdown'])
-                        print("Markdownライブラリのインストール成功。再試行します。")
+                        logger.info("Markdownライブラリのインストール成功。再試行します。")
                         # 再度インポートと変換を試みる
                         try:
                              import markdown
                              html_content = markdown.markdown(self.summary, extensions=['extra', 'nl2br'])
-                             print("要約をHTMLとして表示します (インストール後)")
+                             logger.debug("要約をHTMLとして表示します (インストール後)")
                              self.summary_text.setHtml(html_content)
                         except Exception as e_inner:
-                             print(f"インストール後のMarkdown変換/表示エラー: {e_inner}")
+                             logger.error("インストール後のMarkdown変換/表示エラー: %s", e_inner)
                              QMessageBox.warning(self, "エラー", "Markdown変換に失敗。テキスト形式で表示。")
                              self.summary_text.setText(self.summary) # フォールバック
                     except Exception as e_install:
                         QMessageBox.critical(self, "エラー", f"Markdownライブラリのインストール失敗。\n{e_install}")
                         self.summary_text.setText(self.summary) # フォールバック
                 else:
-                    print("インストールをスキップ。テキスト形式で表示します。")
+                    logger.info("インストールをスキップ。テキスト形式で表示します。")
                     self.summary_text.setText(self.summary) # フォールバック
                 # ---------------------------------------
             except Exception as e_convert:
                 # --- その他の変換エラー --- 
-                print(f"MarkdownからHTMLへの変換エラー: {e_convert}")
+                logger.error("MarkdownからHTMLへの変換エラー: %s", e_convert)
                 self.summary_text.setText(self.summary) # フォールバック
                 QMessageBox.warning(self, "表示エラー", "要約のHTML表示に失敗。Markdown形式で表示。")
                 # ---------------------------
         else:
              self.summary_text.clear()
-             print("要約結果が空でした")
+             logger.info("要約結果が空でした")
         
         # タブ切り替え、進捗完了、ボタン有効化
         self.tabs.setCurrentIndex(2)
@@ -700,34 +903,45 @@ class MainWindow(QMainWindow):
     
     def save_results(self):
         """結果を保存"""
-        if not self.transcription and not self.summary:
+        if not self.has_transcription() and not self.summary:
             QMessageBox.warning(self, "警告", "保存する結果がありません")
             return
         
         # 出力ディレクトリの設定
-        output_dir = self.output_dir if self.output_dir else os.path.join(os.path.expanduser("~"), "Documents", "要約ツール")
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # 現在の日時
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # ファイル名の設定
-        base_name = os.path.splitext(os.path.basename(self.audio_file))[0] if self.audio_file else "transcription"
-        
-        # 文字起こしの保存
-        if self.transcription:
-            transcription_file = os.path.join(output_dir, f"{base_name}_{timestamp}_transcription.txt")
-            with open(transcription_file, "w", encoding="utf-8") as f:
-                f.write(self.transcription)
-        
-        # 要約の保存
-        if self.summary:
-            summary_file = os.path.join(output_dir, f"{base_name}_{timestamp}_summary.txt")
-            with open(summary_file, "w", encoding="utf-8") as f:
-                f.write(self.summary)
+        output_dir = self.output_dir if self.output_dir else get_default_output_dir()
+        # セグメントがある場合はストアのバッファをそのまま書き出す
+        saved = save_result_files(output_dir, self.audio_file, self.segments or self.plain_transcription, self.summary)
+        self.archive_session(saved.get('transcription') or saved.get('summary'))
         
         QMessageBox.information(self, "完了", f"結果を保存しました\n保存先: {output_dir}")
     
+    def archive_session(self, source_path):
+        """
+        保存した結果をセッションアーカイブに追加する（失敗してもファイルへの保存は完了しているため警告に留める）
+        
+        Args:
+            source_path (str): 保存したファイルのパス（同じ保存を2回追加しないためのキー）
+        """
+        try:
+            if self.archive is None:
+                self.archive = SessionArchive()
+            audio_digest = None
+            if self.audio_file and os.path.exists(self.audio_file) and self.transcriber.cache is not None:
+                audio_digest = self.transcriber.cache.audio_digest(self.audio_file)
+            self.archive.add_session(
+                segments=self.segments if self.segments else None,
+                transcript=self.plain_transcription,
+                summary=self.summary,
+                documents=self.document_texts,
+                audio_path=os.path.abspath(self.audio_file) if self.audio_file else None,
+                audio_digest=audio_digest,
+                model=self.summary_model if self.summary else None,
+                prompt=self.summary_prompt if self.summary else None,
+                source_path=os.path.abspath(source_path) if source_path else None,
+            )
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("セッションアーカイブへの追加に失敗しました: %s", e)
+    
     def update_transcribe_progress(self, value, message):
         """文字起こしの進捗更新"""
         # GUIの更新はメインスレッドで行われるようにする
@@ -802,23 +1016,35 @@ class MainWindow(QMainWindow):
             else:
                 self.progress_bar.setStyleSheet("QProgressBar { background-color: #e0e0e0; border: 1px solid #bdbdbd; border-radius: 5px; text-align: center; } QProgressBar::chunk { background-color: #2196F3; border-radius: 5px; }")
 
+    def on_transcription_job_done(self, job):
+        """文字起こしジョブの終了時の処理（待ち行列で取り消された場合も呼ばれる）"""
+        if self.transcription_job is job:
+            self.transcription_job = None
+    
     def on_transcription_finished(self, text, segments, success):
         """文字起こし完了時の処理"""
+        self.transcription_job = None
         if success:
-            # 文字起こし結果を表示
-            self.transcription = text
-            self.segments = segments
-            self.populate_segments(segments)
-            self.summarize_btn.setEnabled(True)
+            # 文字起こし結果を表示 (逐次表示済みの行は差分のみ更新)
+            final_segments = SegmentStore(segments)
+            if self.segment_model.rowCount() > 0:
+                self.reconcile_segments(final_segments)
+            else:
+                self.populate_segments(final_segments)
+            self.set_segments(final_segments)
+            # SRTがなくテキストだけ得られた場合はそのテキストを使う
+            self.plain_transcription = "" if segments else text
             
-            # 文書ファイルがあれば処理
+            # 文書ファイルがあれば処理（要約ボタンは資料の処理完了後に有効化する）
             if self.document_files:
                 self.process_documents()
-        else:
-            if text:  # エラーメッセージがある場合
-                QMessageBox.critical(self, "エラー", text)
             else:
-                QMessageBox.critical(self, "エラー", "文字起こしに失敗しました")
+                self.summarize_btn.setEnabled(True)
+        elif self.transcriber.stop_reason == STOP_CANCELLED:
+            pass  # 中止した場合はエラー表示しない
+        else:
+            # 停止・時間超過などの理由がある場合はそれを表示する
+            QMessageBox.critical(self, "エラー", self.transcriber.error_message or "文字起こしに失敗しました")
         
         # 進捗バーを完了状態に
         self.progress_bar.setValue(100)
@@ -830,53 +1056,51 @@ class MainWindow(QMainWindow):
 
     def on_audio_error(self, error_message):
         """音声プレーヤーのエラー処理"""
-        print(f"音声再生エラー: {error_message}")
+        logger.error("音声再生エラー: %s", error_message)
         # QMessageBox.warning(self, "再生エラー", f"音声の再生中にエラーが発生しました。\n詳細: {error_message}")
         # エラー発生時にボタンの状態を適切に設定する
         # self.play_btn.setEnabled(True) # play_btn は存在しない
         self.stop_audio_btn.setEnabled(True) # 停止ボタンは有効にするなど
         # 他の関連ボタンの状態も必要に応じて更新
 
-    def on_segment_updated(self, stdout):
-        """Whisperのセグメント更新シグナルを処理"""
-        # 時間情報からの進捗更新はWhisperTranscriberのextract_timestamp_progressで処理されるため、
+    def on_output_events(self, events):
+        """Whisperの出力から解析された進捗イベントを処理"""
+        # 時間情報からの進捗更新はWhisperTranscriberで処理されるため、
         # ここでの処理は最小限にする
         # 時間情報が見つからなかった場合のみ、セグメント情報からの進捗更新を試みる
-        if not self.handle_whisper_progress(stdout):
+        if not self.handle_whisper_progress(events):
             # 他の進捗情報処理（必要に応じて）
             pass
         
-    def handle_whisper_progress(self, stdout):
-        """Whisperの出力から進捗を推定し、プログレスバーを更新する"""
-        # 時間情報を検出
-        import re
-        timestamp_pattern = r'\[(\d{2}):(\d{2}):([\d\.]+)\s+-->\s+(\d{2}):(\d{2}):([\d\.]+)\]'
-        if re.search(timestamp_pattern, stdout):
-            # 時間情報は既にWhisperTranscriberで処理されているため、見つかったことだけを返す
+    def handle_whisper_progress(self, events):
+        """Whisperの進捗イベントから進捗を推定し、プログレスバーを更新する"""
+        # 時間情報は既にWhisperTranscriberで処理されているため、見つかったことだけを返す
+        if any(isinstance(event, TimestampEvent) for event in events):
             return True
             
-        # セグメント情報を検出（時間情報が見つからない場合のフォールバック）
-        if "segment" in stdout.lower():
-            try:
-                # "Processing segment X / Y"のようなフォーマットから進捗を抽出
-                parts = stdout.split("segment")[1].strip().split("/")
-                if len(parts) == 2:
-                    current = int(parts[0].strip())
-                    total = int(parts[1].strip().split()[0])
-                    
-                    # 進捗率を計算 (20%〜80%の範囲で)
-                    progress = 20 + int(60 * current / total)
-                    self.progress_bar.setValue(progress)
-                    self.progress_label.setText(f"文字起こし中... セグメント {current}/{total}")
-                    return True
-            except Exception as e:
-                print(f"進捗解析エラー: {str(e)}")
+        # セグメント情報（時間情報が見つからない場合のフォールバック）
+        counters = [event for event in events if isinstance(event, SegmentCounterEvent)]
+        if counters:
+            current, total = counters[-1]
+            # 進捗率を計算 (20%〜80%の範囲で)
+            progress = 20 + int(60 * current / total)
+            self.progress_bar.setValue(progress)
+            self.progress_label.setText(f"文字起こし中... セグメント {current}/{total}")
+            return True
                 
         return False
 
     def closeEvent(self, event):
         """ウィンドウが閉じられるときのイベント"""
         self.audio_player.cleanup() # AudioPlayerのクリーンアップを呼び出す
+        self.scheduler.cancel_all() # 待ち中のジョブを取り消し、実行中の文字起こしを中止する
+        self.transcriber.save_checkpoint(force=True) # 文字起こし途中の結果を再開用に保存
+        if self.transcriber.cache is not None:
+            self.transcriber.cache.close() # キャッシュの統計を保存
+        if self.resident_backend is not None:
+            self.resident_backend.shutdown() # 常駐ワーカーを終了
+        if self.archive is not None:
+            self.archive.close()
         event.accept() # イベントを受け入れてウィンドウを閉じる
 
     def browse_srt_file(self):
@@ -884,7 +1108,7 @@ class MainWindow(QMainWindow):
         file_dialog = QFileDialog()
         srt_path, _ = file_dialog.getOpenFileName(
             self, "SRTファイルを選択", "",
-            "SRTファイル (*.srt);;すべてのファイル (*)"
+            "字幕ファイル (*.srt *.vtt *.json *.lsseg);;すべてのファイル (*)"
         )
 
         if srt_path:
@@ -896,8 +1120,13 @@ class MainWindow(QMainWindow):
     def load_srt_data(self, srt_path):
         """指定されたSRTファイルを読み込み、表示を更新する"""
         try:
-            print(f"SRTファイル読み込み開始: {srt_path}")
-            segments = self._parse_srt_file_main(srt_path)
+            logger.info("SRTファイル読み込み開始: %s", srt_path)
+            try:
+                # 最新のサイドカーがあればメモリマップで開き、なければ読みながらストアへ格納する
+                segments = load_segments(srt_path)
+            except (OSError, ValueError):
+                logger.exception("字幕ファイルの解析に失敗しました: %s", srt_path)
+                segments = SegmentStore()
 
             if not segments:
                 QMessageBox.warning(self, "SRT読み込みエラー", "SRTファイルの解析に失敗しました。ファイル形式を確認してください。")
@@ -905,9 +1134,8 @@ class MainWindow(QMainWindow):
                 self.progress_bar.setValue(0)
                 return
 
-            self.segments = segments
-            # 全体の文字起こしテキストを生成
-            self.transcription = "".join([seg.get('text', '').strip() + "\n" for seg in segments])
+            self.set_segments(segments)
+            self.plain_transcription = ""
 
             # 音声関連情報をクリア
             self.audio_file = None
@@ -929,58 +1157,18 @@ class MainWindow(QMainWindow):
 
             self.progress_bar.setValue(100)
             self.progress_label.setText("SRTファイルの読み込み完了")
-            print("SRTファイル読み込み成功")
+            logger.info("SRTファイル読み込み成功")
 
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("SRTファイルの読み込み中にエラーが発生しました")
             QMessageBox.critical(self, "SRT読み込みエラー", f"SRTファイルの読み込み中に予期せぬエラーが発生しました:\n{e}")
             self.progress_label.setText("SRT読み込みエラー")
             self.progress_bar.setValue(0)
 
-    def _parse_srt_file_main(self, srt_file_path):
-        """SRTファイルを解析してセグメントリストを生成 (MainWindow用)"""
-        segments = []
-        try:
-            with open(srt_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            entries = content.strip().split('\n\n')
-            for entry in entries:
-                lines = entry.split('\n')
-                if len(lines) >= 3:
-                    time_range = lines[1]
-                    start_time, end_time = self._parse_srt_time_range_main(time_range)
-                    text = ' '.join(lines[2:])
-                    segment = {'start': start_time, 'end': end_time, 'text': text}
-                    segments.append(segment)
-            return segments
-        except Exception as e:
-            print(f"SRTファイル解析エラー (main): {str(e)}")
-            return []
-
-    def _parse_srt_time_range_main(self, time_range):
-        """SRTの時間範囲文字列をパース (MainWindow用)"""
-        try:
-            start_str, end_str = time_range.split(' --> ')
-            start_time = self._parse_srt_time_main(start_str)
-            end_time = self._parse_srt_time_main(end_str)
-            return start_time, end_time
-        except:
-            return 0, 0
-
-    def _parse_srt_time_main(self, time_str):
-        """SRTの時間文字列を秒に変換 (MainWindow用)"""
-        try:
-            parts = time_str.split(':')
-            h = int(parts[0])
-            m = int(parts[1])
-            s_ms = parts[2].replace(',', '.')
-            s, ms = map(float, s_ms.split('.'))
-            return h * 3600 + m * 60 + s + ms / 1000.0
-        except:
-            return 0
-
 def main():
     """メイン関数"""
+    configure_logging(LOG_LEVEL, LOG_MODULE_LEVELS)
+    install_crash_handler(os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs"))
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -1,32 +1,33 @@
 """
-QtMultimedia を使用した音声プレーヤーユーティリティ (ffmpegによる一時変換)
+QtMultimedia を使用した音声プレーヤーユーティリティ (ffmpegでデコードしたPCMキャッシュを再生)
+
+デコードはバックグラウンドで行い、先頭部分のデコードが終わった時点でその部分の再生を始められる。
+全体のデコードが終わると再生位置・再生状態を保ったまま全体のWAVに切り替える。
+
+終了位置を指定したセグメントの再生は、デコード済みのPCMから区間を切り出して QAudioOutput で再生する
+(SegmentPlaybackEngine)。出力デバイスが形式に対応していない場合や準備中は QMediaPlayer で再生し、
+タイマーで終了位置を確認する。
 """
 
 import os
-import time
-import subprocess
-import tempfile
-import traceback
 from PyQt5.QtCore import QObject, pyqtSignal, QUrl, QTimer
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent # QAudioOutputは不要
+from utils.log_utils import get_logger
+from utils.pcm_cache import get_pcm_cache
+from utils.job_scheduler import qt_main_thread_dispatcher
+from utils.segment_playback import SegmentPlaybackEngine
 
-# スクリプトの場所に基づいて ffmpeg.exe のパスを決定
-# utils/audio_player.py から見て、プロジェクトルート (main.pyがある階層) の
-# 中にある Faster-Whisper-XXL ディレクトリの中にあると仮定
-script_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(script_dir) # utilsの一つ上の階層
-ffmpeg_dir_name = "Faster-Whisper-XXL"
-ffmpeg_exe_name = "ffmpeg.exe"
-ffmpeg_path = os.path.join(project_root, ffmpeg_dir_name, ffmpeg_exe_name)
-print(f"使用するffmpegのパス: {ffmpeg_path}")
+logger = get_logger(__name__)
 
 class AudioPlayer(QObject):
-    """QMediaPlayerを使用して音声を再生するためのクラス (ffmpegで一時WAV変換)"""
+    """QMediaPlayerを使用して音声を再生するためのクラス (PCMキャッシュのWAVを再生)"""
 
     position_changed = pyqtSignal(int)  # 現在の再生位置（ミリ秒）
     duration_changed = pyqtSignal(int)  # 音声の長さ（ミリ秒）
     state_changed = pyqtSignal(int)    # 再生状態の変更（0=停止, 1=再生中, 2=一時停止）
     error_occurred = pyqtSignal(str)   # エラー発生時
+    load_progress = pyqtSignal(int, str)  # 再生用音声の準備の進捗（0-100, メッセージ）
+    load_finished = pyqtSignal(bool)      # 再生用音声の準備の終了（全体を再生できるようになったかどうか）
 
     # QMediaPlayerの状態定数 (互換性のため)
     class State:
@@ -44,10 +45,18 @@ class AudioPlayer(QObject):
         # self.player.setAudioOutput(self.audio_output) # 不要
 
         self.original_file = "" # 元ファイルのパス
-        self.temp_wav_file = None # 一時WAVファイルのパス
+        self.playback_file = None # 再生するWAV（PCMキャッシュ内）のパス
+        self.decoded_audio = None # デコード済み音声（波形表示などからも参照できる）
         self.end_position = None
         self.last_known_good_position = 0
 
+        # バックグラウンドのデコード
+        self.decode_job = None         # 実行中のデコード (DecodeJob)
+        self.available_ms = None       # 先頭部分だけを再生している場合、その長さ（ミリ秒）
+        self.pending_position = None   # メディアの読み込み後に移動する位置（ミリ秒）
+        self.pending_play = False      # メディアの読み込み後に再生を始めるかどうか
+        self._dispatch = qt_main_thread_dispatcher()  # ワーカースレッドからの通知をメインスレッドで処理する
+
         # エラーリトライ用 (ffmpeg変換で不要になる可能性が高いが念のため残す)
         self.retry_count = 0
         self.max_retries = 3
@@ -59,99 +68,176 @@ class AudioPlayer(QObject):
         self.player.stateChanged.connect(self._on_playback_state_changed)
         self.player.error.connect(self._on_error)
 
-        # セグメント終了タイマー
+        # セグメントの区間再生 (QAudioOutput)
+        self.segment_engine = SegmentPlaybackEngine(self)
+        self.segment_engine.position_changed.connect(self.position_changed.emit)
+        self.segment_engine.state_changed.connect(self._on_segment_state_changed)
+        self.segment_engine.finished.connect(self._on_segment_finished)
+
+        # セグメント終了タイマー (QMediaPlayerでセグメントを再生する場合)
         self.segment_end_timer = QTimer()
         self.segment_end_timer.setInterval(50)
         self.segment_end_timer.timeout.connect(self._check_segment_end)
 
-    def _cleanup_temp_file(self):
-        """一時ファイルを削除する"""
-        if self.temp_wav_file and os.path.exists(self.temp_wav_file):
-            try:
-                os.remove(self.temp_wav_file)
-                print(f"一時ファイルを削除しました: {self.temp_wav_file}")
-                self.temp_wav_file = None
-            except Exception as e:
-                print(f"一時ファイルの削除に失敗しました: {e}")
+    def _release_decoded_audio(self):
+        """読み込み中のデコード済み音声を解放する（キャッシュのファイルは他の処理でも使うため削除しない）"""
+        self.segment_engine.set_source(None)
+        if self.decoded_audio is not None:
+            self.decoded_audio.close()
+            self.decoded_audio = None
+        self.playback_file = None
+        self.available_ms = None
+        self.pending_position = None
+        self.pending_play = False
+
+    def is_loading(self):
+        """再生用の音声をデコード中かどうか"""
+        return self.decode_job is not None
 
     def load_file(self, file_path):
-        """音声ファイルをffmpegで一時WAVに変換して読み込む (バンドル版ffmpegを使用)"""
+        """
+        音声ファイルの共有PCMキャッシュへのデコードをバックグラウンドで開始する（デコード済みなら変換しない）
+
+        進捗は load_progress、終了は load_finished で通知する。先頭部分の準備ができた時点から再生できる。
+
+        Returns:
+            bool: デコードを開始できたかどうか
+        """
         if not os.path.exists(file_path):
             self.error_occurred.emit(f"ファイルが存在しません: {file_path}")
             return False
 
+        self.cancel_load()
         self.player.stop()
-        self._cleanup_temp_file()
+        self.player.setMedia(QMediaContent())
+        self._release_decoded_audio()
         self.original_file = os.path.abspath(file_path)
         self.retry_count = 0
 
-        try:
-            # ffmpeg実行ファイルの存在確認
-            if not os.path.exists(ffmpeg_path):
-                error_msg = f"バンドルされたffmpegが見つかりません: {ffmpeg_path}"
-                print(error_msg)
-                self.error_occurred.emit(error_msg)
-                return False
-
-            # 一時WAVファイルのパスを生成
-            temp_dir = tempfile.gettempdir()
-            temp_wav_name = f"audio_player_temp_{int(time.time())}.wav"
-            self.temp_wav_file = os.path.join(temp_dir, temp_wav_name)
-            print(f"一時WAVファイルパス: {self.temp_wav_file}")
-
-            # ffmpegコマンドの構築 (バンドルされたffmpegのパスを使用)
-            ffmpeg_cmd = [ffmpeg_path, '-i', self.original_file, '-y', self.temp_wav_file]
-            print(f"ffmpegコマンド実行: {' '.join(ffmpeg_cmd)}")
-
-            # ffmpegを実行
-            process = subprocess.run(ffmpeg_cmd, capture_output=True, text=True, check=False, creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
-
-            if process.returncode != 0:
-                error_msg = f"ffmpegでの変換に失敗しました (Code: {process.returncode})\n実行パス: {ffmpeg_path}\nエラー出力:\n{process.stderr}"
-                print(error_msg)
+        # 文字起こし・無音検出と同じデコード結果を使う（初回のみffmpegで変換）
+        # コールバックはワーカースレッドから呼ばれるため、メインスレッドに渡してから処理する
+        self.decode_job = get_pcm_cache().start_decode(
+            self.original_file,
+            on_progress=lambda job: self._dispatch(lambda: self._on_decode_progress(job)),
+            on_preview=lambda job: self._dispatch(lambda: self._on_decode_preview(job)),
+            on_done=lambda job: self._dispatch(lambda: self._on_decode_done(job)),
+        )
+        self.load_progress.emit(0, "再生用の音声を準備中...")
+        return True
+
+    def cancel_load(self):
+        """実行中のデコードを取り消す（終了は load_finished(False) で通知される）"""
+        if self.decode_job is not None:
+            logger.info("再生用の音声の準備を取り消します: %s", self.original_file)
+            self.decode_job.cancel()
+
+    def _on_decode_progress(self, job):
+        if job is not self.decode_job:
+            return
+        minutes = int(job.decoded_seconds // 60)
+        if job.duration > 0:
+            self.load_progress.emit(int(job.progress * 100),
+                                    f"再生用の音声を準備中... {minutes}/{int(job.duration // 60)}分")
+        else:
+            self.load_progress.emit(0, f"再生用の音声を準備中... {minutes}分")
+
+    def _on_decode_preview(self, job):
+        """先頭部分のWAVができたら、全体のデコードを待たずにそれを再生できるようにする"""
+        if job is not self.decode_job or job.preview_path is None:
+            return
+        self.playback_file = job.preview_path
+        self.available_ms = int(job.preview_seconds * 1000)
+        self.player.setMedia(QMediaContent(QUrl.fromLocalFile(self.playback_file)))
+        logger.info("先頭%s秒を再生できます: %s", job.preview_seconds, self.playback_file)
+        self.load_progress.emit(int(job.progress * 100),
+                                f"先頭{int(job.preview_seconds)}秒を再生できます（残りを準備中）")
+
+    def _on_decode_done(self, job):
+        if job is not self.decode_job:
+            # 別のファイルを選び直したなどで取り消された以前のデコード
+            if job.result is not None:
+                job.result.close()
+            job.discard_preview()
+            return
+        self.decode_job = None
+
+        if job.result is None:
+            if self.available_ms is not None:
+                self.player.stop()
+                self.player.setMedia(QMediaContent())
+                self._release_decoded_audio()
+            QTimer.singleShot(1000, job.discard_preview)
+            if not job.cancelled:
+                error_msg = f"音声のデコードに失敗しました: {self.original_file}"
+                logger.error(error_msg)
                 self.error_occurred.emit(error_msg)
-                self._cleanup_temp_file()
-                return False
-
-            print("ffmpegでの変換成功")
-
-            # 変換された一時WAVファイルをQMediaPlayerにセット
-            url = QUrl.fromLocalFile(self.temp_wav_file)
-            content = QMediaContent(url)
-            self.player.setMedia(content)
-            print(f"一時WAVファイルを準備完了: {self.temp_wav_file}")
-            return True
+            self.load_finished.emit(False)
+            return
+
+        # 先頭部分を再生していた場合は、位置と再生状態を引き継いで全体のWAVに切り替える
+        if self.available_ms is not None:
+            if self.pending_position is None:
+                self.pending_position = self.player.position()
+                self.pending_play = self.player.state() == QMediaPlayer.PlayingState
+        self.decoded_audio = job.result
+        self.segment_engine.set_source(job.result)
+        self.playback_file = job.result.path
+        self.available_ms = None
+        self.player.setMedia(QMediaContent(QUrl.fromLocalFile(self.playback_file)))
+        # 先頭部分のWAVはメディアを切り替えて手放されてから削除する
+        QTimer.singleShot(1000, job.discard_preview)
+        logger.info("再生用の音声を準備完了: %s", self.playback_file)
+        self.load_progress.emit(100, "再生用の音声の準備完了")
+        self.load_finished.emit(True)
+
+    def _defer_until_loaded(self, position_ms, play):
+        """まだデコードされていない位置への移動・再生を、全体の準備ができるまで保留する"""
+        logger.debug("準備中のため %sms への移動を保留します", position_ms)
+        self.pending_position = position_ms
+        self.pending_play = play
+        if play:
+            self.player.pause()
+        self.load_progress.emit(int(self.decode_job.progress * 100) if self.decode_job else 0,
+                                "再生位置の音声を準備中... 準備ができ次第再生します")
 
-        except FileNotFoundError:
-             # このエラーは↑のos.path.existsで捕捉されるはずだが念のため
-             error_msg = f"ffmpegが見つかりません: {ffmpeg_path}"
-             print(error_msg)
-             self.error_occurred.emit(error_msg)
-             self._cleanup_temp_file()
-             return False
-        except Exception as e:
-            error_msg = f"ファイル読み込み/変換エラー: {str(e)}"
-            print(error_msg)
-            traceback.print_exc()
-            self.error_occurred.emit(error_msg)
-            self._cleanup_temp_file()
+    def _is_beyond_available(self, position_ms):
+        if self.decode_job is None:
             return False
+        return self.available_ms is None or position_ms >= self.available_ms
 
     def play(self, start_position_ms=None):
         """再生を開始 (指定された位置から)"""
-        # 一時ファイルが準備されているか確認
-        if self.player.mediaStatus() == QMediaPlayer.NoMedia or not self.temp_wav_file:
-             msg = "再生エラー: メディアが設定されていないか、一時ファイルがありません。"
-             print(msg)
+        if start_position_ms is None and self.segment_engine.state == SegmentPlaybackEngine.PausedState:
+            self.segment_engine.resume()
+            return True
+        self.segment_engine.stop()
+        if self._play_segment_range(start_position_ms):
+            return True
+
+        # デコード中でその位置がまだ再生できない場合は、準備ができてから再生する
+        position = start_position_ms if start_position_ms is not None else self.player.position()
+        if self._is_beyond_available(position):
+            self._defer_until_loaded(position, play=True)
+            return True
+        if self.playback_file and self.player.mediaStatus() in (QMediaPlayer.LoadingMedia, QMediaPlayer.NoMedia):
+            # メディアを切り替えた直後はまだ位置を設定できないため、読み込み後に再生する
+            self.pending_position = start_position_ms
+            self.pending_play = True
+            return True
+
+        # 再生用のファイルが準備されているか確認
+        if self.player.mediaStatus() == QMediaPlayer.NoMedia or not self.playback_file:
+             msg = "再生エラー: メディアが設定されていないか、再生用のファイルがありません。"
+             logger.warning(msg)
              self.error_occurred.emit(msg)
              return False
 
         if start_position_ms is not None:
-             print(f"再生開始位置を設定: {start_position_ms}ms")
+             logger.debug("再生開始位置を設定: %sms", start_position_ms)
              self.set_position(start_position_ms)
              self.last_known_good_position = start_position_ms
 
-        print("再生開始")
+        logger.debug("再生開始")
         try:
             self.player.play()
             if self.end_position is not None:
@@ -161,39 +247,83 @@ class AudioPlayer(QObject):
             self.error_occurred.emit(f"再生開始エラー: {str(e)}")
             return False
 
+    def _play_segment_range(self, start_position_ms):
+        """終了位置が指定されていれば、区間をそのサンプルだけ QAudioOutput で再生する"""
+        if (start_position_ms is None or self.end_position is None
+                or self.decoded_audio is None or self.decode_job is not None):
+            return False
+        end_position_ms = self.end_position
+        self.player.pause()
+        if not self.segment_engine.play_range(start_position_ms / 1000, end_position_ms / 1000):
+            return False
+        self.segment_end_timer.stop()
+        self.end_position = None
+        return True
+
+    def prefetch_segments(self, ranges):
+        """次に再生しそうなセグメントの区間 [(開始秒, 終了秒), ...] のPCMを、現在の処理の後で先に読み込む"""
+        if self.decoded_audio is not None and ranges:
+            QTimer.singleShot(0, lambda: self.segment_engine.prefetch(ranges))
+
+    def _on_segment_state_changed(self, state):
+        # 区間の終わりでの停止は _on_segment_finished で一時停止として通知する
+        if state != SegmentPlaybackEngine.StoppedState:
+            self.state_changed.emit(state)
+
+    def _on_segment_finished(self, position_ms):
+        """区間の終わりでは、QMediaPlayer をその位置で一時停止した状態にする（続きは通常の再生）"""
+        self.player.setPosition(position_ms)
+        self.last_known_good_position = position_ms
+        self.state_changed.emit(QMediaPlayer.PausedState)
+
     def pause(self):
         """再生を一時停止/再開"""
+        if self.segment_engine.state == SegmentPlaybackEngine.PlayingState:
+            self.segment_engine.pause()
+            return
+        if self.segment_engine.state == SegmentPlaybackEngine.PausedState:
+            self.segment_engine.resume()
+            return
         if self.player.playbackState() == QMediaPlayer.PlayingState:
-            print("一時停止")
+            logger.debug("一時停止")
             self.player.pause()
             self.segment_end_timer.stop() # 一時停止中はタイマーも停止
         elif self.player.playbackState() == QMediaPlayer.PausedState:
-            print("再生再開")
+            logger.debug("再生再開")
             self.player.play()
             if self.end_position is not None:
                 self.segment_end_timer.start() # 再開時にタイマーも再開
 
     def stop(self):
         """再生を停止"""
-        print("停止")
+        logger.debug("停止")
+        self.segment_engine.stop()
         self.player.stop()
         self.segment_end_timer.stop()
         self.end_position = None
         self.last_known_good_position = 0
-        # 停止時に一時ファイルを削除するかどうかは検討事項
-        # すぐに再利用する可能性があるなら削除しない方が効率的かもしれない
-        # self._cleanup_temp_file() # ここで消すと再生の度に変換が必要になる
 
     def set_position(self, position_ms):
         """再生位置を設定 (ミリ秒単位)"""
-        if self.player.mediaStatus() >= QMediaPlayer.LoadedMedia:
-             print(f"位置を設定: {position_ms}ms")
+        if self.segment_engine.is_active():
+            if self.segment_engine.contains(position_ms):
+                # 再生中の区間内（再生中のセグメントの選択など）は区間の再生を続ける
+                return
+            self.segment_engine.stop()
+        if self._is_beyond_available(position_ms) or (
+                self.playback_file and self.player.mediaStatus() == QMediaPlayer.LoadingMedia):
+            # まだ再生できない位置・読み込み中のメディアの場合は、準備ができてから移動する
+            self.pending_position = position_ms
+        elif self.player.mediaStatus() >= QMediaPlayer.LoadedMedia:
+             logger.debug("位置を設定: %sms", position_ms)
              self.player.setPosition(max(0, position_ms))
         else:
-             print(f"警告: メディア未ロードのため位置設定スキップ: {position_ms}ms")
+             logger.warning("メディア未ロードのため位置設定スキップ: %sms", position_ms)
 
     def get_position(self):
         """現在の再生位置を取得 (ミリ秒単位)"""
+        if self.segment_engine.is_active():
+            return self.segment_engine.position()
         return self.player.position()
 
     def get_duration(self):
@@ -202,12 +332,14 @@ class AudioPlayer(QObject):
 
     def get_state(self):
         """現在の再生状態を取得"""
+        if self.segment_engine.is_active():
+            return self.segment_engine.state
         return self.player.playbackState()
 
     def set_end_position(self, position_ms):
         """セグメント再生の終了位置を設定 (ミリ秒単位)"""
         if position_ms is not None and position_ms > 0:
-             print(f"セグメント終了位置を設定: {position_ms}ms")
+             logger.debug("セグメント終了位置を設定: %sms", position_ms)
              self.end_position = max(0, position_ms)
         else:
              self.end_position = None
@@ -217,14 +349,14 @@ class AudioPlayer(QObject):
         """タイマーでセグメント終了位置をチェック"""
         if self.end_position is not None and self.player.position() >= self.end_position:
              current_pos = self.player.position()
-             print(f"セグメント終了位置に到達: {current_pos}ms >= {self.end_position}ms")
+             logger.debug("セグメント終了位置に到達: %sms >= %sms", current_pos, self.end_position)
              # self.stop() # stop() だと状態がリセットされすぎるので pause() に変更
              self.player.pause() # 停止ではなく一時停止にする
              self.segment_end_timer.stop() # タイマーを止める
              self.end_position = None # 終了位置をリセット
              # 必要であれば、位置をend_positionぴったりに調整する
              # self.player.setPosition(self.end_position)
-             print("セグメント終了、一時停止しました")
+             logger.debug("セグメント終了、一時停止しました")
 
     def _on_position_changed(self, position):
         """QMediaPlayerからの再生位置変更シグナル"""
@@ -234,28 +366,42 @@ class AudioPlayer(QObject):
 
     def _on_duration_changed(self, duration):
         """QMediaPlayerからの期間変更シグナル"""
-        print(f"Duration検出: {duration}ms")
+        logger.debug("Duration検出: %sms", duration)
         self.duration_changed.emit(duration)
 
     def _on_media_status_changed(self, status):
         """QMediaPlayerのメディアステータス変更シグナル"""
-        print(f"メディアステータス変更: {status}")
+        logger.debug("メディアステータス変更: %s", status)
         if status == QMediaPlayer.LoadedMedia:
-             print("メディア読み込み完了 (一時WAV)")
+             logger.debug("メディア読み込み完了: %s", self.playback_file)
+             # 読み込み前に指示された移動・再生をここで行う
+             if self.pending_position is not None:
+                 position, self.pending_position = self.pending_position, None
+                 self.player.setPosition(max(0, position))
+             if self.pending_play:
+                 self.pending_play = False
+                 self.player.play()
+                 if self.end_position is not None:
+                     self.segment_end_timer.start()
         elif status == QMediaPlayer.InvalidMedia:
              # ffmpegで変換しているので、これが起きる可能性は低いが...
-             error_msg = f"無効なメディアファイルです (一時WAV: {self.temp_wav_file})"
+             error_msg = f"無効なメディアファイルです (再生用WAV: {self.playback_file})"
              self.error_occurred.emit(error_msg)
-             print(f"エラー: {error_msg}")
+             logger.error("エラー: %s", error_msg)
         elif status == QMediaPlayer.EndOfMedia:
-             print("メディア再生終了")
+             if self.decode_job is not None and self.available_ms is not None:
+                 # 先頭部分の末尾まで再生した場合は、全体の準備ができたら続きから再生する
+                 self._defer_until_loaded(self.available_ms, play=True)
+                 return
+             logger.debug("メディア再生終了")
              self.stop()
 
     def _on_playback_state_changed(self, state):
          """QMediaPlayerの再生状態変更シグナル"""
-         print(f"再生状態変更: {state}")
+         logger.debug("再生状態変更: %s", state)
          self.state_changed.emit(state)
-         if state == QMediaPlayer.StoppedState:
+         if state == QMediaPlayer.StoppedState and not self.pending_play:
+              # 全体のWAVへの切り替え待ちで止まった場合はセグメントの終了位置を残す
               self.segment_end_timer.stop()
               self.end_position = None
 
@@ -263,17 +409,17 @@ class AudioPlayer(QObject):
         """QMediaPlayerのエラーシグナル"""
         error_string = self.player.errorString()
         error_code_hex = f"{error:#0{10}x}"
-        print(f"QMediaPlayerエラー発生: Code={error}, Hex={error_code_hex}, Message={error_string}, File={self.temp_wav_file}")
+        logger.error("QMediaPlayerエラー発生: Code=%s, Hex=%s, Message=%s, File=%s", error, error_code_hex, error_string, self.playback_file)
 
         # ffmpeg変換によりDirectShowエラーは減るはずだが、リトライロジックは残す
         if error_code_hex == self.DIRECTSHOW_ERROR_CODE:
             if self.retry_count < self.max_retries:
                 self.retry_count += 1
-                print(f"DirectShowエラー ({error_code_hex}) を検出。リトライします ({self.retry_count}/{self.max_retries})。")
+                logger.warning("DirectShowエラー (%s) を検出。リトライします (%s/%s)。", error_code_hex, self.retry_count, self.max_retries)
                 QTimer.singleShot(500 * self.retry_count, self._retry_playback)
             else:
                 error_msg = f"DirectShowエラー ({error_code_hex}) が最大リトライ回数 ({self.max_retries}) を超えました。再生を停止します。"
-                print(error_msg)
+                logger.error(error_msg)
                 self.error_occurred.emit(error_msg)
                 self.stop()
         else:
@@ -281,22 +427,25 @@ class AudioPlayer(QObject):
 
     def _retry_playback(self):
          """DirectShowエラーからの再生リトライ処理"""
-         print(f"再生リトライ実行: 位置を {self.last_known_good_position}ms に戻して再生")
+         logger.info("再生リトライ実行: 位置を %sms に戻して再生", self.last_known_good_position)
          self.player.stop()
          QTimer.singleShot(100, lambda: self._perform_retry_play())
 
     def _perform_retry_play(self):
-         # リトライ時は一時ファイルが存在するか確認
-         if self.temp_wav_file and os.path.exists(self.temp_wav_file):
+         # リトライ時は再生用のファイルが存在するか確認
+         if self.playback_file and os.path.exists(self.playback_file):
              self.set_position(self.last_known_good_position)
              self.player.play()
-             print("リトライ再生開始試行")
+             logger.debug("リトライ再生開始試行")
          else:
-             print("リトライ再生失敗: 一時ファイルが見つかりません")
-             self.error_occurred.emit("リトライ再生に失敗しました (一時ファイル喪失)")
+             logger.error("リトライ再生失敗: 再生用のファイルが見つかりません")
+             self.error_occurred.emit("リトライ再生に失敗しました (再生用ファイル喪失)")
 
     def cleanup(self):
-         """リソース解放 (一時ファイルの削除)"""
-         print("AudioPlayer クリーンアップ")
+         """リソース解放 (デコード済み音声のメモリマップを閉じる)"""
+         logger.debug("AudioPlayer クリーンアップ")
+         self.cancel_load()
+         self.decode_job = None
+         self.segment_engine.stop()
          self.player.stop()
-         self._cleanup_temp_file() # アプリ終了時に一時ファイルを削除 
\ No newline at end of file
+         self._release_decoded_audio() 
\ No newline at end of file
@@ -10,6 +10,8 @@ from pptx import Presentation
 from docx import Document
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from utils.job_scheduler import RESOURCE_DOCUMENTS, PRIORITY_NORMAL
+
 class DocumentParser(QObject):
     """ドキュメントからテキストを抽出するクラス"""
     
@@ -18,6 +20,24 @@ class DocumentParser(QObject):
     def __init__(self):
         super().__init__()
     
+    def submit_extraction(self, scheduler, file_path, priority=PRIORITY_NORMAL, on_done=None):
+        """
+        テキスト抽出をスケジューラの資料抽出枠に投入する
+        
+        Args:
+            scheduler (JobScheduler): ジョブスケジューラ
+            file_path (str): ファイルのパス
+            priority (int, optional): 優先度
+            on_done (callable, optional): 終了時に job を受け取る関数
+            
+        Returns:
+            Job: 結果が抽出テキストになるジョブ
+        """
+        return scheduler.submit(
+            self.extract_text_from_file, file_path,
+            resource=RESOURCE_DOCUMENTS, priority=priority, name=os.path.basename(file_path), on_done=on_done
+        )
+    
     def extract_text_from_file(self, file_path):
         """
         ファイルからテキストを抽出する
@@ -0,0 +1,429 @@
+"""
+資源ごとの同時実行数と優先度を考慮して、文字起こし・資料抽出・要約APIなどの処理を順番に実行するスケジューラ (GUI非依存)
+
+- 資源（"transcription" / "api" / "documents" など）ごとに同時実行数を制限する
+- 待ち行列は優先度（値が小さいほど先）→ 投入順で並べる
+- 待ち中のジョブは取り消せる。実行中のジョブには取り消し要求を伝える
+- 資源ごとの待ち行列の長さ・待ち時間・実行時間を集計する
+
+ジョブの実行方法は3通り:
+    submit(func)        空きができたらスケジューラのスレッドで func を実行する
+    submit_async(start) 空きができたら start(job) を呼ぶ。QProcessなど非同期の処理は終了時に job.finish() を呼ぶ
+    with slot(resource) 呼び出し元のスレッドで枠が空くまで待ち、with ブロックの間その枠を使う
+
+使用例:
+    scheduler = JobScheduler({"api": 2, "documents": 2})
+    job = scheduler.submit(parser.extract_text_from_file, path, resource="documents")
+    text = job.result()
+"""
+
+import time
+import heapq
+import itertools
+import threading
+
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# 資源の種類
+RESOURCE_TRANSCRIPTION = "transcription"  # CPU/GPUを占有する文字起こし
+RESOURCE_API = "api"                      # 生成AIのAPI呼び出し（I/O待ち）
+RESOURCE_DOCUMENTS = "documents"          # 資料からのテキスト抽出
+
+# 優先度（値が小さいほど先に実行する）
+PRIORITY_HIGH = 0     # 画面操作から直接依頼された処理
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20     # まとめて処理するバッチなど
+
+# ジョブの状態
+STATE_QUEUED = "queued"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+STATE_CANCELLED = "cancelled"
+
+DEFAULT_LIMIT = 1
+
+
+class JobCancelledError(Exception):
+    """取り消されたジョブの結果を取得しようとした場合の例外"""
+
+
+class Job:
+    """スケジューラに投入された1件の処理"""
+
+    def __init__(self, scheduler, job_id, name, resource, priority, on_done=None, on_cancel=None):
+        self.scheduler = scheduler
+        self.id = job_id
+        self.name = name
+        self.resource = resource
+        self.priority = priority
+        self.state = STATE_QUEUED
+        self.error = None
+        self.cancel_requested = False  # 実行中のジョブが定期的に確認して中断するためのフラグ
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+        self._result = None
+        self._on_done = on_done
+        self._on_cancel = on_cancel
+        self._start = None
+        self._on_complete = None  # 終了時にロックの外で直接呼ぶ関数（dispatch を経由しない）
+        self._done_event = threading.Event()
+
+    @property
+    def wait_seconds(self):
+        """枠が空くまで待った時間（秒）"""
+        end = self.started_at if self.started_at is not None else (self.finished_at or time.perf_counter())
+        return end - self.submitted_at
+
+    @property
+    def run_seconds(self):
+        """実行にかかった時間（秒）。未実行の場合は0"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def done(self):
+        """終了（成功・失敗・取り消し）しているかどうか"""
+        return self._done_event.is_set()
+
+    def wait(self, timeout=None):
+        """終了するまで待つ"""
+        return self._done_event.wait(timeout)
+
+    def result(self, timeout=None):
+        """
+        終了を待って結果を返す
+
+        Raises:
+            JobCancelledError: 取り消された場合
+            Exception: 処理で発生した例外
+        """
+        if not self._done_event.wait(timeout):
+            raise TimeoutError(f"ジョブ {self.name} が終了していません")
+        if self.state == STATE_CANCELLED:
+            raise JobCancelledError(f"ジョブ {self.name} は取り消されました")
+        if self.error is not None:
+            raise self.error
+        return self._result
+
+    def finish(self, result=None):
+        """非同期ジョブの正常終了を通知する"""
+        self.scheduler._complete(self, STATE_DONE, result=result)
+
+    def fail(self, error):
+        """非同期ジョブの失敗を通知する"""
+        if not isinstance(error, BaseException):
+            error = RuntimeError(str(error))
+        self.scheduler._complete(self, STATE_FAILED, error=error)
+
+    def cancel(self):
+        """
+        ジョブを取り消す（待ち中ならすぐに、実行中なら取り消し要求を伝える）
+
+        Returns:
+            bool: 待ち中のジョブを取り消した場合 True
+        """
+        return self.scheduler.cancel(self)
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.name} {self.resource} {self.state}>"
+
+
+class _ResourceStats:
+    """資源ごとの集計値"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+        self.max_queue_depth = 0
+
+
+class JobScheduler:
+    """資源ごとの同時実行数と優先度に従ってジョブを実行するスケジューラ"""
+
+    def __init__(self, limits=None, dispatch=None):
+        """
+        Args:
+            limits (dict, optional): 資源名 -> 同時実行数（未指定の資源は1）
+            dispatch (callable, optional): 非同期ジョブの開始と完了コールバックを実行する関数。
+                GUIでは qt_main_thread_dispatcher() を渡してメインスレッドで実行させる
+        """
+        self.limits = dict(limits or {})
+        self.dispatch = dispatch or (lambda func: func())
+        self._lock = threading.Lock()
+        self._queues = {}   # 資源名 -> [(優先度, 投入順, Job)]
+        self._running = {}  # 資源名 -> 実行中の Job の集合
+        self._stats = {}    # 資源名 -> _ResourceStats
+        self._ids = itertools.count(1)
+
+    def set_limit(self, resource, limit):
+        """資源の同時実行数を変更する（増やした場合は待ち中のジョブをすぐに開始する）"""
+        with self._lock:
+            self.limits[resource] = max(1, int(limit))
+            to_start = self._take_startable(resource)
+        self._start_jobs(to_start)
+
+    def _new_job(self, name, resource, priority, on_done, on_cancel):
+        return Job(self, next(self._ids), name or resource, resource, priority, on_done, on_cancel)
+
+    def submit(self, func, *args, resource=RESOURCE_API, priority=PRIORITY_NORMAL, name=None,
+               on_done=None, on_cancel=None, **kwargs):
+        """
+        空きができたらスケジューラのスレッドで func(*args, **kwargs) を実行するジョブを投入する
+
+        Args:
+            func (callable): 実行する関数
+            resource (str): 使用する資源
+            priority (int): 優先度（値が小さいほど先）
+            name (str, optional): ログ・集計用の名前
+            on_done (callable, optional): 終了時に job を受け取る関数（dispatch経由で呼ばれる）
+            on_cancel (callable, optional): 実行中に取り消された場合に呼ぶ関数
+
+        Returns:
+            Job: 投入したジョブ
+        """
+        job = self._new_job(name or getattr(func, "__name__", None), resource, priority, on_done, on_cancel)
+
+        def run_in_thread(job):
+            def target():
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException as e:
+                    logger.exception("ジョブ %s でエラーが発生しました", job.name, extra={"stage": job.resource})
+                    self._complete(job, STATE_FAILED, error=e)
+                else:
+                    self._complete(job, STATE_DONE, result=result)
+            threading.Thread(target=target, name=f"job-{job.id}-{job.name}", daemon=True).start()
+
+        job._start = run_in_thread
+        self._enqueue(job)
+        return job
+
+    def submit_async(self, start, resource=RESOURCE_TRANSCRIPTION, priority=PRIORITY_NORMAL, name=None,
+                     on_done=None, on_cancel=None):
+        """
+        空きができたら start(job) を呼ぶジョブを投入する（終了時に job.finish() / job.fail() を呼ぶこと）
+
+        Args:
+            start (callable): job を受け取って処理を開始する関数（dispatch経由で呼ばれる）
+            resource (str): 使用する資源
+            priority (int): 優先度（値が小さいほど先）
+            name (str, optional): ログ・集計用の名前
+            on_done (callable, optional): 終了時に job を受け取る関数
+            on_cancel (callable, optional): 実行中に取り消された場合に呼ぶ関数（プロセスの停止など）
+
+        Returns:
+            Job: 投入したジョブ
+        """
+        job = self._new_job(name, resource, priority, on_done, on_cancel)
+
+        def run_dispatched(job):
+            def begin():
+                try:
+                    start(job)
+                except BaseException as e:
+                    logger.exception("ジョブ %s の開始に失敗しました", job.name, extra={"stage": job.resource})
+                    self._complete(job, STATE_FAILED, error=e)
+            self.dispatch(begin)
+
+        job._start = run_dispatched
+        self._enqueue(job)
+        return job
+
+    def slot(self, resource, priority=PRIORITY_NORMAL, name=None):
+        """
+        呼び出し元のスレッドで資源の枠を確保するコンテキストマネージャを返す
+
+        使用例:
+            with scheduler.slot("api") as job:
+                summary = api.generate_summary(...)
+        """
+        return _SlotContext(self, resource, priority, name)
+
+    def _enqueue(self, job):
+        with self._lock:
+            queue = self._queues.setdefault(job.resource, [])
+            heapq.heappush(queue, (job.priority, job.id, job))
+            stats = self._stats.setdefault(job.resource, _ResourceStats())
+            stats.submitted += 1
+            stats.max_queue_depth = max(stats.max_queue_depth, len(queue))
+            to_start = self._take_startable(job.resource)
+        logger.debug("ジョブを投入しました: %s (資源=%s, 優先度=%s, 待ち=%d)", job.name, job.resource, job.priority,
+                     len(queue), extra={"stage": "scheduler"})
+        self._start_jobs(to_start)
+
+    def _take_startable(self, resource):
+        """空いている枠の数だけ待ち行列からジョブを取り出す（ロック内で呼ぶ）"""
+        queue = self._queues.get(resource, [])
+        running = self._running.setdefault(resource, set())
+        limit = self.limits.get(resource, DEFAULT_LIMIT)
+        to_start = []
+        while queue and len(running) < limit:
+            _, _, job = heapq.heappop(queue)
+            if job.state != STATE_QUEUED:
+                continue
+            job.state = STATE_RUNNING
+            job.started_at = time.perf_counter()
+            running.add(job)
+            stats = self._stats.setdefault(resource, _ResourceStats())
+            stats.total_wait += job.wait_seconds
+            stats.max_wait = max(stats.max_wait, job.wait_seconds)
+            to_start.append(job)
+        return to_start
+
+    def _start_jobs(self, jobs):
+        for job in jobs:
+            logger.debug("ジョブを開始します: %s (待ち時間 %.3f秒)", job.name, job.wait_seconds,
+                         extra={"stage": "scheduler"})
+            job._start(job)
+
+    def _complete(self, job, state, result=None, error=None):
+        with self._lock:
+            if job.state not in (STATE_QUEUED, STATE_RUNNING):
+                return
+            was_running = job.state == STATE_RUNNING
+            if job.cancel_requested and state == STATE_DONE and error is None:
+                state = STATE_CANCELLED
+            job.state = state
+            job._result = result
+            job.error = error
+            job.finished_at = time.perf_counter()
+            stats = self._stats.setdefault(job.resource, _ResourceStats())
+            if state == STATE_DONE:
+                stats.completed += 1
+            elif state == STATE_FAILED:
+                stats.failed += 1
+            else:
+                stats.cancelled += 1
+            to_start = []
+            if was_running:
+                self._running.get(job.resource, set()).discard(job)
+                stats.total_run += job.run_seconds
+                to_start = self._take_startable(job.resource)
+        job._done_event.set()
+        if job._on_complete is not None:
+            job._on_complete(job)
+        logger.debug("ジョブが終了しました: %s (%s, 実行時間 %.3f秒)", job.name, state, job.run_seconds,
+                     extra={"stage": "scheduler"})
+        if job._on_done is not None:
+            self.dispatch(lambda: job._on_done(job))
+        self._start_jobs(to_start)
+
+    def cancel(self, job):
+        """
+        ジョブを取り消す
+
+        Returns:
+            bool: 待ち中のジョブを取り消した場合 True（実行中の場合は取り消し要求のみ）
+        """
+        with self._lock:
+            state = job.state
+            job.cancel_requested = state in (STATE_QUEUED, STATE_RUNNING)
+        if state == STATE_QUEUED:
+            # 待ち行列からは開始時に読み飛ばす
+            self._complete(job, STATE_CANCELLED)
+            return True
+        if state == STATE_RUNNING and job._on_cancel is not None:
+            self.dispatch(lambda: job._on_cancel(job))
+        return False
+
+    def cancel_all(self, resource=None):
+        """待ち中のジョブをすべて取り消し、実行中のジョブに取り消しを要求する"""
+        with self._lock:
+            jobs = [job for name, queue in self._queues.items() if resource in (None, name) for _, _, job in queue]
+            jobs += [job for name, running in self._running.items() if resource in (None, name) for job in running]
+        for job in jobs:
+            self.cancel(job)
+
+    def queue_depth(self, resource):
+        """資源の待ち中のジョブ数"""
+        with self._lock:
+            return sum(1 for _, _, job in self._queues.get(resource, []) if job.state == STATE_QUEUED)
+
+    def metrics(self):
+        """
+        資源ごとの集計値を返す
+
+        Returns:
+            dict: 資源名 -> {limit, queued, running, submitted, completed, failed, cancelled,
+                  avg_wait_seconds, max_wait_seconds, avg_run_seconds, max_queue_depth}
+        """
+        with self._lock:
+            result = {}
+            for resource in set(self._stats) | set(self.limits):
+                stats = self._stats.get(resource, _ResourceStats())
+                started = stats.completed + stats.failed + len(self._running.get(resource, ()))
+                finished = stats.completed + stats.failed
+                result[resource] = {
+                    "limit": self.limits.get(resource, DEFAULT_LIMIT),
+                    "queued": sum(1 for _, _, job in self._queues.get(resource, []) if job.state == STATE_QUEUED),
+                    "running": len(self._running.get(resource, ())),
+                    "submitted": stats.submitted,
+                    "completed": stats.completed,
+                    "failed": stats.failed,
+                    "cancelled": stats.cancelled,
+                    "avg_wait_seconds": round(stats.total_wait / started, 3) if started else 0.0,
+                    "max_wait_seconds": round(stats.max_wait, 3),
+                    "avg_run_seconds": round(stats.total_run / finished, 3) if finished else 0.0,
+                    "max_queue_depth": stats.max_queue_depth,
+                }
+            return result
+
+
+class _SlotContext:
+    """JobScheduler.slot() が返すコンテキストマネージャ"""
+
+    def __init__(self, scheduler, resource, priority, name):
+        self.scheduler = scheduler
+        self.job = scheduler._new_job(name, resource, priority, None, None)
+        self._granted = threading.Event()
+        self.job._start = lambda job: self._granted.set()
+        # 待ち中に取り消された場合も待機を終わらせる
+        self.job._on_complete = lambda job: self._granted.set()
+
+    def __enter__(self):
+        """
+        Raises:
+            JobCancelledError: 枠が空く前に取り消された場合
+        """
+        self.scheduler._enqueue(self.job)
+        self._granted.wait()
+        if self.job.state == STATE_CANCELLED:
+            raise JobCancelledError(f"ジョブ {self.job.name} は取り消されました")
+        return self.job
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_value is not None:
+            self.job.fail(exc_value)
+        else:
+            self.job.finish()
+
+
+_qt_dispatcher = None
+
+
+def qt_main_thread_dispatcher():
+    """
+    Qtのメインスレッドで関数を実行する dispatch 関数を返す（どのスレッドから呼んでもよい）
+
+    QApplication の生成後、メインスレッドで最初に呼ぶこと。
+    """
+    global _qt_dispatcher
+    if _qt_dispatcher is None:
+        from PyQt5.QtCore import QObject, pyqtSignal
+
+        class _MainThreadInvoker(QObject):
+            invoke = pyqtSignal(object)
+
+        invoker = _MainThreadInvoker()
+        invoker.invoke.connect(lambda func: func())
+        _qt_dispatcher = invoker
+    return _qt_dispatcher.invoke.emit
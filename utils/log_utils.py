@@ -0,0 +1,325 @@
+"""
+アプリケーション全体のログ設定 (GUI非依存)
+
+- モジュールごとのログレベル（"OFF" で完全に無効化）
+- クラッシュレポート用に直近のログを保持するリングバッファ
+- stage / file / elapsed などの付加情報を持つ構造化レコードと JSON Lines 出力
+
+使用例:
+    from utils.log_utils import get_logger
+    logger = get_logger(__name__)
+    logger.debug("チャンク受信: %d bytes", len(data))
+    logger.info("文字起こし完了", extra={"stage": "transcribe", "file": path, "elapsed": 12.3})
+
+環境変数で設定を上書きできる:
+    LISTEN_SUMMARIZE_LOG_LEVEL=DEBUG
+    LISTEN_SUMMARIZE_LOG_MODULES=whisper_utils=DEBUG,audio_player=INFO
+    LISTEN_SUMMARIZE_LOG_JSON=logs/app_log.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from collections import deque
+from contextlib import contextmanager
+
+# アプリケーションのロガー階層の最上位
+ROOT_LOGGER_NAME = "listen_summarize"
+
+# すべてのログを無効化するレベル
+OFF = logging.CRITICAL + 10
+logging.addLevelName(OFF, "OFF")
+
+DEFAULT_CONSOLE_LEVEL = "WARNING"
+DEFAULT_RING_BUFFER_LEVEL = "INFO"
+DEFAULT_RING_BUFFER_SIZE = 2000
+
+# 構造化レコードとして扱う付加情報のキー
+STRUCTURED_FIELDS = ("stage", "file", "elapsed")
+
+ENV_LEVEL = "LISTEN_SUMMARIZE_LOG_LEVEL"
+ENV_MODULE_LEVELS = "LISTEN_SUMMARIZE_LOG_MODULES"
+ENV_JSON_PATH = "LISTEN_SUMMARIZE_LOG_JSON"
+
+_ring_buffer = None
+_json_writer = None
+_configure_lock = threading.Lock()
+
+
+def get_logger(name):
+    """
+    モジュール用のロガーを取得する
+
+    Args:
+        name (str): モジュール名（通常は __name__）。"utils." や "__main__" は省略される
+
+    Returns:
+        logging.Logger: "listen_summarize.<モジュール名>" のロガー
+    """
+    short_name = name.rsplit(".", 1)[-1]
+    if short_name == "__main__":
+        short_name = "main"
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{short_name}")
+
+
+def parse_level(level):
+    """"DEBUG" や "OFF" などのレベル名を数値に変換する"""
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).strip().upper())
+    if not isinstance(value, int):
+        raise ValueError(f"不明なログレベルです: {level}")
+    return value
+
+
+def parse_module_levels(text):
+    """
+    "whisper_utils=DEBUG,audio_player=INFO" 形式の文字列をモジュールごとのレベルに変換する
+
+    Returns:
+        dict: モジュール名 -> レベル名
+    """
+    levels = {}
+    for item in (text or "").split(","):
+        if "=" in item:
+            module, level = item.split("=", 1)
+            levels[module.strip()] = level.strip()
+    return levels
+
+
+def record_to_dict(record):
+    """
+    ログレコードをJSONに変換できる辞書にする
+
+    Args:
+        record (logging.LogRecord): ログレコード
+
+    Returns:
+        dict: 時刻・レベル・モジュール・メッセージと付加情報
+    """
+    data = {
+        "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+        "level": record.levelname,
+        "module": record.name.split(".", 1)[-1],
+        "message": record.getMessage(),
+    }
+    for field in STRUCTURED_FIELDS:
+        value = getattr(record, field, None)
+        if value is not None:
+            data[field] = value
+    if record.exc_info:
+        data["exception"] = logging.Formatter().formatException(record.exc_info)
+    return data
+
+
+class ConsoleFormatter(logging.Formatter):
+    """付加情報を末尾に添えて1行で表示するフォーマッター"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(module_name)s] %(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        record.module_name = record.name.split(".", 1)[-1]
+        text = super().format(record)
+        fields = []
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                fields.append(f"{field}={value:.3f}" if isinstance(value, float) else f"{field}={value}")
+        if fields:
+            text += f" ({', '.join(fields)})"
+        return text
+
+
+class ModuleLevelFilter(logging.Filter):
+    """モジュールごとのレベル（指定がなければ既定のレベル）以上のレコードだけを通す"""
+
+    def __init__(self, default_level, module_levels):
+        super().__init__()
+        self.default_level = default_level
+        self.module_levels = module_levels
+
+    def filter(self, record):
+        module = record.name.split(".", 1)[-1]
+        return record.levelno >= self.module_levels.get(module, self.default_level)
+
+
+class RingBufferHandler(logging.Handler):
+    """直近のログレコードをメモリ上に保持するハンドラー"""
+
+    def __init__(self, capacity=DEFAULT_RING_BUFFER_SIZE, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        # メッセージの整形はダンプ時まで遅らせる
+        self.records.append(record)
+
+    def snapshot(self):
+        """保持しているレコードを辞書のリストで返す"""
+        with self.lock:
+            records = list(self.records)
+        return [record_to_dict(record) for record in records]
+
+    def dump_jsonl(self, path):
+        """
+        保持しているレコードをJSON Lines形式で書き出す
+
+        Args:
+            path (str): 出力先のパス
+
+        Returns:
+            str: 出力先のパス
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for data in self.snapshot():
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+        return path
+
+
+class JsonLinesHandler(logging.Handler):
+    """レコードをJSON Lines形式でファイルへ書き出すハンドラー（書き込みはバックグラウンド）"""
+
+    def __init__(self, path, level=logging.NOTSET):
+        from utils.log_writer import AsyncLogWriter
+        super().__init__(level)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.writer = AsyncLogWriter(path, mode="a")
+
+    def emit(self, record):
+        try:
+            self.writer.write(json.dumps(record_to_dict(record), ensure_ascii=False) + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.writer.close()
+        super().close()
+
+
+def configure_logging(level=None, module_levels=None, ring_buffer_level=None,
+                      ring_buffer_size=DEFAULT_RING_BUFFER_SIZE, json_path=None):
+    """
+    アプリケーションのログ出力を設定する（環境変数の指定が引数より優先される）
+
+    Args:
+        level (str, optional): コンソールに出力するレベル（"OFF" ですべて無効）
+        module_levels (dict, optional): モジュール名 -> レベル名
+        ring_buffer_level (str, optional): リングバッファに保持するレベル
+        ring_buffer_size (int, optional): リングバッファに保持するレコード数
+        json_path (str, optional): JSON Linesを書き出すファイルのパス
+
+    Returns:
+        logging.Logger: アプリケーションの最上位ロガー
+    """
+    global _ring_buffer, _json_writer
+
+    console_level = parse_level(os.environ.get(ENV_LEVEL) or level or DEFAULT_CONSOLE_LEVEL)
+    modules = {name: parse_level(value) for name, value in (module_levels or {}).items()}
+    modules.update({name: parse_level(value) for name, value in parse_module_levels(os.environ.get(ENV_MODULE_LEVELS)).items()})
+    ring_level = parse_level(ring_buffer_level or DEFAULT_RING_BUFFER_LEVEL)
+    json_path = os.environ.get(ENV_JSON_PATH) or json_path
+    if console_level >= OFF:
+        ring_level = OFF
+
+    with _configure_lock:
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+        root.propagate = False
+
+        # レコードを生成する最低レベル（これ未満のlogger.debugなどは引数の整形も行われない）
+        root.setLevel(min(console_level, ring_level))
+        for name, module_level in modules.items():
+            logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}").setLevel(min(module_level, ring_level))
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(ConsoleFormatter())
+        console.addFilter(ModuleLevelFilter(console_level, modules))
+        root.addHandler(console)
+
+        _ring_buffer = RingBufferHandler(ring_buffer_size)
+        _ring_buffer.addFilter(ModuleLevelFilter(ring_level, modules))
+        root.addHandler(_ring_buffer)
+
+        _json_writer = None
+        if json_path:
+            _json_writer = JsonLinesHandler(json_path)
+            _json_writer.addFilter(ModuleLevelFilter(min(console_level, ring_level), modules))
+            root.addHandler(_json_writer)
+    return root
+
+
+def get_recent_events():
+    """
+    リングバッファに保持している直近のログを取得する
+
+    Returns:
+        list: record_to_dict 形式の辞書のリスト（未設定の場合は空）
+    """
+    return _ring_buffer.snapshot() if _ring_buffer is not None else []
+
+
+def dump_recent_events(path):
+    """
+    直近のログをJSON Lines形式で書き出す
+
+    Args:
+        path (str): 出力先のパス
+
+    Returns:
+        str: 出力先のパス（リングバッファが未設定の場合は None）
+    """
+    if _ring_buffer is None:
+        return None
+    return _ring_buffer.dump_jsonl(path)
+
+
+def install_crash_handler(report_dir):
+    """
+    未処理の例外が発生したときに直近のログをクラッシュレポートとして保存する
+
+    Args:
+        report_dir (str): レポートの保存先ディレクトリ
+    """
+    previous_hook = sys.excepthook
+
+    def handle_exception(exc_type, exc_value, exc_traceback):
+        if not issubclass(exc_type, KeyboardInterrupt):
+            logger = logging.getLogger(ROOT_LOGGER_NAME)
+            logger.critical("未処理の例外が発生しました", exc_info=(exc_type, exc_value, exc_traceback))
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            try:
+                path = dump_recent_events(os.path.join(report_dir, f"crash_{timestamp}.jsonl"))
+                if path:
+                    sys.stderr.write(f"クラッシュレポートを保存しました: {path}\n")
+            except OSError as e:
+                sys.stderr.write(f"クラッシュレポートの保存に失敗しました: {e}\n")
+        previous_hook(exc_type, exc_value, exc_traceback)
+
+    sys.excepthook = handle_exception
+
+
+@contextmanager
+def log_stage(logger, stage, file=None, level=logging.INFO):
+    """
+    処理段階の開始と終了を経過時間付きで記録する
+
+    使用例:
+        with log_stage(logger, "extract", file=path):
+            ...
+    """
+    logger.log(level, "%s 開始", stage, extra={"stage": stage, "file": file})
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        logger.exception("%s 失敗", stage, extra={"stage": stage, "file": file, "elapsed": time.perf_counter() - started})
+        raise
+    logger.log(level, "%s 完了", stage, extra={"stage": stage, "file": file, "elapsed": time.perf_counter() - started})
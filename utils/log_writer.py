@@ -0,0 +1,182 @@
+"""
+バックグラウンドスレッドでログファイルへ書き込む非同期ログライター (GUI非依存)
+
+書き込み要求はメモリ上の上限付きキューに積むだけで即座に戻り、
+ファイルのオープン・書き込み・ローテーションはすべて専用スレッドで行う。
+"""
+
+import os
+import gzip
+import time
+import queue
+import shutil
+import threading
+
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# キューに保持する書き込み要求の上限（超えた分は破棄して件数を記録する）
+DEFAULT_MAX_QUEUE = 10000
+# バッファをファイルへ書き出す間隔（秒）
+DEFAULT_FLUSH_INTERVAL = 0.5
+# 間隔を待たずに書き出すバッファサイズ（文字数）
+FLUSH_THRESHOLD = 64 * 1024
+# ローテーションするファイルサイズ（バイト）
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+# 保持する過去ログの数
+DEFAULT_BACKUP_COUNT = 3
+
+_STOP = object()
+
+
+class AsyncLogWriter:
+    """上限付きキューと定期フラッシュ、サイズによるローテーションを備えたログライター"""
+
+    def __init__(self, path, mode="w", max_queue=DEFAULT_MAX_QUEUE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT, compress=False):
+        """
+        Args:
+            path (str): ログファイルのパス
+            mode (str, optional): "w" で新規作成、"a" で追記
+            max_queue (int, optional): キューに保持する書き込み要求の上限
+            flush_interval (float, optional): ファイルへ書き出す間隔（秒）
+            max_bytes (int, optional): ローテーションするサイズ（0以下でローテーションしない）
+            backup_count (int, optional): 保持する過去ログの数
+            compress (bool, optional): ローテーションした過去ログと、閉じたログをgzip圧縮するかどうか
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self.dropped = 0  # キューが一杯で破棄した書き込み要求の数
+        self._write_failed = False  # 書き込みの失敗を記録済み（ログ出力先が自身の場合に失敗の記録が繰り返されないようにする）
+        self.bytes_written = 0  # これまでにファイルへ書き出したバイト数（ローテーション分も含む）
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._file = open(path, mode, encoding="utf-8")
+        self._file_size = self._file.tell()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="AsyncLogWriter", daemon=True)
+        self._thread.start()
+
+    def write(self, text):
+        """
+        書き込みを要求する（ブロックしない）
+
+        Args:
+            text (str): 書き込む文字列
+        """
+        if self._closed or not text:
+            return
+        try:
+            self._queue.put_nowait(text)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5.0):
+        """キューに残った内容を書き出してファイルを閉じる"""
+        if self._closed:
+            return
+        self._closed = True
+        if not self._thread.is_alive():
+            self._finish()
+            return
+        # 終了要求は破棄されないよう空きができるまで待って積むが、GUIスレッドから呼ばれるため待ち続けない
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("ログライターの終了を待てませんでした: %s", self.path)
+            return
+        self._thread.join(timeout)
+
+    def _run(self):
+        buffer = []
+        buffered = 0
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._flush(buffer)
+                self._finish()
+                return
+            if item is not None:
+                buffer.append(item)
+                buffered += len(item)
+            if buffered >= FLUSH_THRESHOLD or time.monotonic() - last_flush >= self.flush_interval:
+                self._flush(buffer)
+                buffer = []
+                buffered = 0
+                last_flush = time.monotonic()
+
+    def _flush(self, buffer):
+        if self.dropped:
+            buffer.append(f"\n[ログライター] キューが一杯のため {self.dropped} 件の出力を破棄しました\n")
+            self.dropped = 0
+        if not buffer or self._file is None:
+            return
+        text = "".join(buffer)
+        try:
+            self._file.write(text)
+            self._file.flush()
+        except (OSError, ValueError) as e:
+            if not self._write_failed:
+                self._write_failed = True
+                logger.warning("ログの書き込みに失敗しました: %s (%s)", self.path, e)
+            return
+        self._write_failed = False
+        size = len(text.encode("utf-8"))
+        self._file_size += size
+        self.bytes_written += size
+        if self.max_bytes > 0 and self._file_size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        """
+        現在のログを .1 に退避し、過去ログを1つずつずらす
+
+        他のプロセスがログを開いているなどで退避できない場合は、以降ローテーションせずに現在のファイルへ追記する。
+        """
+        try:
+            self._file.close()
+            suffix = ".gz" if self.compress else ""
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}{suffix}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}{suffix}")
+            if self.backup_count > 0:
+                rotated = f"{self.path}.1"
+                os.replace(self.path, rotated)
+                if self.compress:
+                    self._compress(rotated)
+        except OSError as e:
+            logger.warning("ログのローテーションに失敗したため、以降はローテーションしません: %s (%s)", self.path, e)
+            self.max_bytes = 0
+        try:
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._file_size = self._file.tell()
+        except OSError as e:
+            logger.warning("ログファイルを開けないため、以降の出力を破棄します: %s (%s)", self.path, e)
+            self._file = None
+
+    def _compress(self, path):
+        try:
+            with open(path, "rb") as src, gzip.open(f"{path}.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(path)
+        except OSError as e:
+            logger.warning("ログの圧縮に失敗しました: %s (%s)", path, e)
+
+    def _finish(self):
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+        except OSError:
+            return
+        if self.compress and self._file_size > 0:
+            self._compress(self.path)
@@ -0,0 +1,427 @@
+"""
+音声・動画ファイルの長さとストリーム情報を取得するプローブ (GUI非依存)
+
+WAV/MP3/FLAC/MP4(M4A) はコンテナのヘッダーだけを読み取り、デコードせずに長さを求める。
+ヘッダーから判定できない形式は ffprobe を1回だけ実行して補う。
+結果はパス・更新時刻・サイズをキーにメモリ上へ保存し、同じファイルを再度読み込まない。
+"""
+
+import os
+import json
+import struct
+import subprocess
+import threading
+from collections import OrderedDict, namedtuple
+
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# duration は秒（不明な場合は0）、sample_rate/channels は不明な場合は0
+MediaInfo = namedtuple("MediaInfo", ["duration", "sample_rate", "channels", "codec", "source"])
+
+# スクリプトの場所に基づいて ffprobe のパスを決定
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+DEFAULT_FFPROBE_PATH = os.path.join(project_root, "Faster-Whisper-XXL", "ffprobe.exe")
+
+# メモ化するファイル数の上限
+MAX_CACHE_ENTRIES = 256
+
+# MP3のフレーム同期を探す範囲（ID3タグの直後から）
+MP3_SYNC_SEARCH_BYTES = 64 * 1024
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise EOFError
+    return data
+
+
+def _probe_wav(f, file_size):
+    """RIFF/RF64 WAVE: fmt チャンクとdataチャンクのサイズから長さを求める"""
+    header = _read_exact(f, 12)
+    if header[:4] not in (b"RIFF", b"RF64") or header[8:12] != b"WAVE":
+        return None
+    is_rf64 = header[:4] == b"RF64"
+    rf64_data_size = None
+    channels = sample_rate = byte_rate = 0
+    codec = "pcm"
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return None
+        chunk_id, chunk_size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+        if chunk_id == b"ds64" and is_rf64:
+            body = _read_exact(f, chunk_size)
+            rf64_data_size = struct.unpack("<Q", body[8:16])[0]
+        elif chunk_id == b"fmt ":
+            body = _read_exact(f, chunk_size)
+            format_tag, channels, sample_rate, byte_rate = struct.unpack("<HHII", body[:12])
+            if format_tag == 3:
+                codec = "pcm_float"
+            elif format_tag not in (1, 0xFFFE):
+                codec = f"wav_0x{format_tag:04x}"
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            data_size = chunk_size
+            if is_rf64 and chunk_size == 0xFFFFFFFF and rf64_data_size is not None:
+                data_size = rf64_data_size
+            # 録音途中で止まったファイルはヘッダーの値が実際より大きいことがある
+            data_size = min(data_size, file_size - f.tell())
+            return MediaInfo(data_size / byte_rate, sample_rate, channels, codec, "header")
+        else:
+            f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+def _probe_flac(f, file_size):
+    """FLAC: STREAMINFOブロックの総サンプル数とサンプリング周波数から長さを求める"""
+    if _read_exact(f, 4) != b"fLaC":
+        return None
+    block_header = _read_exact(f, 4)
+    if block_header[0] & 0x7F != 0:  # 先頭は必ずSTREAMINFO
+        return None
+    info = _read_exact(f, 34)
+    packed = int.from_bytes(info[10:18], "big")
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x07) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate or not total_samples:
+        return None
+    return MediaInfo(total_samples / sample_rate, sample_rate, channels, "flac", "header")
+
+
+_MP3_BITRATES = {
+    # (MPEGバージョン1か, レイヤー) -> ビットレート表(kbps)
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _parse_mp3_frame_header(header):
+    """MPEGオーディオのフレームヘッダーを解析する（不正な場合は None）"""
+    if header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version_bits = (header[1] >> 3) & 0x03
+    layer_bits = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    is_v1 = version_bits == 3
+    layer = 4 - layer_bits
+    bitrate = _MP3_BITRATES[(is_v1, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version_bits][rate_index]
+    if layer == 1:
+        samples_per_frame = 384
+    elif layer == 3 and not is_v1:
+        samples_per_frame = 576
+    else:
+        samples_per_frame = 1152
+    channels = 1 if (header[3] >> 6) == 3 else 2
+    return is_v1, bitrate, sample_rate, samples_per_frame, channels
+
+
+def _probe_mp3(f, file_size):
+    """MP3: Xing/Info/VBRIヘッダーのフレーム数、なければCBRとしてビットレートから長さを求める"""
+    start = 0
+    tag = f.read(10)
+    if len(tag) == 10 and tag[:3] == b"ID3":
+        size = (tag[6] << 21) | (tag[7] << 14) | (tag[8] << 7) | tag[9]
+        start = 10 + size + (10 if tag[5] & 0x10 else 0)
+    f.seek(start)
+    data = f.read(MP3_SYNC_SEARCH_BYTES)
+
+    pos = data.find(b"\xff")
+    frame = None
+    while 0 <= pos <= len(data) - 4:
+        frame = _parse_mp3_frame_header(data[pos:pos + 4])
+        if frame:
+            break
+        pos = data.find(b"\xff", pos + 1)
+    if not frame:
+        return None
+    is_v1, bitrate, sample_rate, samples_per_frame, channels = frame
+    audio_start = start + pos
+
+    # VBRファイルはXing(Info)またはVBRIヘッダーに総フレーム数が書かれている
+    if is_v1:
+        side_info = 17 if channels == 1 else 32
+    else:
+        side_info = 9 if channels == 1 else 17
+    xing_pos = pos + 4 + side_info
+    frames = None
+    if data[xing_pos:xing_pos + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[xing_pos + 4:xing_pos + 8])[0]
+        if flags & 0x01:
+            frames = struct.unpack(">I", data[xing_pos + 8:xing_pos + 12])[0]
+    elif data[pos + 36:pos + 40] == b"VBRI":
+        frames = struct.unpack(">I", data[pos + 50:pos + 54])[0]
+    if frames:
+        return MediaInfo(frames * samples_per_frame / sample_rate, sample_rate, channels, "mp3", "header")
+
+    audio_bytes = file_size - audio_start
+    f.seek(max(0, file_size - 128))
+    if f.read(3) == b"TAG":  # ID3v1
+        audio_bytes -= 128
+    if bitrate <= 0 or audio_bytes <= 0:
+        return None
+    return MediaInfo(audio_bytes * 8 / bitrate, sample_rate, channels, "mp3", "header")
+
+
+def _iter_mp4_boxes(f, start, end):
+    """指定範囲のMP4ボックスを (種類, 本体の開始位置, 本体の終了位置) で列挙する"""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", _read_exact(f, 8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_size:
+            return
+        yield box_type, pos + header_size, min(pos + size, end)
+        pos += size
+
+
+def _find_mp4_box(f, start, end, box_type):
+    for found_type, body_start, body_end in _iter_mp4_boxes(f, start, end):
+        if found_type == box_type:
+            return body_start, body_end
+    return None
+
+
+def _read_mp4_duration(f, body_start):
+    """mvhd/mdhdボックスから (タイムスケール, 長さ) を読み取る"""
+    f.seek(body_start)
+    version = _read_exact(f, 4)[0]
+    if version == 1:
+        _, _, timescale, duration = struct.unpack(">QQIQ", _read_exact(f, 28))
+    else:
+        _, _, timescale, duration = struct.unpack(">IIII", _read_exact(f, 16))
+    return timescale, duration
+
+
+def _probe_mp4(f, file_size):
+    """MP4/M4A/MOV: moov内の音声トラック(mdhd)またはmvhdの長さを読み取る"""
+    header = _read_exact(f, 8)
+    if header[4:8] not in (b"ftyp", b"moov", b"wide", b"free", b"mdat"):
+        return None
+    moov = _find_mp4_box(f, 0, file_size, b"moov")
+    if moov is None:
+        return None
+
+    # 動画ファイルでは音声トラックの長さを優先する
+    for box_type, trak_start, trak_end in _iter_mp4_boxes(f, *moov):
+        if box_type != b"trak":
+            continue
+        mdia = _find_mp4_box(f, trak_start, trak_end, b"mdia")
+        if mdia is None:
+            continue
+        hdlr = _find_mp4_box(f, mdia[0], mdia[1], b"hdlr")
+        if hdlr is None:
+            continue
+        f.seek(hdlr[0] + 8)
+        if f.read(4) != b"soun":
+            continue
+        mdhd = _find_mp4_box(f, mdia[0], mdia[1], b"mdhd")
+        if mdhd is None:
+            continue
+        timescale, duration = _read_mp4_duration(f, mdhd[0])
+        if timescale and duration:
+            # 音声トラックのタイムスケールは通常サンプリング周波数と一致する
+            return MediaInfo(duration / timescale, timescale, 0, "mp4a", "header")
+
+    mvhd = _find_mp4_box(f, moov[0], moov[1], b"mvhd")
+    if mvhd is None:
+        return None
+    timescale, duration = _read_mp4_duration(f, mvhd[0])
+    if not timescale or not duration:
+        return None
+    return MediaInfo(duration / timescale, 0, 0, "mp4", "header")
+
+
+# 拡張子 -> 優先して試すヘッダーパーサー
+_HEADER_PROBES = {
+    ".wav": _probe_wav,
+    ".wave": _probe_wav,
+    ".mp3": _probe_mp3,
+    ".flac": _probe_flac,
+    ".m4a": _probe_mp4,
+    ".mp4": _probe_mp4,
+    ".m4v": _probe_mp4,
+    ".mov": _probe_mp4,
+    ".aac": _probe_mp4,
+}
+
+
+def probe_header(file_path):
+    """
+    コンテナのヘッダーだけを読んで長さを求める
+
+    Args:
+        file_path (str): 音声・動画ファイルのパス
+
+    Returns:
+        MediaInfo: 取得できない形式の場合は None
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    first = _HEADER_PROBES.get(ext)
+    # 拡張子と中身が異なるファイルもあるため、シグネチャで判定できるパーサーも順に試す
+    # (MP3はフレーム同期の誤検出を避けるため拡張子が一致する場合のみ)
+    probes = [first] if first else []
+    probes += [p for p in (_probe_wav, _probe_mp4, _probe_flac) if p is not first]
+    try:
+        file_size = os.path.getsize(file_path)
+        with open(file_path, "rb") as f:
+            for probe in probes:
+                f.seek(0)
+                try:
+                    info = probe(f, file_size)
+                except (EOFError, struct.error, KeyError, IndexError):
+                    info = None
+                if info and info.duration > 0:
+                    return info
+    except OSError as e:
+        logger.warning("ヘッダーの読み込みに失敗しました: %s", e)
+    return None
+
+
+def probe_ffprobe(file_path, ffprobe_path=None):
+    """
+    ffprobeを1回実行して長さと最初の音声ストリームの情報を取得する
+
+    Args:
+        file_path (str): 音声・動画ファイルのパス
+        ffprobe_path (str, optional): ffprobeのパス
+
+    Returns:
+        MediaInfo: 取得できなかった場合は None
+    """
+    ffprobe_path = ffprobe_path or DEFAULT_FFPROBE_PATH
+    if not os.path.exists(ffprobe_path):
+        logger.warning("ffprobeが見つかりません: %s", ffprobe_path)
+        return None
+
+    ffprobe_cmd = [
+        ffprobe_path,
+        "-v", "error",
+        "-select_streams", "a:0",  # 最初のオーディオストリームを選択
+        "-show_entries", "format=duration:stream=codec_name,sample_rate,channels,duration",
+        "-of", "json",
+        file_path
+    ]
+    try:
+        result = subprocess.run(
+            ffprobe_cmd, capture_output=True, text=True, check=False,
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+        )
+    except OSError as e:
+        logger.warning("ffprobeの実行に失敗しました: %s", e)
+        return None
+    if result.returncode != 0:
+        logger.warning("ffprobe実行エラー (Code: %s):\n%s", result.returncode, result.stderr)
+        return None
+
+    try:
+        output_data = json.loads(result.stdout)
+    except ValueError:
+        logger.warning("ffprobeのJSON出力のパースに失敗しました:\n%s", result.stdout)
+        return None
+    streams = output_data.get("streams") or [{}]
+    stream = streams[0]
+    duration = output_data.get("format", {}).get("duration") or stream.get("duration")
+    try:
+        duration = float(duration)
+    except (TypeError, ValueError):
+        logger.warning("ffprobeの出力に長さが含まれていません。")
+        return None
+    return MediaInfo(
+        duration,
+        int(stream.get("sample_rate") or 0),
+        int(stream.get("channels") or 0),
+        stream.get("codec_name") or "",
+        "ffprobe",
+    )
+
+
+def probe_media(file_path, ffprobe_path=None, use_ffprobe=True):
+    """
+    ファイルの長さとストリーム情報を取得する（結果はパス・更新時刻・サイズでメモ化）
+
+    Args:
+        file_path (str): 音声・動画ファイルのパス
+        ffprobe_path (str, optional): ffprobeのパス
+        use_ffprobe (bool, optional): ヘッダーから取得できない場合にffprobeを実行するかどうか
+
+    Returns:
+        MediaInfo: 取得できなかった場合は None
+    """
+    path = os.path.abspath(file_path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    info = probe_header(path)
+    if info is None and use_ffprobe:
+        info = probe_ffprobe(path, ffprobe_path)
+    if info is None and not use_ffprobe:
+        # ffprobeを後で実行できるよう、失敗した結果は保存しない
+        return None
+
+    with _cache_lock:
+        _cache[key] = info
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return info
+
+
+def get_duration(file_path, ffprobe_path=None):
+    """
+    ファイルの長さを秒単位で取得する
+
+    Returns:
+        float: 長さ（秒）。取得できなかった場合は0
+    """
+    info = probe_media(file_path, ffprobe_path)
+    return info.duration if info else 0
+
+
+def clear_cache():
+    """メモ化した結果を破棄する"""
+    with _cache_lock:
+        _cache.clear()
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    for target in sys.argv[1:]:
+        started = time.perf_counter()
+        result = probe_media(target)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"{target}: {result} ({elapsed:.2f} ms)")
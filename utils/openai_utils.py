@@ -6,6 +6,8 @@ import os
 import openai
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from utils.job_scheduler import RESOURCE_API, PRIORITY_NORMAL
+
 class OpenAIAPI(QObject):
     """OpenAI APIとの通信を行うクラス"""
     
@@ -34,6 +36,26 @@ class OpenAIAPI(QObject):
         """
         self.model = model
     
+    def submit_summary(self, scheduler, prompt, transcription, additional_info="", priority=PRIORITY_NORMAL, on_done=None):
+        """
+        要約の生成をスケジューラのAPI枠に投入する
+        
+        Args:
+            scheduler (JobScheduler): ジョブスケジューラ
+            prompt (str): 要約用プロンプトテンプレート
+            transcription (str): 文字起こしテキスト
+            additional_info (str, optional): 追加資料からの情報
+            priority (int, optional): 優先度
+            on_done (callable, optional): 終了時に job を受け取る関数
+            
+        Returns:
+            Job: 結果が要約文字列になるジョブ
+        """
+        return scheduler.submit(
+            self.generate_summary, prompt, transcription, additional_info,
+            resource=RESOURCE_API, priority=priority, name="summary", on_done=on_done
+        )
+    
     def generate_summary(self, prompt, transcription, additional_info=""):
         """
         文字起こしと追加情報から要約を生成する
@@ -0,0 +1,68 @@
+"""
+文字起こし・要約結果のファイル出力を行うユーティリティ
+"""
+
+import os
+from datetime import datetime
+
+from utils.transcript_sidecar import write_sidecar, sidecar_path
+
+
+def get_default_output_dir():
+    """
+    結果保存先のデフォルトディレクトリを取得する
+
+    Returns:
+        str: ~/Documents/要約ツール
+    """
+    return os.path.join(os.path.expanduser("~"), "Documents", "要約ツール")
+
+
+def save_result_files(output_dir, audio_file, transcription, summary, timestamp=None):
+    """
+    文字起こしと要約をテキストファイルとして保存する
+
+    Args:
+        output_dir (str): 出力ディレクトリ（空の場合はデフォルト）
+        audio_file (str): 元の音声ファイルのパス（ファイル名の基に使う）
+        transcription (str or SegmentStore): 文字起こしテキスト
+            （SegmentStoreの場合はバッファをそのまま書き出し、隣にセグメントのサイドカーも書き出す）
+        summary (str): 要約テキスト
+        timestamp (str, optional): ファイル名に付ける日時（未指定時は現在時刻）
+
+    Returns:
+        dict: 保存したファイルのパス ('transcription', 'segments', 'summary')
+    """
+    output_dir = output_dir or get_default_output_dir()
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 現在の日時
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    # ファイル名の設定
+    base_name = os.path.splitext(os.path.basename(audio_file))[0] if audio_file else "transcription"
+
+    saved = {}
+
+    # 文字起こしの保存
+    if transcription:
+        transcription_file = os.path.join(output_dir, f"{base_name}_{timestamp}_transcription.txt")
+        if hasattr(transcription, "write_transcript"):
+            with open(transcription_file, "wb") as f:
+                transcription.write_transcript(f)
+            sidecar_file = sidecar_path(transcription_file)
+            if write_sidecar(sidecar_file, transcription):
+                saved['segments'] = sidecar_file
+        else:
+            with open(transcription_file, "w", encoding="utf-8") as f:
+                f.write(transcription)
+        saved['transcription'] = transcription_file
+
+    # 要約の保存
+    if summary:
+        summary_file = os.path.join(output_dir, f"{base_name}_{timestamp}_summary.txt")
+        with open(summary_file, "w", encoding="utf-8") as f:
+            f.write(summary)
+        saved['summary'] = summary_file
+
+    return saved
@@ -0,0 +1,477 @@
+"""
+長時間音声を無音区間で分割し、複数のfaster-whisperプロセスで並列に文字起こしするユーティリティ
+"""
+
+import os
+import shutil
+from PyQt5.QtCore import QObject, pyqtSignal, QProcess
+
+from utils.whisper_utils import (
+    ffmpeg_path, WHISPER_EXE_NAME, build_whisper_arguments
+)
+from utils.subtitle_utils import write_srt_file, write_text_file
+from utils.transcript_sidecar import write_sidecar, sidecar_path
+from utils.log_utils import get_logger
+from utils.vad import parse_silencedetect_output
+from utils.process_supervisor import kill_process_tree, describe_stop_reason
+from utils.whisper_backends import ProcessWatchdog
+
+logger = get_logger(__name__)
+
+# 1ワーカー(faster-whisperプロセス)あたりの想定メモリ使用量（バイト）
+MEMORY_PER_WORKER = 3 * 1024 ** 3
+# 1ワーカーあたりに割り当てるCPUスレッド数
+THREADS_PER_WORKER = 4
+
+# チャンク長の目安（秒）
+MIN_CHUNK_SECONDS = 120
+MAX_CHUNK_SECONDS = 900
+
+# 無音検出のパラメータ
+SILENCE_NOISE_DB = -35
+SILENCE_MIN_DURATION = 0.6
+
+def get_available_memory():
+    """
+    利用可能な物理メモリ量を取得する
+
+    Returns:
+        int: 利用可能メモリ（バイト）。取得できない場合は0
+    """
+    try:
+        if os.name == "nt":
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [
+                    ("dwLength", ctypes.c_ulong),
+                    ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong),
+                    ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong),
+                    ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong),
+                    ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+                ]
+
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return int(status.ullAvailPhys)
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES")
+    except Exception as e:
+        logger.warning("利用可能メモリの取得に失敗しました: %s", e)
+        return 0
+
+
+def recommended_worker_count(memory_per_worker=MEMORY_PER_WORKER, threads_per_worker=THREADS_PER_WORKER):
+    """
+    CPUコア数と空きメモリから同時実行するワーカー数を決定する
+
+    Args:
+        memory_per_worker (int): 1ワーカーあたりの想定メモリ（バイト）
+        threads_per_worker (int): 1ワーカーあたりのCPUスレッド数
+
+    Returns:
+        int: ワーカー数（最低1）
+    """
+    cpu_count = os.cpu_count() or 1
+    by_cpu = max(1, cpu_count // max(1, threads_per_worker))
+
+    available = get_available_memory()
+    by_memory = max(1, available // memory_per_worker) if available > 0 else by_cpu
+
+    return int(max(1, min(by_cpu, by_memory)))
+
+
+def plan_chunks(duration, silences, target_seconds, min_seconds=MIN_CHUNK_SECONDS, max_seconds=MAX_CHUNK_SECONDS):
+    """
+    無音区間の中央で音声を分割するチャンク計画を作成する
+
+    Args:
+        duration (float): 音声全体の長さ（秒）
+        silences (list): (開始秒, 終了秒) の無音区間リスト
+        target_seconds (float): 目標とするチャンク長（秒）
+        min_seconds (float): チャンクの最小長（秒）
+        max_seconds (float): チャンクの最大長（秒）
+
+    Returns:
+        list: (開始秒, 終了秒) のタプルのリスト
+    """
+    if duration <= 0:
+        return []
+
+    target_seconds = min(max(target_seconds, min_seconds), max_seconds)
+    cut_points = sorted((start + end) / 2 for start, end in silences)
+
+    chunks = []
+    start = 0.0
+    while duration - start > target_seconds + min_seconds:
+        ideal = start + target_seconds
+        candidates = [p for p in cut_points if start + min_seconds <= p <= start + max_seconds]
+        if candidates:
+            cut = min(candidates, key=lambda p: abs(p - ideal))
+        else:
+            # 無音が見つからない場合は目標位置で強制的に分割
+            cut = ideal
+        chunks.append((start, cut))
+        start = cut
+
+    chunks.append((start, duration))
+    return chunks
+
+
+def plan_chunks_in_ranges(ranges, silences, target_seconds):
+    """
+    指定した区間ごとにチャンク計画を作成する（チェックポイントから再開する場合の未処理区間向け）
+
+    Args:
+        ranges (list): (開始秒, 終了秒) の処理対象区間リスト
+        silences (list): (開始秒, 終了秒) の無音区間リスト（元音声の時間軸）
+        target_seconds (float): 目標とするチャンク長（秒）
+
+    Returns:
+        list: 元音声の時間軸での (開始秒, 終了秒) のタプルのリスト
+    """
+    chunks = []
+    for range_start, range_end in ranges:
+        local_silences = [
+            (start - range_start, end - range_start)
+            for start, end in silences if start >= range_start and end <= range_end
+        ]
+        for start, end in plan_chunks(range_end - range_start, local_silences, target_seconds):
+            chunks.append((start + range_start, end + range_start))
+    return chunks
+
+
+def merge_chunk_segments(chunk_results):
+    """
+    チャンクごとのセグメントを元の時間軸に戻して結合する
+
+    Args:
+        chunk_results (list): (チャンク開始秒, セグメントリスト) のタプルのリスト
+
+    Returns:
+        list: 開始時間順に並んだセグメントリスト
+    """
+    merged = []
+    for offset, segments in chunk_results:
+        for segment in segments:
+            merged.append({
+                'start': segment.get('start', 0) + offset,
+                'end': segment.get('end', 0) + offset,
+                'text': segment.get('text', ''),
+            })
+    merged.sort(key=lambda s: (s['start'], s['end']))
+    return merged
+
+
+class ParallelTranscriber(QObject):
+    """音声を無音区間で分割し、複数のfaster-whisperプロセスで並列に文字起こしするクラス"""
+
+    progress_updated = pyqtSignal(int, str)
+    transcription_finished = pyqtSignal(str, list, bool)  # (テキスト, セグメント, 成功フラグ)
+
+    def __init__(self, whisper_path, parse_srt, max_workers=None):
+        """
+        Args:
+            whisper_path (str): faster-whisper-xxlのディレクトリ
+            parse_srt (callable): SRTファイルのパスを受け取りセグメントリストを返す関数
+            max_workers (int, optional): 同時実行ワーカー数（未指定時は自動決定）
+        """
+        super().__init__()
+        self.whisper_path = whisper_path
+        self.parse_srt = parse_srt
+        self.max_workers = max_workers
+        self.workers = 1
+        self.threads_per_worker = THREADS_PER_WORKER
+
+        self.audio_file_path = ""
+        self.output_directory = ""
+        self.work_directory = ""
+        self.basename = ""
+        self.audio_duration = 0
+
+        self.silence_process = None
+        self.silence_output = []
+        self.chunks = []
+        self.pending = []
+        self.running = {}  # チャンク番号 -> QProcess
+        self.watchdogs = {}  # チャンク番号 -> 文字起こし中のプロセスの ProcessWatchdog
+        self.results = {}  # チャンク番号 -> セグメントリスト
+        self.failed = False
+        self.stop_reason = None  # チャンクの停止・時間超過で失敗した場合の理由 (process_supervisor.STOP_*)
+        self.finished_emitted = False
+        self.use_source_directly = False
+        self.checkpoint = None
+        self.resumed_seconds = 0  # チェックポイントから引き継いだ処理済みの秒数
+        self.decoded_audio = None
+
+    def start(self, audio_file_path, output_dir, audio_duration, checkpoint=None, decoded_audio=None):
+        """
+        並列文字起こしを開始する
+
+        Args:
+            audio_file_path (str): 音声ファイルのパス
+            output_dir (str): 出力ディレクトリ
+            audio_duration (float): 音声の長さ（秒）
+            checkpoint (TranscriptionCheckpoint, optional): 完了したチャンクを保存し、未処理区間だけを処理する
+            decoded_audio (DecodedAudio, optional): デコード済みのPCM。指定時はチャンクをここから切り出す
+        """
+        self.audio_file_path = audio_file_path
+        self.checkpoint = checkpoint
+        self.decoded_audio = decoded_audio
+        self.resumed_seconds = 0
+        self.output_directory = output_dir
+        self.audio_duration = audio_duration
+        self.basename = os.path.basename(audio_file_path).split('.')[0]
+        self.work_directory = os.path.join(output_dir, f"{self.basename}_chunks")
+        os.makedirs(self.work_directory, exist_ok=True)
+
+        self.workers = self.max_workers or recommended_worker_count()
+        cpu_count = os.cpu_count() or 1
+        self.threads_per_worker = max(1, cpu_count // self.workers)
+
+        self.chunks = []
+        self.pending = []
+        self.running = {}
+        self.watchdogs = {}
+        self.results = {}
+        self.failed = False
+        self.stop_reason = None
+        self.finished_emitted = False
+        self.use_source_directly = False
+
+        if audio_duration <= 0 or not os.path.exists(ffmpeg_path):
+            logger.info("音声長またはffmpegが不明なため、分割せずに1チャンクで処理します")
+            self.use_source_directly = True
+            self._start_chunks([(0.0, max(0.0, audio_duration))])
+            return
+
+        self.progress_updated.emit(1, "無音区間を検出中...")
+        self.silence_output = []
+        self.silence_process = QProcess()
+        self.silence_process.setProcessChannelMode(QProcess.MergedChannels)
+        self.silence_process.readyReadStandardOutput.connect(self._read_silence_output)
+        self.silence_process.finished.connect(self._on_silence_detected)
+        # デコード済みのPCMがあれば、元の音声の代わりにそれを解析する（圧縮音声の再デコードを省く）
+        source_path = decoded_audio.path if decoded_audio is not None else audio_file_path
+        self.silence_process.start(ffmpeg_path, [
+            "-hide_banner", "-nostats",
+            "-i", source_path,
+            "-vn",
+            "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_DURATION}",
+            "-f", "null", "-",
+        ])
+
+    def cancel(self, notify=False):
+        """
+        実行中の全プロセスを停止する
+
+        Args:
+            notify (bool): Trueの場合は中止したことを transcription_finished で通知する
+        """
+        self.failed = True
+        self.pending = []
+        if self.silence_process and self.silence_process.state() != QProcess.NotRunning:
+            self.silence_process.kill()
+        for process in list(self.running.values()):
+            if process.state() != QProcess.NotRunning:
+                kill_process_tree(int(process.processId()))
+                process.kill()
+        if notify:
+            self.progress_updated.emit(100, "文字起こしを中止しました")
+            self._emit_finished("", [], False)
+
+    def _read_silence_output(self):
+        data = self.silence_process.readAllStandardOutput()
+        if data:
+            self.silence_output.append(bytes(data).decode('utf-8', errors='ignore'))
+
+    def _on_silence_detected(self, exit_code, exit_status):
+        silences = parse_silencedetect_output("".join(self.silence_output))
+        self.silence_output = []
+        if exit_code != 0:
+            logger.warning("無音検出に失敗しました (Code: %s)。固定長で分割します", exit_code)
+            silences = []
+        logger.debug("検出した無音区間: %s件", len(silences))
+
+        # ワーカーあたり2チャンク程度になるよう目標長を決める（負荷の偏りを抑えるため）
+        ranges = [(0.0, self.audio_duration)]
+        if self.checkpoint is not None:
+            ranges = self.checkpoint.missing_ranges(self.audio_duration)
+            self.resumed_seconds = self.audio_duration - sum(end - start for start, end in ranges)
+            if self.resumed_seconds > 0:
+                logger.info("チェックポイントから再開します: 処理済み %.1f秒", self.resumed_seconds,
+                            extra={"stage": "checkpoint", "file": self.audio_file_path})
+            if not ranges:
+                self._finish()
+                return
+        remaining = sum(end - start for start, end in ranges)
+        target = remaining / (self.workers * 2)
+        chunks = plan_chunks_in_ranges(ranges, silences, target)
+        self._start_chunks(chunks)
+
+    def _start_chunks(self, chunks):
+        self.chunks = chunks
+        self.pending = list(range(len(chunks)))
+        logger.info("並列文字起こし: チャンク数=%s, ワーカー数=%s, スレッド/ワーカー=%s", len(chunks), self.workers, self.threads_per_worker)
+        self.progress_updated.emit(2, f"{len(chunks)}個のチャンクを{self.workers}並列で文字起こし中...")
+        self._fill_workers()
+
+    def _fill_workers(self):
+        while self.pending and len(self.running) < self.workers and not self.failed:
+            index = self.pending.pop(0)
+            self._extract_chunk(index)
+
+    def _chunk_path(self, index, ext):
+        return os.path.join(self.work_directory, f"chunk_{index:04d}.{ext}")
+
+    def _extract_chunk(self, index):
+        """チャンク区間を16kHzモノラルWAVとして切り出す（デコード済みのPCMがあればffmpegを使わない）"""
+        start, end = self.chunks[index]
+        chunk_wav = self._chunk_path(index, "wav")
+
+        if self.use_source_directly:
+            # 分割できない場合は元ファイルをそのまま使う
+            self._run_whisper(index, self.audio_file_path)
+            return
+
+        if self.decoded_audio is not None:
+            try:
+                self.decoded_audio.write_wav(chunk_wav, [(start, end)])
+            except OSError as e:
+                logger.error("チャンク%sの切り出しに失敗しました: %s", index, e)
+                self._fail_chunk(index)
+                return
+            self._run_whisper(index, chunk_wav)
+            return
+
+        process = QProcess()
+        process.setProcessChannelMode(QProcess.MergedChannels)
+        process.finished.connect(lambda code, status, i=index: self._on_chunk_extracted(i, code))
+        self.running[index] = process
+        process.start(ffmpeg_path, [
+            "-hide_banner", "-loglevel", "error",
+            "-ss", f"{start:.3f}",
+            "-t", f"{end - start:.3f}",
+            "-i", self.audio_file_path,
+            "-vn", "-ac", "1", "-ar", "16000",
+            "-y", chunk_wav,
+        ])
+
+    def _on_chunk_extracted(self, index, exit_code):
+        if self.failed:
+            self.running.pop(index, None)
+            return
+        if exit_code != 0:
+            logger.error("チャンク%sの切り出しに失敗しました (Code: %s)", index, exit_code)
+            self._fail_chunk(index)
+            return
+        self._run_whisper(index, self._chunk_path(index, "wav"))
+
+    def _run_whisper(self, index, input_path):
+        whisper_exe = os.path.join(self.whisper_path, WHISPER_EXE_NAME)
+        chunk_output_dir = os.path.join(self.work_directory, f"out_{index:04d}")
+        os.makedirs(chunk_output_dir, exist_ok=True)
+        arguments = build_whisper_arguments(
+            input_path, chunk_output_dir,
+            extra_args=["--threads", str(self.threads_per_worker)]
+        )
+
+        process = QProcess()
+        process.setWorkingDirectory(self.whisper_path)
+        process.setProcessChannelMode(QProcess.MergedChannels)
+        # 出力はバッファに溜めない（並列時の進捗はチャンク単位で報告する）
+        process.readyReadStandardOutput.connect(lambda p=process: p.readAllStandardOutput())
+        process.finished.connect(
+            lambda code, status, i=index, d=chunk_output_dir, src=input_path: self._on_chunk_transcribed(i, code, d, src)
+        )
+        self.running[index] = process
+        process.start(whisper_exe, arguments)
+        # 止まったチャンクが文字起こしの枠を占有し続けないよう、単一プロセス実行と同じ基準で監視する
+        watchdog = ProcessWatchdog(parent=self)
+        watchdog.watch(process)
+        self.watchdogs[index] = watchdog
+
+    def _on_chunk_transcribed(self, index, exit_code, chunk_output_dir, input_path):
+        self.running.pop(index, None)
+        watchdog = self.watchdogs.pop(index, None)
+        reason = watchdog.reason if watchdog is not None else None
+        if watchdog is not None:
+            watchdog.deleteLater()
+        if self.failed:
+            return
+        if reason is not None:
+            self.stop_reason = reason
+            message = describe_stop_reason(reason)
+            logger.error("チャンク%sを終了させました: %s", index, message)
+            self._fail_chunk(index, message)
+            return
+
+        srt_name = f"{os.path.basename(input_path).split('.')[0]}.srt"
+        srt_path = os.path.join(chunk_output_dir, srt_name)
+        if exit_code != 0 or not os.path.exists(srt_path):
+            logger.error("チャンク%sの文字起こしに失敗しました (Code: %s)", index, exit_code)
+            self._fail_chunk(index)
+            return
+
+        self.results[index] = self.parse_srt(srt_path)
+        if self.checkpoint is not None:
+            # 完了したチャンクはすぐに保存し、中断しても再実行時に処理し直さない
+            start, end = self.chunks[index]
+            segments = merge_chunk_segments([(start, self.results[index])])
+            if segments:
+                end = max(end, segments[-1]['end'])
+            self.checkpoint.save_unit(start, end, segments)
+
+        done = len(self.results)
+        total = len(self.chunks)
+        done_seconds = self.resumed_seconds + sum(self.chunks[i][1] - self.chunks[i][0] for i in self.results)
+        if self.audio_duration > 0:
+            progress = min(99, int(done_seconds / self.audio_duration * 100))
+        else:
+            progress = min(99, int(done / total * 100))
+        self.progress_updated.emit(progress, f"文字起こし中... チャンク {done}/{total} 完了 ({progress}%)")
+
+        if done == total:
+            self._finish()
+        else:
+            self._fill_workers()
+
+    def _fail_chunk(self, index, message=None):
+        self.running.pop(index, None)
+        self.cancel()
+        self.progress_updated.emit(100, message or f"チャンク{index + 1}の処理に失敗しました")
+        self._emit_finished("", [], False)
+
+    def _finish(self):
+        try:
+            if self.checkpoint is not None:
+                # 以前の実行で保存したチャンクも含めて結合する
+                segments = self.checkpoint.assemble()
+            else:
+                chunk_results = [(self.chunks[i][0], self.results[i]) for i in range(len(self.chunks))]
+                segments = merge_chunk_segments(chunk_results)
+
+            # 単一プロセス実行時と同じ名前でSRT/TXTを出力
+            srt_path = os.path.join(self.output_directory, f"{self.basename}.srt")
+            txt_path = os.path.join(self.output_directory, f"{self.basename}.txt")
+            write_srt_file(srt_path, segments)
+            full_text = write_text_file(txt_path, segments)
+            write_sidecar(sidecar_path(srt_path), segments, srt_path)
+
+            shutil.rmtree(self.work_directory, ignore_errors=True)
+
+            self.progress_updated.emit(100, "文字起こし完了")
+            self._emit_finished(full_text, segments, True)
+        except Exception:
+            logger.exception("結果の結合中にエラーが発生しました")
+            self.progress_updated.emit(100, "結果の結合中にエラーが発生しました")
+            self._emit_finished("", [], False)
+
+    def _emit_finished(self, text, segments, success):
+        if not self.finished_emitted:
+            self.finished_emitted = True
+            self.transcription_finished.emit(text, segments, success)
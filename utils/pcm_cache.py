@@ -0,0 +1,588 @@
+"""
+音声ファイルを一度だけ16kHzモノラルPCMにデコードし、内容のハッシュをキーにディスクへ保存するキャッシュ (GUI非依存)
+
+デコード結果は DecodedAudio としてメモリマップで開くため、プレーヤー・文字起こしのチャンク分割・VAD・
+波形表示などはデータをコピーせずに同じバッファを参照できる。再生や文字起こしに必要な区間だけのWAVは
+ffmpegで再デコードせず、このバッファから切り出して書き出す。
+
+デコードは DecodeJob としてバックグラウンドのスレッドでも実行でき、進捗・取り消しと、
+先頭部分だけのWAV（全体のデコード完了前に再生を始めるためのもの）を通知する。
+
+使用例:
+    decoded = get_pcm_cache().decode("会議.mp4")
+    decoded.write_wav("chunk.wav", [(60.0, 120.0)])
+
+    job = get_pcm_cache().start_decode("会議.mp4", on_progress=..., on_preview=..., on_done=...)
+    job.cancel()
+"""
+
+import os
+import sys
+import mmap
+import time
+import struct
+import tempfile
+import threading
+import subprocess
+from collections import deque
+
+from config.api_config import PCM_CACHE_DIR, PCM_CACHE_MAX_MB
+from utils.transcription_cache import get_digest_index
+from utils.media_probe import get_duration as get_media_duration
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# スクリプトの場所に基づいて ffmpeg のパスとキャッシュディレクトリを決定
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+DEFAULT_FFMPEG_PATH = os.path.join(project_root, "Faster-Whisper-XXL", "ffmpeg.exe")
+DEFAULT_PCM_CACHE_DIR = os.path.join(project_root, "cache", "pcm")
+
+# キャッシュ全体の上限サイズ（バイト）。16kHzモノラル16bitで1時間あたり約115MB
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+
+# デコード後の形式（faster-whisperの入力と同じ）
+PCM_SAMPLE_RATE = 16000
+PCM_CHANNELS = 1
+PCM_SAMPLE_WIDTH = 2
+
+# バックグラウンドのデコード
+PREVIEW_SECONDS = 60          # 先頭からこの秒数がデコードできた時点で、その部分だけのWAVを書き出す
+STREAM_BLOCK_SIZE = 256 * 1024  # ffmpegの出力を読み込む単位（バイト）
+PROGRESS_INTERVAL = 0.25      # 進捗を通知する最短の間隔（秒）
+STDERR_TAIL_LINES = 50        # エラー時にログへ残すffmpegの出力の行数
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def build_stream_arguments(audio_file_path):
+    """音声を16kHzモノラル16bitの生PCMとして標準出力に書き出すffmpegの引数を返す"""
+    return [
+        "-hide_banner", "-loglevel", "error",
+        "-i", audio_file_path,
+        "-vn", "-ac", str(PCM_CHANNELS), "-ar", str(PCM_SAMPLE_RATE),
+        "-c:a", "pcm_s16le", "-map_metadata", "-1",
+        "-f", "s16le", "pipe:1",
+    ]
+
+
+def wav_header(data_size, sample_rate=PCM_SAMPLE_RATE, channels=PCM_CHANNELS, sample_width=PCM_SAMPLE_WIDTH):
+    """PCM WAVの44バイトのヘッダーを返す"""
+    block_align = channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, sample_width * 8,
+        b"data", data_size,
+    )
+
+
+def _find_pcm_data(buffer):
+    """
+    WAVのチャンクを走査し、PCMの形式とデータ位置を返す
+
+    Returns:
+        tuple: (サンプリングレート, チャンネル数, サンプル幅, データ開始位置, データサイズ)。PCMでなければ None
+    """
+    if len(buffer) < 12 or buffer[0:4] != b"RIFF" or buffer[8:12] != b"WAVE":
+        return None
+    fmt = None
+    position = 12
+    while position + 8 <= len(buffer):
+        chunk_id = bytes(buffer[position:position + 4])
+        chunk_size = struct.unpack_from("<I", buffer, position + 4)[0]
+        body = position + 8
+        if chunk_id == b"fmt " and chunk_size >= 16:
+            audio_format, channels, sample_rate = struct.unpack_from("<HHI", buffer, body)
+            bits = struct.unpack_from("<H", buffer, body + 14)[0]
+            if audio_format != 1 or bits != 16:
+                return None
+            fmt = (sample_rate, channels, bits // 8)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            # 書き込み途中のファイルなどでサイズが不正な場合はファイル末尾までをデータとみなす
+            size = min(chunk_size, len(buffer) - body)
+            return fmt + (body, size)
+        position = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+class DecodedAudio:
+    """デコード済みのPCM(WAV)をメモリマップで参照するクラス"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): 16bit PCMのWAVファイルのパス
+
+        Raises:
+            ValueError: 16bit PCMのWAVでない場合
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"空のファイルです: {path}")
+        layout = _find_pcm_data(self._mmap)
+        if layout is None:
+            self.close()
+            raise ValueError(f"16bit PCMのWAVではありません: {path}")
+        self.sample_rate, self.channels, self.sample_width, data_offset, data_size = layout
+        self.frame_size = self.channels * self.sample_width
+        self.num_frames = data_size // self.frame_size
+        # PCMデータ全体（コピーせずにメモリマップを参照する）
+        self.pcm = memoryview(self._mmap)[data_offset:data_offset + self.num_frames * self.frame_size]
+
+    @property
+    def duration(self):
+        """音声の長さ（秒）"""
+        return self.num_frames / self.sample_rate if self.sample_rate else 0.0
+
+    def _frame_index(self, seconds):
+        return min(max(0, int(round(seconds * self.sample_rate))), self.num_frames)
+
+    def frames(self, start=0.0, end=None):
+        """
+        指定区間のPCMデータを返す（コピーしない）
+
+        Args:
+            start (float): 開始秒
+            end (float, optional): 終了秒（未指定時は末尾まで）
+
+        Returns:
+            memoryview: リトルエンディアン16bitのPCMデータ
+        """
+        first = self._frame_index(start)
+        last = self.num_frames if end is None else max(first, self._frame_index(end))
+        return self.pcm[first * self.frame_size:last * self.frame_size]
+
+    def write_wav(self, output_path, ranges=None):
+        """
+        指定区間をつなげたWAVを書き出す（ffmpegで元の音声を再デコードしない）
+
+        Args:
+            output_path (str): 出力先のパス
+            ranges (list, optional): (開始秒, 終了秒) の区間リスト。終了秒は None で末尾まで。未指定時は全体
+
+        Returns:
+            str: 出力先のパス
+        """
+        parts = [self.frames(start, end) for start, end in (ranges or [(0.0, None)])]
+        temp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(wav_header(sum(len(part) for part in parts), self.sample_rate, self.channels, self.sample_width))
+            for part in parts:
+                f.write(part)
+        os.replace(temp_path, output_path)
+        return output_path
+
+    def close(self):
+        """メモリマップを閉じる（切り出したmemoryviewが残っている場合はそれらの解放時に閉じられる）"""
+        pcm = getattr(self, "pcm", None)
+        if pcm is not None:
+            pcm.release()
+            self.pcm = None
+        try:
+            self._mmap.close()
+        except (AttributeError, BufferError):
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class DecodeJob:
+    """
+    1つの音声をPCMにデコードするジョブ
+
+    ffmpegの標準出力から生PCMを受け取りながら一時ファイルに書き、受け取った長さを進捗として通知する。
+    先頭 preview_seconds 秒がそろった時点でその部分だけのWAVを一時ディレクトリに書き出し、
+    全体のデコードが終わる前に再生を始められるようにする。取り消すとffmpegを終了し、一時ファイルを削除する。
+    """
+
+    def __init__(self, cache, audio_file_path, on_progress=None, on_preview=None, on_done=None,
+                 preview_seconds=PREVIEW_SECONDS):
+        self.cache = cache
+        self.audio_file_path = audio_file_path
+        self.on_progress = on_progress
+        self.on_preview = on_preview
+        self.on_done = on_done
+        self.preview_seconds = preview_seconds
+        self.preview_path = None   # 先頭部分のWAV（書き出した場合）
+        self.duration = 0.0        # 元の音声の長さ（秒、不明な場合は0）
+        self.decoded_seconds = 0.0  # デコード済みの長さ（秒）
+        self.result = None         # デコード結果の DecodedAudio
+        self.error = None
+        self.process = None
+        self._cancel_event = threading.Event()
+        self._finished_event = threading.Event()
+        self._thread = None
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def progress(self):
+        """進捗（0.0〜1.0、長さが不明な場合は0）"""
+        if self.duration <= 0:
+            return 0.0
+        return min(1.0, self.decoded_seconds / self.duration)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="pcm-decode", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """デコードを取り消す（完了の通知は on_done で行われる）"""
+        self._cancel_event.set()
+        process = self.process
+        if process is not None and process.poll() is None:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    def done(self):
+        return self._finished_event.is_set()
+
+    def wait(self, timeout=None):
+        """完了を待つ（タイムアウトした場合は False）"""
+        return self._finished_event.wait(timeout)
+
+    def discard_preview(self):
+        """先頭部分のWAVを削除する（再生中で削除できない場合は残す）"""
+        if self.preview_path is None:
+            return
+        try:
+            os.remove(self.preview_path)
+            self.preview_path = None
+        except FileNotFoundError:
+            self.preview_path = None
+        except OSError as e:
+            logger.debug("先頭部分のWAVを削除できませんでした: %s (%s)", self.preview_path, e)
+
+    def run(self):
+        """
+        デコードを実行する（start() を使わずに呼ぶと同期実行になる）
+
+        Returns:
+            DecodedAudio: 失敗・取り消しの場合は None
+        """
+        try:
+            self.result = self._decode()
+        except Exception as e:
+            logger.exception("PCMへのデコード中にエラーが発生しました: %s", self.audio_file_path)
+            self.error = str(e)
+            self.result = None
+        finally:
+            if self.result is None:
+                self.discard_preview()
+            self._finished_event.set()
+            if self.on_done is not None:
+                self.on_done(self)
+        return self.result
+
+    def _notify(self, callback):
+        if callback is not None:
+            callback(self)
+
+    def _decode(self):
+        cache = self.cache
+        decoded = cache.lookup(self.audio_file_path)
+        if decoded is not None:
+            self.duration = self.decoded_seconds = decoded.duration
+            return decoded
+        if not os.path.exists(cache.ffmpeg_path):
+            self.error = f"ffmpegが見つからないためデコードできません: {cache.ffmpeg_path}"
+            logger.warning(self.error)
+            return None
+
+        digest = cache.digest_index.digest(self.audio_file_path)
+        if self.cancelled:
+            return None
+        path = cache.entry_path(digest)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.duration = get_media_duration(self.audio_file_path)
+        logger.info("PCMにデコードします", extra={"stage": "decode", "file": self.audio_file_path})
+
+        bytes_per_second = PCM_SAMPLE_RATE * PCM_CHANNELS * PCM_SAMPLE_WIDTH
+        preview_bytes = int(self.preview_seconds * bytes_per_second) if self.preview_seconds else 0
+        preview = bytearray()
+        stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+
+        self.process = subprocess.Popen(
+            [cache.ffmpeg_path] + build_stream_arguments(self.audio_file_path),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+        )
+        # 標準エラーが詰まって ffmpeg が止まらないよう別スレッドで読み捨てる（末尾だけ残す）
+        stderr_reader = threading.Thread(
+            target=lambda: stderr_tail.extend(
+                line.decode("utf-8", errors="ignore").rstrip() for line in self.process.stderr
+            ),
+            daemon=True
+        )
+        stderr_reader.start()
+        if self.cancelled:
+            self.cancel()
+
+        written = 0
+        last_notified = 0.0
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(wav_header(0))
+                while True:
+                    block = self.process.stdout.read(STREAM_BLOCK_SIZE)
+                    if not block or self.cancelled:
+                        break
+                    f.write(block)
+                    written += len(block)
+                    self.decoded_seconds = written / bytes_per_second
+                    if preview_bytes and self.preview_path is None:
+                        preview += block[:preview_bytes - len(preview)]
+                        if len(preview) >= preview_bytes:
+                            self._write_preview(digest, preview)
+                            preview = None
+                            preview_bytes = 0
+                    now = time.monotonic()
+                    if now - last_notified >= PROGRESS_INTERVAL:
+                        last_notified = now
+                        self._notify(self.on_progress)
+                returncode = self.process.wait()
+                stderr_reader.join(timeout=5)
+                if not self.cancelled and returncode == 0:
+                    # 書き終えたデータの長さでヘッダーを書き直す
+                    f.seek(0)
+                    f.write(wav_header(written))
+        except OSError:
+            self.cancel()
+            cache._remove(temp_path)
+            raise
+
+        if self.cancelled:
+            logger.info("PCMへのデコードを取り消しました", extra={"stage": "decode", "file": self.audio_file_path})
+            cache._remove(temp_path)
+            return None
+        if returncode != 0:
+            self.error = "\n".join(stderr_tail) or f"ffmpegがエラーで終了しました (Code: {returncode})"
+            logger.error("PCMへのデコードに失敗しました (Code: %s):\n%s", returncode, self.error,
+                         extra={"stage": "decode", "file": self.audio_file_path})
+            cache._remove(temp_path)
+            return None
+        self._notify(self.on_progress)
+        return cache.commit(temp_path, path)
+
+    def _write_preview(self, digest, pcm):
+        """先頭部分のPCMをWAVとして一時ディレクトリに書き出し、on_preview で通知する"""
+        preview_path = os.path.join(
+            tempfile.gettempdir(), f"listen_summarize_preview_{digest[:16]}_{os.getpid()}_{id(self):x}.wav"
+        )
+        try:
+            with open(preview_path, "wb") as f:
+                f.write(wav_header(len(pcm)))
+                f.write(pcm)
+        except OSError as e:
+            logger.warning("先頭部分のWAVを書き出せませんでした: %s", e)
+            return
+        self.preview_path = preview_path
+        self._notify(self.on_preview)
+
+
+class PcmCache:
+    """デコード済みPCMを内容のハッシュで管理し、LRU方式で容量を管理するディスクキャッシュ"""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, ffmpeg_path=None, digest_index=None):
+        """
+        Args:
+            cache_dir (str, optional): キャッシュディレクトリ
+            max_bytes (int, optional): キャッシュ全体の上限サイズ（バイト）
+            ffmpeg_path (str, optional): デコードに使うffmpegのパス
+            digest_index (DigestIndex, optional): 音声のダイジェストの索引（未指定時は文字起こしキャッシュと共有の索引）
+        """
+        self.cache_dir = cache_dir or DEFAULT_PCM_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.ffmpeg_path = ffmpeg_path or DEFAULT_FFMPEG_PATH
+        self.digest_index = digest_index or get_digest_index()
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # 上限を小さく設定し直した場合に備え、開いた時点でも上限まで削る
+        self.trim()
+
+    def entry_path(self, digest):
+        """ダイジェストに対応するWAVのパスを返す"""
+        return os.path.join(self.cache_dir, f"{digest}.wav")
+
+    def lookup(self, audio_file_path):
+        """
+        デコード済みのPCMがあれば開く
+
+        Args:
+            audio_file_path (str): 元の音声ファイルのパス
+
+        Returns:
+            DecodedAudio: キャッシュにない場合は None
+        """
+        try:
+            path = self.entry_path(self.digest_index.digest(audio_file_path))
+        except OSError:
+            return None
+        if not os.path.exists(path):
+            return None
+        try:
+            decoded = DecodedAudio(path)
+        except (OSError, ValueError) as e:
+            logger.warning("壊れたPCMキャッシュを削除します: %s (%s)", path, e)
+            self._remove(path)
+            return None
+        # 更新時刻をLRUの最終アクセス時刻として使う
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return decoded
+
+    def decode(self, audio_file_path):
+        """
+        音声をデコードしてキャッシュに保存する（キャッシュ済みならデコードしない、同期実行）
+
+        Args:
+            audio_file_path (str): 元の音声ファイルのパス
+
+        Returns:
+            DecodedAudio: デコードに失敗した場合は None
+        """
+        return DecodeJob(self, audio_file_path, preview_seconds=None).run()
+
+    def start_decode(self, audio_file_path, on_progress=None, on_preview=None, on_done=None,
+                     preview_seconds=PREVIEW_SECONDS):
+        """
+        音声のデコードをバックグラウンドのスレッドで開始する（キャッシュ済みならすぐに完了する）
+
+        Args:
+            audio_file_path (str): 元の音声ファイルのパス
+            on_progress (callable, optional): 進捗の通知 on_progress(job)
+            on_preview (callable, optional): 先頭部分のWAVの準備完了 on_preview(job)
+            on_done (callable, optional): 完了・失敗・取り消しの通知 on_done(job)
+            preview_seconds (float, optional): 先頭部分の長さ（秒）。None の場合は書き出さない
+
+        Returns:
+            DecodeJob: 開始したジョブ（コールバックはワーカースレッドから呼ばれる）
+        """
+        job = DecodeJob(self, audio_file_path, on_progress, on_preview, on_done, preview_seconds)
+        job.start()
+        return job
+
+    def commit(self, temp_path, path):
+        """
+        デコードした一時ファイルをキャッシュに登録する（別プロセスのデコード結果も受け付ける）
+
+        Args:
+            temp_path (str): デコード結果の一時ファイル
+            path (str): 登録先（entry_path の戻り値）
+
+        Returns:
+            DecodedAudio: 登録したPCM（不正なファイルの場合は None）
+        """
+        try:
+            os.replace(temp_path, path)
+            decoded = DecodedAudio(path)
+        except (OSError, ValueError) as e:
+            logger.error("PCMキャッシュの登録に失敗しました: %s", e)
+            self._remove(temp_path)
+            self._remove(path)
+            return None
+        with self._lock:
+            self._evict(keep=path)
+        return decoded
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _list_entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".wav"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self, keep=None):
+        """上限サイズを超えた分を最終アクセスの古い順に削除する（使用中で削除できないものは残す）"""
+        entries = self._list_entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def trim(self):
+        """上限サイズを超えていれば最終アクセスの古い順に削除する"""
+        with self._lock:
+            self._evict()
+
+    def clear(self):
+        """キャッシュを全て削除する"""
+        with self._lock:
+            for _, _, path in self._list_entries():
+                self._remove(path)
+
+    def stats(self):
+        """
+        キャッシュの統計情報を取得する
+
+        Returns:
+            dict: エントリ数、合計サイズ、上限サイズ
+        """
+        entries = self._list_entries()
+        return {
+            "entries": len(entries),
+            "total_bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+
+def get_pcm_cache():
+    """プレーヤーと文字起こしで共有するPCMキャッシュを返す"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = PcmCache(PCM_CACHE_DIR, max_bytes=int(PCM_CACHE_MAX_MB * 1024 * 1024))
+        return _shared_cache
+
+
+if __name__ == "__main__":
+    # python -m utils.pcm_cache [--clear]
+    cache = get_pcm_cache()
+    if "--clear" in sys.argv[1:]:
+        cache.clear()
+        print("キャッシュを削除しました")
+    for name, value in cache.stats().items():
+        print(f"{name}: {value}")
@@ -0,0 +1,174 @@
+"""
+文字起こしプロセスの監視ユーティリティ
+
+プロセスの状態を定期的に問い合わせる代わりに、出力と終了のイベントで監視する。
+一定時間出力が進まない場合（停止）や実行時間の上限を超えた場合、中止を要求された場合は
+子プロセスを含めたプロセスツリーごと終了させ、その理由を呼び出し元に返す。
+"""
+
+import os
+import time
+import signal
+import threading
+import subprocess
+from collections import namedtuple
+
+from config.api_config import WHISPER_STALL_SECONDS, WHISPER_TIMEOUT_SECONDS
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# プロセスを終了させた理由
+STOP_CANCELLED = "cancelled"  # 呼び出し元が中止を要求した
+STOP_STALLED = "stalled"      # 一定時間出力が進まなかった
+STOP_TIMEOUT = "timeout"      # 実行時間の上限を超えた
+
+# 中止要求を確認する間隔（秒）。run_supervised() に cancel_event を渡した場合のみ使う
+CANCEL_CHECK_INTERVAL = 0.5
+
+# 失敗時にログへ残す出力の末尾の行数
+ERROR_OUTPUT_TAIL_LINES = 50
+
+SupervisedResult = namedtuple("SupervisedResult", ["returncode", "output", "reason"])
+
+
+def describe_stop_reason(reason, stall_seconds=WHISPER_STALL_SECONDS, timeout_seconds=WHISPER_TIMEOUT_SECONDS):
+    """終了させた理由をユーザー向けのメッセージにする"""
+    if reason == STOP_CANCELLED:
+        return "文字起こしを中止しました"
+    if reason == STOP_STALLED:
+        return f"文字起こしが{int(stall_seconds)}秒間進まなかったため中止しました"
+    if reason == STOP_TIMEOUT:
+        return f"文字起こしが制限時間（{int(timeout_seconds)}秒）を超えたため中止しました"
+    return ""
+
+
+def _child_pids(pid):
+    """/proc から子プロセスのPIDを再帰的に集める（Windows以外）"""
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    try:
+        tasks = os.listdir(task_dir)
+    except OSError:
+        return children
+    for task in tasks:
+        try:
+            with open(os.path.join(task_dir, task, "children"), "r") as f:
+                direct = [int(child) for child in f.read().split()]
+        except (OSError, ValueError):
+            continue
+        for child in direct:
+            children.extend(_child_pids(child))
+            children.append(child)
+    return children
+
+
+def kill_process_tree(pid):
+    """
+    プロセスとその子孫プロセスを強制終了する
+
+    faster-whisper-xxl.exe は内部でffmpegなどを起動するため、親だけを終了すると子が残ることがある。
+
+    Args:
+        pid (int): 終了させるプロセスのPID（0以下の場合は何もしない）
+
+    Returns:
+        bool: 終了の要求を出せたかどうか
+    """
+    if not pid or pid <= 0:
+        return False
+    if os.name == "nt":
+        result = subprocess.run(
+            ["taskkill", "/PID", str(pid), "/T", "/F"],
+            capture_output=True,
+            check=False,
+            creationflags=subprocess.CREATE_NO_WINDOW
+        )
+        if result.returncode != 0:
+            logger.debug("taskkillに失敗しました: pid=%s, code=%s", pid, result.returncode)
+        return result.returncode == 0
+
+    # 子から先に終了させ、親が新しい子を起動し直さないようにする
+    pids = list(reversed(_child_pids(pid))) + [pid]
+    killed = False
+    for target in pids:
+        try:
+            os.kill(target, signal.SIGKILL)
+            killed = True
+        except OSError:
+            pass
+    return killed
+
+
+def run_supervised(cmd, cwd=None, stall_seconds=WHISPER_STALL_SECONDS, timeout_seconds=WHISPER_TIMEOUT_SECONDS,
+                   cancel_event=None, on_output=None):
+    """
+    コマンドを同期実行し、停止・時間超過・中止要求を監視する (GUIを使わない処理向け)
+
+    標準出力と標準エラー出力はまとめて読み取り、最後に出力があった時刻を停止の判定に使う。
+
+    Args:
+        cmd (list): 実行するコマンド
+        cwd (str, optional): 作業ディレクトリ
+        stall_seconds (float, optional): 出力がないまま経過したら停止とみなす秒数（Noneで無効）
+        timeout_seconds (float, optional): 実行時間の上限（秒）（Noneで無効）
+        cancel_event (threading.Event, optional): セットされたら中止する
+        on_output (callable, optional): 出力を1行ずつ受け取る関数（読み取りスレッドから呼ばれる）
+
+    Returns:
+        SupervisedResult: (終了コード, 出力, 終了させた理由。正常に終了した場合はNone)
+    """
+    process = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="ignore",
+        creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+    )
+    started = time.monotonic()
+    last_output = [started]
+    lines = []
+    exited = threading.Event()
+
+    def read_output():
+        try:
+            for line in process.stdout:
+                last_output[0] = time.monotonic()
+                lines.append(line)
+                if on_output:
+                    on_output(line)
+        finally:
+            process.wait()
+            exited.set()
+
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+
+    reason = None
+    while not exited.is_set():
+        now = time.monotonic()
+        deadlines = []
+        if stall_seconds:
+            deadlines.append((last_output[0] + stall_seconds, STOP_STALLED))
+        if timeout_seconds:
+            deadlines.append((started + timeout_seconds, STOP_TIMEOUT))
+        expired = [stop for deadline, stop in deadlines if deadline <= now]
+        if cancel_event is not None and cancel_event.is_set():
+            expired.insert(0, STOP_CANCELLED)
+        if expired:
+            reason = expired[0]
+            logger.warning("プロセスを終了させます: pid=%s, 理由=%s", process.pid, reason, extra={"stage": "supervisor"})
+            kill_process_tree(process.pid)
+            process.kill()
+            break
+
+        wait = min(deadline for deadline, _ in deadlines) - now if deadlines else None
+        if cancel_event is not None:
+            wait = CANCEL_CHECK_INTERVAL if wait is None else min(wait, CANCEL_CHECK_INTERVAL)
+        exited.wait(wait)
+
+    reader.join()
+    return SupervisedResult(process.returncode, "".join(lines), reason)
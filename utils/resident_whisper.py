@@ -0,0 +1,309 @@
+"""
+faster-whisperのモデルを常駐させたワーカープロセスで文字起こしを行うユーティリティ (GUI非依存)
+
+モデルの読み込みはワーカー起動時の1回だけで、以降のジョブはローカルキューで受け付ける。
+"""
+
+import os
+import time
+import queue
+import itertools
+import threading
+import traceback
+import importlib.util
+import multiprocessing
+
+from config.api_config import (
+    RESIDENT_WHISPER_MODEL, RESIDENT_WHISPER_DEVICE,
+    RESIDENT_WHISPER_COMPUTE_TYPE, RESIDENT_WHISPER_MODEL_DIR,
+    WHISPER_STALL_SECONDS, WHISPER_TIMEOUT_SECONDS
+)
+from utils.process_supervisor import (
+    SupervisedResult, STOP_CANCELLED, STOP_STALLED, STOP_TIMEOUT, CANCEL_CHECK_INTERVAL
+)
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# ワーカーからのメッセージ種別
+MSG_OUTPUT = "output"  # 標準出力相当のテキスト
+MSG_DONE = "done"      # ジョブ終了（終了コード付き）
+MSG_READY = "ready"    # モデル読み込み完了
+MSG_FATAL = "fatal"    # ワーカー全体のエラー（モデル読み込み失敗など）
+
+
+def is_faster_whisper_available():
+    """faster_whisperパッケージが利用可能かどうか"""
+    return importlib.util.find_spec("faster_whisper") is not None
+
+
+def _format_live_time(seconds):
+    """faster-whisper-xxlの標準出力と同じ [MM:SS.mmm] 形式"""
+    minutes, secs = divmod(max(0.0, seconds), 60)
+    return f"{int(minutes):02d}:{secs:06.3f}"
+
+
+def _worker_main(job_queue, result_queue, model_name, device, compute_type, model_dir):
+    """ワーカープロセスのエントリポイント"""
+    try:
+        from faster_whisper import WhisperModel
+        from utils.subtitle_utils import write_srt_file, write_text_file
+
+        model = WhisperModel(model_name, device=device, compute_type=compute_type, download_root=model_dir)
+    except Exception:
+        result_queue.put((MSG_FATAL, None, traceback.format_exc()))
+        return
+
+    result_queue.put((MSG_READY, None, model_name))
+
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+
+        job_id = job["id"]
+        try:
+            result_queue.put((MSG_OUTPUT, job_id, f"Transcribing {job['audio_file_path']}\n"))
+            segments_iter, info = model.transcribe(
+                job["audio_file_path"],
+                language=job.get("language", "ja"),
+                beam_size=job.get("beam_size", 5),
+                vad_filter=job.get("vad_filter", True),
+            )
+            segments = []
+            for seg in segments_iter:
+                text = seg.text.strip()
+                segments.append({'start': seg.start, 'end': seg.end, 'text': text})
+                # 既存の進捗解析・逐次表示がそのまま使えるように同じ形式で出力する
+                result_queue.put((
+                    MSG_OUTPUT, job_id,
+                    f"[{_format_live_time(seg.start)} --> {_format_live_time(seg.end)}] {text}\n"
+                ))
+
+            os.makedirs(job["output_dir"], exist_ok=True)
+            basename = os.path.basename(job["audio_file_path"]).split('.')[0]
+            write_srt_file(os.path.join(job["output_dir"], f"{basename}.srt"), segments)
+            write_text_file(os.path.join(job["output_dir"], f"{basename}.txt"), segments)
+            result_queue.put((MSG_OUTPUT, job_id, "Writing results\n"))
+            result_queue.put((MSG_DONE, job_id, 0))
+        except Exception:
+            result_queue.put((MSG_OUTPUT, job_id, traceback.format_exc()))
+            result_queue.put((MSG_DONE, job_id, 1))
+
+
+class ResidentWhisperWorker:
+    """モデルを読み込んだままのワーカープロセスを管理し、ジョブ単位で結果を振り分けるクラス"""
+
+    def __init__(self, model_name=None, device=None, compute_type=None, model_dir=None):
+        """
+        Args:
+            model_name (str, optional): faster-whisperのモデル名またはパス
+            device (str, optional): "auto" / "cpu" / "cuda"
+            compute_type (str, optional): CTranslate2の計算精度
+            model_dir (str, optional): モデルのダウンロード先
+        """
+        self.model_name = model_name or RESIDENT_WHISPER_MODEL
+        self.device = device or RESIDENT_WHISPER_DEVICE
+        self.compute_type = compute_type or RESIDENT_WHISPER_COMPUTE_TYPE
+        self.model_dir = model_dir or RESIDENT_WHISPER_MODEL_DIR
+
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._job_queue = None
+        self._result_queue = None
+        self._dispatcher = None
+        self._dispatch_stop = None  # 起動中のワーカーの振り分けスレッドに終了を伝える threading.Event
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+        # ジョブID -> queue.Queue（ワーカーを起動するたびに作り直し、再起動前のジョブと混ざらないようにする）
+        self._job_outputs = {}
+        self.fatal_error = None
+        self.ready = threading.Event()
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    @property
+    def pid(self):
+        """ワーカープロセスのPID（起動していない場合は None）"""
+        process = self._process
+        return process.pid if process is not None else None
+
+    def start(self):
+        """ワーカープロセスを起動する（起動済みなら何もしない）"""
+        with self._lock:
+            if self.is_alive():
+                return
+            self.fatal_error = None
+            self.ready.clear()
+            self._job_queue = self._context.Queue()
+            self._result_queue = self._context.Queue()
+            self._job_outputs = {}
+            self._dispatch_stop = threading.Event()
+            self._process = self._context.Process(
+                target=_worker_main,
+                args=(self._job_queue, self._result_queue, self.model_name,
+                      self.device, self.compute_type, self.model_dir),
+                daemon=True,
+            )
+            self._process.start()
+            self._dispatcher = threading.Thread(
+                target=self._dispatch,
+                args=(self._result_queue, self._process, self._job_outputs, self._dispatch_stop),
+                daemon=True,
+            )
+            self._dispatcher.start()
+            logger.info("常駐Whisperワーカーを起動しました (モデル: %s, PID: %s)", self.model_name, self._process.pid)
+
+    def _dispatch(self, result_queue, process, job_outputs, stop_event):
+        """
+        ワーカーからのメッセージをジョブごとのキューに振り分ける
+
+        引数は起動したワーカー1つ分のもので、再起動後のワーカーのジョブには触れない。
+        """
+        while True:
+            if stop_event.is_set():
+                self._fail_all_jobs(job_outputs, "常駐Whisperワーカーが終了しました\n")
+                return
+            try:
+                kind, job_id, payload = result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not process.is_alive():
+                    self._fail_all_jobs(job_outputs, "常駐Whisperワーカーが終了しました\n")
+                    return
+                continue
+            except (EOFError, OSError):
+                self._fail_all_jobs(job_outputs, "常駐Whisperワーカーとの通信が切断されました\n")
+                return
+            if stop_event.is_set():
+                continue
+
+            if kind == MSG_READY:
+                self.ready.set()
+                continue
+            if kind == MSG_FATAL:
+                self.fatal_error = payload
+                logger.error("常駐Whisperワーカーの起動に失敗しました:\n%s", payload)
+                self.ready.set()
+                self._fail_all_jobs(job_outputs, payload)
+                return
+
+            with self._lock:
+                job_queue = job_outputs.get(job_id)
+            if job_queue is not None:
+                job_queue.put((kind, payload))
+
+    def _fail_all_jobs(self, job_outputs, message):
+        with self._lock:
+            pending = list(job_outputs.values())
+        for job_queue in pending:
+            job_queue.put((MSG_OUTPUT, message))
+            job_queue.put((MSG_DONE, 1))
+
+    def submit(self, audio_file_path, output_dir, language="ja"):
+        """
+        文字起こしジョブを投入する
+
+        Args:
+            audio_file_path (str): 音声ファイルのパス
+            output_dir (str): SRT/TXTの出力ディレクトリ
+
+        Returns:
+            tuple: (ジョブID, 結果メッセージを受け取る queue.Queue)
+        """
+        self.start()
+        job_id = next(self._job_ids)
+        outputs = queue.Queue()
+        if self.fatal_error:
+            outputs.put((MSG_OUTPUT, self.fatal_error))
+            outputs.put((MSG_DONE, 1))
+            return job_id, outputs
+        # 振り分け先の登録と投入は同じワーカーに対して行う
+        with self._lock:
+            self._job_outputs[job_id] = outputs
+            job_queue = self._job_queue
+        job_queue.put({
+            "id": job_id,
+            "audio_file_path": audio_file_path,
+            "output_dir": output_dir,
+            "language": language,
+        })
+        return job_id, outputs
+
+    def release(self, job_id):
+        """終了したジョブの振り分け先を解放する"""
+        with self._lock:
+            self._job_outputs.pop(job_id, None)
+
+    def transcribe(self, audio_file_path, output_dir, on_output=None, cancel_event=None,
+                   stall_seconds=WHISPER_STALL_SECONDS, timeout_seconds=WHISPER_TIMEOUT_SECONDS):
+        """
+        ジョブを投入して終了まで待ち、停止・時間超過・中止要求を監視する（同期実行）
+
+        停止と時間超過はワーカーがジョブを始めた時点（最初の出力）から数え、前のジョブの待ち時間は含めない。
+        ワーカーは実行中の1ジョブだけを中断できないため、終了させる場合はワーカーごと終了する（次のジョブで再起動する）。
+
+        Args:
+            audio_file_path (str): 音声ファイルのパス
+            output_dir (str): SRT/TXTの出力ディレクトリ
+            on_output (callable, optional): 出力テキストを受け取る関数
+            cancel_event (threading.Event, optional): セットされたら中止する
+            stall_seconds (float, optional): 出力がないまま経過したら停止とみなす秒数（Noneで無効）
+            timeout_seconds (float, optional): ジョブの実行時間の上限（秒）（Noneで無効）
+
+        Returns:
+            SupervisedResult: (終了コード, 出力, 終了させた理由。正常に終了した場合はNone)
+        """
+        job_id, outputs = self.submit(audio_file_path, output_dir)
+        texts = []
+        started = None      # ワーカーがジョブを始めた時刻
+        last_output = None
+        try:
+            while True:
+                now = time.monotonic()
+                reason = None
+                if cancel_event is not None and cancel_event.is_set():
+                    reason = STOP_CANCELLED
+                elif started is not None and timeout_seconds and now - started >= timeout_seconds:
+                    reason = STOP_TIMEOUT
+                elif started is not None and stall_seconds and now - last_output >= stall_seconds:
+                    reason = STOP_STALLED
+                if reason is not None:
+                    logger.warning("常駐Whisperワーカーのジョブを終了させます: 理由=%s, pid=%s", reason, self.pid,
+                                   extra={"stage": "supervisor", "file": audio_file_path})
+                    if started is not None:
+                        self.shutdown(timeout=0)
+                    return SupervisedResult(None, "".join(texts), reason)
+
+                try:
+                    kind, payload = outputs.get(timeout=CANCEL_CHECK_INTERVAL)
+                except queue.Empty:
+                    continue
+                last_output = time.monotonic()
+                if started is None:
+                    started = last_output
+                if kind == MSG_DONE:
+                    return SupervisedResult(payload, "".join(texts), None)
+                texts.append(payload)
+                if on_output:
+                    on_output(payload)
+        finally:
+            self.release(job_id)
+
+    def shutdown(self, timeout=5.0):
+        """ワーカープロセスを終了する"""
+        with self._lock:
+            process = self._process
+            if process is None:
+                return
+            try:
+                self._job_queue.put(None)
+            except Exception:
+                pass
+            # このワーカーの振り分けスレッドだけを終了させる（直後に再起動したワーカーのジョブには影響しない）
+            self._dispatch_stop.set()
+            self._process = None
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+        logger.info("常駐Whisperワーカーを終了しました")
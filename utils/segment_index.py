@@ -0,0 +1,149 @@
+"""
+再生位置からセグメントを探す区間インデックス
+
+開始時刻の配列を二分探索し、再生位置を含むセグメントを O(log n) で求める。
+再生中は位置が少しずつ進むため、直前に見つかったセグメントとその次を先に確認する。
+セグメント同士が重なっている場合は、位置を含むもののうち開始が最も遅いものを返す。
+"""
+
+from array import array
+from bisect import bisect_right
+
+
+class SegmentIndex:
+    """
+    開始・終了時刻の列から作る区間インデックス
+
+    SegmentStore（starts / ends を持つもの）を渡すと配列をコピーせずに参照し、
+    文字起こし中にセグメントが追加されても refresh() で追加分だけを取り込む。
+    開始時刻が昇順でない場合は、並べ替えた配列を別に持つ。
+    """
+
+    def __init__(self, source=None):
+        """
+        Args:
+            source: starts / ends 配列を持つオブジェクト（SegmentStore）、
+                または 'start' / 'end' を持つ辞書のリスト
+        """
+        self.source = source
+        self.last_hit = None
+        self._reset()
+        self.refresh()
+
+    @classmethod
+    def from_segments(cls, segments):
+        """辞書のリストなど starts / ends を持たないセグメント列からインデックスを作る"""
+        index = cls()
+        index._starts.extend(segment.get('start', 0) for segment in segments)
+        index._ends.extend(segment.get('end', 0) for segment in segments)
+        index._build()
+        return index
+
+    def _reset(self):
+        self._starts = array('d')
+        self._ends = array('d')
+        self._order = None        # 並べ替えた位置 -> 元の番号（昇順の場合はNone）
+        self._max_end = array('d')  # 並べ替えた先頭からその位置までの終了時刻の最大値
+        self._count = 0
+
+    def _source_columns(self):
+        if self.source is None:
+            return None, None
+        if hasattr(self.source, "starts"):
+            return self.source.starts, self.source.ends
+        return None, None
+
+    def refresh(self):
+        """元のセグメントが増えていれば追加分を取り込む（減った・置き換わった場合は作り直す）"""
+        starts, ends = self._source_columns()
+        if starts is None:
+            if self.source is not None and len(self.source) != self._count:
+                source = self.source
+                self._reset()
+                self._starts.extend(segment.get('start', 0) for segment in source)
+                self._ends.extend(segment.get('end', 0) for segment in source)
+                self._build()
+            return
+        if len(starts) < self._count:
+            self._reset()
+        if len(starts) == self._count:
+            return
+        if self._order is None and all(
+            starts[i] >= starts[i - 1] for i in range(max(1, self._count), len(starts))
+        ):
+            # 昇順のまま増えた場合は元の配列をそのまま参照し、最大終了時刻だけ伸ばす
+            self._starts = starts
+            self._ends = ends
+            self._extend_max_end(self._count, len(starts))
+            self._count = len(starts)
+            return
+        self._starts = array('d', starts)
+        self._ends = array('d', ends)
+        self._build()
+
+    def _build(self):
+        count = len(self._starts)
+        if any(self._starts[i] < self._starts[i - 1] for i in range(1, count)):
+            order = sorted(range(count), key=self._starts.__getitem__)
+            self._order = array('l', order)
+            self._starts = array('d', (self._starts[i] for i in order))
+            self._ends = array('d', (self._ends[i] for i in order))
+        else:
+            self._order = None
+        self._max_end = array('d')
+        self._extend_max_end(0, count)
+        self._count = count
+        self.last_hit = None
+
+    def _extend_max_end(self, first, stop):
+        current = self._max_end[-1] if self._max_end else float("-inf")
+        ends = self._ends
+        for i in range(first, stop):
+            if ends[i] > current:
+                current = ends[i]
+            self._max_end.append(current)
+
+    def __len__(self):
+        return self._count
+
+    def _contains(self, position, seconds):
+        return self._starts[position] <= seconds <= self._ends[position]
+
+    def _is_best(self, position, seconds):
+        """position が seconds を含み、それより後に始まるセグメントが seconds を含まないかどうか"""
+        return (self._contains(position, seconds)
+                and (position + 1 >= self._count or self._starts[position + 1] > seconds))
+
+    def find(self, seconds):
+        """
+        指定した時刻を含むセグメントの番号を返す
+
+        Args:
+            seconds (float): 秒単位の時刻
+
+        Returns:
+            int: セグメントの番号（元の並び順）。含むセグメントがない場合はNone
+        """
+        if self._count == 0:
+            return None
+        # 直前に見つかったセグメントとその次を先に確認する（再生中の大半はここで決まる）
+        last = self.last_hit
+        if last is not None and last < self._count:
+            if self._is_best(last, seconds):
+                return self._original(last)
+            following = last + 1
+            if following < self._count and self._is_best(following, seconds):
+                self.last_hit = following
+                return self._original(following)
+
+        position = bisect_right(self._starts, seconds, 0, self._count) - 1
+        # 開始が seconds 以前のセグメントを後ろから確認する。重なりがない限り1回で決まる
+        while position >= 0 and self._max_end[position] >= seconds:
+            if self._ends[position] >= seconds:
+                self.last_hit = position
+                return self._original(position)
+            position -= 1
+        return None
+
+    def _original(self, position):
+        return position if self._order is None else self._order[position]
@@ -0,0 +1,239 @@
+"""
+デコード済みPCMの指定区間を QAudioOutput でサンプル単位で正確に再生するエンジン
+
+QMediaPlayer のシークと終了位置のポーリングによるセグメント再生は、シークの待ち時間があり終了位置も行き過ぎる。
+ここでは DecodedAudio のPCMから区間ちょうどのサンプルを切り出してメモリに置き、QAudioOutput に渡す。
+出力はバッファを読み終えた時点で止まるため、セグメントの終わりで正確に止まる。
+次に再生しそうなセグメントは prefetch() で先にメモリへ切り出しておき、再生をすぐに始められるようにする。
+"""
+
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, pyqtSignal, QBuffer, QByteArray, QIODevice
+from PyQt5.QtMultimedia import QAudio, QAudioFormat, QAudioOutput, QAudioDeviceInfo
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+PREFETCH_MAX_BYTES = 32 * 1024 * 1024  # メモリに置く区間のPCMの合計の上限（16kHzモノラル16bitで約17分）
+NOTIFY_INTERVAL_MS = 50                # 再生位置を通知する間隔（ミリ秒）
+SEGMENT_PREFETCH_COUNT = 3             # セグメントの再生時に先に読み込んでおく後続のセグメント数
+
+
+class PcmRangeCache:
+    """DecodedAudio から切り出した区間のPCMを、合計サイズの上限付きでメモリに保持する (LRU)"""
+
+    def __init__(self, max_bytes=PREFETCH_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (開始秒, 終了秒) -> bytes
+        self._total = 0
+
+    def get(self, decoded, start, end):
+        """
+        区間のPCMを返す（メモリにない場合はメモリマップから切り出して保持する）
+
+        Args:
+            decoded (DecodedAudio): デコード済みの音声
+            start (float): 開始秒
+            end (float): 終了秒
+
+        Returns:
+            bytes: 区間のPCMデータ
+        """
+        key = (start, end)
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            return data
+        data = bytes(decoded.frames(start, end))
+        self._entries[key] = data
+        self._total += len(data)
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self._total -= len(old)
+        return data
+
+    def clear(self):
+        self._entries.clear()
+        self._total = 0
+
+
+class SegmentPlaybackEngine(QObject):
+    """DecodedAudio の区間を QAudioOutput で再生するクラス"""
+
+    position_changed = pyqtSignal(int)  # 再生位置（ミリ秒）
+    state_changed = pyqtSignal(int)     # 再生状態の変更（QMediaPlayer と同じく 0=停止, 1=再生中, 2=一時停止）
+    finished = pyqtSignal(int)          # 区間の終わりまで再生した（終了位置、ミリ秒）
+
+    StoppedState = 0
+    PlayingState = 1
+    PausedState = 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.decoded = None          # 再生する DecodedAudio
+        self.cache = PcmRangeCache()
+        self.output = None
+        self.state = self.StoppedState
+        self.start_ms = 0            # 再生中の区間（ミリ秒）
+        self.end_ms = 0
+        self._stopped_position = 0   # 停止した時点の再生位置（ミリ秒）
+        self._buffer = None
+        self._format_key = None      # output を作った形式 (サンプリングレート, チャンネル数, サンプル幅)
+        self._unsupported = set()    # 出力デバイスが対応していない形式
+
+    def set_source(self, decoded):
+        """再生する音声を設定する（None で解除）。切り出し済みのPCMは破棄する"""
+        self.stop()
+        self.decoded = decoded
+        self.cache.clear()
+
+    def is_active(self):
+        """区間を再生中・一時停止中かどうか"""
+        return self.state != self.StoppedState
+
+    def contains(self, position_ms):
+        """再生中の区間にその位置が含まれるかどうか"""
+        return self.is_active() and self.start_ms <= position_ms < self.end_ms
+
+    def _ensure_output(self):
+        """音声の形式に合った QAudioOutput を返す（出力デバイスが対応していない場合は None）"""
+        decoded = self.decoded
+        if decoded is None:
+            return None
+        key = (decoded.sample_rate, decoded.channels, decoded.sample_width)
+        if key == self._format_key:
+            return self.output
+        if key in self._unsupported:
+            return None
+
+        audio_format = QAudioFormat()
+        audio_format.setSampleRate(decoded.sample_rate)
+        audio_format.setChannelCount(decoded.channels)
+        audio_format.setSampleSize(decoded.sample_width * 8)
+        audio_format.setCodec("audio/pcm")
+        audio_format.setByteOrder(QAudioFormat.LittleEndian)
+        audio_format.setSampleType(QAudioFormat.SignedInt)
+        if not QAudioDeviceInfo.defaultOutputDevice().isFormatSupported(audio_format):
+            logger.warning("出力デバイスが %sHz %sch %sbit に対応していないため、区間の再生には使用しません", *key[:2], key[2] * 8)
+            self._unsupported.add(key)
+            return None
+
+        if self.output is not None:
+            self.output.stop()
+            self.output.deleteLater()
+        self.output = QAudioOutput(audio_format, self)
+        self.output.setNotifyInterval(NOTIFY_INTERVAL_MS)
+        self.output.notify.connect(self._on_notify)
+        self.output.stateChanged.connect(self._on_output_state_changed)
+        self._format_key = key
+        return self.output
+
+    def is_available(self):
+        """区間の再生に使えるかどうか"""
+        return self._ensure_output() is not None
+
+    def play_range(self, start, end):
+        """
+        区間 [start, end) のサンプルだけを再生する
+
+        Args:
+            start (float): 開始秒
+            end (float): 終了秒
+
+        Returns:
+            bool: 再生を開始できたかどうか（False の場合は呼び出し側で QMediaPlayer を使う）
+        """
+        output = self._ensure_output()
+        if output is None or end <= start:
+            return False
+        data = self.cache.get(self.decoded, start, end)
+        if not data:
+            return False
+
+        self._stop_output()
+        self._buffer = QBuffer(self)
+        self._buffer.setData(QByteArray(data))
+        self._buffer.open(QIODevice.ReadOnly)
+        frames = len(data) // self.decoded.frame_size
+        self.start_ms = int(round(start * 1000))
+        self.end_ms = self.start_ms + int(frames * 1000 / self.decoded.sample_rate)
+
+        # start() 中の状態変化を区間の終了と取り違えないよう、開始後に再生中にする
+        output.start(self._buffer)
+        if output.error() != QAudio.NoError:
+            logger.warning("区間の再生を開始できませんでした (QAudio.Error: %s)", output.error())
+            self._stop_output()
+            return False
+        logger.debug("区間を再生: %sms - %sms (%sフレーム)", self.start_ms, self.end_ms, frames)
+        self._set_state(self.PlayingState)
+        self.position_changed.emit(self.start_ms)
+        return True
+
+    def prefetch(self, ranges):
+        """次に再生しそうな区間のPCMを先に切り出しておく"""
+        if self.decoded is None:
+            return
+        for start, end in ranges:
+            if end > start:
+                self.cache.get(self.decoded, start, end)
+
+    def position(self):
+        """再生位置（ミリ秒）"""
+        if self.output is None or not self.is_active():
+            return self._stopped_position
+        return min(self.end_ms, self.start_ms + self.output.processedUSecs() // 1000)
+
+    def pause(self):
+        if self.state == self.PlayingState:
+            self.output.suspend()
+            self._set_state(self.PausedState)
+
+    def resume(self):
+        if self.state == self.PausedState:
+            self.output.resume()
+            self._set_state(self.PlayingState)
+
+    def stop(self):
+        """区間の再生を止める"""
+        if not self.is_active():
+            return
+        self._stop_output()
+        self.state_changed.emit(self.StoppedState)
+
+    def _stop_output(self):
+        # 状態を先に停止にしておき、stop() による状態変化の通知を無視させる
+        if self.is_active():
+            self._stopped_position = self.position()
+        self.state = self.StoppedState
+        if self.output is not None:
+            self.output.stop()
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer.deleteLater()
+            self._buffer = None
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self.state_changed.emit(state)
+
+    def _on_notify(self):
+        if self.state == self.PlayingState:
+            self.position_changed.emit(self.position())
+
+    def _on_output_state_changed(self, state):
+        if not self.is_active():
+            return
+        if state == QAudio.IdleState:
+            # バッファを読み終えた = 区間の終わりのサンプルまで出力した
+            logger.debug("区間の終わりに到達: %sms", self.end_ms)
+            self._stopped_position = self.end_ms
+            self._set_state(self.StoppedState)
+            self.position_changed.emit(self.end_ms)
+            self.finished.emit(self.end_ms)
+        elif state == QAudio.StoppedState and self.output.error() != QAudio.NoError:
+            logger.warning("区間の再生が中断されました (QAudio.Error: %s)", self.output.error())
+            self._stopped_position = self.position()
+            self._set_state(self.StoppedState)
+            self.finished.emit(self._stopped_position)
@@ -0,0 +1,151 @@
+"""
+文字起こしセグメントの全文検索
+
+日本語は空白で単語に分けられないため、セグメントのテキストを文字バイグラム（隣り合う2文字）に分けた
+転置インデックスを作り、検索語のバイグラムをすべて含むセグメントに絞り込んでから実際に含むかを確かめる。
+全角・半角や大文字・小文字の違いは NFKC 正規化と casefold で吸収する（「１０００台」で「1000台」も見つかる）。
+"""
+
+import math
+import unicodedata
+from array import array
+from collections import namedtuple
+
+SearchHit = namedtuple("SearchHit", ["index", "start", "end", "score", "text"])
+
+DEFAULT_SEARCH_LIMIT = 200
+
+
+def normalize_text(text):
+    """検索用にテキストを正規化する（NFKC + casefold）"""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def split_query(query):
+    """検索語を空白で区切り、正規化した語のリストにする（すべての語を含むセグメントが対象）"""
+    return [term for term in normalize_text(query).split() if term]
+
+
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class SegmentSearchIndex:
+    """
+    セグメントのテキストから作る文字バイグラムの転置インデックス
+
+    SegmentStore（または 'text' を持つ辞書のリスト）を参照し、文字起こし中にセグメントが追加されても
+    refresh() で追加分だけを取り込む。search() も呼ばれた時点の追加分を取り込んでから検索する。
+    """
+
+    def __init__(self, source=None):
+        """
+        Args:
+            source: text(i) を持つオブジェクト（SegmentStore）、または 'text' を持つ辞書のリスト
+        """
+        self.source = source
+        self._reset()
+
+    def _reset(self):
+        self._postings = {}  # バイグラム -> そのバイグラムを含むセグメント番号の array('I')（昇順）
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _text(self, index):
+        if hasattr(self.source, "text"):
+            return self.source.text(index)
+        return self.source[index].get('text', '')
+
+    def refresh(self):
+        """元のセグメントが増えていれば追加分をインデックスに加える（減った場合は作り直す）"""
+        if self.source is None:
+            return
+        count = len(self.source)
+        if count < self._count:
+            self._reset()
+        postings = self._postings
+        for index in range(self._count, count):
+            for bigram in _bigrams(normalize_text(self._text(index))):
+                posting = postings.get(bigram)
+                if posting is None:
+                    postings[bigram] = array('I', [index])
+                else:
+                    posting.append(index)
+        self._count = count
+
+    def _candidates(self, term):
+        """term のバイグラムをすべて含むセグメントの番号（1文字の語は全セグメント）"""
+        if len(term) < 2:
+            return range(self._count)
+        postings = []
+        for bigram in _bigrams(term):
+            posting = self._postings.get(bigram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        # 最も短い転置リストから始めて共通部分を取る
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return sorted(candidates)
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        検索語をすべて含むセグメントを関連度の高い順に返す
+
+        関連度は語ごとの「出現回数 × 語の長さ × log(1 + セグメント数 / 該当セグメント数)」の合計で、
+        短いセグメントほどわずかに高くなる。同じ関連度の場合は開始時刻の早い順に並べる。
+
+        Args:
+            query (str): 検索語（空白区切りで複数指定するとすべてを含むセグメントを探す）
+            limit (int, optional): 返す件数の上限（None で無制限）
+
+        Returns:
+            list: SearchHit のリスト
+        """
+        self.refresh()
+        terms = split_query(query)
+        if not terms or self._count == 0:
+            return []
+
+        # 最も絞り込める語で候補を決め、候補のテキストで全ての語を確かめる
+        candidates = min((self._candidates(term) for term in terms), key=len)
+        matches = []
+        document_frequency = [0] * len(terms)
+        for index in candidates:
+            text = normalize_text(self._text(index))
+            counts = [text.count(term) for term in terms]
+            if all(counts):
+                matches.append((index, text, counts))
+                for i in range(len(terms)):
+                    document_frequency[i] += 1
+        if not matches:
+            return []
+
+        weights = [len(term) * math.log(1 + self._count / document_frequency[i]) for i, term in enumerate(terms)]
+        scored = []
+        for index, text, counts in matches:
+            score = sum(count * weight for count, weight in zip(counts, weights))
+            scored.append((score / math.sqrt(1 + len(text) / 50), index))
+        scored.sort(key=lambda item: (-item[0], self._start(item[1])))
+        if limit is not None:
+            scored = scored[:limit]
+        return [
+            SearchHit(index, self._start(index), self._end(index), round(score, 4), self._text(index))
+            for score, index in scored
+        ]
+
+    def _start(self, index):
+        if hasattr(self.source, "starts"):
+            return self.source.starts[index]
+        return self.source[index].get('start', 0)
+
+    def _end(self, index):
+        if hasattr(self.source, "ends"):
+            return self.source.ends[index]
+        return self.source[index].get('end', 0)
@@ -0,0 +1,222 @@
+"""
+文字起こしセグメントをまとめて保持するコンテナ
+
+セグメントごとに辞書と文字列を作る代わりに、開始・終了時刻を型付き配列に、
+テキストを1つのUTF-8バッファ（各セグメントを1行とした全文そのもの）に格納する。
+数時間分の文字起こしでもオブジェクト数が増えず、全文を別に組み立てる必要がない。
+"""
+
+from array import array
+
+
+class Segment:
+    """SegmentStore の1件を参照する軽量なビュー（辞書と同じ 'start'/'end'/'text' キーでも参照できる）"""
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def start(self):
+        return self.store.starts[self.index]
+
+    @property
+    def end(self):
+        return self.store.ends[self.index]
+
+    @property
+    def text(self):
+        return self.store.text(self.index)
+
+    def __getitem__(self, key):
+        if key == 'start':
+            return self.start
+        if key == 'end':
+            return self.end
+        if key == 'text':
+            return self.text
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        return {'start': self.start, 'end': self.end, 'text': self.text}
+
+    def __repr__(self):
+        return f"<Segment {self.index} {self.start:.3f}-{self.end:.3f} {self.text[:20]!r}>"
+
+
+class SegmentView:
+    """SegmentStore の連続した範囲を参照するビュー（スライスで作られ、データはコピーしない）"""
+
+    __slots__ = ("store", "first", "stop")
+
+    def __init__(self, store, first, stop):
+        self.store = store
+        self.first = first
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.first
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            first, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("SegmentView は step 付きのスライスに対応していません")
+            return SegmentView(self.store, self.first + first, self.first + max(first, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("セグメントの番号が範囲外です")
+        return Segment(self.store, self.first + index)
+
+    def __iter__(self):
+        for index in range(self.first, self.stop):
+            yield Segment(self.store, index)
+
+    def transcript(self):
+        """範囲内のテキストを1行1セグメントで連結した文字列"""
+        return self.store.transcript(self.first, self.stop)
+
+    def to_dicts(self):
+        return [segment.to_dict() for segment in self]
+
+
+class SegmentStore:
+    """
+    セグメントを列ごとに保持するコンテナ
+
+    - starts / ends: 開始・終了時刻（秒）の array('d')
+    - テキスト: 前後の空白を除き改行で終えたUTF-8を1つの bytearray に連結（空のテキストは何も追加しない）
+    - offsets: i番目のセグメントのテキストがバッファの offsets[i]:offsets[i + 1] にある
+
+    バッファは各セグメントを1行とした全文と同じ内容なので、全文は transcript() でそのまま取り出せる。
+    from_columns() で作ったストアは渡された列（サイドカーをマップした memoryview など）を参照し、
+    列が追加に対応していなければ読み取り専用になる。
+    """
+
+    __slots__ = ("starts", "ends", "offsets", "buffer")
+
+    def __init__(self, segments=None):
+        self.starts = array('d')
+        self.ends = array('d')
+        self.offsets = array('Q', [0])
+        self.buffer = bytearray()
+        if segments is not None:
+            self.extend(segments)
+
+    @classmethod
+    def from_columns(cls, starts, ends, offsets, buffer):
+        """
+        既存の列からコピーせずにストアを作る
+
+        Args:
+            starts: 開始時刻の列（'d' の array または memoryview）
+            ends: 終了時刻の列
+            offsets: テキストの位置の列（セグメント数 + 1 件、先頭は0）
+            buffer: UTF-8テキスト（bytearray または memoryview）
+        """
+        store = cls.__new__(cls)
+        store.starts = starts
+        store.ends = ends
+        store.offsets = offsets
+        store.buffer = buffer
+        return store
+
+    def append(self, start, end, text):
+        """セグメントを末尾に追加する（テキスト内の改行は空白に置き換える）"""
+        text = text.strip()
+        if "\n" in text:
+            text = text.replace("\r", "").replace("\n", " ")
+        self.starts.append(start)
+        self.ends.append(end)
+        if text:
+            self.buffer += text.encode("utf-8")
+            self.buffer += b"\n"
+        self.offsets.append(len(self.buffer))
+
+    def extend(self, segments):
+        """
+        セグメントをまとめて追加する
+
+        Args:
+            segments (iterable): 'start'/'end'/'text' を持つ辞書・Segment、または SegmentStore
+        """
+        if isinstance(segments, SegmentStore):
+            base = len(self.buffer)
+            self.starts.extend(segments.starts)
+            self.ends.extend(segments.ends)
+            self.buffer += segments.buffer
+            self.offsets.extend(base + offset for offset in segments.offsets[1:])
+            return
+        for segment in segments:
+            self.append(segment.get('start', 0), segment.get('end', 0), segment.get('text', ''))
+
+    def clear(self):
+        del self.starts[:]
+        del self.ends[:]
+        del self.offsets[1:]
+        del self.buffer[:]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __bool__(self):
+        return len(self.starts) > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SegmentView(self, 0, len(self))[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("セグメントの番号が範囲外です")
+        return Segment(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield Segment(self, index)
+
+    def text(self, index):
+        """index番目のセグメントのテキスト"""
+        first = self.offsets[index]
+        stop = self.offsets[index + 1]
+        if first == stop:
+            return ""
+        return str(self.buffer[first:stop - 1], "utf-8")
+
+    def matches(self, index, start, end, text, tolerance=0.001):
+        """index番目のセグメントが指定の内容と同じかどうか（時刻は tolerance 秒まで同じとみなす）"""
+        return (abs(self.starts[index] - start) < tolerance and abs(self.ends[index] - end) < tolerance
+                and self.text(index) == text.strip())
+
+    def transcript(self, first=0, stop=None):
+        """
+        テキストを1行1セグメントで連結した全文（空のセグメントは含めない）
+
+        Args:
+            first (int, optional): 最初のセグメントの番号
+            stop (int, optional): 最後のセグメントの次の番号（省略時は末尾まで）
+        """
+        stop = len(self) if stop is None else stop
+        return str(self.buffer[self.offsets[first]:self.offsets[stop]], "utf-8")
+
+    def write_transcript(self, f):
+        """全文をバイナリモードのファイルへ書き出す（文字列を経由しない）"""
+        f.write(self.buffer)
+
+    def to_dicts(self):
+        """従来の辞書のリストに変換する（シグナル・キャッシュなどリストを受け取る処理向け）"""
+        return [segment.to_dict() for segment in self]
+
+    def nbytes(self):
+        """保持しているデータの概算バイト数"""
+        return (len(self.buffer) + self.starts.itemsize * len(self.starts) * 2
+                + self.offsets.itemsize * len(self.offsets))
@@ -0,0 +1,159 @@
+"""
+文字起こしセグメントを表示するテーブルのモデルとデリゲート
+
+SegmentStore をそのまま QAbstractTableModel として公開し、表示中の行だけが描画時に値を取り出す。
+行ごとのウィジェット（再生ボタン）は作らず、再生列はデリゲートがボタンの見た目を描画してクリックを受け取る。
+"""
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, pyqtSignal
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
+
+from utils.segment_store import SegmentStore
+
+COLUMN_START = 0
+COLUMN_END = 1
+COLUMN_TEXT = 2
+COLUMN_PLAY = 3
+HEADERS = ["開始時間", "終了時間", "テキスト", "再生"]
+
+
+def format_segment_time(seconds):
+    """秒数を「分:秒」形式にフォーマット"""
+    m, s = divmod(int(seconds), 60)
+    return f"{m:02d}:{s:02d}"
+
+
+class SegmentTableModel(QAbstractTableModel):
+    """SegmentStore を表示するテーブルモデル"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.store = SegmentStore()
+        self.has_audio = True
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == COLUMN_START:
+                return format_segment_time(self.store.starts[row])
+            if column == COLUMN_END:
+                return format_segment_time(self.store.ends[row])
+            if column == COLUMN_TEXT:
+                return self.store.text(row)
+            if column == COLUMN_PLAY:
+                return "再生"
+        elif role == Qt.ToolTipRole and column == COLUMN_TEXT:
+            return self.store.text(row)
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.column() == COLUMN_PLAY and not self.has_audio:
+            return Qt.ItemIsSelectable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def set_segments(self, store, has_audio=True):
+        """表示するセグメントを差し替える（テーブル全体を作り直す）"""
+        self.beginResetModel()
+        self.store = store
+        self.has_audio = has_audio
+        self.endResetModel()
+
+    def append(self, segments):
+        """
+        セグメントを末尾に追加する（追加した行だけがビューに通知される）
+
+        Args:
+            segments (iterable): 'start'/'end'/'text' を持つ辞書のリスト、または SegmentStore
+        """
+        addition = segments if isinstance(segments, SegmentStore) else SegmentStore(segments)
+        if not addition:
+            return
+        first = len(self.store)
+        self.beginInsertRows(QModelIndex(), first, first + len(addition) - 1)
+        self.store.extend(addition)
+        self.endInsertRows()
+
+    def replace_segments(self, store, has_audio=True):
+        """
+        逐次表示していたセグメントを最終結果に置き換える（行数の差と内容が変わった範囲だけを通知する）
+
+        Args:
+            store (SegmentStore): 最終的なセグメント
+            has_audio (bool): 音声があるかどうか
+        """
+        old = self.store
+        shown = len(old)
+        count = len(store)
+        changed = [
+            i for i in range(min(shown, count))
+            if not old.matches(i, store.starts[i], store.ends[i], store.text(i))
+        ]
+        if count < shown:
+            self.beginRemoveRows(QModelIndex(), count, shown - 1)
+            self.store = store
+            self.endRemoveRows()
+        elif count > shown:
+            self.beginInsertRows(QModelIndex(), shown, count - 1)
+            self.store = store
+            self.endInsertRows()
+        else:
+            self.store = store
+        self.has_audio = has_audio
+        if changed:
+            self.dataChanged.emit(self.index(changed[0], 0), self.index(changed[-1], len(HEADERS) - 1))
+
+
+class PlayButtonDelegate(QStyledItemDelegate):
+    """再生列にボタンの見た目を描画し、クリックされた行を play_requested で通知するデリゲート"""
+
+    play_requested = pyqtSignal(int)  # 行番号
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pressed_row = None
+
+    def _button_option(self, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = index.data(Qt.DisplayRole) or ""
+        enabled = bool(index.flags() & Qt.ItemIsEnabled)
+        button.state = QStyle.State_Enabled if enabled else QStyle.State_None
+        if enabled and self.pressed_row == index.row():
+            button.state |= QStyle.State_Sunken
+        else:
+            button.state |= QStyle.State_Raised
+        return button
+
+    def paint(self, painter, option, index):
+        widget = option.widget
+        style = widget.style() if widget is not None else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, self._button_option(option, index), painter, widget)
+
+    def editorEvent(self, event, model, option, index):
+        if not index.flags() & Qt.ItemIsEnabled:
+            return False
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            self.pressed_row = index.row()
+            return True
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            pressed, self.pressed_row = self.pressed_row, None
+            if pressed == index.row() and option.rect.contains(event.pos()):
+                self.play_requested.emit(index.row())
+            return True
+        return False
@@ -0,0 +1,455 @@
+"""
+会議ごとの文字起こし・資料・要約を1つのSQLiteデータベースに蓄積するアーカイブ
+
+セッション（1回の会議）ごとに、音声のダイジェスト・セグメント・追加資料の抽出テキスト・要約・
+使用したモデルとプロンプトを保存し、FTS5 の全文検索インデックスで複数の会議をまとめて検索する。
+日本語は空白で区切られないため、FTS5 は trigram トークナイザーを使う（3文字未満の語は LIKE で探す）。
+一覧・セグメント・検索結果はすべてページ単位で取り出し、全文をまとめてメモリに読み込まない。
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from collections import namedtuple
+
+from utils.log_utils import get_logger
+from utils.output_utils import get_default_output_dir
+from utils.transcript_sidecar import load_segments, load_sidecar, sidecar_path
+from utils.subtitle_parser import SUBTITLE_EXTENSIONS
+
+logger = get_logger(__name__)
+
+SCHEMA_VERSION = 1
+DEFAULT_PAGE_SIZE = 50
+
+# 検索対象の種類（本体のテーブル名。FTSのテーブルは {種類}_fts）
+KIND_SEGMENTS = "segments"
+KIND_SUMMARIES = "summaries"
+KIND_DOCUMENTS = "documents"
+SEARCH_KINDS = (KIND_SEGMENTS, KIND_SUMMARIES, KIND_DOCUMENTS)
+
+# trigram トークナイザーで検索できる最短の語の長さ
+MIN_FTS_TERM_LENGTH = 3
+
+Page = namedtuple("Page", ["items", "page", "has_more"])
+
+# save_result_files が出力するファイル名: {元のファイル名}_{YYYYmmdd_HHMMSS}_transcription.txt / _summary.txt
+_SAVED_FILE_RE = re.compile(r"^(?P<title>.+)_(?P<timestamp>\d{8}_\d{6})_(?P<kind>transcription|summary)\.txt$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    title TEXT NOT NULL,
+    audio_path TEXT,
+    audio_digest TEXT,
+    source_path TEXT UNIQUE,
+    model TEXT,
+    prompt TEXT,
+    segment_count INTEGER NOT NULL DEFAULT 0,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_created_at ON sessions(created_at);
+CREATE INDEX IF NOT EXISTS sessions_audio_digest ON sessions(audio_digest);
+
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    start_time REAL,
+    end_time REAL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_session ON segments(session_id, position);
+
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_session ON documents(session_id);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    created_at TEXT NOT NULL,
+    model TEXT,
+    prompt TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_session ON summaries(session_id);
+"""
+
+
+def get_default_archive_path():
+    """
+    アーカイブの既定の保存先を取得する
+
+    Returns:
+        str: ~/Documents/要約ツール/archive.sqlite3
+    """
+    return os.path.join(get_default_output_dir(), "archive.sqlite3")
+
+
+def _fts_phrase(term):
+    """検索語を FTS5 のフレーズとして引用する"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _like_pattern(term):
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _make_snippet(text, terms, width=40):
+    """最初に見つかった語の前後を切り出した抜粋（FTSを使わない検索用）"""
+    lowered = text.casefold()
+    positions = [lowered.find(term.casefold()) for term in terms]
+    positions = [p for p in positions if p >= 0]
+    if not positions:
+        return text[:width * 2]
+    first = max(0, min(positions) - width)
+    stop = min(len(text), min(positions) + width)
+    return ("…" if first > 0 else "") + text[first:stop] + ("…" if stop < len(text) else "")
+
+
+class SessionArchive:
+    """
+    会議ごとの結果を蓄積するSQLiteアーカイブ
+
+    1つの接続を複数のスレッドで共有する（書き込みはロックで直列化する）。
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str, optional): データベースファイルのパス（省略時は get_default_archive_path()）
+        """
+        self.path = path or get_default_archive_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        self.tokenizer = None
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            for tokenizer in ("trigram", "unicode61"):
+                try:
+                    for kind in SEARCH_KINDS:
+                        self._conn.execute(
+                            f"CREATE VIRTUAL TABLE IF NOT EXISTS {kind}_fts USING fts5("
+                            f"text, content='{kind}', content_rowid='id', tokenize='{tokenizer}')"
+                        )
+                    self.tokenizer = tokenizer
+                    break
+                except sqlite3.OperationalError as e:
+                    logger.warning("FTS5の %s トークナイザーを使えません: %s", tokenizer, e)
+            if self.tokenizer is None:
+                raise sqlite3.OperationalError("FTS5を使用できないSQLiteです")
+            for kind in SEARCH_KINDS:
+                # 本体テーブルへの追加・削除をFTSインデックスに反映する
+                self._conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {kind}_fts_insert AFTER INSERT ON {kind} BEGIN "
+                    f"INSERT INTO {kind}_fts(rowid, text) VALUES (new.id, new.text); END"
+                )
+                self._conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {kind}_fts_delete AFTER DELETE ON {kind} BEGIN "
+                    f"INSERT INTO {kind}_fts({kind}_fts, rowid, text) VALUES ('delete', old.id, old.text); END"
+                )
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # 追加・削除
+    # ------------------------------------------------------------------
+
+    def add_session(self, segments=None, transcript=None, summary=None, documents=None,
+                    audio_path=None, audio_digest=None, model=None, prompt=None,
+                    title=None, created_at=None, source_path=None):
+        """
+        1回の会議の結果を追加する
+
+        Args:
+            segments (iterable, optional): 'start'/'end'/'text' を持つ辞書・Segment、または SegmentStore
+            transcript (str or iterable, optional): セグメントがない場合の文字起こし（1行を1セグメントとして時刻なしで保存）
+            summary (str, optional): 要約
+            documents (list, optional): (資料名, 抽出テキスト) のリスト
+            audio_path (str, optional): 元の音声ファイルのパス
+            audio_digest (str, optional): 音声ファイルのダイジェスト
+            model (str, optional): 要約に使ったモデル
+            prompt (str, optional): 要約に使ったプロンプト
+            title (str, optional): 表示名（省略時は音声ファイル名）
+            created_at (str, optional): 会議の日時（ISO形式、省略時は現在時刻）
+            source_path (str, optional): 取り込み元のファイル（同じファイルは2回取り込まない）
+
+        Returns:
+            int: 追加したセッションのID（source_path が取り込み済みの場合は None）
+        """
+        created_at = created_at or datetime.now().isoformat(timespec="seconds")
+        if title is None:
+            title = os.path.splitext(os.path.basename(audio_path))[0] if audio_path else "transcription"
+
+        with self._lock, self._conn:
+            if source_path and self._conn.execute(
+                "SELECT 1 FROM sessions WHERE source_path = ?", (source_path,)
+            ).fetchone():
+                return None
+            session_id = self._conn.execute(
+                "INSERT INTO sessions (created_at, title, audio_path, audio_digest, source_path, model, prompt) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (created_at, title, audio_path, audio_digest, source_path, model, prompt)
+            ).lastrowid
+
+            if segments is not None:
+                rows = (
+                    (session_id, position, segment.get('start'), segment.get('end'), segment.get('text', '').strip())
+                    for position, segment in enumerate(segments)
+                )
+            elif transcript:
+                lines = transcript.splitlines() if isinstance(transcript, str) else transcript
+                rows = (
+                    (session_id, position, None, None, line)
+                    for position, line in enumerate(line.strip() for line in lines) if line
+                )
+            else:
+                rows = ()
+            self._conn.executemany(
+                "INSERT INTO segments (session_id, position, start_time, end_time, text) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute(
+                "UPDATE sessions SET segment_count = (SELECT COUNT(*) FROM segments WHERE session_id = ?), "
+                "duration = (SELECT MAX(end_time) FROM segments WHERE session_id = ?) WHERE id = ?",
+                (session_id, session_id, session_id)
+            )
+            self._conn.executemany(
+                "INSERT INTO documents (session_id, name, text) VALUES (?, ?, ?)",
+                ((session_id, name, text) for name, text in (documents or []) if text)
+            )
+            if summary:
+                self._conn.execute(
+                    "INSERT INTO summaries (session_id, created_at, model, prompt, text) VALUES (?, ?, ?, ?, ?)",
+                    (session_id, created_at, model, prompt, summary)
+                )
+        logger.info("アーカイブに追加しました: %s (ID: %d)", title, session_id)
+        return session_id
+
+    def add_summary(self, session_id, summary, model=None, prompt=None):
+        """既存のセッションに要約を追加する（要約を作り直した場合など）"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "INSERT INTO summaries (session_id, created_at, model, prompt, text) VALUES (?, ?, ?, ?, ?)",
+                (session_id, datetime.now().isoformat(timespec="seconds"), model, prompt, summary)
+            ).lastrowid
+
+    def delete_session(self, session_id):
+        """セッションと、そのセグメント・資料・要約を削除する"""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+    # ------------------------------------------------------------------
+    # 参照（すべてページ単位）
+    # ------------------------------------------------------------------
+
+    def _page(self, sql, params, page, page_size):
+        """page_size + 1 件を取り出して次のページの有無を判定する"""
+        page = max(0, page)
+        with self._lock:
+            rows = self._conn.execute(
+                f"{sql} LIMIT ? OFFSET ?", (*params, page_size + 1, page * page_size)
+            ).fetchall()
+        return Page([dict(row) for row in rows[:page_size]], page, len(rows) > page_size)
+
+    def count_sessions(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def list_sessions(self, page=0, page_size=DEFAULT_PAGE_SIZE):
+        """
+        セッションの一覧を新しい順に返す（本文は含めない）
+
+        Returns:
+            Page: items は id / created_at / title / audio_path / audio_digest / model / segment_count / duration の辞書
+        """
+        return self._page(
+            "SELECT id, created_at, title, audio_path, audio_digest, model, segment_count, duration "
+            "FROM sessions ORDER BY created_at DESC, id DESC",
+            (), page, page_size
+        )
+
+    def get_session(self, session_id):
+        """セッションの情報（プロンプトを含み、本文は含めない）。存在しない場合は None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def get_segments(self, session_id, page=0, page_size=DEFAULT_PAGE_SIZE):
+        """
+        セッションのセグメントを先頭から順に返す
+
+        Returns:
+            Page: items は position / start / end / text の辞書
+        """
+        return self._page(
+            "SELECT position, start_time AS start, end_time AS end, text FROM segments "
+            "WHERE session_id = ? ORDER BY position",
+            (session_id,), page, page_size
+        )
+
+    def get_summaries(self, session_id):
+        """セッションの要約を新しい順に返す"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, created_at, model, prompt, text FROM summaries WHERE session_id = ? "
+                "ORDER BY created_at DESC, id DESC",
+                (session_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(self, query, kind=KIND_SEGMENTS, page=0, page_size=DEFAULT_PAGE_SIZE):
+        """
+        全セッションを対象に全文検索する
+
+        空白で区切った語をすべて含むものを返す。全ての語が3文字以上の場合はFTSインデックスで探して
+        関連度（bm25）順に、短い語を含む場合は LIKE で探して新しいセッション順に並べる。
+
+        Args:
+            query (str): 検索語
+            kind (str): 検索対象（KIND_SEGMENTS / KIND_SUMMARIES / KIND_DOCUMENTS）
+            page (int): ページ番号（0始まり）
+            page_size (int): 1ページの件数
+
+        Returns:
+            Page: items は session_id / title / created_at / id / snippet の辞書
+                （セグメントの場合は start / end、資料の場合は name も含む）
+        """
+        if kind not in SEARCH_KINDS:
+            raise ValueError(f"検索対象が不正です: {kind}")
+        terms = query.split()
+        if not terms:
+            return Page([], page, False)
+
+        extra = {
+            KIND_SEGMENTS: ", t.start_time AS start, t.end_time AS end",
+            KIND_SUMMARIES: ", t.model",
+            KIND_DOCUMENTS: ", t.name",
+        }[kind]
+        use_fts = self.tokenizer != "trigram" or all(len(term) >= MIN_FTS_TERM_LENGTH for term in terms)
+        if use_fts:
+            return self._page(
+                f"SELECT t.session_id, s.title, s.created_at, t.id{extra}, "
+                f"snippet({kind}_fts, 0, '【', '】', '…', 24) AS snippet "
+                f"FROM {kind}_fts JOIN {kind} t ON t.id = {kind}_fts.rowid JOIN sessions s ON s.id = t.session_id "
+                f"WHERE {kind}_fts MATCH ? ORDER BY bm25({kind}_fts), t.id",
+                (" ".join(_fts_phrase(term) for term in terms),), page, page_size
+            )
+
+        conditions = " AND ".join("t.text LIKE ? ESCAPE '\\'" for _ in terms)
+        result = self._page(
+            f"SELECT t.session_id, s.title, s.created_at, t.id{extra}, t.text AS snippet "
+            f"FROM {kind} t JOIN sessions s ON s.id = t.session_id "
+            f"WHERE {conditions} ORDER BY s.created_at DESC, t.id",
+            tuple(_like_pattern(term) for term in terms), page, page_size
+        )
+        for item in result.items:
+            item["snippet"] = _make_snippet(item["snippet"], terms)
+        return result
+
+    # ------------------------------------------------------------------
+    # 既存の出力フォルダーの取り込み
+    # ------------------------------------------------------------------
+
+    def import_output_folder(self, folder, recursive=True):
+        """
+        既存の出力フォルダーの結果をまとめて取り込む
+
+        - save_result_files の出力（{名前}_{日時}_transcription.txt / _summary.txt）は日時ごとに1セッションにする。
+          隣にサイドカー（_transcription.lsseg）があれば時刻付きのセグメントとして取り込む。
+        - 文字起こしの出力（SRT/WebVTT/JSON）は、同じ名前の保存済みセッションがない場合だけ取り込む。
+        - 取り込み済みのファイルは取り込まない（何度実行してもよい）。
+
+        Args:
+            folder (str): 出力フォルダー
+            recursive (bool): サブフォルダーも探すかどうか
+
+        Returns:
+            dict: 'imported' / 'skipped' / 'failed' の件数
+        """
+        saved = {}      # (フォルダー, 名前, 日時) -> {'transcription': パス, 'summary': パス}
+        subtitles = []  # 字幕ファイルのパス
+        for root, dirs, files in os.walk(folder):
+            # 並列文字起こしの作業フォルダーは取り込まない
+            dirs[:] = [] if not recursive else [d for d in dirs if not d.endswith("_chunks")]
+            for name in files:
+                match = _SAVED_FILE_RE.match(name)
+                if match:
+                    key = (root, match.group("title"), match.group("timestamp"))
+                    saved.setdefault(key, {})[match.group("kind")] = os.path.join(root, name)
+                elif os.path.splitext(name)[1].lower() in SUBTITLE_EXTENSIONS:
+                    subtitles.append(os.path.join(root, name))
+
+        counts = {"imported": 0, "skipped": 0, "failed": 0}
+
+        def record(func, path):
+            try:
+                session_id = func()
+            except (OSError, ValueError, UnicodeDecodeError, sqlite3.Error) as e:
+                logger.warning("取り込みに失敗しました: %s (%s)", path, e)
+                counts["failed"] += 1
+                return
+            counts["imported" if session_id is not None else "skipped"] += 1
+
+        for (root, title, timestamp), paths in sorted(saved.items()):
+            source = paths.get("transcription") or paths["summary"]
+            record(lambda: self._import_saved(title, timestamp, paths), source)
+
+        saved_titles = {title for _, title, _ in saved}
+        for path in sorted(subtitles):
+            title = os.path.splitext(os.path.basename(path))[0]
+            if title in saved_titles:
+                counts["skipped"] += 1
+                continue
+            record(lambda: self._import_subtitle(path, title), path)
+        logger.info("取り込み完了: %s (%s)", folder, counts)
+        return counts
+
+    def _import_saved(self, title, timestamp, paths):
+        created_at = datetime.strptime(timestamp, "%Y%m%d_%H%M%S").isoformat(timespec="seconds")
+        transcription_path = paths.get("transcription")
+        source_path = os.path.abspath(transcription_path or paths["summary"])
+        summary = None
+        if paths.get("summary"):
+            with open(paths["summary"], "r", encoding="utf-8") as f:
+                summary = f.read()
+        if transcription_path is None:
+            return self.add_session(summary=summary, title=title, created_at=created_at, source_path=source_path)
+
+        segments = load_sidecar(sidecar_path(transcription_path))
+        if segments is not None:
+            return self.add_session(segments=segments, summary=summary, title=title,
+                                    created_at=created_at, source_path=source_path)
+        # テキストは1行ずつ読みながら追加する
+        with open(transcription_path, "r", encoding="utf-8") as f:
+            return self.add_session(transcript=f, summary=summary, title=title,
+                                    created_at=created_at, source_path=source_path)
+
+    def _import_subtitle(self, path, title):
+        created_at = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds")
+        segments = load_segments(path)
+        if not segments:
+            return None  # バッチのレポートなど字幕ではないJSON
+        return self.add_session(segments=segments, title=title, created_at=created_at,
+                                source_path=os.path.abspath(path))
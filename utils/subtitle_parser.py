@@ -0,0 +1,343 @@
+"""
+字幕ファイル (SRT / WebVTT / faster-whisperのJSON出力) の読み込みを行うユーティリティ
+
+ファイル全体を一度に読み込まず、一定サイズずつ読みながら空行区切りのブロック単位で解析する。
+faster-whisperが書く固定の形（番号 / "HH:MM:SS,mmm --> HH:MM:SS,mmm" / テキスト）のブロックは
+文字位置から直接読み取り、それ以外は正規表現で、形が崩れたブロック（番号・空行の欠落、時刻行の重複など）は
+1行ずつの解析に回す。CRLF・BOMにも対応する。時刻行として解釈できないブロックは読み飛ばす。
+"""
+
+import os
+import re
+import json
+
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+FORMAT_SRT = "srt"
+FORMAT_VTT = "vtt"
+FORMAT_JSON = "json"
+
+# 拡張子 -> 形式
+SUBTITLE_EXTENSIONS = {
+    ".srt": FORMAT_SRT,
+    ".vtt": FORMAT_VTT,
+    ".json": FORMAT_JSON,
+}
+
+# 時刻 (SRTは HH:MM:SS,mmm、WebVTTは時が省略可能で区切りが '.')
+_TIME = r"(?:(\d+):)?(\d{1,2}):(\d{1,2})(?:[,.](\d{1,3}))?"
+# 時刻行 "開始 --> 終了"。WebVTTでは終了時刻の後に表示位置などの設定が続くことがある
+_TIMING_RE = re.compile(r"\s*" + _TIME + r"\s*-->\s*" + _TIME)
+_TIME_RE = re.compile(r"\s*" + _TIME + r"\s*$")
+# 整ったブロック: 番号行(省略可)、時刻行、空白以外を含む行の並び
+_CUE_BLOCK_RE = re.compile(
+    r"^(?:\d+[ \t]*\n)?[ \t]*" + _TIME + r"[ \t]*-->[ \t]*" + _TIME + r"[^\n]*\n?"
+    r"((?:[ \t]*\S[^\n]*\n?)*)",
+    re.M
+)
+# faster-whisperが書く固定の形のブロック: 番号行、"HH:MM:SS,mmm --> HH:MM:SS,mmm"、空でない行の並び、空行
+_FIXED_CUE_RE = re.compile(
+    r"^\d+\n(\d\d):(\d\d):(\d\d),(\d\d\d) --> (\d\d):(\d\d):(\d\d),(\d\d\d)\n([^\n]+(?:\n[^\n]+)*)(?:\n\n+|\n?\Z)",
+    re.M
+)
+# WebVTTのテキスト内タグ (<v 話者>, <c.色>, <00:00:01.000> など)
+_VTT_TAG_RE = re.compile(r"<[^>]*>")
+# WebVTTでキューとして扱わないブロック
+_VTT_SKIP_BLOCKS = ("NOTE", "STYLE", "REGION")
+_VTT_ENTITIES = (("&lt;", "<"), ("&gt;", ">"), ("&nbsp;", " "), ("&amp;", "&"))
+
+# ファイルから一度に読み込む文字数
+READ_CHUNK_SIZE = 1024 * 1024
+
+# ミリ秒部分の桁数 -> 秒への換算係数 (",5" は0.5秒として扱う)
+_FRACTION_SCALE = {0: 0.0, 1: 0.1, 2: 0.01, 3: 0.001}
+
+# 固定の形の時刻の "時" "分" (2桁) -> 秒。int() の呼び出しより辞書の参照の方が速い
+_HOURS_TO_SECONDS = {f"{i:02d}": i * 3600 for i in range(100)}
+_MINUTES_TO_SECONDS = {f"{i:02d}": i * 60 for i in range(100)}
+
+
+def _to_seconds(hours, minutes, seconds, fraction):
+    """正規表現のグループ（文字列またはNone）を秒数にする"""
+    total = int(minutes) * 60 + int(seconds)
+    if hours:
+        total += int(hours) * 3600
+    if fraction:
+        return total + int(fraction) * _FRACTION_SCALE[len(fraction)]
+    return float(total)
+
+
+def parse_timestamp(text):
+    """
+    SRT/WebVTTの時刻文字列を秒数に変換する
+
+    Returns:
+        float: 秒数（解釈できない場合はNone）
+    """
+    match = _TIME_RE.match(text)
+    if match is None:
+        return None
+    return _to_seconds(*match.groups())
+
+
+def parse_timing_line(line):
+    """
+    "開始 --> 終了" の時刻行を解釈する
+
+    Returns:
+        tuple: (開始秒, 終了秒)（時刻行でない場合はNone）
+    """
+    # faster-whisperが出力する "HH:MM:SS,mmm --> HH:MM:SS,mmm" は文字位置から直接読み取る
+    if (len(line) >= 29 and line[12:17] == " --> " and line[2] == line[5] == line[19] == line[22] == ":"
+            and line[8] in ",." and line[25] in ",." and (len(line) == 29 or line[29] == " ")):
+        try:
+            return (
+                int(line[0:2]) * 3600 + int(line[3:5]) * 60 + int(line[6:8] + line[9:12]) / 1000,
+                int(line[17:19]) * 3600 + int(line[20:22]) * 60 + int(line[23:25] + line[26:29]) / 1000,
+            )
+        except ValueError:
+            pass
+    match = _TIMING_RE.match(line)
+    if match is None:
+        return None
+    groups = match.groups()
+    return _to_seconds(*groups[:4]), _to_seconds(*groups[4:])
+
+
+def _clean_vtt_text(text):
+    if "<" in text:
+        text = _VTT_TAG_RE.sub("", text)
+    if "&" in text:
+        for entity, char in _VTT_ENTITIES:
+            text = text.replace(entity, char)
+    return text
+
+
+def iter_cues(lines, vtt=False):
+    """
+    行のイテラブルからSRT/WebVTTのキューを順に取り出す
+
+    番号行の有無は問わず、時刻行から次の空行（または次の時刻行）までをテキストとして扱う。
+    複数行のテキストは空白で連結する。
+
+    Args:
+        lines (iterable): 1行ずつの文字列（末尾の改行はあってもよい）
+        vtt (bool): WebVTTとして扱う（ヘッダー・NOTE等のブロック・タグを除去する）
+
+    Yields:
+        dict: {'start': 開始秒, 'end': 終了秒, 'text': テキスト}
+    """
+    timing = None
+    text_lines = []
+    skipping = False  # WebVTTのNOTE/STYLE/REGIONブロック内
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if timing is not None:
+                yield {'start': timing[0], 'end': timing[1], 'text': " ".join(text_lines)}
+                timing = None
+                text_lines = []
+            skipping = False
+            continue
+        if skipping:
+            continue
+        if "-->" in line:
+            parsed = parse_timing_line(line)
+            if parsed is not None:
+                # 空行が欠けていても新しいブロックとして扱う（直前の番号行はテキストに含めない）
+                if timing is not None:
+                    if text_lines and text_lines[-1].isdigit():
+                        text_lines.pop()
+                    yield {'start': timing[0], 'end': timing[1], 'text': " ".join(text_lines)}
+                timing = parsed
+                text_lines = []
+                continue
+        if timing is None:
+            # 番号行・キューID・ヘッダーなど時刻行より前の行は読み飛ばす
+            if vtt and line.startswith(_VTT_SKIP_BLOCKS):
+                skipping = True
+            continue
+        text_lines.append(_clean_vtt_text(line) if vtt else line)
+    if timing is not None:
+        yield {'start': timing[0], 'end': timing[1], 'text': " ".join(text_lines)}
+
+
+def _iter_regions(f, chunk_size=READ_CHUNK_SIZE):
+    """ファイルを一定サイズずつ読み、ブロックの途中で切れないよう空行の位置で区切った文字列を順に返す"""
+    pending = []
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        cut = chunk.rfind("\n\n")
+        if cut < 0:
+            pending.append(chunk)
+            continue
+        pending.append(chunk[:cut + 1])
+        yield "".join(pending)
+        pending = [chunk[cut + 1:]]
+    if pending:
+        yield "".join(pending)
+
+
+def _iter_regex_cues(region, vtt=False):
+    """整ったブロックを正規表現で読み取り、それ以外の部分を iter_cues() で1行ずつ解析する"""
+    pos = 0
+    for match in _CUE_BLOCK_RE.finditer(region):
+        gap = region[pos:match.start()]
+        pos = match.end()
+        if gap and not gap.isspace():
+            yield from iter_cues(gap.split("\n"), vtt)
+        h1, m1, s1, f1, h2, m2, s2, f2, text = match.groups()
+        if "-->" in text:
+            # 空行が欠けて次のブロックの時刻行までテキストに含まれている
+            yield from iter_cues(match.group(0).split("\n"), vtt)
+            continue
+        text = text.strip()
+        if "\n" in text:
+            text = " ".join(line.strip() for line in text.split("\n"))
+        # 関数呼び出しを避けて時刻を直接計算する（_to_seconds と同じ処理）
+        yield {
+            'start': (int(m1) * 60 + int(s1) + (int(h1) * 3600 if h1 else 0)
+                      + (int(f1) * _FRACTION_SCALE[len(f1)] if f1 else 0)),
+            'end': (int(m2) * 60 + int(s2) + (int(h2) * 3600 if h2 else 0)
+                    + (int(f2) * _FRACTION_SCALE[len(f2)] if f2 else 0)),
+            'text': _clean_vtt_text(text) if vtt else text,
+        }
+    gap = region[pos:]
+    if gap and not gap.isspace():
+        yield from iter_cues(gap.split("\n"), vtt)
+
+
+def _iter_srt_cues(region):
+    """
+    SRTの領域から、faster-whisperが書く固定の形のブロックを文字位置の決まった正規表現でまとめて読み取る
+
+    固定の形でない部分は _iter_regex_cues() に回す。
+    """
+    hours = _HOURS_TO_SECONDS
+    minutes = _MINUTES_TO_SECONDS
+    pos = 0
+    for match in _FIXED_CUE_RE.finditer(region):
+        start = match.start()
+        if start != pos:
+            gap = region[pos:start]
+            if not gap.isspace():
+                yield from _iter_regex_cues(gap)
+        pos = match.end()
+        h1, m1, s1, f1, h2, m2, s2, f2, text = match.groups()
+        if "\n" in text:
+            if "-->" in text:
+                # 空行が欠けて次のブロックの時刻行までテキストに含まれている
+                yield from iter_cues(match.group(0).split("\n"))
+                continue
+            text = " ".join(line.strip() for line in text.split("\n"))
+        yield {
+            'start': hours[h1] + minutes[m1] + int(s1 + f1) / 1000,
+            'end': hours[h2] + minutes[m2] + int(s2 + f2) / 1000,
+            'text': text.strip(),
+        }
+    gap = region[pos:]
+    if gap and not gap.isspace():
+        yield from _iter_regex_cues(gap)
+
+
+def iter_cue_blocks(f, vtt=False, chunk_size=READ_CHUNK_SIZE):
+    """
+    ファイルオブジェクトからSRT/WebVTTのキューを順に取り出す
+
+    SRTでfaster-whisperが書く固定の形のブロックは文字位置から直接読み取る。
+    "番号(省略可) / 時刻行 / テキスト" の整ったブロックは正規表現でまとめて読み取り、
+    それ以外の部分（番号・空行の欠落、時刻行の重複など）は iter_cues() で1行ずつ解析する。
+
+    Args:
+        f (file): テキストモードで開いたファイル（改行は '\n' に変換済みであること）
+        vtt (bool): WebVTTとして扱う
+        chunk_size (int, optional): 一度に読み込む文字数
+
+    Yields:
+        dict: {'start': 開始秒, 'end': 終了秒, 'text': テキスト}
+    """
+    for region in _iter_regions(f, chunk_size):
+        if vtt:
+            yield from _iter_regex_cues(region, vtt=True)
+        else:
+            yield from _iter_srt_cues(region)
+
+
+def iter_json_segments(data):
+    """
+    faster-whisperのJSON出力 ({"segments": [{"start", "end", "text", ...}]}) からセグメントを取り出す
+
+    セグメントのリストだけを保存したJSONにも対応する。不正な要素は読み飛ばす。
+    """
+    segments = data.get("segments", []) if isinstance(data, dict) else data
+    if not isinstance(segments, list):
+        return
+    for item in segments:
+        if not isinstance(item, dict):
+            continue
+        try:
+            start = float(item["start"])
+            end = float(item["end"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        yield {'start': start, 'end': end, 'text': str(item.get("text", "")).strip()}
+
+
+def detect_format(file_path, first_line=""):
+    """拡張子（不明な場合は先頭行）から字幕ファイルの形式を判定する"""
+    fmt = SUBTITLE_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+    if fmt is not None:
+        return fmt
+    head = first_line.lstrip("\ufeff").lstrip()
+    if head.startswith("WEBVTT"):
+        return FORMAT_VTT
+    if head.startswith(("{", "[")):
+        return FORMAT_JSON
+    return FORMAT_SRT
+
+
+def iter_subtitle_file(file_path, fmt=None):
+    """
+    字幕ファイルを少しずつ読みながらセグメントを順に返す
+
+    JSONは構造上ファイル全体を読み込んでから解析する。
+
+    Args:
+        file_path (str): SRT/WebVTT/JSONファイルのパス
+        fmt (str, optional): 形式 (FORMAT_*)。省略時は拡張子・先頭行から判定する
+
+    Yields:
+        dict: {'start': 開始秒, 'end': 終了秒, 'text': テキスト}
+    """
+    # utf-8-sig でBOMを除き、改行の自動変換でCRLF/CRも '\n' として扱う
+    with open(file_path, "r", encoding="utf-8-sig", errors="replace") as f:
+        if fmt is None:
+            first_line = f.readline()
+            f.seek(0)
+            fmt = detect_format(file_path, first_line)
+        if fmt == FORMAT_JSON:
+            yield from iter_json_segments(json.load(f))
+        else:
+            yield from iter_cue_blocks(f, vtt=(fmt == FORMAT_VTT))
+
+
+def parse_subtitle_file(file_path, fmt=None):
+    """
+    字幕ファイルを解析してセグメントリストを生成する
+
+    Args:
+        file_path (str): SRT/WebVTT/JSONファイルのパス
+        fmt (str, optional): 形式 (FORMAT_*)。省略時は拡張子・先頭行から判定する
+
+    Returns:
+        list: セグメントのリスト（読み込めない場合は空リスト）
+    """
+    try:
+        return list(iter_subtitle_file(file_path, fmt))
+    except (OSError, ValueError) as e:
+        logger.error("字幕ファイル解析エラー: %s", e, extra={"stage": "parse_srt", "file": file_path})
+        return []
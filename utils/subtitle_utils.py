@@ -0,0 +1,34 @@
+"""
+字幕ファイル (SRT) の書き出しを行うユーティリティ
+"""
+
+
+def format_srt_time(seconds):
+    """秒数をSRTのタイムスタンプ形式 (HH:MM:SS,mmm) に変換"""
+    total_ms = int(round(max(0.0, seconds) * 1000))
+    hours, rem = divmod(total_ms, 3600000)
+    minutes, rem = divmod(rem, 60000)
+    secs, ms = divmod(rem, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{ms:03d}"
+
+
+def write_srt_file(srt_path, segments):
+    """セグメントリストをSRTファイルとして書き出す"""
+    with open(srt_path, "w", encoding="utf-8") as f:
+        for i, segment in enumerate(segments, start=1):
+            f.write(f"{i}\n")
+            f.write(f"{format_srt_time(segment['start'])} --> {format_srt_time(segment['end'])}\n")
+            f.write(f"{segment['text']}\n\n")
+
+
+def write_text_file(txt_path, segments):
+    """
+    セグメントのテキストを1行ずつテキストファイルに書き出す
+
+    Returns:
+        str: 書き出したテキスト
+    """
+    full_text = "".join(f"{s['text'].strip()}\n" for s in segments if s['text'].strip())
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write(full_text)
+    return full_text
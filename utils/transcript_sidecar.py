@@ -0,0 +1,199 @@
+"""
+文字起こしセグメントのバイナリサイドカー（.lsseg）の書き出しと読み込み
+
+SRTの隣に SegmentStore の列をそのまま並べたファイルを置き、過去の結果を開くときは
+SRTを解析し直さずにメモリマップで読み込む。表示に必要なページだけがディスクから読まれる。
+
+ファイルの構成（数値はすべてリトルエンディアン）:
+    ヘッダー (HEADER_SIZE バイト): マジック, 形式のバージョン, フラグ, セグメント数,
+        テキストのバイト数, 元のSRTのサイズと更新時刻（ナノ秒, 元がない場合は0）
+    starts: float64 × セグメント数
+    ends: float64 × セグメント数
+    offsets: uint64 × (セグメント数 + 1)
+    テキスト: 各セグメントを1行としたUTF-8（SegmentStore のバッファと同じ内容）
+"""
+
+import os
+import sys
+import mmap
+import struct
+import threading
+from array import array
+
+from utils.log_utils import get_logger
+from utils.segment_store import SegmentStore
+from utils.subtitle_parser import iter_subtitle_file
+
+logger = get_logger(__name__)
+
+SIDECAR_EXTENSION = ".lsseg"
+MAGIC = b"LSSEG\0"
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<6sHIQQqq")
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def sidecar_path(subtitle_path):
+    """字幕ファイルに対応するサイドカーのパス（拡張子を置き換えたもの）"""
+    return f"{os.path.splitext(subtitle_path)[0]}{SIDECAR_EXTENSION}"
+
+
+def _source_stamp(source_path):
+    """元ファイルのサイズと更新時刻（ナノ秒）。元がない場合は (0, 0)"""
+    if not source_path:
+        return 0, 0
+    try:
+        stat = os.stat(source_path)
+    except OSError:
+        return 0, 0
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _column_bytes(typecode, column):
+    """列をリトルエンディアンの8バイト値として書き出せる形にする（可能ならコピーしない）"""
+    if _LITTLE_ENDIAN and column.itemsize == 8:
+        return column
+    converted = array(typecode, column)
+    if not _LITTLE_ENDIAN:
+        converted.byteswap()
+    return converted
+
+
+def write_sidecar(path, segments, source_path=None):
+    """
+    セグメントをサイドカーに書き出す（一時ファイルに書いてから置き換える）
+
+    Args:
+        path (str): 出力先のパス
+        segments: SegmentStore、または 'start'/'end'/'text' を持つ辞書のリスト
+        source_path (str, optional): 対応する字幕ファイル（読み込み時に更新されていないかを確かめる）
+
+    Returns:
+        bool: 書き出せたかどうか
+    """
+    store = segments if isinstance(segments, SegmentStore) else SegmentStore(segments)
+    source_size, source_mtime = _source_stamp(source_path)
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0, len(store), len(store.buffer), source_size, source_mtime
+    ).ljust(HEADER_SIZE, b"\0")
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(header)
+            f.write(_column_bytes('d', store.starts))
+            f.write(_column_bytes('d', store.ends))
+            f.write(_column_bytes('Q', store.offsets))
+            f.write(store.buffer)
+        os.replace(temp_path, path)
+    except OSError as e:
+        # 読み込み中のサイドカーはWindowsでは置き換えられない。SRTは出力済みなので警告に留める
+        logger.warning("サイドカーを書き出せませんでした: %s (%s)", path, e)
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+    logger.debug("サイドカーを書き出しました: %s (%dセグメント)", path, len(store))
+    return True
+
+
+def _read_column(view, typecode, first, count):
+    """マップした領域から列を取り出す（リトルエンディアン環境ではコピーせずに参照する）"""
+    column = view[first:first + count * 8]
+    if _LITTLE_ENDIAN:
+        return column.cast(typecode)
+    converted = array(typecode, column.tobytes())
+    converted.byteswap()
+    return converted
+
+
+def load_sidecar(path, source_path=None):
+    """
+    サイドカーをメモリマップで読み込む
+
+    返すストアの列はファイルを直接参照する読み取り専用のビューで、追加・消去はできない。
+    ファイルは返したストアが参照されなくなった時点で閉じられる。
+
+    Args:
+        path (str): サイドカーのパス
+        source_path (str, optional): 対応する字幕ファイル。指定した場合、書き出し後に
+            字幕ファイルが更新されていればサイドカーを使わない
+
+    Returns:
+        SegmentStore: 読み込んだセグメント（ファイルがない・形式が違う・古い場合は None）
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    # 読み込めなかった場合はマップを閉じる（開いたままだと Windows ではサイドカーを書き換えられない）
+    views = []
+    store = None
+    try:
+        if len(mapped) < HEADER_SIZE:
+            return None
+        magic, version, _flags, count, text_size, source_size, source_mtime = _HEADER.unpack_from(mapped)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            logger.info("対応していない形式のサイドカーです: %s (version %s)", path, version)
+            return None
+        if len(mapped) != HEADER_SIZE + (count * 3 + 1) * 8 + text_size:
+            logger.warning("サイドカーのサイズが不正です: %s", path)
+            return None
+        if source_path and (source_size, source_mtime) != _source_stamp(source_path):
+            logger.info("字幕ファイルが更新されているためサイドカーを使いません: %s", path)
+            return None
+
+        view = memoryview(mapped)
+        views.append(view)
+        position = HEADER_SIZE
+        starts = _read_column(view, 'd', position, count)
+        position += count * 8
+        ends = _read_column(view, 'd', position, count)
+        position += count * 8
+        offsets = _read_column(view, 'Q', position, count + 1)
+        position += (count + 1) * 8
+        views.extend((starts, ends, offsets))
+        if offsets[0] != 0 or offsets[count] != text_size:
+            logger.warning("サイドカーのオフセットが不正です: %s", path)
+            return None
+        store = SegmentStore.from_columns(starts, ends, offsets, view[position:position + text_size])
+        return store
+    finally:
+        if store is None:
+            # マップを参照するビューを先に解放しないと close() が BufferError になる
+            for column in reversed(views):
+                if isinstance(column, memoryview):
+                    column.release()
+            mapped.close()
+
+
+def load_segments(path):
+    """
+    字幕ファイルまたはサイドカーからセグメントを読み込む
+
+    字幕ファイルを指定した場合、隣に最新のサイドカーがあればそれをメモリマップで読み込み、
+    なければ字幕ファイルを解析する。
+
+    Args:
+        path (str): 字幕ファイル（SRT/WebVTT/JSON）またはサイドカーのパス
+
+    Returns:
+        SegmentStore: 読み込んだセグメント
+
+    Raises:
+        OSError: ファイルを読み込めない場合
+        ValueError: サイドカーの形式が不正な場合
+    """
+    if path.lower().endswith(SIDECAR_EXTENSION):
+        store = load_sidecar(path)
+        if store is None:
+            raise ValueError(f"サイドカーを読み込めません: {path}")
+        return store
+    store = load_sidecar(sidecar_path(path), source_path=path)
+    if store is not None:
+        logger.info("サイドカーから読み込みました: %s (%dセグメント)", path, len(store))
+        return store
+    return SegmentStore(iter_subtitle_file(path))
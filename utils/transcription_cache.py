@@ -0,0 +1,370 @@
+"""
+音声ファイルの内容とWhisper引数をキーにした文字起こし結果のディスクキャッシュ
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# デフォルトのキャッシュディレクトリ（プロジェクト直下の cache/transcription）
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+DEFAULT_CACHE_DIR = os.path.join(project_root, "cache", "transcription")
+
+# 文字起こしキャッシュとPCMキャッシュで共有する、音声ファイルのダイジェストの索引
+DEFAULT_DIGEST_INDEX_PATH = os.path.join(project_root, "cache", "digests.json")
+
+# キャッシュ全体の上限サイズ（バイト）
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# ハッシュ計算時の読み込みブロックサイズ
+HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+# ヒット・ミスの統計を stats.json に書き出す最短の間隔（秒）。put() と close() では間隔によらず書き出す
+STATS_FLUSH_INTERVAL = 30.0
+
+# キーに含めない引数（実行ごとに変わる値を取る引数）
+_VOLATILE_ARGUMENTS = {"--output_dir"}
+
+
+def compute_file_digest(file_path):
+    """
+    ファイル内容のハッシュ値を計算する (BLAKE2b)
+
+    Args:
+        file_path (str): ファイルのパス
+
+    Returns:
+        str: 16進数のダイジェスト
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def normalize_arguments(arguments, audio_file_path=None):
+    """
+    キャッシュキー用に引数リストから出力先と入力ファイルを除去する
+
+    Args:
+        arguments (list): faster-whisperの引数リスト
+        audio_file_path (str, optional): 入力音声ファイルのパス
+
+    Returns:
+        list: 正規化した引数リスト
+    """
+    normalized = []
+    skip_next = False
+    for arg in arguments:
+        if skip_next:
+            skip_next = False
+            continue
+        if arg in _VOLATILE_ARGUMENTS:
+            skip_next = True
+            continue
+        if audio_file_path and arg == audio_file_path:
+            continue
+        normalized.append(arg)
+    return normalized
+
+
+_shared_digest_indexes = {}
+_shared_digest_indexes_lock = threading.Lock()
+
+
+def get_digest_index(index_path=None):
+    """
+    索引ファイルごとに共有する DigestIndex を返す
+
+    同じ録音のハッシュを文字起こしキャッシュとPCMキャッシュで別々に計算しないよう、両方でこれを使う。
+    """
+    index_path = os.path.abspath(index_path or DEFAULT_DIGEST_INDEX_PATH)
+    with _shared_digest_indexes_lock:
+        index = _shared_digest_indexes.get(index_path)
+        if index is None:
+            index = _shared_digest_indexes[index_path] = DigestIndex(index_path)
+        return index
+
+
+class DigestIndex:
+    """
+    ファイルのダイジェストを (サイズ, 更新時刻) とともに記録し、変更がなければ再計算しない索引
+
+    複数のスレッドが同じファイルのダイジェストを同時に求めた場合は、最初のスレッドの計算を待って結果を共有する。
+    """
+
+    def __init__(self, index_path):
+        """
+        Args:
+            index_path (str): 索引を保存するJSONファイルのパス
+        """
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._pending = {}  # 計算中のパス -> 計算の完了を知らせる Event
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def digest(self, file_path):
+        """
+        ファイルのダイジェストを取得する（パス・サイズ・更新時刻が同じなら再計算しない）
+
+        Args:
+            file_path (str): ファイルのパス
+
+        Returns:
+            str: 16進数のダイジェスト
+        """
+        path = os.path.abspath(file_path)
+        while True:
+            stat = os.stat(path)
+            signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+            with self._lock:
+                cached = self._index.get(path)
+                if cached and cached.get("signature") == signature:
+                    return cached["digest"]
+                pending = self._pending.get(path)
+                if pending is None:
+                    pending = self._pending[path] = threading.Event()
+                    break
+            # 別のスレッドが計算中なので、終わってから索引を見直す
+            pending.wait()
+
+        try:
+            digest = compute_file_digest(path)
+            with self._lock:
+                self._index[path] = {"signature": signature, "digest": digest}
+                os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+                temp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._index, f, ensure_ascii=False)
+                os.replace(temp_path, self.index_path)
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+            pending.set()
+        return digest
+
+
+class TranscriptionCache:
+    """文字起こし結果をディスクに保存し、LRU方式で容量を管理するキャッシュ"""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, digest_index=None):
+        """
+        Args:
+            cache_dir (str, optional): キャッシュディレクトリ
+            max_bytes (int, optional): キャッシュ全体の上限サイズ（バイト）
+            digest_index (DigestIndex, optional): 音声のダイジェストの索引（未指定時はPCMキャッシュと共有の索引）
+        """
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.entries_dir = os.path.join(self.cache_dir, "entries")
+        self.max_bytes = max_bytes
+        self.digest_index = digest_index or get_digest_index()
+        self.stats_path = os.path.join(self.cache_dir, "stats.json")
+        self._lock = threading.Lock()
+        os.makedirs(self.entries_dir, exist_ok=True)
+        self._stats = self._load_json(self.stats_path, {"hits": 0, "misses": 0, "evictions": 0})
+        self._stats_dirty = False
+        self._stats_flushed_at = time.monotonic()
+
+    def _load_json(self, path, default):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def _write_json_atomic(self, path, data):
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def audio_digest(self, audio_file_path):
+        """
+        音声ファイルのダイジェストを取得する（パス・サイズ・更新時刻が同じなら再計算しない）
+
+        Args:
+            audio_file_path (str): 音声ファイルのパス
+
+        Returns:
+            str: 16進数のダイジェスト
+        """
+        return self.digest_index.digest(audio_file_path)
+
+    def make_key(self, audio_file_path, arguments):
+        """
+        音声ダイジェストと引数リストからキャッシュキーを生成する
+
+        Args:
+            audio_file_path (str): 音声ファイルのパス
+            arguments (list): faster-whisperの引数リスト
+
+        Returns:
+            str: キャッシュキー
+        """
+        digest = self.audio_digest(audio_file_path)
+        normalized = normalize_arguments(arguments, audio_file_path)
+        payload = json.dumps({"audio": digest, "args": normalized}, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.entries_dir, f"{key}.json")
+
+    def get(self, key):
+        """
+        キャッシュから文字起こし結果を取得する
+
+        Args:
+            key (str): キャッシュキー
+
+        Returns:
+            tuple: (テキスト, セグメントリスト)。見つからない場合は None
+        """
+        path = self._entry_path(key)
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                # 更新時刻をLRUの最終アクセス時刻として使う
+                os.utime(path, None)
+                self._stats["hits"] += 1
+                result = (entry.get("text", ""), entry.get("segments", []))
+            except (OSError, ValueError):
+                self._stats["misses"] += 1
+                result = None
+            # ヒットのたびに書き出さず、一定間隔ごとにまとめて書き出す
+            self._stats_dirty = True
+            if time.monotonic() - self._stats_flushed_at >= STATS_FLUSH_INTERVAL:
+                self._flush_stats()
+        return result
+
+    def put(self, key, text, segments, metadata=None):
+        """
+        文字起こし結果をキャッシュに保存する
+
+        Args:
+            key (str): キャッシュキー
+            text (str): 文字起こしテキスト
+            segments (list): セグメントリスト
+            metadata (dict, optional): 付加情報（元ファイル名など）
+        """
+        entry = {
+            "text": text,
+            "segments": segments,
+            "created": time.time(),
+            "metadata": metadata or {},
+        }
+        try:
+            with self._lock:
+                self._write_json_atomic(self._entry_path(key), entry)
+                self._evict()
+                self._flush_stats()
+        except Exception:
+            logger.exception("文字起こしキャッシュへの保存に失敗しました")
+
+    def _list_entries(self):
+        entries = []
+        for name in os.listdir(self.entries_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.entries_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        """上限サイズを超えた分を最終アクセスの古い順に削除する"""
+        entries = self._list_entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self._stats["evictions"] += 1
+                self._stats_dirty = True
+            except OSError:
+                pass
+
+    def clear(self):
+        """キャッシュを全て削除する"""
+        with self._lock:
+            for _, _, path in self._list_entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+            self._stats_dirty = True
+            self._flush_stats()
+
+    def _flush_stats(self):
+        """未保存の統計を stats.json に書き出す（_lock を取得した状態で呼ぶ）"""
+        if not self._stats_dirty:
+            return
+        try:
+            self._write_json_atomic(self.stats_path, self._stats)
+        except OSError:
+            logger.exception("キャッシュの統計の保存に失敗しました")
+            return
+        self._stats_dirty = False
+        self._stats_flushed_at = time.monotonic()
+
+    def close(self):
+        """未保存の統計を書き出す（終了時に呼ぶ）"""
+        with self._lock:
+            self._flush_stats()
+
+    def stats(self):
+        """
+        キャッシュの統計情報を取得する
+
+        Returns:
+            dict: エントリ数、合計サイズ、上限サイズ、ヒット数、ミス数、削除数、ヒット率
+        """
+        with self._lock:
+            entries = self._list_entries()
+            hits = self._stats.get("hits", 0)
+            misses = self._stats.get("misses", 0)
+            return {
+                "entries": len(entries),
+                "total_bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hits": hits,
+                "misses": misses,
+                "evictions": self._stats.get("evictions", 0),
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            }
+
+
+if __name__ == "__main__":
+    # python -m utils.transcription_cache [--clear]
+    cache = TranscriptionCache()
+    if "--clear" in sys.argv[1:]:
+        cache.clear()
+        print("キャッシュを削除しました")
+    for name, value in cache.stats().items():
+        print(f"{name}: {value}")
+    cache.close()
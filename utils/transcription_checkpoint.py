@@ -0,0 +1,209 @@
+"""
+文字起こしの途中結果を区間(ユニット)ごとに保存し、中断後に未処理の区間だけを再開するためのチェックポイント (GUI非依存)
+
+ユニットは元音声の時間軸で (開始秒, 終了秒, セグメント) を持ち、出力ディレクトリ配下に1ファイルずつ保存する。
+音声ファイルの内容(サイズ・更新時刻)やWhisperの引数が変わった場合は、保存済みのユニットを破棄する。
+"""
+
+import os
+import json
+import shutil
+import threading
+
+from utils.transcription_cache import normalize_arguments
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+CHECKPOINT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+# 逐次実行時にユニットとして保存する間隔（音声上の秒数）
+CHECKPOINT_INTERVAL_SECONDS = 120
+
+# この幅より短い未処理区間は処理済みとみなす（秒）
+GAP_TOLERANCE_SECONDS = 0.5
+
+
+def get_checkpoint_dir(output_dir, audio_file_path):
+    """音声ファイルに対応するチェックポイントディレクトリのパスを返す"""
+    basename = os.path.basename(audio_file_path).split('.')[0]
+    return os.path.join(output_dir, f"{basename}_checkpoints")
+
+
+def merge_ranges(ranges, tolerance=GAP_TOLERANCE_SECONDS):
+    """
+    重なり・隣接する区間を結合する
+
+    Args:
+        ranges (list): (開始秒, 終了秒) のリスト
+        tolerance (float): この幅以下の隙間は連続しているとみなす
+
+    Returns:
+        list: 開始時間順に結合した (開始秒, 終了秒) のリスト
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + tolerance:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class TranscriptionCheckpoint:
+    """区間ごとの文字起こし結果を保存・結合するチェックポイント"""
+
+    def __init__(self, checkpoint_dir, audio_file_path, arguments):
+        """
+        Args:
+            checkpoint_dir (str): ユニットを保存するディレクトリ
+            audio_file_path (str): 元の音声ファイルのパス
+            arguments (list): faster-whisperの引数（結果が変わる設定の判定に使用）
+        """
+        self.checkpoint_dir = checkpoint_dir
+        self.audio_file_path = audio_file_path
+        self.arguments = normalize_arguments(arguments, audio_file_path)
+        self.manifest_path = os.path.join(checkpoint_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+
+    def _signature(self):
+        stat = os.stat(self.audio_file_path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _write_json_atomic(self, path, data):
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def open(self):
+        """
+        チェックポイントを開く（条件が一致しない既存のユニットは破棄する）
+
+        Returns:
+            bool: 再利用できるユニットが存在する場合 True
+        """
+        manifest = {
+            "version": CHECKPOINT_VERSION,
+            "signature": self._signature(),
+            "arguments": self.arguments,
+        }
+        existing = None
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        if existing != manifest:
+            if existing is not None:
+                logger.info("音声または設定が変わったためチェックポイントを破棄します",
+                            extra={"stage": "checkpoint", "file": self.audio_file_path})
+            self.clear()
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            self._write_json_atomic(self.manifest_path, manifest)
+            return False
+        return bool(self.units())
+
+    def _unit_path(self, start, end):
+        return os.path.join(self.checkpoint_dir, f"unit_{int(start * 1000):010d}_{int(end * 1000):010d}.json")
+
+    def save_unit(self, start, end, segments):
+        """
+        区間の文字起こし結果を保存する
+
+        Args:
+            start (float): 区間の開始秒（元音声の時間軸）
+            end (float): 区間の終了秒（元音声の時間軸）
+            segments (list): 元音声の時間軸に合わせたセグメントリスト
+        """
+        if end <= start:
+            return
+        data = {"start": start, "end": end, "segments": segments}
+        with self._lock:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            self._write_json_atomic(self._unit_path(start, end), data)
+        logger.debug("チェックポイントを保存しました: %.1f-%.1f秒 (%dセグメント)", start, end, len(segments),
+                     extra={"stage": "checkpoint", "file": self.audio_file_path})
+
+    def units(self):
+        """
+        保存済みのユニットを取得する
+
+        Returns:
+            list: {"start", "end", "segments"} の辞書を開始時間順に並べたリスト
+        """
+        units = []
+        try:
+            names = os.listdir(self.checkpoint_dir)
+        except OSError:
+            return units
+        for name in names:
+            if not (name.startswith("unit_") and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.checkpoint_dir, name), "r", encoding="utf-8") as f:
+                    units.append(json.load(f))
+            except (OSError, ValueError):
+                # 書き込み途中で中断されたユニットは未処理として扱う
+                logger.warning("読み込めないチェックポイントを無視します: %s", name)
+        units.sort(key=lambda unit: (unit["start"], unit["end"]))
+        return units
+
+    def completed_ranges(self):
+        """処理済みの区間を結合して返す"""
+        return merge_ranges((unit["start"], unit["end"]) for unit in self.units())
+
+    def missing_ranges(self, duration):
+        """
+        未処理の区間を返す
+
+        Args:
+            duration (float): 音声全体の長さ（秒）
+
+        Returns:
+            list: (開始秒, 終了秒) のリスト
+        """
+        missing = []
+        position = 0.0
+        for start, end in self.completed_ranges():
+            if start - position > GAP_TOLERANCE_SECONDS:
+                missing.append((position, start))
+            position = max(position, end)
+        if duration - position > GAP_TOLERANCE_SECONDS:
+            missing.append((position, duration))
+        return missing
+
+    def resume_point(self):
+        """先頭から途切れずに処理済みの位置（秒）を返す"""
+        ranges = self.completed_ranges()
+        if ranges and ranges[0][0] <= GAP_TOLERANCE_SECONDS:
+            return ranges[0][1]
+        return 0.0
+
+    def discard_after(self, position):
+        """指定位置より後に始まるユニットを削除する（逐次実行で続きから処理し直す場合）"""
+        for unit in self.units():
+            if unit["start"] >= position - GAP_TOLERANCE_SECONDS:
+                try:
+                    os.remove(self._unit_path(unit["start"], unit["end"]))
+                except OSError:
+                    pass
+
+    def assemble(self):
+        """
+        保存済みのユニットを結合して最終的なセグメントリストを作る
+
+        Returns:
+            list: 開始時間順に並んだセグメントリスト
+        """
+        segments = []
+        for unit in self.units():
+            segments.extend(unit["segments"])
+        segments.sort(key=lambda s: (s.get('start', 0), s.get('end', 0)))
+        return segments
+
+    def clear(self):
+        """チェックポイントをすべて削除する"""
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
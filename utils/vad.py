@@ -0,0 +1,236 @@
+"""
+文字起こし前に無音区間を取り除く音声区間検出(VAD) (GUI非依存)
+
+ffmpegで発話帯域(200Hz〜4kHz)に絞った信号のエネルギーから無音区間を求め、
+発話区間だけをつなげた16kHzモノラルWAVを作る。つなげた音声の時間は OffsetMap で元の時間軸に戻す。
+"""
+
+import os
+import re
+import bisect
+import subprocess
+
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# スクリプトの場所に基づいて ffmpeg のパスを決定
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+DEFAULT_FFMPEG_PATH = os.path.join(project_root, "Faster-Whisper-XXL", "ffmpeg.exe")
+
+# 発話とみなさない音量（dB）と、取り除く無音の最小長（秒）
+VAD_NOISE_DB = -35
+VAD_MIN_SILENCE_SECONDS = 1.5
+# 発話区間の前後に残す余白（秒）。語頭・語尾が切れないようにする
+VAD_PADDING_SECONDS = 0.3
+# 取り除ける無音がこの割合未満なら、切り出しの手間に見合わないのでVADを使わない
+VAD_MIN_SAVING_RATIO = 0.05
+
+# 発話帯域のみを残してから無音を判定する（空調音などの低域ノイズを発話と誤判定しないため）
+_BAND_FILTER = "highpass=f=200,lowpass=f=4000"
+
+_silence_start_re = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_silence_end_re = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+def parse_silencedetect_output(output, duration=None):
+    """
+    ffmpegのsilencedetectフィルタの出力から無音区間を抽出する
+
+    Args:
+        output (str): ffmpegの標準エラー出力
+        duration (float, optional): 音声全体の長さ。指定時は末尾まで続く無音も区間に含める
+
+    Returns:
+        list: (開始秒, 終了秒) のタプルのリスト
+    """
+    silences = []
+    current_start = None
+    for line in output.splitlines():
+        match = _silence_start_re.search(line)
+        if match:
+            current_start = max(0.0, float(match.group(1)))
+            continue
+        match = _silence_end_re.search(line)
+        if match and current_start is not None:
+            silences.append((current_start, float(match.group(1))))
+            current_start = None
+    if current_start is not None and duration and duration > current_start:
+        silences.append((current_start, duration))
+    return silences
+
+
+def build_detect_arguments(audio_file_path, noise_db=VAD_NOISE_DB, min_silence=VAD_MIN_SILENCE_SECONDS):
+    """無音区間を検出するffmpegの引数を返す"""
+    return [
+        "-hide_banner", "-nostats",
+        "-i", audio_file_path,
+        "-vn",
+        "-af", f"{_BAND_FILTER},silencedetect=noise={noise_db}dB:d={min_silence}",
+        "-f", "null", "-",
+    ]
+
+
+def speech_regions_from_silences(silences, duration, padding=VAD_PADDING_SECONDS):
+    """
+    無音区間の補集合として発話区間を求める
+
+    Args:
+        silences (list): (開始秒, 終了秒) の無音区間リスト
+        duration (float): 音声全体の長さ（秒）
+        padding (float): 発話区間の前後に残す余白（秒）
+
+    Returns:
+        list: 重なりのない (開始秒, 終了秒) の発話区間リスト
+    """
+    regions = []
+    position = 0.0
+    for start, end in sorted(silences):
+        if start > position:
+            regions.append((position, start))
+        position = max(position, end)
+    if duration > position:
+        regions.append((position, duration))
+
+    padded = []
+    for start, end in regions:
+        start = max(0.0, start - padding)
+        end = min(duration, end + padding)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], max(padded[-1][1], end))
+        else:
+            padded.append((start, end))
+    return padded
+
+
+class OffsetMap:
+    """発話区間だけをつなげた音声の時刻と、元の音声の時刻を対応付ける"""
+
+    def __init__(self, regions):
+        """
+        Args:
+            regions (list): 元の時間軸での (開始秒, 終了秒) の発話区間リスト（開始時間順）
+        """
+        self.regions = list(regions)
+        self.compressed_starts = []  # つなげた音声上での各区間の開始秒
+        position = 0.0
+        for start, end in self.regions:
+            self.compressed_starts.append(position)
+            position += end - start
+        self.speech_duration = position
+
+    def to_original(self, seconds, is_end=False):
+        """
+        つなげた音声上の時刻を元の音声の時刻に変換する
+
+        Args:
+            seconds (float): つなげた音声上の時刻
+            is_end (bool): 区間の終端として扱う（区間の境目では前の区間の末尾に対応させる）
+
+        Returns:
+            float: 元の音声の時刻
+        """
+        if not self.regions:
+            return seconds
+        if is_end:
+            index = bisect.bisect_left(self.compressed_starts, seconds) - 1
+        else:
+            index = bisect.bisect_right(self.compressed_starts, seconds) - 1
+        index = min(max(index, 0), len(self.regions) - 1)
+        start, end = self.regions[index]
+        return min(start + seconds - self.compressed_starts[index], end)
+
+    def map_segments(self, segments):
+        """セグメントリストの start/end を元の時間軸に変換する"""
+        return [
+            {
+                'start': self.to_original(segment.get('start', 0)),
+                'end': self.to_original(segment.get('end', 0), is_end=True),
+                'text': segment.get('text', ''),
+            }
+            for segment in segments
+        ]
+
+
+def write_select_filter(regions, filter_path):
+    """
+    発話区間だけを残すffmpegのフィルタスクリプトを書き出す（区間数が多くてもコマンドラインが長くならないように）
+
+    Args:
+        regions (list): (開始秒, 終了秒) の発話区間リスト
+        filter_path (str): フィルタスクリプトの出力先
+    """
+    terms = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in regions)
+    with open(filter_path, "w", encoding="utf-8") as f:
+        f.write(f"aselect='{terms}',asetpts=N/SR/TB")
+
+
+def build_extract_arguments(audio_file_path, filter_path, output_wav):
+    """発話区間だけをつなげた16kHzモノラルWAVを作るffmpegの引数を返す"""
+    return [
+        "-hide_banner", "-loglevel", "error",
+        "-i", audio_file_path,
+        "-vn", "-ac", "1", "-ar", "16000",
+        "-filter_script:a", filter_path,
+        "-y", output_wav,
+    ]
+
+
+def is_worth_applying(regions, duration, min_saving_ratio=VAD_MIN_SAVING_RATIO):
+    """取り除ける無音が十分にあり、発話も含まれている場合に True を返す"""
+    if duration <= 0 or not regions:
+        return False
+    speech = sum(end - start for start, end in regions)
+    return speech > 0 and 1 - speech / duration >= min_saving_ratio
+
+
+def _run_ffmpeg(ffmpeg_path, arguments):
+    return subprocess.run(
+        [ffmpeg_path] + arguments, capture_output=True, text=True, encoding="utf-8", errors="ignore", check=False,
+        creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+    )
+
+
+def detect_speech_regions(audio_file_path, duration, ffmpeg_path=None):
+    """
+    発話区間を検出する（同期実行、GUIを使わない処理向け）
+
+    Args:
+        audio_file_path (str): 音声ファイルのパス
+        duration (float): 音声全体の長さ（秒）
+        ffmpeg_path (str, optional): ffmpegのパス
+
+    Returns:
+        list: (開始秒, 終了秒) の発話区間リスト（検出できなかった場合は None）
+    """
+    result = _run_ffmpeg(ffmpeg_path or DEFAULT_FFMPEG_PATH, build_detect_arguments(audio_file_path))
+    if result.returncode != 0:
+        logger.warning("無音検出に失敗しました (Code: %s)", result.returncode, extra={"stage": "vad", "file": audio_file_path})
+        return None
+    silences = parse_silencedetect_output(result.stderr, duration)
+    return speech_regions_from_silences(silences, duration)
+
+
+def extract_speech(audio_file_path, regions, output_wav, ffmpeg_path=None):
+    """
+    発話区間だけをつなげたWAVを作る（同期実行）
+
+    Returns:
+        OffsetMap: 作成できなかった場合は None
+    """
+    filter_path = f"{output_wav}.filter.txt"
+    write_select_filter(regions, filter_path)
+    try:
+        result = _run_ffmpeg(ffmpeg_path or DEFAULT_FFMPEG_PATH,
+                             build_extract_arguments(audio_file_path, filter_path, output_wav))
+    finally:
+        try:
+            os.remove(filter_path)
+        except OSError:
+            pass
+    if result.returncode != 0:
+        logger.warning("発話区間の切り出しに失敗しました (Code: %s):\n%s", result.returncode, result.stderr,
+                       extra={"stage": "vad", "file": audio_file_path})
+        return None
+    return OffsetMap(regions)
@@ -0,0 +1,369 @@
+"""
+WhisperTranscriberが使用する文字起こしバックエンド
+
+- SubprocessBackend: faster-whisper-xxl.exe をジョブごとに起動する（従来方式・フォールバック）
+- ResidentModelBackend: モデルを読み込んだままのワーカープロセスにジョブを送る
+- BackendWatchdog: 出力と終了のイベントでバックエンドを監視し、停止・時間超過・中止時に終了させる
+- ProcessWatchdog: 並列・まとめた文字起こしが直接起動するQProcessを同じ基準で監視する
+"""
+
+import os
+import queue
+from PyQt5.QtCore import QObject, pyqtSignal, QProcess, QTimer
+
+from utils.resident_whisper import (
+    ResidentWhisperWorker, is_faster_whisper_available, MSG_DONE
+)
+from utils.process_supervisor import (
+    kill_process_tree, STOP_STALLED, STOP_TIMEOUT
+)
+from config.api_config import WHISPER_STALL_SECONDS, WHISPER_TIMEOUT_SECONDS
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+WHISPER_EXE_NAME = "faster-whisper-xxl.exe"
+
+
+class TranscriptionBackend(QObject):
+    """文字起こしバックエンドの基底クラス"""
+
+    output_received = pyqtSignal(str)  # 標準出力相当のテキスト
+    finished = pyqtSignal(int, int)    # (終了コード, 終了ステータス) ※QProcess.finishedと同じ形
+
+    name = "base"
+    supports_fallback = False  # 失敗時にサブプロセス方式で再実行してよいか
+
+    def is_available(self):
+        """このバックエンドが利用可能かどうか"""
+        return True
+
+    def start(self, audio_file_path, output_dir, arguments):
+        """
+        文字起こしを開始する
+
+        Args:
+            audio_file_path (str): 音声ファイルのパス
+            output_dir (str): SRT/TXTの出力ディレクトリ
+            arguments (list): faster-whisper-xxlのコマンドライン引数
+        """
+        raise NotImplementedError
+
+    def is_running(self):
+        """文字起こしを実行中かどうか"""
+        raise NotImplementedError
+
+    def exit_code(self):
+        """直近のジョブの終了コード"""
+        return 0
+
+    def process_id(self):
+        """実行中プロセスのPID（不明な場合は0）"""
+        return 0
+
+    def kill(self):
+        """実行中のジョブを中止する"""
+
+    def kill_tree(self):
+        """実行中のジョブを、起動した子プロセスも含めて中止する"""
+        self.kill()
+
+    def shutdown(self):
+        """バックエンドが保持するリソースを解放する"""
+        self.kill()
+
+
+class SubprocessBackend(TranscriptionBackend):
+    """faster-whisper-xxl.exe をQProcessとして起動するバックエンド"""
+
+    name = "subprocess"
+
+    def __init__(self, whisper_path):
+        super().__init__()
+        self.whisper_path = whisper_path
+        self.process = None
+
+    def start(self, audio_file_path, output_dir, arguments):
+        program = os.path.join(self.whisper_path, WHISPER_EXE_NAME)
+
+        # QProcessを設定
+        self.process = QProcess()
+        self.process.setWorkingDirectory(self.whisper_path)
+
+        # プロセスのバッファリングモードを設定
+        self.process.setProcessChannelMode(QProcess.MergedChannels)
+
+        # シグナル接続
+        self.process.readyReadStandardOutput.connect(self._read_output)
+        self.process.finished.connect(self.finished.emit)
+
+        # デバッグ用にコマンドを出力
+        logger.info("実行コマンド: %s %s", program, ' '.join(arguments))
+        self.process.start(program, arguments)
+
+    def _read_output(self):
+        data = self.process.readAllStandardOutput()
+        if data:
+            stdout = bytes(data).decode('utf-8', errors='ignore')
+            self.output_received.emit(stdout)
+
+    def is_running(self):
+        return self.process is not None and self.process.state() != QProcess.NotRunning
+
+    def exit_code(self):
+        return self.process.exitCode() if self.process is not None else 0
+
+    def process_id(self):
+        return int(self.process.processId()) if self.process is not None else 0
+
+    def kill(self):
+        if self.is_running():
+            self.process.kill()
+
+    def kill_tree(self):
+        if self.is_running():
+            kill_process_tree(self.process_id())
+            self.process.kill()
+
+
+class ResidentModelBackend(TranscriptionBackend):
+    """faster-whisperのモデルを常駐させたワーカープロセスを使うバックエンド"""
+
+    name = "resident"
+    supports_fallback = True
+
+    POLL_INTERVAL = 100  # ワーカーからの出力を確認する間隔（ミリ秒）
+
+    def __init__(self, worker=None):
+        super().__init__()
+        self.worker = worker or ResidentWhisperWorker()
+        self.job_id = None
+        self.outputs = None
+        self.last_exit_code = 0
+        self.poll_timer = QTimer()
+        self.poll_timer.setInterval(self.POLL_INTERVAL)
+        self.poll_timer.timeout.connect(self._poll)
+
+    def is_available(self):
+        return is_faster_whisper_available() and not self.worker.fatal_error
+
+    def warm_up(self):
+        """ジョブ投入前にワーカーを起動してモデルを読み込んでおく"""
+        if self.is_available():
+            self.worker.start()
+
+    def start(self, audio_file_path, output_dir, arguments):
+        # 引数のうち言語だけを引き継ぐ（出力形式はSRT/TXT固定）
+        language = "ja"
+        if "--language" in arguments:
+            index = arguments.index("--language")
+            if index + 1 < len(arguments):
+                language = arguments[index + 1]
+
+        logger.info("常駐モデルで文字起こし: %s", audio_file_path)
+        self.job_id, self.outputs = self.worker.submit(audio_file_path, output_dir, language)
+        self.poll_timer.start()
+
+    def _poll(self):
+        if self.outputs is None:
+            self.poll_timer.stop()
+            return
+        texts = []
+        while True:
+            try:
+                kind, payload = self.outputs.get_nowait()
+            except queue.Empty:
+                break
+            if kind == MSG_DONE:
+                if texts:
+                    self.output_received.emit("".join(texts))
+                self._finish(payload)
+                return
+            texts.append(payload)
+        if texts:
+            self.output_received.emit("".join(texts))
+
+    def _finish(self, exit_code):
+        self.poll_timer.stop()
+        self.worker.release(self.job_id)
+        self.job_id = None
+        self.outputs = None
+        self.last_exit_code = exit_code
+        self.finished.emit(exit_code, 0)
+
+    def is_running(self):
+        return self.outputs is not None
+
+    def exit_code(self):
+        return self.last_exit_code
+
+    def process_id(self):
+        return self.worker.pid or 0
+
+    def kill(self):
+        # 常駐ワーカーは単一ジョブを中断できないため、ワーカーごと終了する
+        if self.is_running():
+            self.worker.shutdown(timeout=0)
+            self._finish(1)
+
+    def shutdown(self):
+        self.poll_timer.stop()
+        self.worker.shutdown()
+
+
+class BackendWatchdog(QObject):
+    """
+    実行中のバックエンドを出力と終了のイベントで監視するクラス
+
+    出力があるたびに停止判定のタイマーを延長し、出力がないまま stall_seconds が経過するか
+    timeout_seconds を超えた場合はプロセスツリーごと終了させる。終了させた理由は reason に残る。
+    """
+
+    stopped = pyqtSignal(str)  # 終了させた理由 (process_supervisor.STOP_*)
+
+    def __init__(self, stall_seconds=WHISPER_STALL_SECONDS, timeout_seconds=WHISPER_TIMEOUT_SECONDS):
+        super().__init__()
+        self.stall_seconds = stall_seconds
+        self.timeout_seconds = timeout_seconds
+        self.backend = None
+        self.reason = None  # 直近の実行を終了させた理由（正常に終了した場合はNone）
+
+        self.stall_timer = QTimer()
+        self.stall_timer.setSingleShot(True)
+        self.stall_timer.timeout.connect(lambda: self.stop(STOP_STALLED))
+        self.timeout_timer = QTimer()
+        self.timeout_timer.setSingleShot(True)
+        self.timeout_timer.timeout.connect(lambda: self.stop(STOP_TIMEOUT))
+
+    def watch(self, backend):
+        """
+        バックエンドの監視を開始する（start() の直後に呼ぶ）
+
+        Args:
+            backend (TranscriptionBackend): 監視するバックエンド
+        """
+        self.release()
+        self.backend = backend
+        self.reason = None
+        backend.output_received.connect(self._on_output)
+        backend.finished.connect(self._on_finished)
+        if self.stall_seconds:
+            self.stall_timer.start(int(self.stall_seconds * 1000))
+        if self.timeout_seconds:
+            self.timeout_timer.start(int(self.timeout_seconds * 1000))
+
+    def release(self):
+        """監視を終了する（reason は次の watch() まで保持する）"""
+        self.stall_timer.stop()
+        self.timeout_timer.stop()
+        if self.backend is not None:
+            self.backend.output_received.disconnect(self._on_output)
+            self.backend.finished.disconnect(self._on_finished)
+            self.backend = None
+
+    def stop(self, reason):
+        """
+        監視中のバックエンドをプロセスツリーごと終了させる
+
+        finished シグナルより前に reason を設定するため、終了処理の中で理由を参照できる。
+
+        Args:
+            reason (str): 終了させる理由 (process_supervisor.STOP_*)
+
+        Returns:
+            bool: 実行中のジョブを終了させたかどうか
+        """
+        backend = self.backend
+        if backend is None or not backend.is_running():
+            return False
+        self.reason = reason
+        logger.warning("%sバックエンドを終了させます: 理由=%s, pid=%s", backend.name, reason, backend.process_id(),
+                       extra={"stage": "supervisor"})
+        self.stopped.emit(reason)
+        backend.kill_tree()
+        return True
+
+    def _on_output(self, _text):
+        if self.stall_seconds and self.stall_timer.isActive():
+            self.stall_timer.start(int(self.stall_seconds * 1000))
+
+    def _on_finished(self, _exit_code, _exit_status):
+        # 終了処理の中で別のバックエンドの監視を始めた場合は、そちらを解除しない
+        if self.sender() is self.backend:
+            self.release()
+
+
+class ProcessWatchdog(QObject):
+    """
+    QProcess を出力と終了のイベントで監視するクラス（BackendWatchdog のQProcess版）
+
+    並列文字起こしのチャンクやまとめた文字起こしのように、バックエンドを介さずに起動したプロセスに使う。
+    出力がないまま stall_seconds が経過するか timeout_seconds を超えた場合はプロセスツリーごと終了させ、理由を reason に残す。
+    """
+
+    stopped = pyqtSignal(str)  # 終了させた理由 (process_supervisor.STOP_*)
+
+    def __init__(self, stall_seconds=WHISPER_STALL_SECONDS, timeout_seconds=WHISPER_TIMEOUT_SECONDS, parent=None):
+        super().__init__(parent)
+        self.stall_seconds = stall_seconds
+        self.timeout_seconds = timeout_seconds
+        self.process = None
+        self.reason = None  # 終了させた理由（正常に終了した場合はNone）
+
+        self.stall_timer = QTimer(self)
+        self.stall_timer.setSingleShot(True)
+        self.stall_timer.timeout.connect(lambda: self.stop(STOP_STALLED))
+        self.timeout_timer = QTimer(self)
+        self.timeout_timer.setSingleShot(True)
+        self.timeout_timer.timeout.connect(lambda: self.stop(STOP_TIMEOUT))
+
+    def watch(self, process):
+        """
+        プロセスの監視を開始する（start() の直後に呼ぶ）
+
+        Args:
+            process (QProcess): 監視するプロセス
+        """
+        self.release()
+        self.process = process
+        self.reason = None
+        process.readyReadStandardOutput.connect(self._on_output)
+        process.finished.connect(self._on_finished)
+        if self.stall_seconds:
+            self.stall_timer.start(int(self.stall_seconds * 1000))
+        if self.timeout_seconds:
+            self.timeout_timer.start(int(self.timeout_seconds * 1000))
+
+    def release(self):
+        """監視を終了する（reason は次の watch() まで保持する）"""
+        self.stall_timer.stop()
+        self.timeout_timer.stop()
+        if self.process is not None:
+            self.process.readyReadStandardOutput.disconnect(self._on_output)
+            self.process.finished.disconnect(self._on_finished)
+            self.process = None
+
+    def stop(self, reason):
+        """
+        監視中のプロセスをプロセスツリーごと終了させる（finished シグナルより前に reason を設定する）
+
+        Returns:
+            bool: 実行中のプロセスを終了させたかどうか
+        """
+        process = self.process
+        if process is None or process.state() == QProcess.NotRunning:
+            return False
+        self.reason = reason
+        pid = int(process.processId())
+        logger.warning("プロセスを終了させます: 理由=%s, pid=%s", reason, pid, extra={"stage": "supervisor"})
+        self.stopped.emit(reason)
+        kill_process_tree(pid)
+        process.kill()
+        return True
+
+    def _on_output(self):
+        if self.stall_seconds and self.stall_timer.isActive():
+            self.stall_timer.start(int(self.stall_seconds * 1000))
+
+    def _on_finished(self, _exit_code, _exit_status):
+        self.release()
@@ -0,0 +1,362 @@
+"""
+複数の音声ファイルを1回のfaster-whisper-xxl実行にまとめて文字起こしするユーティリティ
+
+短い録音が多い日は、ファイルごとのプロセス起動とモデル読み込みが処理時間の大半を占める。
+ファイル数と合計音声長の上限までキューのファイルを1回の実行に詰め、出力されたSRT/TXTを各ファイルに振り分ける。
+"""
+
+import os
+import time
+from PyQt5.QtCore import QObject, pyqtSignal, QProcess, QTimer
+
+from config.api_config import WHISPER_PATH, WHISPER_BATCH_MAX_FILES, WHISPER_BATCH_MAX_SECONDS
+from utils.whisper_utils import build_whisper_arguments, ffprobe_path
+from utils.subtitle_parser import parse_subtitle_file
+from utils.transcript_sidecar import write_sidecar, sidecar_path
+from utils.whisper_backends import WHISPER_EXE_NAME, ProcessWatchdog
+from utils.process_supervisor import run_supervised, kill_process_tree, describe_stop_reason, ERROR_OUTPUT_TAIL_LINES
+from utils.media_probe import get_duration
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# 実行中に出力ファイルの完成を確認する間隔（ミリ秒）
+OUTPUT_POLL_INTERVAL = 1000
+
+# 出力ファイルの更新時刻と実行開始時刻を比べる際の許容差（秒、ファイルシステムの時刻の精度の差を吸収する）
+MTIME_TOLERANCE = 1.0
+
+
+def output_stem(audio_file_path):
+    """faster-whisper-xxlが出力するSRT/TXTのファイル名（拡張子なし）"""
+    return os.path.basename(audio_file_path).split('.')[0]
+
+
+def plan_whisper_batches(jobs, max_files=WHISPER_BATCH_MAX_FILES, max_seconds=WHISPER_BATCH_MAX_SECONDS):
+    """
+    キューの順序を保ったまま、ファイル数と合計音声長の上限までファイルを1回の実行にまとめる
+
+    出力ファイル名が同じになるファイルは、結果を上書きしないよう別の実行に分ける。
+
+    Args:
+        jobs (list): (音声ファイルのパス, 音声長の秒数) のリスト。長さが不明な場合は0
+        max_files (int): 1回の実行に含める最大ファイル数
+        max_seconds (float): 1回の実行に含める合計音声長の上限（秒）。1ファイルで超える場合は単独で実行する
+
+    Returns:
+        list: 音声ファイルのパスのリストのリスト
+    """
+    batches = []
+    current = []
+    current_seconds = 0.0
+    current_stems = set()
+    for path, seconds in jobs:
+        stem = output_stem(path).lower()
+        if current and (len(current) >= max(1, max_files)
+                        or current_seconds + seconds > max_seconds
+                        or stem in current_stems):
+            batches.append(current)
+            current, current_seconds, current_stems = [], 0.0, set()
+        current.append(path)
+        current_seconds += seconds
+        current_stems.add(stem)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_arguments(audio_file_paths, output_dir, extra_args=None):
+    """
+    複数ファイルを1回で文字起こしするfaster-whisper-xxlの引数を返す
+
+    Args:
+        audio_file_paths (list): 音声ファイルのパスのリスト
+        output_dir (str): 出力ディレクトリ
+        extra_args (list, optional): 追加の引数
+
+    Returns:
+        list: コマンドライン引数のリスト
+    """
+    arguments = build_whisper_arguments(audio_file_paths[0], output_dir, extra_args)
+    arguments.extend(audio_file_paths[1:])
+    return arguments
+
+
+def output_paths(audio_file_path, output_dir):
+    """1ファイル分の出力 (SRT, TXT) のパス"""
+    stem = output_stem(audio_file_path)
+    return os.path.join(output_dir, f"{stem}.srt"), os.path.join(output_dir, f"{stem}.txt")
+
+
+def is_fresh_output(path, since=None):
+    """出力ファイルが存在し、since（実行開始時刻）以降に書かれたものかどうか"""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return False
+    return since is None or mtime >= since - MTIME_TOLERANCE
+
+
+def clear_stale_outputs(audio_file_paths, output_dir):
+    """
+    実行の前に、以前の実行で残った同じ名前の出力(SRT/TXT/サイドカー)を削除する
+
+    出力ディレクトリは実行間で共有されるため、残っていると今回の結果と取り違える。
+    """
+    for path in audio_file_paths:
+        srt_path, txt_path = output_paths(path, output_dir)
+        for stale_path in (srt_path, txt_path, sidecar_path(srt_path)):
+            try:
+                os.remove(stale_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # 削除できなくても、更新時刻の確認で以前の出力は受け付けない
+                logger.warning("以前の出力を削除できませんでした: %s (%s)", stale_path, e,
+                               extra={"stage": "transcribe_batch", "file": path})
+
+
+def collect_outputs(audio_file_path, output_dir, since=None):
+    """
+    1ファイル分の出力(SRT/TXT)を読み込み、SRTの隣にサイドカーを書き出す
+
+    Args:
+        audio_file_path (str): 音声ファイルのパス
+        output_dir (str): faster-whisperの出力ディレクトリ
+        since (float, optional): 実行開始時刻 (time.time())。これより前に書かれた出力は以前の実行のものとして無視する
+
+    Returns:
+        tuple: (テキスト, セグメントリスト, 成功フラグ)
+    """
+    srt_path, txt_path = output_paths(audio_file_path, output_dir)
+    segments = parse_subtitle_file(srt_path) if is_fresh_output(srt_path, since) else []
+    if segments:
+        write_sidecar(sidecar_path(srt_path), segments, srt_path)
+    if is_fresh_output(txt_path, since):
+        with open(txt_path, 'r', encoding='utf-8') as f:
+            return f.read(), segments, True
+    if segments:
+        return "".join(f"{seg['text'].strip()}\n" for seg in segments if seg['text'].strip()), segments, True
+    return "", [], False
+
+
+def _lookup_cache(cache, audio_file_path, output_dir):
+    """キャッシュキーと結果を返す（キャッシュ無効時やエラー時は (None, None)）"""
+    if cache is None:
+        return None, None
+    try:
+        key = cache.make_key(audio_file_path, build_whisper_arguments(audio_file_path, output_dir))
+        return key, cache.get(key)
+    except Exception as e:
+        logger.warning("キャッシュの確認に失敗しました: %s", e, extra={"stage": "cache", "file": audio_file_path})
+        return None, None
+
+
+def transcribe_batch_with_subprocess(audio_file_paths, output_dir, whisper_path=None, cache=None,
+                                     max_files=WHISPER_BATCH_MAX_FILES, max_seconds=WHISPER_BATCH_MAX_SECONDS,
+                                     on_file_finished=None):
+    """
+    複数ファイルをまとめてfaster-whisperで同期実行する (GUIを使わない処理向け)
+
+    Args:
+        audio_file_paths (list): 音声ファイルのパスのリスト
+        output_dir (str): faster-whisperの出力ディレクトリ
+        whisper_path (str, optional): faster-whisper-xxlのディレクトリ
+        cache (TranscriptionCache, optional): 文字起こしキャッシュ（ヒットしたファイルは実行に含めない）
+        max_files (int, optional): 1回の実行に含める最大ファイル数
+        max_seconds (float, optional): 1回の実行に含める合計音声長の上限（秒）
+        on_file_finished (callable, optional): (パス, テキスト, セグメント, 成功フラグ) を受け取る関数。
+            まとめた実行が終わるたびに、その実行に含めたファイルについて呼ばれる
+
+    Returns:
+        dict: パス -> (テキスト, セグメントリスト, 成功フラグ)
+    """
+    whisper_path = whisper_path or WHISPER_PATH
+    os.makedirs(output_dir, exist_ok=True)
+    results = {}
+    cache_keys = {}
+
+    def finish(path, text, segments, ok):
+        results[path] = (text, segments, ok)
+        if ok and cache_keys.get(path):
+            cache.put(cache_keys[path], text, segments)
+        if on_file_finished:
+            on_file_finished(path, text, segments, ok)
+
+    jobs = []
+    for path in audio_file_paths:
+        key, cached = _lookup_cache(cache, path, output_dir)
+        if cached is not None:
+            finish(path, cached[0], cached[1], True)
+            continue
+        cache_keys[path] = key
+        jobs.append((path, get_duration(path, ffprobe_path)))
+
+    for batch in plan_whisper_batches(jobs, max_files, max_seconds):
+        cmd = [os.path.join(whisper_path, WHISPER_EXE_NAME)] + build_batch_arguments(batch, output_dir)
+        logger.info("まとめて文字起こし: %dファイル", len(batch), extra={"stage": "transcribe_batch"})
+        logger.debug("実行コマンド: %s", " ".join(cmd))
+        clear_stale_outputs(batch, output_dir)
+        started_at = time.time()
+        # 停止・時間超過で終了させた場合も、出力が揃っているファイルは下で完了として扱う
+        result = run_supervised(cmd, cwd=whisper_path if os.path.isdir(whisper_path) else None)
+        if result.returncode != 0 or result.reason is not None:
+            logger.error("まとめた文字起こしが失敗しました (Code: %s, 理由: %s):\n%s", result.returncode, result.reason,
+                         "".join(result.output.splitlines(True)[-ERROR_OUTPUT_TAIL_LINES:]),
+                         extra={"stage": "transcribe_batch"})
+        # 途中で失敗しても、出力が揃っているファイルは完了として扱う
+        for path in batch:
+            text, segments, ok = collect_outputs(path, output_dir, since=started_at)
+            finish(path, text, segments, ok)
+    return results
+
+
+class WhisperBatchTranscriber(QObject):
+    """キューの複数ファイルを少数のfaster-whisper実行にまとめて文字起こしするクラス"""
+
+    progress_updated = pyqtSignal(int, str)
+    file_finished = pyqtSignal(str, str, list, bool)  # (音声ファイル, テキスト, セグメント, 成功フラグ)
+    batch_finished = pyqtSignal(dict)  # 音声ファイル -> {"text", "segments", "success"}
+
+    def __init__(self, whisper_path=None, cache=None, max_files=WHISPER_BATCH_MAX_FILES,
+                 max_seconds=WHISPER_BATCH_MAX_SECONDS):
+        """
+        Args:
+            whisper_path (str, optional): faster-whisper-xxlのディレクトリ
+            cache (TranscriptionCache, optional): 文字起こしキャッシュ
+            max_files (int, optional): 1回の実行に含める最大ファイル数
+            max_seconds (float, optional): 1回の実行に含める合計音声長の上限（秒）
+        """
+        super().__init__()
+        self.whisper_path = whisper_path or WHISPER_PATH
+        self.cache = cache
+        self.max_files = max_files
+        self.max_seconds = max_seconds
+
+        self.output_directory = ""
+        self.batches = []
+        self.current_batch = []
+        self.process = None
+        self.results = {}
+        self.cache_keys = {}
+        self.total_files = 0
+        self.output_sizes = {}  # 音声ファイル -> 前回確認したSRTのサイズ
+        self.batch_started_at = None  # 実行中のまとめた実行の開始時刻 (time.time())
+        self.watchdog = ProcessWatchdog(parent=self)  # 実行中のプロセスの停止・時間超過を監視する
+        self.stop_reason = None  # 直近に停止・時間超過で終了させた実行の理由 (process_supervisor.STOP_*)
+        self.error_message = None  # 直近の失敗の理由（画面に表示するメッセージ）
+        self.cancelled = False
+        self.poll_timer = QTimer()
+        self.poll_timer.setInterval(OUTPUT_POLL_INTERVAL)
+        self.poll_timer.timeout.connect(self._poll_outputs)
+
+    def start(self, audio_file_paths, output_dir):
+        """
+        まとめた文字起こしを開始する
+
+        Args:
+            audio_file_paths (list): 音声ファイルのパスのリスト（この順に処理する）
+            output_dir (str): faster-whisperの出力ディレクトリ
+        """
+        self.output_directory = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.results = {}
+        self.cache_keys = {}
+        self.cancelled = False
+        self.stop_reason = None
+        self.error_message = None
+        self.total_files = len(audio_file_paths)
+
+        jobs = []
+        for path in audio_file_paths:
+            key, cached = _lookup_cache(self.cache, path, output_dir)
+            if cached is not None:
+                self._finish_file(path, cached[0], cached[1], True)
+                continue
+            self.cache_keys[path] = key
+            jobs.append((path, get_duration(path, ffprobe_path)))
+
+        self.batches = plan_whisper_batches(jobs, self.max_files, self.max_seconds)
+        logger.info("まとめて文字起こし: %dファイルを%d回の実行で処理します", len(jobs), len(self.batches),
+                    extra={"stage": "transcribe_batch"})
+        self._start_next_batch()
+
+    def cancel(self):
+        """残りの実行を取り消し、実行中のプロセスを停止する"""
+        self.cancelled = True
+        self.batches = []
+        self.poll_timer.stop()
+        if self.process is not None and self.process.state() != QProcess.NotRunning:
+            kill_process_tree(int(self.process.processId()))
+            self.process.kill()
+
+    def _start_next_batch(self):
+        if self.cancelled or not self.batches:
+            self.poll_timer.stop()
+            self.progress_updated.emit(100, self.error_message or "文字起こし完了")
+            self.batch_finished.emit(self.results)
+            return
+
+        self.current_batch = self.batches.pop(0)
+        self.output_sizes = {}
+        self.process = QProcess()
+        self.process.setWorkingDirectory(self.whisper_path)
+        self.process.setProcessChannelMode(QProcess.MergedChannels)
+        # 出力はバッファに溜めない（ファイル単位の完了は出力ファイルで判定する）
+        self.process.readyReadStandardOutput.connect(lambda p=self.process: p.readAllStandardOutput())
+        self.process.finished.connect(self._on_batch_finished)
+        self._emit_progress()
+        clear_stale_outputs(self.current_batch, self.output_directory)
+        self.batch_started_at = time.time()
+        self.process.start(
+            os.path.join(self.whisper_path, WHISPER_EXE_NAME),
+            build_batch_arguments(self.current_batch, self.output_directory)
+        )
+        self.watchdog.watch(self.process)
+        self.poll_timer.start()
+
+    def _poll_outputs(self):
+        """SRTのサイズが前回の確認から変わっていなければ、そのファイルは書き終わったとみなす"""
+        for path in self.current_batch:
+            if path in self.results:
+                continue
+            srt_path = output_paths(path, self.output_directory)[0]
+            if not is_fresh_output(srt_path, self.batch_started_at):
+                continue
+            try:
+                size = os.path.getsize(srt_path)
+            except OSError:
+                continue
+            if self.output_sizes.get(path) == size:
+                self._finish_file(path, *collect_outputs(path, self.output_directory, since=self.batch_started_at))
+            else:
+                self.output_sizes[path] = size
+
+    def _on_batch_finished(self, exit_code, exit_status):
+        self.poll_timer.stop()
+        if self.watchdog.reason is not None and not self.cancelled:
+            # 停止・時間超過で終了させた場合も、出力が揃っているファイルは下で完了として扱う
+            self.stop_reason = self.watchdog.reason
+            self.error_message = describe_stop_reason(self.stop_reason)
+            logger.error("まとめた文字起こしを終了させました: %s", self.error_message, extra={"stage": "transcribe_batch"})
+        elif exit_code != 0:
+            logger.error("まとめた文字起こしが失敗しました (Code: %s)", exit_code, extra={"stage": "transcribe_batch"})
+        for path in self.current_batch:
+            if path not in self.results:
+                self._finish_file(path, *collect_outputs(path, self.output_directory, since=self.batch_started_at))
+        self.current_batch = []
+        self._start_next_batch()
+
+    def _finish_file(self, path, text, segments, success):
+        self.results[path] = {"text": text, "segments": segments, "success": success}
+        if success and self.cache_keys.get(path):
+            self.cache.put(self.cache_keys[path], text, segments)
+        logger.info("文字起こし%s: %dセグメント", "完了" if success else "失敗", len(segments),
+                    extra={"stage": "transcribe_batch", "file": path})
+        self.file_finished.emit(path, text, segments, success)
+        self._emit_progress()
+
+    def _emit_progress(self):
+        done = len(self.results)
+        progress = min(99, int(done / self.total_files * 100)) if self.total_files else 99
+        self.progress_updated.emit(progress, f"文字起こし中... {done}/{self.total_files}ファイル完了")
@@ -0,0 +1,131 @@
+"""
+faster-whisperの標準出力を行単位で解析し、進捗イベントに変換するパーサー (GUI非依存)
+
+QProcessからの読み込みは行の途中で分割されることがあるため、未完の行は次の入力まで保持する。
+"""
+
+import re
+from collections import namedtuple
+
+# タイムスタンプ行: start/end は秒、text はセグメント本文（本文のない形式では None）
+TimestampEvent = namedtuple("TimestampEvent", ["start", "end", "text"])
+# "segment X / Y" 形式のセグメントカウンタ
+SegmentCounterEvent = namedtuple("SegmentCounterEvent", ["current", "total"])
+# 処理フェーズを示すキーワード: progress は目安の進捗率、message は表示用メッセージ
+PhaseEvent = namedtuple("PhaseEvent", ["keyword", "progress", "message"])
+
+# キーワード -> (進捗率, メッセージ)
+PHASES = {
+    "transcribing": (10, "音声を処理中..."),
+    "detecting speakers": (50, "話者を検出中..."),
+    "saving": (80, "文字起こし結果を保存中..."),
+    "processing": (30, "音声を解析中..."),
+    "writing": (90, "ファイルに出力中..."),
+}
+
+# 行の種類ごとの文法（モジュール読み込み時に一度だけコンパイル）
+_BRACKET_RE = re.compile(
+    r"\[(?:(\d+):)?(\d+):(\d+(?:\.\d+)?)\s+-->\s+(?:(\d+):)?(\d+):(\d+(?:\.\d+)?)\]\s*(.*)"
+)  # [MM:SS.ms --> MM:SS.ms] 本文
+_ARROW_RE = re.compile(
+    r"(\d+):(\d+):(\d+(?:[.,]\d+)?)\s+-->\s+(\d+):(\d+):(\d+(?:[.,]\d+)?)"
+)  # HH:MM:SS(,ms|.ms) --> HH:MM:SS(,ms|.ms)
+_COUNTER_RE = re.compile(r"segment\s*(\d+)\s*/\s*(\d+)", re.IGNORECASE)  # segment X / Y
+_PHASE_RE = re.compile(r"transcribing|detecting speakers|saving|processing|writing", re.IGNORECASE)
+
+
+def _seconds(hours, minutes, seconds):
+    if hours is None:
+        return int(minutes) * 60 + float(seconds)
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def parse_line(line):
+    """
+    1行を解析してイベントに変換する
+
+    行頭の文字と区切り文字列で候補を絞り込み、各行につき原則1つの正規表現だけを照合する。
+    優先順位はタイムスタンプ > セグメントカウンタ > フェーズキーワード。
+
+    Args:
+        line (str): 標準出力の1行
+
+    Returns:
+        イベント（該当しない行の場合は None）
+    """
+    if "-->" in line:
+        match = _BRACKET_RE.match(line) if line[:1] == "[" else _BRACKET_RE.search(line)
+        if match:
+            sh, sm, ss, eh, em, es, text = match.groups()
+            return TimestampEvent(_seconds(sh, sm, ss), _seconds(eh, em, es), text.strip())
+        match = _ARROW_RE.search(line)
+        if match:
+            sh, sm, ss, eh, em, es = match.groups()
+            return TimestampEvent(
+                _seconds(sh, sm, ss.replace(',', '.')), _seconds(eh, em, es.replace(',', '.')), None
+            )
+
+    if "egment" in line or "EGMENT" in line:
+        match = _COUNTER_RE.search(line)
+        if match:
+            total = int(match.group(2))
+            if total > 0:
+                return SegmentCounterEvent(int(match.group(1)), total)
+
+    match = _PHASE_RE.search(line)
+    if match:
+        progress, message = PHASES[match.group(0).lower()]
+        return PhaseEvent(match.group(0).lower(), progress, message)
+    return None
+
+
+class WhisperOutputParser:
+    """行バッファ付きのインクリメンタルな出力パーサー"""
+
+    def __init__(self):
+        self.remainder = ""  # 改行で終わっていない途中の行
+
+    def reset(self):
+        """保持している途中の行を破棄する"""
+        self.remainder = ""
+
+    def feed(self, chunk):
+        """
+        受信した出力を解析する
+
+        Args:
+            chunk (str): QProcessなどから受信した出力（行の途中で切れていてもよい）
+
+        Returns:
+            list: 完結した行から得られたイベントのリスト
+        """
+        if not chunk:
+            return []
+        data = self.remainder + chunk
+        if "\r" in data:
+            data = data.replace("\r\n", "\n").replace("\r", "\n")
+        lines = data.split("\n")
+        self.remainder = lines.pop()
+        return self._parse_lines(lines)
+
+    def flush(self):
+        """
+        出力の終了時に途中の行も含めて解析する
+
+        Returns:
+            list: イベントのリスト
+        """
+        if not self.remainder:
+            return []
+        lines = [self.remainder]
+        self.remainder = ""
+        return self._parse_lines(lines)
+
+    def _parse_lines(self, lines):
+        events = []
+        for line in lines:
+            if line:
+                event = parse_line(line)
+                if event is not None:
+                    events.append(event)
+        return events
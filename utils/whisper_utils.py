@@ -3,17 +3,37 @@ Whisperを使用して音声から文字起こしを行うためのユーティ
 """
 
 import os
-import subprocess
-import json
 import tempfile
-from PyQt5.QtCore import QObject, pyqtSignal, QThread, QProcess, QTimer
+from PyQt5.QtCore import QObject, pyqtSignal, QThread, QTimer, QProcess
 from config.api_config import WHISPER_PATH
+from utils.transcription_cache import TranscriptionCache
+from utils.whisper_backends import SubprocessBackend, BackendWatchdog, WHISPER_EXE_NAME
+from utils.process_supervisor import run_supervised, describe_stop_reason, STOP_CANCELLED, ERROR_OUTPUT_TAIL_LINES
+from utils.whisper_progress import (
+    WhisperOutputParser, TimestampEvent, SegmentCounterEvent, PhaseEvent
+)
+from utils.media_probe import probe_media, get_duration as get_media_duration
+from utils.log_writer import AsyncLogWriter
+from utils.log_utils import get_logger
+from utils.subtitle_utils import write_srt_file, write_text_file
+from utils.subtitle_parser import parse_subtitle_file
+from utils.transcript_sidecar import write_sidecar, sidecar_path
+from utils.segment_index import SegmentIndex
+from utils.pcm_cache import get_pcm_cache
+from utils.job_scheduler import RESOURCE_TRANSCRIPTION, PRIORITY_NORMAL
+from utils.vad import (
+    build_detect_arguments, parse_silencedetect_output, speech_regions_from_silences,
+    is_worth_applying, write_select_filter, build_extract_arguments, OffsetMap
+)
+from utils.transcription_checkpoint import (
+    TranscriptionCheckpoint, get_checkpoint_dir, CHECKPOINT_INTERVAL_SECONDS, GAP_TOLERANCE_SECONDS
+)
 import threading
 from datetime import datetime
-import re
 import sys
 import time
-import traceback
+
+logger = get_logger(__name__)
 
 # スクリプトの場所に基づいて ffmpeg/ffprobe のパスを決定
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -22,11 +42,118 @@ ffmpeg_dir_name = "Faster-Whisper-XXL"
 
 ffmpeg_exe_name = "ffmpeg.exe"
 ffmpeg_path = os.path.join(project_root, ffmpeg_dir_name, ffmpeg_exe_name)
-print(f"使用するffmpegのパス: {ffmpeg_path}")
+logger.debug("使用するffmpegのパス: %s", ffmpeg_path)
 
 ffprobe_exe_name = "ffprobe.exe" # ffprobeの名前
 ffprobe_path = os.path.join(project_root, ffmpeg_dir_name, ffprobe_exe_name)
-print(f"使用するffprobeのパス: {ffprobe_path}")
+logger.debug("使用するffprobeのパス: %s", ffprobe_path)
+
+
+# 逐次セグメントをUIへまとめて送る間隔（ミリ秒）
+LIVE_SEGMENT_FLUSH_INTERVAL = 500
+
+
+def build_whisper_arguments(audio_file_path, output_dir, extra_args=None):
+    """
+    faster-whisper-xxlのコマンドライン引数を構築する
+
+    Args:
+        audio_file_path (str): 音声ファイルのパス
+        output_dir (str): 出力ディレクトリ
+        extra_args (list, optional): 追加の引数
+
+    Returns:
+        list: コマンドライン引数のリスト
+    """
+    arguments = [
+        "--language", "ja",
+        "--output_dir", output_dir,
+        "--output_format", "txt",  # 1つ目のフォーマット
+        "--output_format", "srt",  # 2つ目のフォーマット
+        "--verbose", "False",
+    ]
+    if extra_args:
+        arguments.extend(extra_args)
+    arguments.append(audio_file_path)
+    return arguments
+
+
+def transcribe_with_subprocess(audio_file_path, output_dir, whisper_path=None, cache=None, progress_callback=None,
+                               resident_worker=None, cancel_event=None):
+    """
+    faster-whisperをサブプロセスとして同期実行し、結果を返す (GUIを使わない処理向け)
+    
+    Args:
+        audio_file_path (str): 音声ファイルのパス
+        output_dir (str): faster-whisperの出力ディレクトリ
+        whisper_path (str, optional): faster-whisper-xxlのディレクトリ
+        cache (TranscriptionCache, optional): 文字起こしキャッシュ
+        progress_callback (callable, optional): (進捗値, メッセージ) を受け取る関数
+        resident_worker (ResidentWhisperWorker, optional): 指定時は常駐モデルのワーカーで実行する
+        cancel_event (threading.Event, optional): セットされたらプロセスツリーごと中止する
+        
+    Returns:
+        tuple: (テキスト, セグメントリスト, 成功フラグ)
+    """
+    def report(value, message):
+        if progress_callback:
+            progress_callback(value, message)
+    
+    whisper_path = whisper_path or WHISPER_PATH
+    os.makedirs(output_dir, exist_ok=True)
+    arguments = build_whisper_arguments(audio_file_path, output_dir)
+    
+    cache_key = None
+    if cache is not None:
+        key_arguments = arguments + (["backend=resident"] if resident_worker is not None else [])
+        cache_key = cache.make_key(audio_file_path, key_arguments)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            report(100, "文字起こし完了 (キャッシュ)")
+            return cached[0], cached[1], True
+    
+    report(0, "Whisperで文字起こし実行中...")
+    if resident_worker is not None:
+        result = resident_worker.transcribe(audio_file_path, output_dir, cancel_event=cancel_event)
+    else:
+        cmd = [os.path.join(whisper_path, WHISPER_EXE_NAME)] + arguments
+        logger.info("実行コマンド: %s", " ".join(cmd), extra={"stage": "transcribe", "file": audio_file_path})
+        result = run_supervised(
+            cmd,
+            cwd=whisper_path if os.path.isdir(whisper_path) else None,
+            cancel_event=cancel_event
+        )
+    if result.reason is not None:
+        message = describe_stop_reason(result.reason)
+        logger.error("%s", message, extra={"stage": "transcribe", "file": audio_file_path})
+        report(100, message)
+        return "", [], False
+    returncode = result.returncode
+    error_output = "".join(result.output.splitlines(True)[-ERROR_OUTPUT_TAIL_LINES:])
+    if returncode != 0:
+        logger.error("文字起こしに失敗しました (Code: %s):\n%s", returncode, error_output,
+                     extra={"stage": "transcribe", "file": audio_file_path})
+        report(100, "文字起こしに失敗しました")
+        return "", [], False
+    
+    basename = os.path.basename(audio_file_path).split('.')[0]
+    srt_path = os.path.join(output_dir, f"{basename}.srt")
+    txt_path = os.path.join(output_dir, f"{basename}.txt")
+    segments = parse_subtitle_file(srt_path) if os.path.exists(srt_path) else []
+    if os.path.exists(txt_path):
+        with open(txt_path, 'r', encoding='utf-8') as f:
+            full_text = f.read()
+    elif segments:
+        full_text = "".join(f"{seg['text'].strip()}\n" for seg in segments if seg['text'].strip())
+    else:
+        report(100, "文字起こし出力ファイルが見つかりません")
+        return "", [], False
+    
+    if cache_key:
+        cache.put(cache_key, full_text, segments)
+    report(100, "文字起こし完了")
+    return full_text, segments, True
+
 
 class WhisperTranscriber(QObject):
     """Whisperを使用して音声ファイルから文字起こしを行うクラス"""
@@ -34,70 +161,71 @@ class WhisperTranscriber(QObject):
     progress_updated = pyqtSignal(int, str)
     transcription_finished = pyqtSignal(str, list, bool)  # 文字起こし完了シグナル：(テキスト, セグメント, 成功フラグ)
     segment_updated = pyqtSignal(str)  # セグメント更新シグナル：現在処理中のセグメント情報を送信
+    segments_appended = pyqtSignal(list)  # 文字起こし中に確定したセグメントをまとめて送信
+    output_events = pyqtSignal(list)  # 標準出力から解析した進捗イベント (whisper_progressのイベント型)
+    batch_file_finished = pyqtSignal(str, str, list, bool)  # まとめた文字起こしの1ファイル完了：(音声ファイル, テキスト, セグメント, 成功フラグ)
+    batch_finished = pyqtSignal(dict)  # まとめた文字起こしの全ファイル完了：音声ファイル -> 結果
+    _prepared = pyqtSignal(int, object, object)  # ワーカースレッドでの準備の完了：(準備の番号, MediaInfo, DecodedAudio)
     
-    def __init__(self, whisper_path=None):
+    def __init__(self, whisper_path=None, cache=None, backend=None, pcm_cache=None):
         super().__init__()
         self.whisper_path = whisper_path or WHISPER_PATH
+        self.cache = cache if cache is not None else TranscriptionCache()
+        self.pcm_cache = pcm_cache if pcm_cache is not None else get_pcm_cache()
+        self.decoded_audio = None  # プレーヤーなどが既にデコードした16kHzモノラルPCM
+        self.cache_key = None  # 現在の文字起こしのキャッシュキー
         self.segments = []
+        self.segment_index = None  # get_segment_by_time() 用の区間インデックス
         self.speakers = []
-        self.process = None
+        self.subprocess_backend = SubprocessBackend(self.whisper_path)  # フォールバック用
+        self.subprocess_backend.output_received.connect(self.handle_stdout_data)
+        self.subprocess_backend.finished.connect(self.process_finished)
+        self.backend = None
+        self.set_backend(backend or self.subprocess_backend)
+        self.watchdog = BackendWatchdog()  # 実行中のバックエンドの停止・時間超過を監視する
+        self.stop_reason = None  # 直近の文字起こしを途中で終了させた理由 (process_supervisor.STOP_*)
+        self.error_message = None  # 直近の文字起こしが失敗した理由（画面に表示するメッセージ）
+        self.current_job = None  # (音声ファイル, 引数) フォールバック再実行用
+        self.fallback_used = False
         self.output_directory = None
         self.log_file = None
+        self.log_writer = None  # whisper_log.txt へのバックグラウンド書き込み
         self.current_segment = 0
         self.total_segments = 0
         self.audio_duration = 0  # 音声ファイルの総再生時間（秒）
         self.current_timestamp = 0  # 現在処理中の時間位置（秒）
+        self.process_start_time = None  # 文字起こし開始時刻
+        self.checkpoint = None  # 区間ごとの途中結果（中断後の再開用）
+        self.resume_offset = 0.0  # 今回の実行が元音声の何秒目から始まるか
+        self.checkpoint_position = 0.0  # チェックポイントに保存済みの位置（秒）
+        self.checkpoint_segments = []  # 次のチェックポイントに保存するセグメント
+        self.offset_map = None  # 無音除去した音声の時刻 -> 元音声の時刻
+        self.prepare_process = None  # 再開・無音除去のための前処理(ffmpeg)
+        self.run_output_directory = None  # 今回のWhisper実行の出力先
+        self.run_srt_filename = ""  # 今回のWhisper実行が出力するSRTファイル名
         self.last_progress_percent = 0  # 最後に報告された進捗率を保存
         self.expected_srt_filename = ""  # 期待されるSRTファイル名
+        self.parallel_transcriber = None  # 並列文字起こし用
+        self.batch_transcriber = None  # 複数ファイルをまとめた文字起こし用
+        self.cancelled = False  # cancel() で中止を要求された
+        self.prepare_serial = 0  # transcribe() ごとに増やす準備の番号（古い準備の結果を無視するため）
+        self.pending_request = None  # 準備の完了を待っている (番号, 音声ファイル, transcribe() の引数)
+        self._prepared.connect(self._on_prepared)
+        
+        # 文字起こし中の逐次セグメント
+        self.live_segments = []  # これまでに受信したセグメント
+        self.pending_live_segments = []  # UIへ未送信のセグメント
+        self.output_parser = WhisperOutputParser()  # 行の途中で分割された出力も扱えるパーサー
+        self.live_flush_timer = QTimer()
+        self.live_flush_timer.setInterval(LIVE_SEGMENT_FLUSH_INTERVAL)
+        self.live_flush_timer.timeout.connect(self.flush_live_segments)
         
     def get_audio_duration(self, file_path):
-        """ffprobeを使用して音声ファイルの長さを秒単位で取得する"""
-        if not os.path.exists(ffprobe_path):
-            print(f"ffprobeが見つかりません: {ffprobe_path}")
-            return 0
-        if not os.path.exists(file_path):
-            print(f"音声ファイルが見つかりません: {file_path}")
-            return 0
-
-        try:
-            ffprobe_cmd = [
-                ffprobe_path,
-                "-v", "error",
-                "-select_streams", "a:0", # 最初のオーディオストリームを選択
-                "-show_entries", "format=duration",
-                "-of", "json",
-                file_path
-            ]
-            print(f"ffprobeコマンド実行: {' '.join(ffprobe_cmd)}")
-            result = subprocess.run(ffprobe_cmd, capture_output=True, text=True, check=False, creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0)
-            
-            if result.returncode != 0:
-                print(f"ffprobe実行エラー (Code: {result.returncode}):\n{result.stderr}")
-                return 0
-
-            # JSON出力をパース
-            output_data = json.loads(result.stdout)
-            if "format" in output_data and "duration" in output_data["format"]:
-                duration = float(output_data["format"]["duration"])
-                print(f"ffprobeで取得したDuration: {duration:.3f}秒")
-                return duration
-            else:
-                print("ffprobeのJSON出力にDurationが含まれていません。")
-                print(f"ffprobe出力: {result.stdout}")
-                return 0
-                
-        except FileNotFoundError:
-            print(f"ffprobeの実行に失敗しました。パスを確認してください: {ffprobe_path}")
-            return 0
-        except json.JSONDecodeError:
-            print(f"ffprobeのJSON出力のパースに失敗しました:\n{result.stdout}")
-            return 0
-        except Exception as e:
-            print(f"音声長さの取得中に予期せぬエラー: {e}")
-            traceback.print_exc()
-            return 0
+        """音声ファイルの長さを秒単位で取得する（ヘッダー解析、できない場合はffprobe）"""
+        return get_media_duration(file_path, ffprobe_path)
 
-    def transcribe(self, audio_file_path, output_dir=None, diarize=True):
+    def transcribe(self, audio_file_path, output_dir=None, diarize=True, parallel=False, max_workers=None, use_cache=True,
+                   vad=False):
         """
         音声ファイルから文字起こしを行う
         
@@ -105,12 +233,24 @@ class WhisperTranscriber(QObject):
             audio_file_path (str): 音声ファイルのパス
             output_dir (str, optional): 出力ディレクトリ
             diarize (bool, optional): 話者分離を行うかどうか
+            parallel (bool, optional): 無音区間で分割して並列に文字起こしするかどうか
+            max_workers (int, optional): 並列時のワーカー数（未指定時はCPUコア数とメモリから決定）
+            use_cache (bool, optional): 同じ音声・引数の結果がキャッシュにあれば再利用するかどうか
+            vad (bool, optional): 無音区間を取り除いた音声で文字起こしするかどうか（逐次実行のみ）
         """
         # --- 処理開始時に必ずリセット --- 
+        self.cache_key = None
+        self.offset_map = None
+        self.cancelled = False
+        self.stop_reason = None
+        self.error_message = None
         self.last_progress_percent = 0 
         self.segments = [] # セグメントリストも初期化
         self.audio_duration = 0 # 音声長も初期化
         self.expected_srt_filename = "" # 期待ファイル名も初期化
+        self.live_segments = []
+        self.pending_live_segments = []
+        self.output_parser.reset()
         # ----------------------------------
 
         # プログレスバーをリセット (UI側への通知)
@@ -120,110 +260,80 @@ class WhisperTranscriber(QObject):
             self.progress_updated.emit(100, f"ファイルが見つかりません: {audio_file_path}")
             self.transcription_finished.emit("", [], False)
             return
-            
-        # 音声ファイルの長さを取得
+        
+        # 数GBの録音のハッシュ計算やffprobeでGUIスレッドを止めないよう、ワーカースレッドで準備してから続きを行う
+        self.prepare_serial += 1
+        self.pending_request = (self.prepare_serial, audio_file_path, dict(
+            output_dir=output_dir, diarize=diarize, parallel=parallel, max_workers=max_workers,
+            use_cache=use_cache, vad=vad
+        ))
+        threading.Thread(target=self._prepare, args=(self.prepare_serial, audio_file_path),
+                         name="transcribe-prepare", daemon=True).start()
+    
+    def _prepare(self, serial, audio_file_path):
+        """
+        ワーカースレッドで音声のダイジェスト・長さ・デコード済みのPCMを求めておく
+        
+        文字起こしキャッシュとPCMキャッシュは同じ索引を共有するため、ここで一度計算すれば以降はどちらも再計算しない。
+        長さはヘッダーから分からない場合にffprobeを使う。結果は準備の番号を付けてGUIスレッドに渡す。
+        """
+        info = None
+        decoded = None
         try:
-            # mutagenライブラリを使用して音声ファイルのメタデータを取得
-            try:
-                # まずmutagenが利用可能か確認
-                try:
-                    import mutagen
-                    print(f"【デバッグ】mutagenライブラリが利用可能です")
-                except ImportError:
-                    # mutagenがインストールされていなければインストールを試みる
-                    self.progress_updated.emit(1, "音声解析ライブラリをインストール中...")
-                    print("【デバッグ】mutagenライブラリをインストールします...")
-                    import subprocess
-                    try:
-                        subprocess.check_call(["pip", "install", "mutagen"])
-                        print("【デバッグ】mutagenライブラリのインストールに成功しました")
-                        import mutagen
-                    except Exception as install_error:
-                        print(f"【デバッグ】mutagenインストールエラー: {str(install_error)}")
-                        raise ImportError("mutagenのインストールに失敗しました")
-                        
-                from mutagen.mp3 import MP3
-                from mutagen.wave import WAVE
-                from mutagen.flac import FLAC
-                from mutagen.mp4 import MP4
-                
-                file_ext = os.path.splitext(audio_file_path)[1].lower()
-                print(f"【デバッグ】ファイル拡張子: {file_ext}")
-                
-                # ファイルサイズを表示
-                file_size = os.path.getsize(audio_file_path)
-                print(f"【デバッグ】ファイルサイズ: {file_size} バイト ({file_size/1024/1024:.2f} MB)")
-                
-                # ファイル形式に応じて適切なクラスを使用
-                if file_ext == '.mp3':
-                    print(f"【デバッグ】MP3形式を検出")
-                    audio = MP3(audio_file_path)
-                    self.audio_duration = audio.info.length
-                elif file_ext == '.wav':
-                    print(f"【デバッグ】WAV形式を検出")
-                    audio = WAVE(audio_file_path)
-                    self.audio_duration = audio.info.length
-                elif file_ext == '.flac':
-                    print(f"【デバッグ】FLAC形式を検出")
-                    audio = FLAC(audio_file_path)
-                    self.audio_duration = audio.info.length
-                elif file_ext in ['.m4a', '.mp4', '.aac']:
-                    print(f"【デバッグ】M4A/MP4/AAC形式を検出")
-                    audio = MP4(audio_file_path)
-                    self.audio_duration = audio.info.length
-                else:
-                    print(f"【デバッグ】汎用フォーマットとして処理")
-                    # その他の形式はgenericで試す
-                    audio = mutagen.File(audio_file_path)
-                    if audio and hasattr(audio.info, 'length'):
-                        self.audio_duration = audio.info.length
-                    else:
-                        raise Exception(f"未対応の音声形式: {file_ext}")
-                
-                print(f"【デバッグ】mutagen使用: 音声ファイルの長さ: {self.audio_duration}秒 ({self.format_time(self.audio_duration)})")
-                
-            except ImportError as ie:
-                # mutagenのインストールや利用ができない場合
-                print(f"【デバッグ】mutagenエラー: {str(ie)}")
-                raise Exception("音声ファイルの解析に必要なライブラリが利用できません")
-                
-        except Exception as e:
-            print(f"【デバッグ】メタデータ取得エラー: {str(e)}")
-            
-            # 代替手段：ファイルサイズから音声長を推定
-            file_size = os.path.getsize(audio_file_path)
-            print(f"【デバッグ】ファイルサイズからの推定: {file_size} バイト")
-            
-            # ファイル拡張子を取得
-            file_ext = os.path.splitext(audio_file_path)[1].lower()
-            
-            # 形式別のビットレート推定（バイト/秒）
-            if file_ext == '.mp3':
-                bytes_per_second = 16000  # 128kbps想定
-                print(f"【デバッグ】MP3形式: 128kbps想定 ({bytes_per_second} バイト/秒)")
-            elif file_ext == '.wav':
-                bytes_per_second = 176400  # 44.1kHz, 16bit, ステレオ想定
-                print(f"【デバッグ】WAV形式: 44.1kHz, 16bit, ステレオ想定 ({bytes_per_second} バイト/秒)")
-            elif file_ext in ['.m4a', '.aac']:
-                bytes_per_second = 20000  # 160kbps想定
-                print(f"【デバッグ】M4A/AAC形式: 160kbps想定 ({bytes_per_second} バイト/秒)")
-            elif file_ext == '.flac':
-                bytes_per_second = 88200  # ロスレス圧縮、平均的な値
-                print(f"【デバッグ】FLAC形式: ロスレス圧縮 ({bytes_per_second} バイト/秒)")
-            else:
-                bytes_per_second = 16000  # デフォルト値（128kbps相当）
-                print(f"【デバッグ】不明な形式: デフォルト128kbps想定 ({bytes_per_second} バイト/秒)")
+            self.pcm_cache.digest_index.digest(audio_file_path)
+        except OSError as e:
+            logger.warning("音声のハッシュを計算できませんでした: %s", e, extra={"stage": "cache", "file": audio_file_path})
+        try:
+            info = probe_media(audio_file_path, ffprobe_path)
+            # 再生用などに既にデコード済みであれば、以降の切り出し・無音検出・文字起こしはそのPCMを使う
+            decoded = self.pcm_cache.lookup(audio_file_path)
+        except Exception:
+            logger.exception("文字起こしの準備中にエラーが発生しました", extra={"stage": "probe", "file": audio_file_path})
+        self._prepared.emit(serial, info, decoded)
+    
+    def _on_prepared(self, serial, info, decoded):
+        """準備が終わったら、GUIスレッドで文字起こしの続きを行う（取り消された・新しい依頼がある場合は何もしない）"""
+        if self.pending_request is None or self.pending_request[0] != serial:
+            if decoded is not None:
+                decoded.close()
+            return
+        _, audio_file_path, request = self.pending_request
+        self.pending_request = None
+        self._transcribe_prepared(audio_file_path, info, decoded, **request)
+    
+    def _transcribe_prepared(self, audio_file_path, info, decoded, output_dir=None, diarize=True, parallel=False,
+                             max_workers=None, use_cache=True, vad=False):
+        """
+        transcribe() の準備が終わった後の処理
+        
+        Args:
+            audio_file_path (str): 音声ファイルのパス
+            info (MediaInfo): 音声の長さなど（取得できなかった場合は None）
+            decoded (DecodedAudio): デコード済みのPCM（キャッシュにない場合は None）
+        """
+        if self.decoded_audio is not None:
+            self.decoded_audio.close()
+        self.decoded_audio = decoded
+        
+        # キャッシュに同じ音声・引数の結果があれば即座に返す
+        if use_cache and self.load_from_cache(audio_file_path, parallel=parallel, vad=vad):
+            return
             
-            # 推定長さ（秒）を計算
-            estimated_duration = file_size / bytes_per_second
-            self.audio_duration = max(estimated_duration, 60)  # 最低でも60秒と仮定
-            print(f"【デバッグ】推定音声長: {self.audio_duration}秒 ({self.format_time(self.audio_duration)})")
+        if info:
+            self.audio_duration = info.duration
+            logger.info("音声ファイルの長さ: %.3f秒 (%s)", self.audio_duration, info.source,
+                        extra={"stage": "probe", "file": audio_file_path})
+        
+        if self.decoded_audio is not None:
+            logger.info("デコード済みのPCMを使用します: %s", self.decoded_audio.path,
+                        extra={"stage": "decode", "file": audio_file_path})
+            if self.audio_duration <= 0:
+                self.audio_duration = self.decoded_audio.duration
         
         # 現在の処理位置をリセット
         self.current_timestamp = 0
         
         # 進捗計算に使用する変数を初期化
-        self.last_progress_time = datetime.now()
         self.process_start_time = datetime.now()
         
         # プロジェクトディレクトリ内にlogsフォルダを作成
@@ -240,189 +350,652 @@ class WhisperTranscriber(QObject):
         
         # 期待されるSRTファイル名を生成 (拡張子を除くファイル名 + .srt)
         self.expected_srt_filename = f"{basename}.srt"
-        print(f"【デバッグ】期待されるSRTファイル名: {self.expected_srt_filename}")
+        logger.debug("期待されるSRTファイル名: %s", self.expected_srt_filename)
+        
+        # 前回中断した文字起こしのチェックポイントがあれば引き継ぐ
+        self.checkpoint = TranscriptionCheckpoint(
+            get_checkpoint_dir(self.output_directory, audio_file_path),
+            audio_file_path, self.get_key_arguments(audio_file_path, parallel=parallel, vad=vad)
+        )
+        try:
+            resumed = self.checkpoint.open()
+        except OSError as e:
+            logger.warning("チェックポイントを利用できません: %s", e, extra={"stage": "checkpoint", "file": audio_file_path})
+            self.checkpoint = None
+            resumed = False
+        
+        if parallel:
+            self.transcribe_parallel(audio_file_path, max_workers)
+            return
+        
+        # 逐次実行では先頭から途切れずに処理済みの位置から再開する
+        self.resume_offset = self.checkpoint.resume_point() if resumed else 0.0
+        if self.resume_offset > 0 and self.decoded_audio is None and not os.path.exists(ffmpeg_path):
+            logger.warning("ffmpegが見つからないため、チェックポイントを使わずに最初から処理します")
+            self.checkpoint.clear()
+            self.checkpoint.open()
+            self.resume_offset = 0.0
+        if resumed:
+            self.checkpoint.discard_after(self.resume_offset)
+        self.checkpoint_position = self.resume_offset
+        self.checkpoint_segments = []
+        
+        if self.resume_offset > 0:
+            # 処理済みの区間はすぐに表示し、残りの区間だけを文字起こしする
+            restored = self.checkpoint.assemble()
+            self.live_segments = list(restored)
+            self.segments_appended.emit(restored)
+            logger.info("チェックポイントから再開します: %.1f秒から", self.resume_offset,
+                        extra={"stage": "checkpoint", "file": audio_file_path})
+            if 0 < self.audio_duration <= self.resume_offset + GAP_TOLERANCE_SECONDS:
+                self.finish_from_checkpoint([])
+                return
+            self.extract_resume_audio(audio_file_path)
+            return
         
-        # Whisperコマンドの構築
-        whisper_exe = os.path.join(self.whisper_path, "faster-whisper-xxl.exe")
+        if vad:
+            if self.checkpoint is None or self.audio_duration <= 0 or not os.path.exists(ffmpeg_path):
+                logger.warning("音声長またはffmpegが不明なため、無音除去を行わずに文字起こしします")
+            else:
+                self.run_vad(audio_file_path)
+                return
         
-        # QProcessを設定
-        self.process = QProcess()
-        self.process.setWorkingDirectory(self.whisper_path)
+        if self.decoded_audio is not None and self.checkpoint is not None:
+            # 出力ファイル名が元の音声と異なるため、チェックポイント経由で元の名前のSRT/TXTを出力する
+            self.start_whisper(self.decoded_audio.path, self.checkpoint.checkpoint_dir)
+            return
+        self.start_whisper(audio_file_path, self.output_directory)
         
-        # プロセスのバッファリングモードを設定
-        self.process.setProcessChannelMode(QProcess.MergedChannels)
+    def submit_transcription(self, scheduler, audio_file_path, priority=PRIORITY_NORMAL, on_done=None, **kwargs):
+        """
+        文字起こしをスケジューラの文字起こし枠に投入する（前の文字起こしが終わるまで待ってから開始する）
         
-        # シグナル接続
-        self.process.readyReadStandardOutput.connect(self.handle_stdout)
-        self.process.readyReadStandardError.connect(self.handle_stderr)
-        self.process.finished.connect(self.process_finished)
+        Args:
+            scheduler (JobScheduler): ジョブスケジューラ
+            audio_file_path (str): 音声ファイルのパス
+            priority (int, optional): 優先度
+            on_done (callable, optional): 終了時に job を受け取る関数
+            **kwargs: transcribe() に渡す引数
+            
+        Returns:
+            Job: 結果が (テキスト, セグメント, 成功フラグ) になるジョブ。取り消すと実行中の処理を中止する
+        """
+        def start(job):
+            def on_finished(text, segments, success):
+                self.transcription_finished.disconnect(on_finished)
+                job.finish((text, segments, success))
+            self.transcription_finished.connect(on_finished)
+            self.transcribe(audio_file_path, **kwargs)
+        
+        return scheduler.submit_async(
+            start, resource=RESOURCE_TRANSCRIPTION, priority=priority,
+            name=os.path.basename(audio_file_path), on_done=on_done, on_cancel=lambda job: self.cancel()
+        )
+        
+    def cancel(self):
+        """実行中の文字起こしを中止する（受信済みのセグメントはチェックポイントに残る）"""
+        self.cancelled = True
+        self.stop_reason = STOP_CANCELLED
+        if self.pending_request is not None:
+            # ハッシュ計算などの準備中（計算結果は索引に残るため次回は速い）
+            self.pending_request = None
+            self.progress_updated.emit(0, "文字起こしを中止しました")
+            self.transcription_finished.emit("", [], False)
+            return
+        if self.parallel_transcriber is not None and not self.parallel_transcriber.finished_emitted:
+            self.parallel_transcriber.cancel(notify=True)
+            return
+        if self.batch_transcriber is not None:
+            self.batch_transcriber.cancel()
+        if self.prepare_process is not None and self.prepare_process.state() != QProcess.NotRunning:
+            # 前処理の終了後に start_whisper() で中止を扱う
+            self.prepare_process.kill()
+            return
+        self.watchdog.stop(STOP_CANCELLED)
+        
+    def get_key_arguments(self, audio_file_path, parallel=False, vad=False):
+        """
+        キャッシュ・チェックポイントの判定に使う引数リストを返す
+        
+        バックエンド・並列処理・無音除去によって結果（区切り方や時刻）が異なるため、既定以外の場合はキーに含める。
+        既定の処理のキーは transcribe_with_subprocess() のキーと同じになる。
+        """
+        key_arguments = build_whisper_arguments(audio_file_path, "")
+        if self.backend is not self.subprocess_backend:
+            key_arguments.append(f"backend={self.backend.name}")
+        if parallel:
+            key_arguments.append("parallel=1")
+        if vad:
+            key_arguments.append("vad=1")
+        return key_arguments
+        
+    def extract_resume_audio(self, audio_file_path):
+        """再開位置以降の音声を切り出してから文字起こしを開始する"""
+        resume_wav = os.path.join(self.checkpoint.checkpoint_dir, f"resume_{int(self.resume_offset * 1000):010d}.wav")
+        self.progress_updated.emit(1, f"{self.format_time(self.resume_offset)} から再開します...")
+        
+        def on_extracted(exit_code, exit_status):
+            if self.cancelled or (exit_code == 0 and os.path.exists(resume_wav)):
+                self.start_whisper(resume_wav, self.checkpoint.checkpoint_dir)
+                return
+            logger.warning("再開用の音声の切り出しに失敗しました (Code: %s)。最初から処理します", exit_code)
+            self.checkpoint.clear()
+            self.checkpoint.open()
+            self.resume_offset = 0.0
+            self.checkpoint_position = 0.0
+            self.start_whisper(audio_file_path, self.output_directory)
+        
+        if self.decoded_audio is not None:
+            # デコード済みのPCMから切り出す（元の音声を再デコードしない）
+            try:
+                self.decoded_audio.write_wav(resume_wav, [(self.resume_offset, None)])
+                on_extracted(0, 0)
+            except OSError as e:
+                logger.warning("再開用の音声の書き出しに失敗しました: %s", e)
+                on_extracted(1, 0)
+            return
+        
+        self.prepare_process = QProcess()
+        self.prepare_process.setProcessChannelMode(QProcess.MergedChannels)
+        self.prepare_process.finished.connect(on_extracted)
+        self.prepare_process.start(ffmpeg_path, [
+            "-hide_banner", "-loglevel", "error",
+            "-ss", f"{self.resume_offset:.3f}",
+            "-i", audio_file_path,
+            "-vn", "-ac", "1", "-ar", "16000",
+            "-y", resume_wav,
+        ])
+        
+    def run_vad(self, audio_file_path):
+        """発話区間を検出し、発話だけをつなげた音声で文字起こしを開始する"""
+        self.progress_updated.emit(1, "発話区間を検出中...")
+        detect_output = []
+        source_path = self.decoded_audio.path if self.decoded_audio is not None else audio_file_path
+        
+        def on_extracted(regions, speech_wav, exit_code):
+            if exit_code == 0 and os.path.exists(speech_wav):
+                self.offset_map = OffsetMap(regions)
+                logger.info("無音除去: %.1f秒 -> %.1f秒", self.audio_duration, self.offset_map.speech_duration,
+                            extra={"stage": "vad", "file": audio_file_path})
+                self.start_whisper(speech_wav, self.checkpoint.checkpoint_dir)
+            else:
+                logger.warning("発話区間の切り出しに失敗しました (Code: %s)。元の音声で文字起こしします", exit_code)
+                self.start_whisper(audio_file_path, self.output_directory)
+        
+        def on_detected(exit_code, exit_status):
+            regions = None
+            if exit_code == 0:
+                silences = parse_silencedetect_output("".join(detect_output), self.audio_duration)
+                regions = speech_regions_from_silences(silences, self.audio_duration)
+            if not regions or not is_worth_applying(regions, self.audio_duration):
+                logger.info("取り除ける無音が少ないため、元の音声で文字起こしします", extra={"stage": "vad", "file": audio_file_path})
+                self.start_whisper(audio_file_path, self.output_directory)
+                return
+            
+            self.progress_updated.emit(2, "発話区間を切り出し中...")
+            speech_wav = os.path.join(self.checkpoint.checkpoint_dir, "speech.wav")
+            if self.decoded_audio is not None:
+                # デコード済みのPCMから発話区間をつなげて書き出す（ffmpegを使わない）
+                try:
+                    self.decoded_audio.write_wav(speech_wav, regions)
+                    on_extracted(regions, speech_wav, 0)
+                except OSError as e:
+                    logger.warning("発話区間の書き出しに失敗しました: %s", e)
+                    on_extracted(regions, speech_wav, 1)
+                return
+            filter_path = f"{speech_wav}.filter.txt"
+            write_select_filter(regions, filter_path)
+            self.prepare_process = QProcess()
+            self.prepare_process.setProcessChannelMode(QProcess.MergedChannels)
+            self.prepare_process.finished.connect(
+                lambda code, status: on_extracted(regions, speech_wav, code)
+            )
+            self.prepare_process.start(ffmpeg_path, build_extract_arguments(audio_file_path, filter_path, speech_wav))
+        
+        self.prepare_process = QProcess()
+        self.prepare_process.setProcessChannelMode(QProcess.MergedChannels)
+        self.prepare_process.readyReadStandardOutput.connect(
+            lambda p=self.prepare_process: detect_output.append(bytes(p.readAllStandardOutput()).decode('utf-8', errors='ignore'))
+        )
+        self.prepare_process.finished.connect(on_detected)
+        self.prepare_process.start(ffmpeg_path, build_detect_arguments(source_path))
+        
+    def to_original_time(self, seconds, is_end=False):
+        """
+        今回のWhisper実行での時刻を元音声の時刻に変換する（無音除去・途中再開の分を戻す）
+        
+        Args:
+            seconds (float): Whisperが出力した時刻（秒）
+            is_end (bool, optional): セグメントの終了時刻として扱うかどうか
+        """
+        if self.offset_map is not None:
+            return self.offset_map.to_original(seconds, is_end)
+        return seconds + self.resume_offset
+        
+    def start_whisper(self, input_path, run_output_dir):
+        """
+        Whisperの実行を開始する
+        
+        Args:
+            input_path (str): 文字起こしする音声（再開時は切り出した残りの区間）
+            run_output_dir (str): Whisperの出力先
+        """
+        if self.cancelled:
+            self.stop_reason = STOP_CANCELLED
+            self.progress_updated.emit(100, describe_stop_reason(STOP_CANCELLED))
+            self.transcription_finished.emit("", [], False)
+            return
+        
+        self.run_output_directory = run_output_dir
+        self.run_srt_filename = f"{os.path.basename(input_path).split('.')[0]}.srt"
         
         # コマンドライン引数
-        program = whisper_exe
-        arguments = [
-            "--language", "ja",
-            "--output_dir", self.output_directory,
-            "--output_format", "txt",  # 1つ目のフォーマット
-            "--output_format", "srt",  # 2つ目のフォーマット
-            "--verbose", "False",
-            audio_file_path
-        ]
-        
-        # デバッグ用にコマンドを出力
-        print(f"実行コマンド: {program} {' '.join(arguments)}")
+        program = os.path.join(self.whisper_path, WHISPER_EXE_NAME)
+        arguments = build_whisper_arguments(input_path, run_output_dir)
         
         # ログファイルのパス設定を追加
         self.log_file = os.path.join(self.output_directory, "whisper_log.txt")
         
-        # ログファイルを初期化
-        with open(self.log_file, "w", encoding="utf-8") as f:
-            f.write(f"実行コマンド: {program} {' '.join(arguments)}\n\n")
-            f.write(f"開始時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write(f"推定音声長: {self.audio_duration}秒\n\n")
+        # ログファイルを初期化（書き込みはバックグラウンドスレッドで行う）
+        self.close_log_writer()
+        self.log_writer = AsyncLogWriter(self.log_file, compress=True)
+        self.log_writer.write(
+            f"実行コマンド: {program} {' '.join(arguments)}\n\n"
+            f"バックエンド: {self.backend.name}\n\n"
+            f"開始時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+            f"推定音声長: {self.audio_duration}秒\n\n"
+            f"再開位置: {self.resume_offset}秒\n\n"
+        )
         
         # 文字起こし実行
         self.progress_updated.emit(0, "Whisperで文字起こし実行中...")
-        self.process.start(program, arguments)
+        self.current_job = (input_path, arguments)
+        self.fallback_used = False
+        backend = self.backend if self.backend.is_available() else self.subprocess_backend
+        self.active_backend = backend
+        backend.start(input_path, run_output_dir, arguments)
+        
+        # 終了は finished シグナルで受け取り、出力が止まった場合や制限時間を超えた場合は監視側で終了させる
+        self.watchdog.watch(backend)
+        
+    def set_backend(self, backend):
+        """
+        文字起こしバックエンドを切り替える
+        
+        Args:
+            backend (TranscriptionBackend): 使用するバックエンド（サブプロセス方式は常にフォールバックとして接続済み）
+        """
+        if self.backend is not None and self.backend is not self.subprocess_backend:
+            self.backend.output_received.disconnect(self.handle_stdout_data)
+            self.backend.finished.disconnect(self.process_finished)
+        self.backend = backend
+        self.active_backend = backend
+        if backend is not self.subprocess_backend:
+            backend.output_received.connect(self.handle_stdout_data)
+            backend.finished.connect(self.process_finished)
+        
+    def load_from_cache(self, audio_file_path, parallel=False, vad=False):
+        """
+        キャッシュから文字起こし結果を読み込む
+        
+        Args:
+            audio_file_path (str): 音声ファイルのパス
+            parallel (bool, optional): 並列処理の結果を探すかどうか
+            vad (bool, optional): 無音除去した音声の結果を探すかどうか
+            
+        Returns:
+            bool: キャッシュヒットした場合はTrue
+        """
+        if self.cache is None:
+            return False
+        try:
+            self.progress_updated.emit(0, "キャッシュを確認中...")
+            self.cache_key = self.cache.make_key(
+                audio_file_path, self.get_key_arguments(audio_file_path, parallel=parallel, vad=vad)
+            )
+            cached = self.cache.get(self.cache_key)
+        except Exception as e:
+            logger.warning("キャッシュの確認に失敗しました: %s", e, extra={"stage": "cache", "file": audio_file_path})
+            self.cache_key = None
+            return False
+        
+        if cached is None:
+            return False
+        
+        full_text, segments = cached
+        logger.info("キャッシュヒット: %dセグメント", len(segments), extra={"stage": "cache", "file": audio_file_path})
+        self.segments = segments
+        self.progress_updated.emit(100, "文字起こし完了 (キャッシュ)")
+        self.transcription_finished.emit(full_text, segments, True)
+        return True
+        
+    def store_to_cache(self, full_text, segments):
+        """文字起こし結果をキャッシュに保存する"""
+        if self.cache is None or not self.cache_key:
+            return
+        self.cache.put(self.cache_key, full_text, segments)
+        
+    def get_cache_stats(self):
+        """
+        キャッシュの統計情報を取得する
+        
+        Returns:
+            dict: 統計情報（キャッシュ無効時は空の辞書）
+        """
+        return self.cache.stats() if self.cache is not None else {}
+        
+    def transcribe_parallel(self, audio_file_path, max_workers=None):
+        """
+        音声を無音区間で分割し、複数プロセスで並列に文字起こしする
+        
+        Args:
+            audio_file_path (str): 音声ファイルのパス
+            max_workers (int, optional): 同時実行ワーカー数
+        """
+        from utils.parallel_transcription import ParallelTranscriber
+        
+        if self.parallel_transcriber is not None:
+            self.parallel_transcriber.cancel()
+        
+        self.parallel_transcriber = ParallelTranscriber(self.whisper_path, self.parse_srt_file, max_workers)
+        self.parallel_transcriber.progress_updated.connect(self.progress_updated.emit)
+        self.parallel_transcriber.transcription_finished.connect(self._on_parallel_finished)
+        self.parallel_transcriber.start(audio_file_path, self.output_directory, self.audio_duration, self.checkpoint,
+                                        self.decoded_audio)
+        
+    def transcribe_batch(self, audio_file_paths, output_dir=None, use_cache=True, max_files=None, max_seconds=None):
+        """
+        複数の音声ファイルを少数のfaster-whisper実行にまとめて文字起こしする
+        
+        ファイルごとの完了は batch_file_finished、全体の完了は batch_finished で通知する。
+        
+        Args:
+            audio_file_paths (list): 音声ファイルのパスのリスト
+            output_dir (str, optional): 出力ディレクトリ
+            use_cache (bool, optional): キャッシュにある結果を再利用するかどうか
+            max_files (int, optional): 1回の実行に含める最大ファイル数
+            max_seconds (float, optional): 1回の実行に含める合計音声長の上限（秒）
+        """
+        from utils.whisper_batch import WhisperBatchTranscriber
+        from config.api_config import WHISPER_BATCH_MAX_FILES, WHISPER_BATCH_MAX_SECONDS
+        
+        if self.batch_transcriber is not None:
+            self.batch_transcriber.cancel()
+        self.stop_reason = None
+        self.error_message = None
+        
+        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output_dir = output_dir or os.path.join(project_dir, "logs", "transcription_output")
+        self.batch_transcriber = WhisperBatchTranscriber(
+            self.whisper_path,
+            cache=self.cache if use_cache else None,
+            max_files=max_files or WHISPER_BATCH_MAX_FILES,
+            max_seconds=max_seconds or WHISPER_BATCH_MAX_SECONDS,
+        )
+        self.batch_transcriber.progress_updated.connect(self.progress_updated.emit)
+        self.batch_transcriber.file_finished.connect(self.batch_file_finished.emit)
+        self.batch_transcriber.batch_finished.connect(self._on_batch_finished)
+        self.batch_transcriber.start(list(audio_file_paths), output_dir)
 
-        # プロセスが起動しているか確認する定期チェック
-        self.process_check_timer = QTimer()
-        self.process_check_timer.timeout.connect(self.check_process_status)
-        self.process_check_timer.start(1000)  # 1秒ごとに状態をチェック
-        
-    def handle_stdout(self):
-        """QProcessからの標準出力シグナルハンドラ"""
-        data = self.process.readAllStandardOutput()
-        if data:
-            stdout = bytes(data).decode('utf-8', errors='ignore')
-            print(f"プロセス出力: {stdout}")  # デバッグ用に出力内容を表示
-            self.handle_stdout_data(stdout)
+    def _on_batch_finished(self, results):
+        """まとめた文字起こし完了時の処理（停止・時間超過で終了させた実行があれば理由を残す）"""
+        if self.batch_transcriber is not None and self.batch_transcriber.stop_reason is not None:
+            self.stop_reason = self.batch_transcriber.stop_reason
+            self.error_message = self.batch_transcriber.error_message
+        self.batch_finished.emit(results)
+        
+    def _on_parallel_finished(self, text, segments, success):
+        """並列文字起こし完了時の処理"""
+        self.segments = segments
+        if success:
+            self.store_to_cache(text, segments)
+            if self.checkpoint is not None:
+                self.checkpoint.clear()
+        elif self.parallel_transcriber is not None and self.parallel_transcriber.stop_reason is not None:
+            # チャンクを停止・時間超過で終了させた場合は、単一プロセス実行と同じく理由を残す
+            self.stop_reason = self.parallel_transcriber.stop_reason
+            self.error_message = describe_stop_reason(self.stop_reason)
+        self.transcription_finished.emit(text, segments, success)
         
     def handle_stdout_data(self, stdout):
         """標準出力データの実際の処理"""
         # ログファイルに出力を保存
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(f"出力: {stdout}\n")
-        
-        # デバッグ出力
-        print(f"【デバッグ】受信した出力: {stdout[:100]}...")
+        if self.log_writer is not None:
+            self.log_writer.write(f"出力: {stdout}\n")
         
-        # タイムスタンプが含まれている可能性が高いかどうかを判断
-        contains_timestamp = "-->" in stdout or ":" in stdout
-        if contains_timestamp:
-            print(f"【デバッグ】タイムスタンプの可能性あり（':'または'-->'を検出）")
-            
-        # タイムスタンプ情報の検出を優先（この情報が最も信頼性が高い）
-        if contains_timestamp and self.extract_timestamp_progress(stdout):
-            # タイムスタンプが見つかったので、このイベントは処理済み
-            print(f"【デバッグ】タイムスタンプ情報から進捗更新完了")
-            self.segment_updated.emit(stdout)
-            return
-                
-        # セグメント情報の検出をタイムスタンプの次に優先
-        if "segment" in stdout.lower():
-            print(f"【デバッグ】セグメント情報を検出")
-            if self.extract_segment_info(stdout):
-                # セグメント情報が見つかったので、このイベントは処理済み
-                print(f"【デバッグ】セグメント情報から進捗更新完了")
-                self.segment_updated.emit(stdout)
-                return
-            else:
-                print(f"【デバッグ】セグメント情報の解析に失敗")
-            
-        # その他のキーワードに基づく進捗の更新
-        if "Transcribing" in stdout:
-            print(f"【デバッグ】キーワード「Transcribing」を検出: 進捗10%")
-            self.progress_updated.emit(10, "音声を処理中...")
-        elif "Detecting speakers" in stdout:
-            print(f"【デバッグ】キーワード「Detecting speakers」を検出: 進捗50%")
-            self.progress_updated.emit(50, "話者を検出中...")
-        elif "Saving" in stdout:
-            print(f"【デバッグ】キーワード「Saving」を検出: 進捗80%")
-            self.progress_updated.emit(80, "文字起こし結果を保存中...")
-        elif "Processing" in stdout:
-            print(f"【デバッグ】キーワード「Processing」を検出: 進捗30%")
-            self.progress_updated.emit(30, "音声を解析中...")
-        elif "Writing" in stdout:
-            print(f"【デバッグ】キーワード「Writing」を検出: 進捗90%")
-            self.progress_updated.emit(90, "ファイルに出力中...")
+        events = self.output_parser.feed(stdout)
+        self.handle_output_events(events)
             
         # 全ての出力をセグメント情報として送信
         self.segment_updated.emit(stdout)
         
-    def handle_stderr(self):
-        """エラー出力を処理"""
-        data = self.process.readAllStandardError()
-        if data:
-            stderr = bytes(data).decode('utf-8', errors='ignore')
-            print(f"Whisperエラー: {stderr}")
-            
-            # ログファイルにエラー出力を保存
-            with open(self.log_file, "a", encoding="utf-8") as f:
-                f.write(f"エラー: {stderr}\n")
-                
-            # エラー出力に進捗情報が含まれる場合もあるため、標準出力と同様に処理
-            self.handle_stdout_data(stderr)
-    
+    def handle_output_events(self, events):
+        """
+        パーサーが生成したイベントから進捗と逐次セグメントを更新する
+        
+        Args:
+            events (list): whisper_progressのイベントのリスト
+        """
+        if not events:
+            return
+        
+        latest_timestamp_sec = -1
+        last_counter = None
+        last_phase = None
+        for event in events:
+            if isinstance(event, TimestampEvent):
+                latest_timestamp_sec = max(latest_timestamp_sec, event.end)
+                if event.text is not None:
+                    # 確定したセグメント行を逐次セグメントとして収集（再開時は元音声の時間軸に戻す）
+                    segment = {
+                        'start': self.to_original_time(event.start),
+                        'end': self.to_original_time(event.end, is_end=True),
+                        'text': event.text,
+                    }
+                    self.live_segments.append(segment)
+                    self.pending_live_segments.append(segment)
+                    self.checkpoint_segments.append(segment)
+            elif isinstance(event, SegmentCounterEvent):
+                last_counter = event
+            elif isinstance(event, PhaseEvent):
+                last_phase = event
+        
+        if self.pending_live_segments and not self.live_flush_timer.isActive():
+            self.live_flush_timer.start()
+        self.save_checkpoint()
+        
+        # タイムスタンプ情報を優先（この情報が最も信頼性が高い）、次にセグメント情報、最後にキーワード
+        if latest_timestamp_sec >= 0:
+            self.update_timestamp_progress(self.to_original_time(latest_timestamp_sec, is_end=True))
+        elif last_counter is not None:
+            self.update_segment_progress(last_counter.current, last_counter.total)
+        elif last_phase is not None:
+            # 進捗率が後戻りしないように、既に進んでいる場合はメッセージのみ更新
+            progress = max(self.last_progress_percent, last_phase.progress)
+            self.progress_updated.emit(progress, last_phase.message)
+        
+        self.output_events.emit(events)
+        
+    def save_checkpoint(self, force=False):
+        """
+        受信済みの逐次セグメントをチェックポイントとして保存する
+        
+        Args:
+            force (bool, optional): Trueの場合は保存間隔に達していなくても保存する（中断時など）
+        """
+        if self.checkpoint is None or not self.checkpoint_segments:
+            return
+        end = self.checkpoint_segments[-1]['end']
+        if not force and end - self.checkpoint_position < CHECKPOINT_INTERVAL_SECONDS:
+            return
+        try:
+            self.checkpoint.save_unit(self.checkpoint_position, end, self.checkpoint_segments)
+        except OSError as e:
+            logger.warning("チェックポイントの保存に失敗しました: %s", e)
+            return
+        self.checkpoint_position = end
+        self.checkpoint_segments = []
+        
+    def finish_from_checkpoint(self, run_segments):
+        """
+        今回の実行結果をチェックポイントに加え、全区間を結合して最終的なSRT/TXTを出力する
+        
+        Args:
+            run_segments (list): 今回の実行で得たセグメント（元音声の時間軸）
+        """
+        if run_segments:
+            # 今回の実行中に保存した途中経過は、確定したSRTの内容で置き換える
+            self.checkpoint.discard_after(self.resume_offset)
+            end = max(self.audio_duration, run_segments[-1]['end'])
+            self.checkpoint.save_unit(self.resume_offset, end, run_segments)
+        segments = self.checkpoint.assemble()
+        srt_path = os.path.join(self.output_directory, self.expected_srt_filename)
+        txt_path = os.path.join(self.output_directory, f"{os.path.splitext(self.expected_srt_filename)[0]}.txt")
+        write_srt_file(srt_path, segments)
+        full_text = write_text_file(txt_path, segments)
+        write_sidecar(sidecar_path(srt_path), segments, srt_path)
+        self.checkpoint.clear()
+        
+        self.segments = segments
+        self.store_to_cache(full_text, segments)
+        self.progress_updated.emit(100, "文字起こし完了")
+        self.transcription_finished.emit(full_text, segments, True)
+        
+    def flush_live_segments(self):
+        """溜まった逐次セグメントをまとめてシグナルで送信する"""
+        if not self.pending_live_segments:
+            self.live_flush_timer.stop()
+            return
+        batch = self.pending_live_segments
+        self.pending_live_segments = []
+        self.segments_appended.emit(batch)
+        
+    def close_log_writer(self):
+        """ログライターに残った出力を書き出して閉じる"""
+        if self.log_writer is not None:
+            self.log_writer.close()
+            self.log_writer = None
+        
     def process_finished(self, exit_code, exit_status):
         """プロセス終了時の処理"""
-        print(f"文字起こし処理が終了しました: 終了コード={exit_code}, 終了ステータス={exit_status}")
+        elapsed = (datetime.now() - self.process_start_time).total_seconds() if self.process_start_time else None
+        logger.info("文字起こし処理が終了しました: 終了コード=%s, 終了ステータス=%s", exit_code, exit_status,
+                    extra={"stage": "transcribe", "file": self.current_job[0] if self.current_job else None, "elapsed": elapsed})
         
-        # プロセス監視タイマーを停止
-        if hasattr(self, 'process_check_timer') and self.process_check_timer.isActive():
-            self.process_check_timer.stop()
+        # 常駐モデルが失敗した場合は従来のサブプロセス方式で再実行する（監視側で終了させた場合を除く）
+        if (exit_code != 0 and self.active_backend.supports_fallback and self.watchdog.reason is None
+                and not self.cancelled and not self.fallback_used and self.current_job is not None):
+            logger.warning("%sバックエンドが失敗したため、サブプロセス方式で再実行します", self.active_backend.name)
+            self.fallback_used = True
+            self.active_backend = self.subprocess_backend
+            self.live_segments = []
+            self.pending_live_segments = []
+            self.output_parser.reset()
+            # 失敗した実行で保存した途中経過は使わない
+            if self.checkpoint is not None:
+                self.checkpoint.discard_after(self.resume_offset)
+            self.checkpoint_position = self.resume_offset
+            self.checkpoint_segments = []
+            self.progress_updated.emit(0, "サブプロセス方式で再実行中...")
+            audio_file_path, arguments = self.current_job
+            self.subprocess_backend.start(audio_file_path, self.run_output_directory, arguments)
+            self.watchdog.watch(self.subprocess_backend)
+            return
+        
+        # 未送信の逐次セグメントを送り切る（最終結果はこの後SRTから確定させる）
+        self.handle_output_events(self.output_parser.flush())
+        self.flush_live_segments()
+        self.live_flush_timer.stop()
+        
+        # ログファイルに終了情報を追加して閉じる
+        if self.log_writer is not None:
+            self.log_writer.write(
+                f"\n終了時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                f"終了コード: {exit_code}\n"
+                f"終了ステータス: {exit_status}\n\n"
+            )
+        self.close_log_writer()
         
-        # ログファイルに終了情報を追加
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(f"\n終了時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"終了コード: {exit_code}\n")
-            f.write(f"終了ステータス: {exit_status}\n\n")
+        if self.watchdog.reason is not None:
+            # 中止・停止・時間超過で終了させた場合は、受信済みのセグメントを保存して理由を通知する
+            self.stop_reason = self.watchdog.reason
+            message = describe_stop_reason(self.stop_reason)
+            self.save_checkpoint(force=True)
+            if self.checkpoint is not None and self.checkpoint_position > 0:
+                message += f"\n{self.format_time(self.checkpoint_position)} までの結果を保存しました。再実行すると続きから処理します"
+            self.progress_updated.emit(100, message)
+            if self.stop_reason != STOP_CANCELLED:
+                self.error_message = message
+            self.transcription_finished.emit("", [], False)
+            return
         
         try:
             # 出力ディレクトリが存在するか確認
             if not os.path.exists(self.output_directory):
-                print(f"出力ディレクトリが見つかりません: {self.output_directory}")
+                logger.error("出力ディレクトリが見つかりません: %s", self.output_directory)
                 self.progress_updated.emit(100, "出力ディレクトリが見つかりません")
                 self.transcription_finished.emit("", [], False)
                 return
             
             # 期待されるSRTファイルのフルパスを構築
-            expected_srt_path = os.path.join(self.output_directory, self.expected_srt_filename)
-            print(f"【デバッグ】確認するSRTファイルパス: {expected_srt_path}")
+            expected_srt_path = os.path.join(self.run_output_directory, self.run_srt_filename)
+            logger.debug("確認するSRTファイルパス: %s", expected_srt_path)
             
             # 期待されるSRTファイルが存在するか確認
-            if os.path.exists(expected_srt_path):
-                print("【デバッグ】期待されるSRTファイルが見つかりました。これを解析します。")
+            if (os.path.exists(expected_srt_path) and self.checkpoint is not None
+                    and self.run_output_directory != self.output_directory):
+                # 途中再開・無音除去・デコード済みPCMで実行した場合は元音声の時間軸に戻し、保存済みの区間と結合して出力する
+                segments = [
+                    {
+                        'start': self.to_original_time(s['start']),
+                        'end': self.to_original_time(s['end'], is_end=True),
+                        'text': s['text'],
+                    }
+                    for s in self.parse_srt_file(expected_srt_path)
+                ]
+                self.finish_from_checkpoint(segments)
+                
+            elif os.path.exists(expected_srt_path):
+                logger.debug("期待されるSRTファイルが見つかりました。これを解析します。")
                 segments = self.parse_srt_file(expected_srt_path)
                 self.segments = segments
+                write_sidecar(sidecar_path(expected_srt_path), segments, expected_srt_path)
                 
                 # テキスト出力 (SRTから生成または別途TXTファイルを読む)
                 # まずTXTファイルを探す (SRTより優先する場合)
-                expected_txt_filename = f"{os.path.splitext(self.expected_srt_filename)[0]}.txt"
-                expected_txt_path = os.path.join(self.output_directory, expected_txt_filename)
+                expected_txt_filename = f"{os.path.splitext(self.run_srt_filename)[0]}.txt"
+                expected_txt_path = os.path.join(self.run_output_directory, expected_txt_filename)
                 full_text = ""
                 if os.path.exists(expected_txt_path):
-                    print("【デバッグ】対応するTXTファイルが見つかりました。")
+                    logger.debug("対応するTXTファイルが見つかりました。")
                     with open(expected_txt_path, 'r', encoding='utf-8') as f:
                         full_text = f.read()
                 else:
-                    print("【デバッグ】対応するTXTファイルが見つかりません。SRTからテキストを生成します。")
+                    logger.debug("対応するTXTファイルが見つかりません。SRTからテキストを生成します。")
                     for segment in segments:
                         text = segment.get('text', '').strip()
                         if text:
                             full_text += f"{text}\n"
                 
+                self.store_to_cache(full_text, segments)
+                if self.checkpoint is not None:
+                    self.checkpoint.clear()
                 self.progress_updated.emit(100, "文字起こし完了")
                 self.transcription_finished.emit(full_text, segments, True)
                 
             else:
                 # 期待されるSRTがない場合、エラーとして処理
                 error_msg = f"期待されるSRTファイルが見つかりません: {expected_srt_path}"
-                print(error_msg)
+                logger.error(error_msg)
+                # 受信済みのセグメントを保存し、次回はその続きから処理できるようにする
+                self.save_checkpoint(force=True)
+                if self.checkpoint is not None and self.checkpoint_position > 0:
+                    error_msg += f"\n{self.format_time(self.checkpoint_position)} までの結果を保存しました。再実行すると続きから処理します"
                 # 念のためTXTファイルだけでも存在するか確認する
-                expected_txt_filename = f"{os.path.splitext(self.expected_srt_filename)[0]}.txt"
-                expected_txt_path = os.path.join(self.output_directory, expected_txt_filename)
+                expected_txt_filename = f"{os.path.splitext(self.run_srt_filename)[0]}.txt"
+                expected_txt_path = os.path.join(self.run_output_directory, expected_txt_filename)
                 if os.path.exists(expected_txt_path):
-                    print("【デバッグ】TXTファイルは見つかりました。SRTなしで完了します。")
+                    logger.info("TXTファイルは見つかりました。SRTなしで完了します。")
                     with open(expected_txt_path, 'r', encoding='utf-8') as f:
                         full_text = f.read()
                     self.progress_updated.emit(100, "文字起こし完了 (SRTなし)")
@@ -431,59 +1004,14 @@ class WhisperTranscriber(QObject):
                     self.progress_updated.emit(100, error_msg)
                     self.transcription_finished.emit("", [], False)
             
-        except Exception as e:
-            traceback.print_exc()
+        except Exception:
+            logger.exception("結果処理中にエラーが発生しました")
             self.progress_updated.emit(100, "結果処理中にエラーが発生しました")
             self.transcription_finished.emit("", [], False)
     
     def parse_srt_file(self, srt_file_path):
         """SRTファイルを解析してセグメントリストを生成"""
-        segments = []
-        
-        try:
-            with open(srt_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # SRTの形式: 番号、時間範囲、テキスト、空行の繰り返し
-            entries = content.strip().split('\n\n')
-            
-            for entry in entries:
-                lines = entry.split('\n')
-                if len(lines) >= 3:
-                    # 時間範囲の解析
-                    time_range = lines[1]
-                    start_time, end_time = self._parse_srt_time_range(time_range)
-                    
-                    # テキスト部分（3行目以降を全て結合）
-                    text = ' '.join(lines[2:])
-                    
-                    # セグメント情報を構築
-                    segment = {
-                        'start': start_time,
-                        'end': end_time,
-                        'text': text,
-                    }
-                    segments.append(segment)
-                    
-            return segments
-        except Exception as e:
-            print(f"SRTファイル解析エラー: {str(e)}")
-            return []
-    
-    def _parse_srt_time_range(self, time_range):
-        """SRTの時間範囲文字列をパース"""
-        try:
-            start_str, end_str = time_range.split(' --> ')
-            
-            # 時間文字列をパース (時:分:秒,ミリ秒)
-            def parse_time(time_str):
-                hours, minutes, seconds = time_str.replace(',', '.').split(':')
-                return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
-                
-            return parse_time(start_str), parse_time(end_str)
-        except Exception as e:
-            print(f"時間範囲パースエラー: {str(e)}")
-            return 0, 0
+        return parse_subtitle_file(srt_file_path)
 
     def get_segment_by_time(self, time_seconds):
         """
@@ -495,115 +1023,39 @@ class WhisperTranscriber(QObject):
         Returns:
             dict: セグメント情報
         """
-        for segment in self.segments:
-            start = segment.get('start', 0)
-            end = segment.get('end', 0)
-            if start <= time_seconds <= end:
-                return segment
-        return None 
-
-    def extract_segment_info(self, stdout):
-        """出力からセグメント情報を抽出して進捗を更新"""
-        # "Processing segment X / Y"のようなフォーマットを探す
-        if "segment" in stdout.lower():
-            try:
-                parts = stdout.split("segment")[1].strip().split("/")
-                if len(parts) == 2:
-                    current = int(parts[0].strip())
-                    total = int(parts[1].strip().split()[0])
-                    
-                    self.current_segment = current
-                    self.total_segments = total
-                    
-                    # 進捗率を計算 (0%〜99%の範囲で)
-                    progress = int(99 * current / total)
-                    print(f"【デバッグ】セグメント進捗計算: current={current}, total={total}, progress={progress}%")
-                    self.progress_updated.emit(progress, f"文字起こし中... セグメント {current}/{total}")
-                    return True
-            except Exception as e:
-                print(f"セグメント情報抽出エラー: {str(e)}")
-        
-        return False
-
-    def extract_timestamp_progress(self, stdout):
-        """Whisperの出力からタイムスタンプを抽出して進捗状況を更新する"""
-        if not stdout or len(stdout.strip()) == 0:
-            return False
-
-        cleaned_stdout = stdout.strip()
-        # print(f"[DBG_TSP] Input: {cleaned_stdout[:100]}...") # 入力ログ
-
-        # 正規表現パターン (前回修正済み)
-        patterns = [
-            r"\[(\d+):(\d+)\.(\d+)\s+-->\s+(\d+):(\d+)\.(\d+)\]", # [MM:SS.ms --> MM:SS.ms]
-            r"(\d+):(\d+):(\d+),(\d+)\s+-->\s+(\d+):(\d+):(\d+),(\d+)", # HH:MM:SS,ms --> HH:MM:SS,ms
-            r"(\d+):(\d+):(\d+)\.(\d+)\s+-->\s+(\d+):(\d+):(\d+)\.(\d+)", # HH:MM:SS.ms --> HH:MM:SS.ms
-            r"(\d+):(\d+):(\d+)\s+-->\s+(\d+):(\d+):(\d+)", # HH:MM:SS --> HH:MM:SS
-        ]
-
-        latest_timestamp_sec = -1
-
-        for line_num, line in enumerate(cleaned_stdout.splitlines()):
-            # print(f"[DBG_TSP] Processing line {line_num}: {line[:80]}...") # 行処理ログ
-            matched_in_line = False
-            for idx, pattern in enumerate(patterns):
-                # print(f"[DBG_TSP] Trying pattern {idx}...") # パターン試行ログ
-                match = re.search(pattern, line)
-                if match:
-                    print(f"[DBG_TSP] Pattern {idx} MATCHED on line {line_num}: {line}") # マッチログ
-                    try:
-                        groups = match.groups()
-                        print(f"[DBG_TSP]   Groups: {groups}") # グループログ
-                        end_sec = 0
-                        # ... (パターンに応じた終了時間の計算 - 変更なし)
-                        if idx == 0: # [MM:SS.ms --> MM:SS.ms]
-                            end_min, end_s, end_ms = int(groups[3]), int(groups[4]), int(groups[5])
-                            end_sec = end_min * 60 + end_s + end_ms / 1000.0
-                        elif idx == 1: # HH:MM:SS,ms --> HH:MM:SS,ms
-                            end_h, end_min, end_s, end_ms = int(groups[4]), int(groups[5]), int(groups[6]), int(groups[7])
-                            end_sec = end_h * 3600 + end_min * 60 + end_s + end_ms / 1000.0
-                        elif idx == 2: # HH:MM:SS.ms --> HH:MM:SS.ms
-                            end_h, end_min, end_s, end_ms = int(groups[4]), int(groups[5]), int(groups[6]), int(groups[7])
-                            end_sec = end_h * 3600 + end_min * 60 + end_s + end_ms / 1000.0
-                        elif idx == 3: # HH:MM:SS --> HH:MM:SS
-                            end_h, end_min, end_s = int(groups[3]), int(groups[4]), int(groups[5])
-                            end_sec = end_h * 3600 + end_min * 60 + end_s
-                        
-                        print(f"[DBG_TSP]   Calculated end_sec: {end_sec:.3f}") # 計算結果ログ
-                        latest_timestamp_sec = max(latest_timestamp_sec, end_sec)
-                        matched_in_line = True
-                        break # マッチしたので次の行へ
-                    except Exception as e:
-                        print(f"[DBG_TSP]   Timestamp parsing ERROR (Pattern {idx}): {e} - Match: {groups}")
-                        continue
-                # else: print(f"[DBG_TSP] Pattern {idx} NO MATCH") # マッチしなかった場合
-
-        # 全行チェック後の進捗計算とシグナル発行
-        # print(f"[DBG_TSP] Final latest_timestamp_sec: {latest_timestamp_sec:.3f}, Audio duration: {self.audio_duration:.3f}")
-        if latest_timestamp_sec >= 0 and self.audio_duration > 0:
-            # 現在の進捗率を計算
-            current_progress = int((latest_timestamp_sec / self.audio_duration) * 100)
-            # 表示する進捗率（前回より減らないように、99%上限）
-            display_progress = max(self.last_progress_percent, min(current_progress, 99))
-            # print(f"[DBG_TSP] Calculated progress: {current_progress}%, Display progress: {display_progress}%, Last progress: {self.last_progress_percent}%")
-
-            # 前回より進捗率（整数）が増えた場合のみ last_progress_percent を更新
-            if display_progress > self.last_progress_percent:
-                self.last_progress_percent = display_progress
-
-            # === 変更点: タイムスタンプが見つかれば必ずシグナルを発行 ===
-            duration_str = self.format_time(self.audio_duration)
-            time_str = self.format_time(latest_timestamp_sec)
-            print(f"【進捗シグナル発行】現在位置: {latest_timestamp_sec:.2f}秒 / {self.audio_duration:.2f}秒 ({display_progress}%)")
-            self.progress_updated.emit(display_progress, f"文字起こし中... {time_str}/{duration_str} ({display_progress}%)")
-            return True # タイムスタンプ処理完了
+        # セグメントリストが差し替えられた場合だけインデックスを作り直す
+        if self.segment_index is None or self.segment_index.source is not self.segments:
+            self.segment_index = SegmentIndex(self.segments)
+        else:
+            self.segment_index.refresh()
+        index = self.segment_index.find(time_seconds)
+        return self.segments[index] if index is not None else None
 
-        elif latest_timestamp_sec >= 0:
-             print("[DBG_TSP] Timestamp found but audio duration is zero or negative.")
-             return True # タイムスタンプは見つかった
+    def update_segment_progress(self, current, total):
+        """セグメントカウンタ (X / Y) から進捗を更新"""
+        self.current_segment = current
+        self.total_segments = total
+        
+        # 進捗率を計算 (0%〜99%の範囲で)
+        progress = int(99 * current / total)
+        self.progress_updated.emit(progress, f"文字起こし中... セグメント {current}/{total}")
 
-        # print("[DBG_TSP] No timestamp patterns matched in the input.")
-        return False
+    def update_timestamp_progress(self, latest_timestamp_sec):
+        """処理済みのタイムスタンプ（秒）から進捗状況を更新する"""
+        self.current_timestamp = latest_timestamp_sec
+        
+        if self.audio_duration <= 0:
+            return
+        
+        # 現在の進捗率を計算
+        current_progress = int((latest_timestamp_sec / self.audio_duration) * 100)
+        # 表示する進捗率（前回より減らないように、99%上限）
+        display_progress = max(self.last_progress_percent, min(current_progress, 99))
+        self.last_progress_percent = display_progress
+        
+        duration_str = self.format_time(self.audio_duration)
+        time_str = self.format_time(latest_timestamp_sec)
+        self.progress_updated.emit(display_progress, f"文字起こし中... {time_str}/{duration_str} ({display_progress}%)")
         
     def format_time(self, seconds):
         """秒数を [HH:]MM:SS 形式にフォーマット"""
@@ -616,91 +1068,6 @@ class WhisperTranscriber(QObject):
         else:
             return f"{minutes:02d}:{secs:02d}"
 
-    def check_process_status(self):
-        """プロセスの状態をチェック"""
-        current_state = self.process.state()
-        print(f"【デバッグ】プロセス状態チェック: state={current_state}（0=未実行、1=開始中、2=実行中）")
-        
-        if current_state == QProcess.NotRunning:
-            # プロセスが実行されていない場合
-            print(f"【デバッグ】プロセスが実行されていません。終了処理を実行します。")
-            self.process_check_timer.stop()
-            self.process_finished(self.process.exitCode(), self.process.exitStatus())
-        else:
-            # プロセスが実行中の場合のみ、状態を確認
-            print(f"【デバッグ】プロセスが実行中です: audio_duration={self.audio_duration}秒, current_timestamp={self.current_timestamp}秒")
-            
-            # 最低でも5秒に1回は進捗情報を更新
-            time_since_last_update = (datetime.now() - self.last_progress_time).total_seconds()
-            print(f"【デバッグ】最終更新からの経過時間: {time_since_last_update}秒")
-            
-            if time_since_last_update >= 5:
-                self.last_progress_time = datetime.now()
-                elapsed_seconds = (datetime.now() - self.process_start_time).total_seconds()
-                print(f"【デバッグ】プロセス開始からの経過時間: {elapsed_seconds}秒")
-                
-                # 現在のタイムスタンプ情報から進捗メッセージを表示
-                if self.current_timestamp > 0:
-                    time_str = self.format_time(self.current_timestamp)
-                    print(f"【デバッグ】現在のタイムスタンプ: {time_str}")
-                    
-                    if self.audio_duration > 0:
-                        duration_str = self.format_time(self.audio_duration)
-                        progress_percent = min(int((self.current_timestamp / self.audio_duration) * 100), 99)
-                        self.last_progress_percent = progress_percent  # 進捗率を保存
-                        print(f"【デバッグ】進捗計算: {self.current_timestamp}/{self.audio_duration} = {progress_percent}%")
-                        self.progress_updated.emit(progress_percent, f"文字起こし中... {time_str}/{duration_str} ({progress_percent}%)")
-                    else:
-                        # 音声長が不明な場合は前回の進捗率を維持
-                        print(f"【デバッグ】音声長不明のため進捗率を前回値に維持")
-                        self.progress_updated.emit(self.last_progress_percent, f"文字起こし中... 現在位置 {time_str}")
-                else:
-                    # タイムスタンプが検出されていない場合は経過時間のみ表示（進捗率は更新しない）
-                    elapsed_time_str = self.format_time(elapsed_seconds)
-                    if self.last_progress_percent > 0:
-                        # 過去に進捗があれば、それを維持
-                        print(f"【デバッグ】タイムスタンプ未検出だが前回の進捗率を維持: {self.last_progress_percent}%")
-                        self.progress_updated.emit(self.last_progress_percent, f"文字起こし中... (経過時間 {elapsed_time_str})")
-                    else:
-                        # 初期状態では進捗率は更新せず、経過時間のみ表示
-                        print(f"【デバッグ】タイムスタンプ未検出：進捗率更新なし")
-                        self.progress_updated.emit(0, f"文字起こしを実行中... 経過時間 {elapsed_time_str}")
-            
-            # プロセスが実行中の場合、出力ディレクトリ内のファイルを確認
-            try:
-                if os.path.exists(self.output_directory):
-                    # ログファイルのサイズを確認
-                    if os.path.exists(self.log_file):
-                        log_size = os.path.getsize(self.log_file)
-                        # ログファイルが大きくなっていれば処理が進行中と判断
-                        if hasattr(self, 'last_log_size'):
-                            size_diff = log_size - self.last_log_size
-                            print(f"【デバッグ】ログファイルサイズ変化: {self.last_log_size} -> {log_size} ({size_diff:+d} bytes)")
-                            if size_diff > 0:
-                                print(f"【デバッグ】ログファイルが更新されています: {log_size} bytes")
-                        else:
-                            print(f"【デバッグ】ログファイルサイズ初期値: {log_size} bytes")
-                        self.last_log_size = log_size
-                
-                # 外部コマンドでプロセスが実行中か確認（Windowsの場合）
-                if os.name == 'nt' and (datetime.now() - self.process_start_time).total_seconds() > 30:
-                    # プロセス開始から30秒以上経過している場合のみチェック
-                    import subprocess
-                    try:
-                        # tasklist実行
-                        print(f"【デバッグ】tasklist実行でプロセス確認を試行")
-                        result = subprocess.run(['tasklist', '/FI', 'IMAGENAME eq faster-whisper-xxl.exe'], 
-                                              capture_output=True, text=True, check=False)
-                        if 'faster-whisper-xxl.exe' not in result.stdout:
-                            print(f"【デバッグ】faster-whisper-xxl.exeプロセスが見つかりません")
-                            # プロセスが存在しない場合でも正常に動作している場合があるため、エラーにはしない
-                        else:
-                            print(f"【デバッグ】faster-whisper-xxl.exeプロセスが実行中です")
-                    except Exception as e:
-                        print(f"【デバッグ】プロセス確認エラー: {str(e)}")
-            except Exception as e:
-                print(f"【デバッグ】プロセス状態確認エラー: {str(e)}")
-
 # トランスクリプションスレッドクラスを追加
 class TranscriptionThread(QThread):
     """文字起こしを実行するスレッド"""
@@ -709,12 +1076,13 @@ class TranscriptionThread(QThread):
     finished = pyqtSignal(str, list, bool)  # (文字起こし結果, セグメント, 成功フラグ)
     progress = pyqtSignal(int, str)  # (進捗値, メッセージ)
     
-    def __init__(self, whisper_path, audio_file_path, output_dir, diarize=True):
+    def __init__(self, whisper_path, audio_file_path, output_dir, diarize=True, cache=None):
         super().__init__()
         self.whisper_path = whisper_path
         self.audio_file_path = audio_file_path
         self.output_dir = output_dir
         self.diarize = diarize
+        self.cache = cache
     
     def run(self):
         """スレッドで実行される処理"""
@@ -735,21 +1103,24 @@ class TranscriptionThread(QThread):
             output_txt = os.path.join(temp_dir, f"{basename}.txt")
             
             # Whisperコマンドの構築
-            whisper_exe = os.path.join(self.whisper_path, "faster-whisper-xxl.exe")
+            whisper_exe = os.path.join(self.whisper_path, WHISPER_EXE_NAME)
             
             # コマンドライン引数
-            cmd = [
-                whisper_exe,
-                "--language", "ja",
-                "--output_dir", temp_dir,
-                "--output_format", "txt",  # 1つ目のフォーマット
-                "--output_format", "srt",  # 2つ目のフォーマット
-                "--verbose", "False",
-                self.audio_file_path
-            ]
+            cmd = [whisper_exe] + build_whisper_arguments(self.audio_file_path, temp_dir)
+            
+            # キャッシュに同じ音声・引数の結果があれば即座に返す
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(self.audio_file_path, cmd[1:])
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    full_text, segments = cached
+                    self.progress.emit(90, "文字起こし完了 (キャッシュ)")
+                    self.finished.emit(full_text, segments, True)
+                    return
             
             # デバッグ用にコマンドを出力
-            print(f"実行コマンド: {' '.join(cmd)}")
+            logger.info("実行コマンド: %s", " ".join(cmd), extra={"stage": "transcribe", "file": self.audio_file_path})
             
             # Whisper実行
             self.progress.emit(20, "Whisperで文字起こし実行中...")
@@ -763,9 +1134,9 @@ class TranscriptionThread(QThread):
             )
             
             # 実行結果を出力
-            print(f"標準出力:\n{process.stdout}")
-            print(f"エラー出力:\n{process.stderr}")
-            print(f"終了コード: {process.returncode}")
+            logger.debug("標準出力:\n%s", process.stdout)
+            logger.debug("エラー出力:\n%s", process.stderr)
+            logger.info("終了コード: %s", process.returncode, extra={"stage": "transcribe", "file": self.audio_file_path})
             
             # エラーチェック
             if process.returncode != 0:
@@ -777,41 +1148,19 @@ class TranscriptionThread(QThread):
             
             # 出力ディレクトリ内のファイルをリスト
             output_files = os.listdir(temp_dir)
-            print(f"出力ディレクトリ内ファイル: {', '.join(output_files)}")
+            logger.debug("出力ディレクトリ内ファイル: %s", ", ".join(output_files))
             
             # SRTファイルを探す
             srt_files = [f for f in output_files if f.endswith(".srt")]
             if srt_files:
                 srt_file = os.path.join(temp_dir, srt_files[0])
                 
-                # SRTファイルを解析（実装は親クラスに依存するので、ここでは簡易版）
-                segments = []
-                full_text = ""
-                
-                with open(srt_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                # SRTの形式: 番号、時間範囲、テキスト、空行の繰り返し
-                entries = content.strip().split('\n\n')
+                # SRTファイルを解析
+                segments = parse_subtitle_file(srt_file)
+                full_text = "".join(f"{segment['text']}\n" for segment in segments)
                 
-                for entry in entries:
-                    lines = entry.split('\n')
-                    if len(lines) >= 3:
-                        # 時間範囲の解析
-                        time_range = lines[1]
-                        start_time, end_time = self._parse_srt_time_range(time_range)
-                        
-                        # テキスト部分（3行目以降を全て結合）
-                        text = ' '.join(lines[2:])
-                        
-                        # セグメント情報を構築
-                        segment = {
-                            'start': start_time,
-                            'end': end_time,
-                            'text': text,
-                        }
-                        segments.append(segment)
-                        full_text += f"{text}\n"
+                if cache_key:
+                    self.cache.put(cache_key, full_text, segments)
                 
                 self.progress.emit(90, "文字起こし完了")
                 self.finished.emit(full_text, segments, True)
@@ -829,21 +1178,6 @@ class TranscriptionThread(QThread):
                 self.finished.emit("", [], False)
                 
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("文字起こしスレッドでエラーが発生しました")
             self.progress.emit(100, f"エラー: {str(e)}")
             self.finished.emit("", [], False)
-    
-    def _parse_srt_time_range(self, time_range):
-        """SRTの時間範囲文字列をパース"""
-        try:
-            start_str, end_str = time_range.split(' --> ')
-            
-            # 時間文字列をパース (時:分:秒,ミリ秒)
-            def parse_time(time_str):
-                hours, minutes, seconds = time_str.replace(',', '.').split(':')
-                return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
-                
-            return parse_time(start_str), parse_time(end_str)
-        except Exception as e:
-            print(f"時間範囲パースエラー: {str(e)}")
-            return 0, 0 
\ No newline at end of file